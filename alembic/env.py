@@ -18,6 +18,9 @@ import models.clients  # noqa
 import models.plaques  # noqa
 import models.orders  # noqa
 import models.production  # noqa
+import models.sequences  # noqa
+import models.schema_state  # noqa
+import models.search  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
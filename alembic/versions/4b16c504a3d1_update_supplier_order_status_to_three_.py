@@ -8,8 +8,8 @@ Create Date: 2025-08-13
 from __future__ import annotations
 revision = '4b16c504a3d1'
 down_revision = 'c3f5a1b8d4e6'
-branch_labels = 'None'
-depends_on = 'None'
+branch_labels = None
+depends_on = None
 
 from alembic import op
 import sqlalchemy as sa
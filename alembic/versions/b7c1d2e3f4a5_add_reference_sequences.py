@@ -0,0 +1,70 @@
+"""Add reference_sequences table (atomic per-prefix reference counters)
+
+Revision ID: b7c1d2e3f4a5
+Revises: a1b2c3d4e6f7, aa11bb22cc33
+Create Date: 2026-10-16 09:00:00.000000
+
+Also merges the two existing heads. Each sequence is backfilled with the
+highest PPNNN reference already stored for its prefix, so numbering
+continues where the old MAX() scan left off.
+"""
+from __future__ import annotations
+import re
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b7c1d2e3f4a5'
+down_revision = ('a1b2c3d4e6f7', 'aa11bb22cc33')
+branch_labels = None
+depends_on = None
+
+# Prefixes of utils.reference_generator.ReferenceGenerator.PREFIXES (frozen for this migration)
+PREFIXES = ['DV', 'BC', 'CM', 'FP', 'MP', 'LV', 'FC', 'RC', 'RT', 'PD', 'MV']
+# Tables/columns that may hold short references
+REFERENCE_COLUMNS = {
+    'quotations': ['reference'],
+    'supplier_orders': ['reference', 'bon_commande_ref'],
+    'client_orders': ['reference'],
+    'receptions': ['reference'],
+    'returns': ['reference'],
+    'deliveries': ['reference'],
+    'invoices': ['reference'],
+    'production_batches': ['batch_code'],
+    'stock_movements': ['reference'],
+}
+
+
+def _existing_maxima(conn) -> dict[str, int]:
+    inspector = sa.inspect(conn)
+    tables = set(inspector.get_table_names())
+    pattern = re.compile(r'^([A-Z]{2})(\d{3,})$')
+    maxima = {prefix: 0 for prefix in PREFIXES}
+    for table, columns in REFERENCE_COLUMNS.items():
+        if table not in tables:
+            continue
+        present = {c['name'] for c in inspector.get_columns(table)}
+        for column in columns:
+            if column not in present:
+                continue
+            for (value,) in conn.execute(sa.text(f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL")):
+                match = pattern.match(str(value).strip())
+                if match and match.group(1) in maxima:
+                    maxima[match.group(1)] = max(maxima[match.group(1)], int(match.group(2)))
+    return maxima
+
+
+def upgrade() -> None:
+    sequences = op.create_table(
+        'reference_sequences',
+        sa.Column('prefix', sa.String(length=8), primary_key=True),
+        sa.Column('last_value', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    maxima = _existing_maxima(op.get_bind())
+    op.bulk_insert(sequences, [{'prefix': prefix, 'last_value': value} for prefix, value in maxima.items()])
+
+
+def downgrade() -> None:
+    op.drop_table('reference_sequences')
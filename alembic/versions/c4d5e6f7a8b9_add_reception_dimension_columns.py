@@ -0,0 +1,80 @@
+"""Add structured plaque dimension and client columns to receptions
+
+Revision ID: c4d5e6f7a8b9
+Revises: b7c1d2e3f4a5
+Create Date: 2026-10-16 10:00:00.000000
+
+Dimensions were only stored inside Reception.notes ("Arrivée matière:
+100x200x50mm"); they are backfilled from the notes, and client_id from the
+supplier order when all its line items belong to a single client. Columns
+already added by the runtime guard in config.database are left untouched.
+"""
+from __future__ import annotations
+import re
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c4d5e6f7a8b9'
+down_revision = 'b7c1d2e3f4a5'
+branch_labels = None
+depends_on = None
+
+DIMENSION_COLUMNS = ['plaque_width_mm', 'plaque_length_mm', 'plaque_flap_mm']
+COMPOSITE_INDEX = 'ix_receptions_plaque_dims_client'
+ARRIVAL_DIMS_RE = re.compile(r"Arrivée matière:\s*([0-9]+)x([0-9]+)x([0-9]+)mm")
+
+
+def _backfill(conn) -> None:
+    rows = conn.execute(sa.text(
+        "SELECT id, notes FROM receptions "
+        "WHERE plaque_width_mm IS NULL AND notes LIKE '%Arrivée matière:%'"
+    )).fetchall()
+    params = []
+    for reception_id, notes in rows:
+        m = ARRIVAL_DIMS_RE.search(notes or '')
+        if m:
+            params.append({'id': reception_id, 'w': int(m.group(1)), 'l': int(m.group(2)), 'f': int(m.group(3))})
+    if params:
+        conn.execute(sa.text(
+            "UPDATE receptions SET plaque_width_mm = :w, plaque_length_mm = :l, plaque_flap_mm = :f WHERE id = :id"
+        ), params)
+    conn.execute(sa.text(
+        "UPDATE receptions SET client_id = ("
+        " SELECT MIN(li.client_id) FROM supplier_order_line_items li"
+        " WHERE li.supplier_order_id = receptions.supplier_order_id"
+        ") WHERE client_id IS NULL AND ("
+        " SELECT COUNT(DISTINCT li.client_id) FROM supplier_order_line_items li"
+        " WHERE li.supplier_order_id = receptions.supplier_order_id"
+        ") = 1"
+    ))
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    columns = {c['name'] for c in inspector.get_columns('receptions')}
+    indexes = {i['name'] for i in inspector.get_indexes('receptions')}
+
+    with op.batch_alter_table('receptions', schema=None) as batch_op:
+        for name in DIMENSION_COLUMNS:
+            if name not in columns:
+                batch_op.add_column(sa.Column(name, sa.Integer(), nullable=True))
+        if 'client_id' not in columns:
+            batch_op.add_column(sa.Column('client_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('fk_receptions_client_id', 'clients', ['client_id'], ['id'], ondelete='SET NULL')
+        if 'ix_receptions_client_id' not in indexes:
+            batch_op.create_index('ix_receptions_client_id', ['client_id'])
+        if COMPOSITE_INDEX not in indexes:
+            batch_op.create_index(COMPOSITE_INDEX, DIMENSION_COLUMNS + ['client_id'])
+
+    _backfill(conn)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('receptions', schema=None) as batch_op:
+        batch_op.drop_index(COMPOSITE_INDEX)
+        batch_op.drop_index('ix_receptions_client_id')
+        batch_op.drop_column('client_id')
+        for name in reversed(DIMENSION_COLUMNS):
+            batch_op.drop_column(name)
@@ -0,0 +1,87 @@
+"""Replace the '[ARCHIVED]' text prefix with an indexed archived_at column
+
+Revision ID: d5e6f7a8b9c0
+Revises: c4d5e6f7a8b9
+Create Date: 2026-10-16 11:00:00.000000
+
+Archiving used to prefix notes (quotations, client/supplier orders,
+receptions) or batch_code (production batches) with '[ARCHIVED]'. Rows
+carrying the prefix get archived_at set (from the timestamp written in
+reception notes, else their last update) and the prefix removed. A batch
+code keeps its prefix when the unprefixed code is already taken.
+Tables already converted by the runtime guard in config.database are skipped.
+"""
+from __future__ import annotations
+import re
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd5e6f7a8b9c0'
+down_revision = 'c4d5e6f7a8b9'
+branch_labels = None
+depends_on = None
+
+MARKER = '[ARCHIVED]'
+# Table -> text column that carried the marker
+ARCHIVABLE_TABLES = {
+    'quotations': 'notes',
+    'client_orders': 'notes',
+    'supplier_orders': 'notes',
+    'receptions': 'notes',
+    'production_batches': 'batch_code',
+}
+ARCHIVED_RECEPTION_RE = re.compile(r"^\[ARCHIVED\]\s*(\d{4}-\d{2}-\d{2} \d{2}:\d{2})\s*\|\s*(.*)$", re.DOTALL)
+
+
+def _backfill(conn, table: str, column: str) -> None:
+    rows = conn.execute(sa.text(
+        f"SELECT id, {column}, updated_at FROM {table} WHERE {column} LIKE :marker AND archived_at IS NULL"
+    ), {'marker': MARKER + '%'}).fetchall()
+    for row_id, value, updated_at in rows:
+        archived_at = updated_at or datetime.now()
+        m = ARCHIVED_RECEPTION_RE.match(value) if table == 'receptions' else None
+        if m:
+            archived_at = datetime.strptime(m.group(1), '%Y-%m-%d %H:%M')
+            stripped = m.group(2).strip()
+        else:
+            stripped = value[len(MARKER):].strip()
+        if column == 'batch_code':
+            taken = conn.execute(sa.text(f"SELECT 1 FROM {table} WHERE batch_code = :code"), {'code': stripped}).first()
+            new_value = value if (taken or not stripped) else stripped
+        else:
+            new_value = stripped or None
+        conn.execute(sa.text(
+            f"UPDATE {table} SET archived_at = :archived_at, {column} = :value WHERE id = :id"
+        ), {'archived_at': archived_at, 'value': new_value, 'id': row_id})
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    for table, column in ARCHIVABLE_TABLES.items():
+        if 'archived_at' in {c['name'] for c in inspector.get_columns(table)}:
+            continue
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('archived_at', sa.DateTime(timezone=True), nullable=True))
+            batch_op.create_index(f'ix_{table}_archived_at', ['archived_at'])
+        _backfill(conn, table, column)
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    for table, column in ARCHIVABLE_TABLES.items():
+        # Put the marker back so older code still hides archived rows
+        prefix = "'" + MARKER + " '"
+        if conn.dialect.name in ('mysql', 'mariadb'):
+            restored = f"CONCAT({prefix}, COALESCE({column}, ''))"
+        else:
+            restored = f"{prefix} || COALESCE({column}, '')"
+        conn.execute(sa.text(
+            f"UPDATE {table} SET {column} = {restored} "
+            f"WHERE archived_at IS NOT NULL AND COALESCE({column}, '') NOT LIKE :marker"
+        ), {'marker': MARKER + '%'})
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_archived_at')
+            batch_op.drop_column('archived_at')
@@ -0,0 +1,257 @@
+"""
+Synthetic data generator for the benchmarks.
+
+Populates a database with a realistic mix of every entity the application
+reads, scaled by the number of quotations (1k to 100k):
+
+    clients              scale / 20 (at least 20)
+    suppliers            scale / 500 (at least 5)
+    quotations           scale, 1 to 3 line items each
+    client orders        4 quotations out of 5, line items copied from the quotation
+    supplier orders      scale / 2, 1 or 2 line items each (one client per line)
+    receptions           one per line item of delivered supplier orders
+    material deliveries  one per reception
+    production batches   2 client orders out of 3
+    deliveries           half of the production batches
+
+Rows are written with executemany inserts in chunks, with explicit ids so the
+links are known without flushing. The same seed gives the same database.
+
+Usage: python benchmarks/datagen.py <database.db> [scale] [seed]
+"""
+from __future__ import annotations
+import datetime
+import random
+import sys
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.engine import Engine
+from models import Base, Client, Supplier, Quotation, QuotationLineItem, ClientOrder, SupplierOrder, SupplierOrderLineItem, Reception, ProductionBatch
+from models.orders import ClientOrderLineItem, ClientOrderStatus, Delivery, DeliveryStatus, MaterialDelivery, SupplierOrderStatus
+
+# Bump when the generated data changes (cached benchmark databases are rebuilt)
+DATAGEN_VERSION = 1
+DEFAULT_SCALE = 1_000
+DEFAULT_SEED = 7
+CHUNK = 5_000
+START_DATE = datetime.date(2024, 1, 1)
+CARDBOARD_TYPES = ['BC', 'DD', 'SC', 'TC']
+DESIGNATIONS = ['Caisse américaine', 'Caisse palette', 'Barquette', 'Plateau', 'Boîte pizza']
+CITIES = ['Alger', 'Oran', 'Constantine', 'Sétif', 'Blida', 'Annaba']
+# (weight, status) of the generated supplier orders
+SUPPLIER_ORDER_STATUSES = [
+    (2, SupplierOrderStatus.INITIAL),
+    (3, SupplierOrderStatus.ORDERED),
+    (2, SupplierOrderStatus.PARTIALLY_DELIVERED),
+    (3, SupplierOrderStatus.COMPLETED),
+]
+# A quotation, reception or batch out of this many is archived
+ARCHIVED_EVERY = 20
+
+
+def box_dimensions(rng: random.Random) -> tuple[int, int, int]:
+    """Box L x W x H on a 50 mm grid (a few hundred distinct sizes, like real catalogues)."""
+    return rng.randrange(200, 801, 50), rng.randrange(150, 601, 50), rng.randrange(100, 501, 50)
+
+
+def plaque_dimensions(length: int, width: int, height: int) -> tuple[int, int, int]:
+    """Flat sheet needed for a box: (width, length, flap)."""
+    return 2 * (length + width) + 40, width + height, width // 2
+
+
+def generate(engine: Engine, scale: int = DEFAULT_SCALE, seed: int = DEFAULT_SEED) -> Dict[str, int]:
+    """Create the schema and the synthetic rows. Returns the number of rows per table."""
+    rng = random.Random(seed)
+    Base.metadata.create_all(engine)
+    tables: Dict[str, List[Dict[str, Any]]] = {name: [] for name in (
+        'clients', 'suppliers', 'quotations', 'quotation_line_items', 'client_orders', 'client_order_line_items',
+        'supplier_orders', 'supplier_order_line_items', 'receptions', 'material_deliveries', 'production_batches',
+        'deliveries')}
+    now = datetime.datetime(2026, 1, 1)
+
+    n_clients = max(20, scale // 20)
+    for i in range(1, n_clients + 1):
+        tables['clients'].append({
+            'id': i, 'name': f'Client {i:05d}', 'contact_name': f'Contact {i}', 'email': f'client{i}@example.com',
+            'phone': f'0550{i:06d}', 'address': f'{i} rue des Frères', 'city': rng.choice(CITIES), 'country': 'Algérie',
+            'activity': rng.choice(['Agroalimentaire', 'Pharmacie', 'Textile', 'Électroménager']),
+            'numero_rc': f'RC{i:08d}', 'nif': f'NIF{i:010d}',
+        })
+    n_suppliers = max(5, scale // 500)
+    for i in range(1, n_suppliers + 1):
+        tables['suppliers'].append({'id': i, 'name': f'Fournisseur {i:04d}', 'phone': f'0770{i:06d}', 'city': rng.choice(CITIES)})
+
+    # Quotations and the client orders converted from them
+    quotation_lines: Dict[int, List[Dict[str, Any]]] = {}
+    line_id = 0
+    order_id = 0
+    order_lines_id = 0
+    client_orders: List[Dict[str, Any]] = []
+    for q in range(1, scale + 1):
+        client_id = rng.randint(1, n_clients)
+        issue_date = START_DATE + datetime.timedelta(days=q * 700 // scale)
+        lines = []
+        total = Decimal('0')
+        for number in range(1, rng.randint(1, 3) + 1):
+            line_id += 1
+            length, width, height = box_dimensions(rng)
+            quantity = rng.choice([500, 1000, 2000, 5000])
+            unit_price = Decimal(rng.randint(20, 120))
+            lines.append({
+                'id': line_id, 'quotation_id': q, 'line_number': number,
+                'description': f'{rng.choice(DESIGNATIONS)} {length}x{width}x{height}', 'quantity': str(quantity),
+                'unit_price': unit_price, 'total_price': unit_price * quantity,
+                'length_mm': length, 'width_mm': width, 'height_mm': height,
+                'cardboard_type': rng.choice(CARDBOARD_TYPES), 'material_reference': f'MR{rng.randint(1, 50):03d}',
+                'is_cliche': rng.random() < 0.1,
+            })
+            total += unit_price * quantity
+        quotation_lines[q] = lines
+        tables['quotation_line_items'].extend(lines)
+        tables['quotations'].append({
+            'id': q, 'client_id': client_id, 'reference': f'DV{q:06d}', 'issue_date': issue_date,
+            'valid_until': issue_date + datetime.timedelta(days=30), 'total_amount': total, 'is_initial': rng.random() < 0.3,
+            'notes': rng.choice([None, 'Livraison urgente', 'Impression 2 couleurs', 'Client fidèle, remise 5%']),
+            'archived_at': now if q % ARCHIVED_EVERY == 0 else None,
+        })
+        if q % 5:
+            order_id += 1
+            client_orders.append({
+                'id': order_id, 'client_id': client_id, 'quotation_id': q, 'supplier_order_id': None,
+                'reference': f'CM{order_id:06d}', 'order_date': issue_date, 'total_amount': total,
+                'status': rng.choice(list(ClientOrderStatus)),
+            })
+            for line in lines:
+                order_lines_id += 1
+                tables['client_order_line_items'].append({
+                    'id': order_lines_id, 'client_order_id': order_id, 'quotation_line_item_id': line['id'],
+                    'line_number': line['line_number'], 'description': line['description'], 'quantity': line['quantity'],
+                    'unit_price': line['unit_price'], 'total_price': line['total_price'], 'length_mm': line['length_mm'],
+                    'width_mm': line['width_mm'], 'height_mm': line['height_mm'], 'cardboard_type': line['cardboard_type'],
+                    'is_cliche': line['is_cliche'],
+                })
+
+    # Supplier orders for the plaques of the client orders, with their receptions
+    weights = [weight for weight, _ in SUPPLIER_ORDER_STATUSES]
+    statuses = [status for _, status in SUPPLIER_ORDER_STATUSES]
+    supplier_line_id = 0
+    reception_id = 0
+    n_supplier_orders = max(1, scale // 2)
+    for s in range(1, n_supplier_orders + 1):
+        status = rng.choices(statuses, weights)[0]
+        order_date = START_DATE + datetime.timedelta(days=s * 700 // n_supplier_orders)
+        order_total = Decimal('0')
+        linked = client_orders[(s - 1) % len(client_orders)] if client_orders else None
+        if linked is not None and linked['supplier_order_id'] is None:
+            linked['supplier_order_id'] = s
+        for number in range(1, rng.randint(1, 2) + 1):
+            supplier_line_id += 1
+            if linked is not None and number == 1:
+                source = quotation_lines[linked['quotation_id']][0]
+                client_id = linked['client_id']
+                length, width, height = source['length_mm'], source['width_mm'], source['height_mm']
+            else:
+                client_id = rng.randint(1, n_clients)
+                length, width, height = box_dimensions(rng)
+            plaque_w, plaque_l, flap = plaque_dimensions(length, width, height)
+            quantity = rng.choice([500, 1000, 2000, 3000])
+            price = Decimal(rng.randint(8, 40))
+            if status is SupplierOrderStatus.COMPLETED:
+                received = quantity
+            elif status is SupplierOrderStatus.PARTIALLY_DELIVERED:
+                received = quantity * rng.randint(2, 8) // 10
+            else:
+                received = 0
+            tables['supplier_order_line_items'].append({
+                'id': supplier_line_id, 'supplier_order_id': s, 'client_id': client_id, 'line_number': number,
+                'code_article': f'ART{supplier_line_id:06d}', 'caisse_length_mm': length, 'caisse_width_mm': width,
+                'caisse_height_mm': height, 'plaque_width_mm': plaque_w, 'plaque_length_mm': plaque_l, 'plaque_flap_mm': flap,
+                'prix_uttc_plaque': price, 'quantity': quantity, 'total_line_amount': price * quantity,
+                'cardboard_type': rng.choice(CARDBOARD_TYPES), 'material_reference': f'MR{rng.randint(1, 50):03d}',
+                'total_received_quantity': received,
+                'delivery_status': (DeliveryStatus.COMPLETE if received >= quantity else
+                                    DeliveryStatus.PARTIAL if received else DeliveryStatus.PENDING),
+            })
+            order_total += price * quantity
+            if received:
+                reception_id += 1
+                arrival = order_date + datetime.timedelta(days=rng.randint(3, 20))
+                tables['receptions'].append({
+                    'id': reception_id, 'supplier_order_id': s, 'reception_date': arrival, 'quantity': received,
+                    'notes': f'Arrivée matière: {plaque_w}x{plaque_l}x{flap}mm', 'plaque_width_mm': plaque_w,
+                    'plaque_length_mm': plaque_l, 'plaque_flap_mm': flap, 'client_id': client_id,
+                    'archived_at': now if reception_id % ARCHIVED_EVERY == 0 else None,
+                })
+                tables['material_deliveries'].append({
+                    'id': reception_id, 'supplier_order_line_item_id': supplier_line_id, 'delivery_date': arrival,
+                    'received_quantity': received, 'batch_reference': f'ARR-{reception_id:06d}', 'quality_notes': '',
+                })
+        tables['supplier_orders'].append({
+            'id': s, 'supplier_id': rng.randint(1, n_suppliers), 'reference': f'BC{s:06d}', 'bon_commande_ref': f'BC{s:06d}',
+            'order_date': order_date, 'status': status, 'total_amount': order_total,
+        })
+    tables['client_orders'] = client_orders
+
+    # Production of two client orders out of three, half of it delivered
+    batch_id = 0
+    for order in client_orders:
+        if order['id'] % 3 == 0:
+            continue
+        batch_id += 1
+        first_line = quotation_lines[order['quotation_id']][0]
+        quantity = int(first_line['quantity']) * rng.randint(5, 10) // 10
+        tables['production_batches'].append({
+            'id': batch_id, 'client_order_id': order['id'], 'batch_code': f'PB{batch_id:06d}', 'quantity': quantity,
+            'production_date': order['order_date'] + datetime.timedelta(days=rng.randint(5, 30)),
+            'description': first_line['description'],
+            'archived_at': now if batch_id % ARCHIVED_EVERY == 0 else None,
+        })
+        if batch_id % 2:
+            tables['deliveries'].append({
+                'id': len(tables['deliveries']) + 1, 'client_order_id': order['id'], 'quantity': quantity // 2,
+                'status': DeliveryStatus.PARTIAL,
+            })
+
+    models = {
+        'clients': Client, 'suppliers': Supplier, 'quotations': Quotation, 'quotation_line_items': QuotationLineItem,
+        'supplier_orders': SupplierOrder, 'supplier_order_line_items': SupplierOrderLineItem,
+        'client_orders': ClientOrder, 'client_order_line_items': ClientOrderLineItem, 'receptions': Reception,
+        'material_deliveries': MaterialDelivery, 'production_batches': ProductionBatch, 'deliveries': Delivery,
+    }
+    with engine.begin() as conn:
+        for name, model in models.items():
+            rows = tables[name]
+            for start in range(0, len(rows), CHUNK):
+                conn.execute(insert(model.__table__), rows[start:start + CHUNK])
+    return {name: len(rows) for name, rows in tables.items()}
+
+
+def row_counts(engine: Engine) -> Dict[str, int]:
+    """Rows per table of an existing database."""
+    with engine.connect() as conn:
+        return {table.name: conn.execute(select(func.count()).select_from(table)).scalar_one()
+                for table in Base.metadata.sorted_tables}
+
+
+def main() -> int:
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 2
+    path = Path(sys.argv[1])
+    scale = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SCALE
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_SEED
+    if path.exists():
+        path.unlink()
+    counts = generate(create_engine(f'sqlite:///{path}'), scale, seed)
+    for name, count in counts.items():
+        print(f"{name:28s}: {count}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""
+Headless benchmark suite.
+
+Times, against a SQLite database filled by benchmarks/datagen.py:
+- grid_refresh: GridDataLoader row building for every grid (refresh_all)
+- dashboard_kpis: the dashboard figures (services.dashboard_metrics)
+- finished_products_stock: the finished products stock aggregation
+- invoice_prepare: InvoiceService.prepare_invoice_data
+- reference_generate / reference_reserve: ReferenceGenerator
+- pdf_*: each PDF fill path, from the database rows to the written file
+
+The first call of each benchmark (imports, template parsing) is reported as
+first_ms and left out of the statistics of the --repeat timed calls that
+follow. Every call works on different rows, so the document cache never
+returns an earlier file. Query counts come from
+utils.instrumentation. PDFs are written to a temporary directory.
+
+Results go to a JSON file (commit, environment, row counts, per-benchmark
+median/min/max ms and queries) that --compare diffs against another run.
+
+Usage:
+    python benchmarks/run.py [--scale N] [--repeat R] [--only NAME ...] [--output results.json]
+    python benchmarks/run.py --compare base.json new.json [--threshold 0.10]
+"""
+from __future__ import annotations
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+RESULTS_DIR = ROOT / 'benchmarks' / 'results'
+DEFAULT_REPEAT = 5
+# A benchmark whose median grows by more than this fraction is reported as a regression
+DEFAULT_THRESHOLD = 0.10
+# Calls per run of the reference generation benchmark
+REFERENCES_PER_RUN = 20
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def prepare_database(scale: int, seed: int, path: Path | None) -> Path:
+    """Path of the benchmark database, generated unless it already exists for this scale/seed/generator."""
+    from datagen import DATAGEN_VERSION, generate
+    from sqlalchemy import create_engine
+    path = path or Path(tempfile.gettempdir()) / f'world_embalage_bench_v{DATAGEN_VERSION}_{scale}_{seed}.db'
+    if not path.exists():
+        print(f"Génération des données ({scale} devis) dans {path}...", flush=True)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.unlink(missing_ok=True)
+        engine = create_engine(f'sqlite:///{tmp_path}')
+        generate(engine, scale, seed)
+        engine.dispose()
+        tmp_path.replace(path)
+    return path
+
+
+def build_benchmarks() -> Dict[str, Callable[[int], Any]]:
+    """name -> fn(run_index); each run works on different rows."""
+    from sqlalchemy import select
+    from config.database import session_scope
+    from models import ProductionBatch, Quotation, Reception, SupplierOrder
+    from services.dashboard_metrics import load_dashboard_data
+    from services.document_service import DocumentService
+    from services.finished_products_stock import compute_finished_products_stock
+    from services.grid_data_loader import GRID_TABLE_DEPENDENCIES, GridDataLoader
+    from services.invoice_service import InvoiceService
+    from services.order_service import OrderService
+    from services.pdf_export_service import export_finished_product_fiche, export_raw_material_label, export_supplier_order_to_pdf
+    from services.pdf_form_filler import PDFFormFiller
+    from utils.reference_generator import ReferenceGenerator
+
+    with session_scope() as session:
+        quotation_ids = session.scalars(select(Quotation.id).order_by(Quotation.id).limit(100)).all()
+        supplier_order_ids = session.scalars(select(SupplierOrder.id).order_by(SupplierOrder.id).limit(100)).all()
+        batches = session.execute(select(ProductionBatch.id, ProductionBatch.quantity).order_by(ProductionBatch.id).limit(100)).all()
+        reception_ids = session.scalars(select(Reception.id).order_by(Reception.id).limit(100)).all()
+
+    def grid_refresh(i):
+        with session_scope() as session:
+            return GridDataLoader(session).load(set(GRID_TABLE_DEPENDENCIES))
+
+    def dashboard_kpis(i):
+        with session_scope() as session:
+            return load_dashboard_data(session)
+
+    def finished_products_stock(i):
+        with session_scope() as session:
+            return compute_finished_products_stock(session)
+
+    def invoice_prepare(i):
+        with InvoiceService() as service:
+            return service.prepare_invoice_data([batches[i % len(batches)][0]])
+
+    def reference_generate(i):
+        return [ReferenceGenerator.generate('quotation') for _ in range(REFERENCES_PER_RUN)]
+
+    def reference_reserve(i):
+        return ReferenceGenerator.reserve('finished_product', 100).references
+
+    def pdf_devis(i):
+        with session_scope() as session:
+            data = OrderService(session).get_quotation_for_pdf(quotation_ids[i % len(quotation_ids)])
+        return PDFFormFiller().fill_devis_template(data)
+
+    def pdf_supplier_order(i):
+        return export_supplier_order_to_pdf(supplier_order_ids[i % len(supplier_order_ids)])
+
+    def pdf_finished_product(i):
+        batch_id, quantity = batches[i % len(batches)]
+        return export_finished_product_fiche(batch_id, quantity or 1)
+
+    def pdf_raw_material_label(i):
+        return export_raw_material_label([reception_ids[i % len(reception_ids)]])
+
+    def pdf_invoice(i):
+        with InvoiceService() as service:
+            data = service.prepare_invoice_data([batches[i % len(batches)][0]])
+        return PDFFormFiller().fill_invoice_template(data)
+
+    def pdf_delivery_note(i):
+        lines = [{'designation': 'Caisse américaine', 'dimensions': '300x200x100', 'quantity': str(1000 + i)}]
+        return DocumentService().build_delivery_note(f'LV{i:05d}', f'Client {i}', datetime.date(2026, 1, 1), lines,
+                                                     'Adresse\nAlger')
+
+    return {
+        'grid_refresh': grid_refresh,
+        'dashboard_kpis': dashboard_kpis,
+        'finished_products_stock': finished_products_stock,
+        'invoice_prepare': invoice_prepare,
+        'reference_generate': reference_generate,
+        'reference_reserve': reference_reserve,
+        'pdf_devis': pdf_devis,
+        'pdf_supplier_order': pdf_supplier_order,
+        'pdf_finished_product': pdf_finished_product,
+        'pdf_raw_material_label': pdf_raw_material_label,
+        'pdf_invoice': pdf_invoice,
+        'pdf_delivery_note': pdf_delivery_note,
+    }
+
+
+def run(args) -> Dict[str, Any]:
+    db_path = prepare_database(args.scale, args.seed, args.db)
+    # Settings read the environment when config.settings is first imported, i.e. below
+    os.environ['DB_URL'] = f'sqlite:///{db_path}'
+    # Slow statements are expected at large scales; keep the console readable
+    os.environ.setdefault('SLOW_QUERY_MS', '100000')
+    from config.settings import settings
+    from datagen import row_counts
+    from config.database import get_engine
+    from services.pdf_backend import get_backend
+    from utils.instrumentation import report, reset, span
+
+    output_dir = tempfile.mkdtemp(prefix='bench_reports_')
+    settings.reports_dir = Path(output_dir)
+    benchmarks = build_benchmarks()
+    selected = args.only or list(benchmarks)
+    unknown = set(selected) - set(benchmarks)
+    if unknown:
+        raise SystemExit(f"Unknown benchmark(s): {', '.join(sorted(unknown))}; available: {', '.join(benchmarks)}")
+
+    results: Dict[str, Any] = {}
+    for name in selected:
+        fn = benchmarks[name]
+        reset()
+        start = time.perf_counter()
+        fn(0)
+        first_ms = (time.perf_counter() - start) * 1000
+        timings: List[float] = []
+        for i in range(1, args.repeat + 1):
+            with span(name):
+                start = time.perf_counter()
+                fn(i)
+                timings.append((time.perf_counter() - start) * 1000)
+        queries = report()['spans'][name]['avg_queries']
+        results[name] = {
+            'median_ms': round(statistics.median(timings), 3),
+            'min_ms': round(min(timings), 3),
+            'max_ms': round(max(timings), 3),
+            'first_ms': round(first_ms, 3),
+            'runs': len(timings),
+            'queries': queries,
+        }
+        print(f"{name:26s}: median {results[name]['median_ms']:9.2f} ms  min {results[name]['min_ms']:9.2f} ms  "
+              f"first {first_ms:9.2f} ms  {queries:6.1f} requêtes", flush=True)
+
+    import sqlalchemy
+    return {
+        'meta': {
+            'commit': _git('rev-parse', 'HEAD'),
+            'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'sqlalchemy': sqlalchemy.__version__,
+            'pdf_backend': get_backend().name,
+            'scale': args.scale,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'rows': row_counts(get_engine()),
+        },
+        'results': results,
+    }
+
+
+def compare(base_path: Path, new_path: Path, threshold: float) -> int:
+    """Print the median change of every benchmark; 1 when one regressed by more than threshold."""
+    base = json.loads(base_path.read_text(encoding='utf-8'))
+    new = json.loads(new_path.read_text(encoding='utf-8'))
+    print(f"base: {base['meta']['commit'][:10]} (échelle {base['meta']['scale']})  "
+          f"nouveau: {new['meta']['commit'][:10]} (échelle {new['meta']['scale']})")
+    if base['meta']['scale'] != new['meta']['scale']:
+        print("Attention: les deux résultats n'ont pas la même échelle de données")
+    regressions = []
+    for name, result in new['results'].items():
+        before = base['results'].get(name)
+        if before is None:
+            print(f"{name:26s}: {result['median_ms']:9.2f} ms  (nouveau)")
+            continue
+        ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  RÉGRESSION'
+            regressions.append(name)
+        print(f"{name:26s}: {before['median_ms']:9.2f} -> {result['median_ms']:9.2f} ms  x{ratio:5.2f}  "
+              f"requêtes {before['queries']:g} -> {result['queries']:g}{flag}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scale', type=int, default=1_000, help="number of quotations (1k to 100k)")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--db', type=Path, help="database file (generated when missing)")
+    parser.add_argument('--only', nargs='+', metavar='NAME', help="benchmarks to run")
+    parser.add_argument('--output', type=Path, help="results file (default: benchmarks/results/<commit>_<scale>.json)")
+    parser.add_argument('--compare', nargs=2, type=Path, metavar=('BASE', 'NEW'))
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+
+    sys.path.insert(0, str(ROOT / 'src'))
+    results = run(args)
+    output = args.output or RESULTS_DIR / f"{results['meta']['commit'][:10] or 'local'}_{args.scale}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"Résultats: {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
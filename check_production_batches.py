@@ -20,13 +20,13 @@ def check_production_batches():
             print(f"  client_order_id: {pb.client_order_id}")
             
             # Check if it would be filtered by archive filter
-            archived = pb.batch_code and pb.batch_code.startswith('[ARCHIVED]')
+            archived = pb.archived_at is not None
             print(f"  Would be filtered (archived): {archived}")
             print()
         
         print("=== PRODUCTION BATCHES AFTER ARCHIVE FILTER ===")
         filtered_batches = session.query(ProductionBatch).filter(
-            ~ProductionBatch.batch_code.like('[ARCHIVED]%')
+            ProductionBatch.archived_at.is_(None)
         ).all()
         for pb in filtered_batches:
             print(f"ProductionBatch {pb.id}: batch_code='{pb.batch_code}', client_order_id={pb.client_order_id}")
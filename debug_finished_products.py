@@ -14,7 +14,7 @@ def debug_finished_products():
         print("=== DEBUGGING FINISHED PRODUCTS DISPLAY LOGIC ===")
         
         production_batches = session.query(ProductionBatch).filter(
-            ~ProductionBatch.batch_code.like('[ARCHIVED]%')
+            ProductionBatch.archived_at.is_(None)
         ).all()
         
         grouped_items = {}
@@ -0,0 +1,215 @@
+"""
+Benchmark for the dashboard finished products stock computation.
+
+Seeds an in-memory SQLite database with N client orders (default 5000) and
+compares the previous per-order implementation (one or two aggregate queries
+per client order, plus lazy loads) with the grouped queries of
+``services.finished_products_stock``. Prints the query count and wall time of
+both and checks they return the same figures.
+
+Usage: python scripts/bench_dashboard_stock.py [orders]
+"""
+from __future__ import annotations
+import random
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from models import Base, Client, Supplier, Quotation, QuotationLineItem, ClientOrder, SupplierOrder, SupplierOrderLineItem, Reception, ProductionBatch
+from models.orders import ClientOrderLineItem, Delivery, MaterialDelivery
+from services.finished_products_stock import compute_finished_products_stock
+
+DEFAULT_ORDERS = 5_000
+REPEAT = 3
+BOX_DIMS = [(300, 200, 100), (400, 300, 150), (500, 400, 200), (250, 250, 250)]
+
+
+def seed(session: Session, n: int) -> None:
+    """n client orders spread over n/10 clients, with a supplier order, receptions,
+    material deliveries, production batches and deliveries for most of them."""
+    rng = random.Random(7)
+    supplier = Supplier(name='Fournisseur Bench', phone='0550000000')
+    session.add(supplier)
+    clients = [Client(name=f'Client {i}') for i in range(max(1, n // 10))]
+    session.add_all(clients)
+    session.flush()
+    for i in range(n):
+        client = clients[i % len(clients)]
+        L, W, H = rng.choice(BOX_DIMS)
+        quotation = Quotation(client_id=client.id, reference=f'DV{i:05d}', total_amount=Decimal('100'))
+        session.add(quotation)
+        session.flush()
+        if i % 5:
+            session.add(QuotationLineItem(
+                quotation_id=quotation.id, line_number=1, description=f'Caisse {i}' if i % 3 else None,
+                quantity='1000', length_mm=L, width_mm=W, height_mm=H, cardboard_type='BC'))
+        supplier_order = SupplierOrder(supplier_id=supplier.id, reference=f'BC{i:05d}', bon_commande_ref=f'BC{i:05d}',
+                                       total_amount=Decimal('50'), order_date=date(2025, 1, 1))
+        session.add(supplier_order)
+        session.flush()
+        line = SupplierOrderLineItem(
+            supplier_order_id=supplier_order.id, client_id=client.id, line_number=1, code_article=f'A{i}',
+            caisse_length_mm=L, caisse_width_mm=W, caisse_height_mm=H,
+            plaque_width_mm=L, plaque_length_mm=W, plaque_flap_mm=H, prix_uttc_plaque=Decimal('10'), quantity=500)
+        session.add(line)
+        session.flush()
+        if i % 4 == 0:
+            session.add(Reception(supplier_order_id=supplier_order.id, quantity=rng.randint(100, 500),
+                                  plaque_width_mm=L, plaque_length_mm=W, plaque_flap_mm=H, client_id=client.id,
+                                  notes=f'Arrivée matière: {L}x{W}x{H}mm'))
+        if i % 4 in (0, 1):
+            session.add(MaterialDelivery(supplier_order_line_item_id=line.id, received_quantity=rng.randint(100, 500)))
+        client_order = ClientOrder(client_id=client.id, quotation_id=quotation.id,
+                                   supplier_order_id=supplier_order.id if i % 2 else None, reference=f'CM{i:05d}')
+        session.add(client_order)
+        session.flush()
+        if i % 5 == 0:
+            session.add(ClientOrderLineItem(client_order_id=client_order.id, line_number=1, quantity='1',
+                                            description=None, length_mm=L, width_mm=W, height_mm=H))
+        if i % 7:
+            session.add(ProductionBatch(client_order_id=client_order.id, batch_code=f'PD{i:05d}',
+                                        quantity=rng.randint(1, 400), production_date=date(2025, 2, 1)))
+        if i % 3 == 0:
+            session.add(Delivery(client_order_id=client_order.id, quantity=rng.randint(0, 200)))
+    session.commit()
+
+
+def legacy_finished_products_stock(session: Session) -> tuple[int, list[dict]]:
+    """Previous DashboardWidget._compute_finished_products_stock (per-order queries)."""
+    rows: list[dict] = []
+    total_stock = 0
+    produced_by_order = dict(
+        session.query(ClientOrder.id, func.coalesce(func.sum(ProductionBatch.quantity), 0))
+        .join(ProductionBatch, ProductionBatch.client_order_id == ClientOrder.id)
+        .filter(ProductionBatch.archived_at.is_(None))
+        .group_by(ClientOrder.id).all()
+    )
+    delivered_by_order = dict(
+        session.query(ClientOrder.id, func.coalesce(func.sum(Delivery.quantity), 0))
+        .join(Delivery, Delivery.client_order_id == ClientOrder.id)
+        .group_by(ClientOrder.id).all()
+    )
+    for order in session.query(ClientOrder).all():
+        produced = int(produced_by_order.get(order.id, 0) or 0)
+        delivered = int(delivered_by_order.get(order.id, 0) or 0)
+        stock = max(0, produced - delivered)
+        if stock <= 0:
+            continue
+        designation = "Produit fini"
+        client_name = order.client.name if order.client else ""
+        if order.quotation and order.quotation.line_items:
+            qli = order.quotation.line_items[0]
+            if qli.description:
+                designation = qli.description
+            elif qli.length_mm and qli.width_mm and qli.height_mm:
+                designation = f"Caisse carton {qli.length_mm}×{qli.width_mm}×{qli.height_mm}"
+        elif order.line_items:
+            cli = order.line_items[0]
+            if cli.description:
+                designation = cli.description
+            elif cli.length_mm and cli.width_mm and cli.height_mm:
+                designation = f"Caisse carton {cli.length_mm}×{cli.width_mm}×{cli.height_mm}"
+        raw_qty = 0
+        target_dims = None
+        if order.quotation and order.quotation.line_items:
+            qli = order.quotation.line_items[0]
+            if qli.length_mm and qli.width_mm and qli.height_mm:
+                target_dims = (int(qli.length_mm), int(qli.width_mm), int(qli.height_mm))
+        if target_dims is None and order.line_items:
+            cli = order.line_items[0]
+            if cli.length_mm and cli.width_mm and cli.height_mm:
+                target_dims = (int(cli.length_mm), int(cli.width_mm), int(cli.height_mm))
+        if target_dims is not None:
+            L, W, H = target_dims
+            raw_qty = int(
+                session.query(func.coalesce(func.sum(Reception.quantity), 0))
+                .join(Reception.supplier_order)
+                .join(SupplierOrderLineItem, SupplierOrderLineItem.supplier_order_id == SupplierOrder.id)
+                .filter(
+                    SupplierOrderLineItem.client_id == order.client_id,
+                    SupplierOrderLineItem.caisse_length_mm == L,
+                    SupplierOrderLineItem.caisse_width_mm == W,
+                    SupplierOrderLineItem.caisse_height_mm == H,
+                    SupplierOrder.archived_at.is_(None),
+                    Reception.archived_at.is_(None),
+                    Reception.plaque_width_mm == L,
+                    Reception.plaque_length_mm == W,
+                    Reception.plaque_flap_mm == H,
+                ).scalar() or 0
+            )
+            if raw_qty == 0:
+                li_q = (
+                    session.query(SupplierOrderLineItem)
+                    .join(SupplierOrder, SupplierOrderLineItem.supplier_order_id == SupplierOrder.id)
+                    .filter(
+                        SupplierOrderLineItem.client_id == order.client_id,
+                        SupplierOrderLineItem.caisse_length_mm == L,
+                        SupplierOrderLineItem.caisse_width_mm == W,
+                        SupplierOrderLineItem.caisse_height_mm == H,
+                        SupplierOrder.archived_at.is_(None),
+                    )
+                )
+                if order.supplier_order_id:
+                    li_q = li_q.filter(SupplierOrderLineItem.supplier_order_id == order.supplier_order_id)
+                matching_items = li_q.all()
+                if matching_items:
+                    raw_qty = int(
+                        session.query(func.coalesce(func.sum(MaterialDelivery.received_quantity), 0))
+                        .filter(MaterialDelivery.supplier_order_line_item_id.in_([li.id for li in matching_items]))
+                        .scalar() or 0
+                    )
+        percent = int(round((stock / raw_qty) * 100)) if raw_qty > 0 else 0
+        rows.append({'designation': designation, 'client': client_name, 'produced': produced,
+                     'delivered': delivered, 'stock': stock, 'percent': percent})
+        total_stock += stock
+    rows.sort(key=lambda r: r['stock'], reverse=True)
+    return total_stock, rows[:10]
+
+
+def measure(engine, fn, repeat: int = REPEAT) -> tuple[float, int, tuple[int, list[dict]]]:
+    """Best wall time (ms) over ``repeat`` fresh sessions, query count and result."""
+    statements: list[str] = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        statements.clear()
+        event.listen(engine, 'before_cursor_execute', listener)
+        with Session(engine) as session:
+            start = time.perf_counter()
+            result = fn(session)
+            best = min(best, (time.perf_counter() - start) * 1000)
+        event.remove(engine, 'before_cursor_execute', listener)
+    return best, len(statements), result
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ORDERS
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    Base.metadata.create_all(engine)
+    start = time.perf_counter()
+    with Session(engine) as session:
+        seed(session, n)
+    print(f"seeded {n} client orders in {time.perf_counter() - start:.1f} s")
+
+    old_ms, old_queries, old_result = measure(engine, legacy_finished_products_stock, repeat=1)
+    new_ms, new_queries, new_result = measure(engine, compute_finished_products_stock)
+    print(f"before (per order): {old_queries:6d} queries {old_ms:9.1f} ms")
+    print(f"after  (grouped)  : {new_queries:6d} queries {new_ms:9.1f} ms")
+    if old_result != new_result:
+        print("FAIL: grouped computation differs from the per-order one")
+        print(f"  before: {old_result}\n  after:  {new_result}")
+        return 1
+    print(f"OK: same total stock ({new_result[0]}) and top {len(new_result[1])} rows")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Benchmark for the process-pool document renderer.
+
+Renders N finished product fiches and N raw material labels (default 500
+each) into a temporary directory, first in a single process and then with one
+worker per CPU core, and prints documents per second for both. Checks every
+job produced its file.
+
+Usage: python scripts/bench_document_renderer.py [documents]
+"""
+from __future__ import annotations
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from services.document_renderer import DocumentRenderer, RenderJob
+
+DEFAULT_DOCUMENTS = 500
+
+
+def make_jobs(n: int, output_dir: Path) -> list[RenderJob]:
+    # Absolute output filenames keep the worker processes' output out of the reports directory
+    jobs = []
+    for i in range(n):
+        jobs.append(RenderJob('finished_product', {
+            'client': f'Client {i % 40}', 'designation': 'Caisse américaine', 'quantity': 100 + i,
+            'dimensions': '300 x 200 x 100 mm', 'production_date': '16/10/2026', 'reference': f'FP{i:06d}',
+        }, str(output_dir / f'fiche_{i}.pdf')))
+        jobs.append(RenderJob('raw_material_label', {
+            'client': f'Client {i % 40}', 'arrival_date': '16/10/2026', 'quantity': 1200, 'designation': 'Cartons',
+            'plaque_dimensions': '440 x 350 R400', 'caisse_dimensions': '300 x 200 x 100 mm',
+            'label_number': f'MP{i:06d}', 'bon_commande': f'BC{i:05d}', 'remaining_quantity': 300,
+        }, str(output_dir / f'etiquette_{i}.pdf')))
+    return jobs
+
+
+def run(workers: int, jobs: list[RenderJob]) -> float:
+    start = time.perf_counter()
+    results = DocumentRenderer(max_workers=workers).render(jobs)
+    elapsed = time.perf_counter() - start
+    failed = [r for r in results if r.error or not (r.path and r.path.exists())]
+    if failed:
+        raise SystemExit(f"FAIL: {len(failed)} job(s) without output, first error: {failed[0].error}")
+    return elapsed
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_DOCUMENTS
+    cores = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as work_dir:
+        jobs = make_jobs(n, Path(work_dir))
+        serial = run(1, jobs)
+        print(f"1 process     : {len(jobs)} documents in {serial:6.2f} s ({len(jobs) / serial:6.1f} docs/s)")
+        if cores > 1:
+            parallel = run(cores, jobs)
+            print(f"{cores:2d} processes  : {len(jobs)} documents in {parallel:6.2f} s "
+                  f"({len(jobs) / parallel:6.1f} docs/s, x{serial / parallel:.1f})")
+        else:
+            print("single CPU: parallel run skipped")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
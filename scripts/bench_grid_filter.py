@@ -0,0 +1,105 @@
+"""
+Micro-benchmark for DataGrid search filtering.
+
+Builds a synthetic 50k-row devis-like dataset and times, per keystroke:
+  - RowSearchIndex.matching_rows (the lowercase substring match), and
+  - DataGrid.filter_multi on a virtual grid (match + proxy re-layout, no paint).
+Fails when the median match time exceeds the ~16 ms frame budget.
+
+Usage: QT_QPA_PLATFORM=offscreen python scripts/bench_grid_filter.py [rows]
+"""
+from __future__ import annotations
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from utils.search_index import RowSearchIndex
+
+# One frame at 60 Hz
+FRAME_BUDGET_MS = 16.0
+DEFAULT_ROWS = 50_000
+REPEAT = 7
+
+HEADERS = ["ID", "Référence", "Client", "Date Création", "Date Validité", "Statut",
+           "Articles", "Dimensions", "Quantités", "Types Carton", "Total HT (DA)", "Notes"]
+NOTE_WORDS = ['caisse', 'carton', 'boîte', 'plaque', 'double', 'simple', 'cannelure', 'urgent', 'Alger', 'Oran']
+
+# Keystroke sequences as typed in the search field (each prefix is one filter call)
+QUERIES = [
+    ['dv0', 'dv01', 'dv012', 'dv0123'],
+    ['c', 'cl', 'cli', 'client 4', 'client 42'],
+    ['300x200', '300×200'],
+    ['zzz'],
+]
+
+
+def make_rows(n: int) -> list[list[str]]:
+    rng = random.Random(42)
+    return [[
+        str(i), f"DV{i:05d}", f"Client {rng.randint(1, 500)}", f"2025-01-{rng.randint(1, 28):02d}", "2025-02-01",
+        rng.choice(['Brouillon', 'Validé', 'Envoyé']), f"{rng.randint(1, 5)} article(s)",
+        f"{rng.randint(100, 900)}×{rng.randint(100, 900)}×{rng.randint(50, 500)}", str(rng.randint(100, 10000)),
+        rng.choice(['BC', 'SC', 'DC']), f"{rng.randint(1000, 99999)}.00", ' '.join(rng.sample(NOTE_WORDS, 3)),
+    ] for i in range(1, n + 1)]
+
+
+def time_ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_index(rows: list[list[str]]) -> list[float]:
+    build = time_ms(lambda: RowSearchIndex(rows))
+    print(f"index build: {build:.1f} ms")
+    samples: list[float] = []
+    for query in QUERIES:
+        for _ in range(REPEAT):
+            index = RowSearchIndex(rows)
+            for text in query:
+                samples.append(time_ms(lambda: index.matching_rows([text])))
+    return samples
+
+
+def bench_grid(rows: list[list[str]]) -> list[float]:
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+    from ui.widgets.data_grid import DataGrid
+
+    grid = DataGrid(HEADERS, virtual=True)
+    print(f"virtual grid load: {time_ms(lambda: grid.load_rows(rows)):.1f} ms")
+    samples: list[float] = []
+    for query in QUERIES:
+        for _ in range(REPEAT):
+            for text in query:
+                samples.append(time_ms(lambda: grid.filter_multi([text])))
+            grid.filter_multi([])
+    app.processEvents()
+    return samples
+
+
+def report(name: str, samples: list[float]) -> float:
+    median = statistics.median(samples)
+    print(f"{name}: median {median:.2f} ms, max {max(samples):.2f} ms over {len(samples)} keystrokes")
+    return median
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    rows = make_rows(n)
+    print(f"{n} rows x {len(HEADERS)} columns")
+    match_median = report("matching_rows", bench_index(rows))
+    report("DataGrid.filter_multi (virtual)", bench_grid(rows))
+    if match_median > FRAME_BUDGET_MS:
+        print(f"FAIL: median match time exceeds the {FRAME_BUDGET_MS:.0f} ms frame budget")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Benchmark for PDF document generation (PDFFormFiller).
+
+Renders N documents of each kind (default 200) into a temporary directory and
+prints the per-document latency, the number of template parses and the number
+of temporary files created by the fill pipeline. Templates are parsed once
+and overlays are rendered in memory, so a run must show one parse per template
+and no temporary files. Also checks that the cached template pages are not
+modified by the merges.
+
+Usage: python scripts/bench_pdf_fill.py [documents]
+"""
+from __future__ import annotations
+import statistics
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import PyPDF2  # type: ignore
+from services.pdf_form_filler import PDFFormFiller, template_cache
+
+DEFAULT_DOCUMENTS = 200
+
+LINE_ITEMS = [
+    {'description': 'Caisse carton 300x200x100', 'designation': 'Caisse américaine', 'quantity': 1000,
+     'unit_price': Decimal('45.0'), 'dimensions': '300x200x100', 'length_mm': 300, 'color': 'Kraft', 'grammage': 'BC',
+     'tva_rate': 19, 'is_cliche': False},
+    {'description': 'Caisse carton 400x300x150', 'designation': 'Caisse américaine', 'quantity': 500,
+     'unit_price': Decimal('60.0'), 'dimensions': '400x300x150', 'length_mm': 400, 'color': 'Blanc', 'grammage': 'BC',
+     'tva_rate': 19, 'is_cliche': True},
+]
+
+DOCUMENTS = {
+    'fiche PF': ('fill_finished_product_template', lambda i: {
+        'client': f'Client {i}', 'designation': 'Caisse américaine', 'quantity': 400 + i,
+        'dimensions': '300x200x100', 'production_date': '16/10/2026',
+    }),
+    'étiquette MP': ('fill_raw_material_label_template', lambda i: {
+        'client': f'Client {i}', 'arrival_date': '16/10/2026', 'quantity': 1200, 'designation': 'Plaque',
+        'plaque_dimensions': '320x220x40', 'caisse_dimensions': '300x200x100', 'bon_commande': f'BC{i:05d}',
+        'remaining_quantity': 300,
+    }),
+    'devis': ('fill_devis_template', lambda i: {
+        'reference': f'DV{i:05d}', 'client_name': f'Client {i}', 'issue_date': '16/10/2026',
+        'line_items': LINE_ITEMS, 'total_ht': Decimal('75000.0'), 'total_ttc': Decimal('89250.0'),
+    }),
+    'bon de commande': ('fill_supplier_order_template', lambda i: {
+        'reference': f'BC{i:05d}', 'supplier_name': 'Fournisseur', 'order_date': '16/10/2026',
+        'line_items': LINE_ITEMS, 'total_ht': Decimal('75000.0'),
+    }),
+    'facture': ('fill_invoice_template', lambda i: {
+        'invoice_number': f'FA{i:05d}', 'client_name': f'Client {i}', 'invoice_date': '16/10/2026',
+        'line_items': LINE_ITEMS, 'total_ht': Decimal('75000.0'), 'tva_amount': Decimal('14250.0'), 'total_ttc': Decimal('89250.0'),
+    }),
+}
+
+
+def count_temp_files() -> list[str]:
+    """Wrap the tempfile constructors so every temporary file created is recorded."""
+    created: list[str] = []
+    for name in ('mkstemp', 'mktemp', 'NamedTemporaryFile', 'TemporaryFile'):
+        original = getattr(tempfile, name)
+
+        def wrapper(*args, _original=original, _name=name, **kwargs):
+            created.append(_name)
+            return _original(*args, **kwargs)
+        setattr(tempfile, name, wrapper)
+    return created
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_DOCUMENTS
+    failures = 0
+    with tempfile.TemporaryDirectory() as work_dir:
+        output_dir = Path(work_dir)
+        created = count_temp_files()
+        filler = PDFFormFiller()
+        filler.output_dir = output_dir
+        for label, (method, make_data) in DOCUMENTS.items():
+            template_cache.clear()
+            parses_before = template_cache.parse_count
+            created.clear()
+            fill = getattr(filler, method)
+            timings = []
+            for i in range(n):
+                start = time.perf_counter()
+                fill(make_data(i), f'{method}_{i}.pdf')
+                timings.append((time.perf_counter() - start) * 1000)
+            parses = template_cache.parse_count - parses_before
+            temp_files = len(created)
+            print(f"{label:16s}: median {statistics.median(timings):6.2f} ms  max {max(timings):7.2f} ms  "
+                  f"template parses {parses}  temp files {temp_files}")
+            if parses != 1 or temp_files:
+                failures += 1
+            for path, cached in template_cache._templates.items():
+                original = PyPDF2.PdfReader(path).pages[0].extract_text()
+                if cached.reader.pages[0].extract_text() != original:
+                    print(f"FAIL: cached template {path.name} was modified")
+                    failures += 1
+    if failures:
+        print("FAIL")
+        return 1
+    print("OK: one parse per template, no temporary files, cached templates untouched")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
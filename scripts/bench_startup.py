@@ -0,0 +1,119 @@
+"""
+Startup time measurement for the main window.
+
+Each run starts a fresh interpreter (offscreen Qt platform) and measures:
+- import: importing ui.main_window
+- window: constructing MainWindow
+- first paint: until the window has painted once after show()
+- dashboard: until the dashboard data is displayed (the splash closes then)
+It also checks that the dialogs and the PDF libraries are not imported at
+startup (they load on first use), and reports the time to build each tab on
+its first display. The database is the one configured (DB_URL / .env).
+
+Usage: python scripts/bench_startup.py [runs]
+"""
+from __future__ import annotations
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / 'src'
+DEFAULT_RUNS = 5
+# Modules that must only be imported on first use
+LAZY_MODULES = ('reportlab', 'PyPDF2', 'pypdf', 'ui.dialogs', 'ui.widgets.archive_widget',
+                'services.pdf_form_filler', 'services.pdf_export_service')
+# Give up waiting for the dashboard after this many seconds
+DASHBOARD_TIMEOUT = 30
+
+
+def measure() -> dict:
+    """Run in the child interpreter: one cold startup, timings in milliseconds."""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    sys.path.insert(0, str(SRC_DIR))
+    from PyQt6.QtCore import QEvent, QObject, QThreadPool
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication(sys.argv)
+    timings: dict = {}
+
+    start = time.perf_counter()
+    from ui.main_window import MainWindow
+    timings['import'] = (time.perf_counter() - start) * 1000
+    timings['eager_modules'] = sorted({name for name in sys.modules
+                                       if name.startswith(LAZY_MODULES)})
+
+    start = time.perf_counter()
+    window = MainWindow()
+    timings['window'] = (time.perf_counter() - start) * 1000
+
+    events = {}
+
+    class PaintWatcher(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and 'paint' not in events:
+                events['paint'] = time.perf_counter()
+            return False
+
+    watcher = PaintWatcher()
+    window.installEventFilter(watcher)
+    window.dashboard.dataLoaded.connect(lambda: events.setdefault('dashboard', time.perf_counter()))
+    shown = time.perf_counter()
+    window.show()
+    deadline = shown + DASHBOARD_TIMEOUT
+    while ('paint' not in events or 'dashboard' not in events) and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    timings['first_paint'] = (events.get('paint', deadline) - start) * 1000
+    timings['dashboard'] = (events.get('dashboard', deadline) - start) * 1000
+
+    tabs = {}
+    for index in range(1, window.tab_widget.count()):
+        tab_start = time.perf_counter()
+        window.tab_widget.setCurrentIndex(index)
+        tabs[window.tab_widget.tabText(index)] = (time.perf_counter() - tab_start) * 1000
+    timings['tabs'] = tabs
+    # Let the background loads (and the ones their results trigger) finish before exiting
+    pool = QThreadPool.globalInstance()
+    while True:
+        pool.waitForDone()
+        app.processEvents()
+        if pool.activeThreadCount() == 0:
+            break
+    window.close()
+    return timings
+
+
+def main() -> int:
+    if '--child' in sys.argv:
+        print(json.dumps(measure()))
+        return 0
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, __file__, '--child'], env=env, cwd=SRC_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    for key, label in (('import', 'import ui.main_window'), ('window', 'MainWindow()'),
+                       ('first_paint', 'première peinture'), ('dashboard', 'tableau de bord prêt')):
+        values = [r[key] for r in results]
+        print(f"{label:24s}: median {statistics.median(values):7.1f} ms  max {max(values):7.1f} ms")
+    for name in results[0]['tabs']:
+        values = [r['tabs'][name] for r in results]
+        print(f"  onglet {name:32s}: première ouverture {statistics.median(values):7.1f} ms")
+
+    eager = sorted({name for r in results for name in r['eager_modules']})
+    if eager:
+        print(f"FAIL: imported at startup: {', '.join(eager)}")
+        return 1
+    print("OK: dialogs and PDF libraries are imported on first use")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Arrival allocation check.
+
+Fills an in-memory SQLite database with benchmarks/datagen.py, records a large
+arrival (sizes from open line items, more plaques than some sizes still wait
+for, one size nobody ordered) with services.arrival_allocation and asserts
+that:
+- quantities go to the line items of the oldest orders first (FIFO);
+- received totals, material deliveries and receptions match the allocation;
+- line item and order statuses agree with the received totals;
+- the statement count does not depend on the number of sizes.
+
+Usage: python scripts/check_arrival_allocation.py [sizes]
+"""
+from __future__ import annotations
+import random
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.pool import StaticPool
+from datagen import generate
+from models.orders import (
+    DeliveryStatus, MaterialDelivery, Reception, SupplierOrder, SupplierOrderLineItem, SupplierOrderStatus
+)
+from services.arrival_allocation import UNMATCHED_SUPPLIER_ORDER_ID, ArrivalLine, record_arrival
+from utils.instrumentation import install, report, reset, span
+
+UNORDERED = (9999, 9999, 999)
+
+
+def waiting_lines(session: Session) -> dict[tuple[int, int, int], list[SupplierOrderLineItem]]:
+    """Line items with quantity left, per size, in FIFO order."""
+    rows = session.scalars(
+        select(SupplierOrderLineItem).join(SupplierOrderLineItem.supplier_order)
+        .where(SupplierOrderLineItem.quantity > SupplierOrderLineItem.total_received_quantity)
+        .order_by(SupplierOrder.order_date, SupplierOrder.id, SupplierOrderLineItem.id)
+    ).all()
+    by_dims = defaultdict(list)
+    for line in rows:
+        by_dims[(line.plaque_width_mm, line.plaque_length_mm, line.plaque_flap_mm)].append(line)
+    return by_dims
+
+
+def record(engine, lines: list[ArrivalLine], name: str):
+    with Session(engine) as session:
+        with span(name):
+            result = record_arrival(session, lines)
+            session.commit()
+    return result
+
+
+def main() -> int:
+    sizes = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    install()
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    generate(engine, 1_000)
+    rng = random.Random(5)
+
+    with Session(engine) as session:
+        waiting = waiting_lines(session)
+        chosen = rng.sample(sorted(waiting), sizes)
+        lines, expected = [], {}
+        for i, dims in enumerate(chosen):
+            left = [line.quantity - line.total_received_quantity for line in waiting[dims]]
+            # Every third size brings more plaques than are still expected
+            quantity = sum(left) + 7 if i % 3 == 0 else max(1, sum(left) // 2)
+            lines.append(ArrivalLine(*dims, quantity))
+            for line, need in zip(waiting[dims], left):
+                applied = min(quantity, need)
+                if applied <= 0:
+                    break
+                expected[line.id] = (line.total_received_quantity + applied, applied)
+                quantity -= applied
+        lines.append(ArrivalLine(*UNORDERED, 12))
+        deliveries_before = session.scalar(select(func.count(MaterialDelivery.id)))
+        receptions_before = session.scalar(select(func.count(Reception.id)))
+
+    reset()
+    result = record(engine, lines, 'arrival')
+    assert {a.line_item_id: (a.received_after, a.quantity) for a in result.allocations} == expected
+    # The unordered size is received under UNMATCHED_SUPPLIER_ORDER_ID, not left over
+    assert set(result.unallocated) == {line.dims for i, line in enumerate(lines[:-1]) if i % 3 == 0}
+
+    with Session(engine) as session:
+        received = dict(session.execute(
+            select(SupplierOrderLineItem.id, SupplierOrderLineItem.total_received_quantity)
+            .where(SupplierOrderLineItem.id.in_(expected))
+        ).all())
+        assert received == {line_id: total for line_id, (total, _) in expected.items()}
+        deliveries = session.scalar(select(func.count(MaterialDelivery.id))) - deliveries_before
+        assert deliveries == len(result.allocations), deliveries
+        receptions = session.scalar(select(func.count(Reception.id))) - receptions_before
+        assert receptions == result.receptions, receptions
+        unordered = session.execute(select(Reception.supplier_order_id, Reception.quantity)
+                                    .where(Reception.plaque_width_mm == UNORDERED[0])).all()
+        assert unordered == [(UNMATCHED_SUPPLIER_ORDER_ID, 12)], unordered
+
+        orders = session.scalars(select(SupplierOrder).where(SupplierOrder.id.in_(result.order_statuses))
+                                 .options(selectinload(SupplierOrder.line_items))).all()
+        for order in orders:
+            for line in order.line_items:
+                status = (DeliveryStatus.COMPLETE if line.total_received_quantity >= line.quantity else
+                          DeliveryStatus.PARTIAL if line.total_received_quantity > 0 else DeliveryStatus.PENDING)
+                assert line.delivery_status is status, (line.id, line.delivery_status, status)
+            if all(line.delivery_status is DeliveryStatus.COMPLETE for line in order.line_items):
+                assert order.status is SupplierOrderStatus.COMPLETED, (order.id, order.status)
+            else:
+                assert order.status is SupplierOrderStatus.PARTIALLY_DELIVERED, (order.id, order.status)
+
+    # lines[0] is now fully received: left over, not received under UNMATCHED_SUPPLIER_ORDER_ID
+    small = record(engine, lines[:2] + [ArrivalLine(*UNORDERED, 1)], 'small_arrival')
+    assert small.unallocated.get(lines[0].dims) == lines[0].quantity, small.unallocated
+    with Session(engine) as session:
+        width, length, flap = lines[0].dims
+        unmatched = session.scalar(select(func.count(Reception.id)).where(
+            Reception.supplier_order_id == UNMATCHED_SUPPLIER_ORDER_ID, Reception.plaque_width_mm == width,
+            Reception.plaque_length_mm == length, Reception.plaque_flap_mm == flap))
+        assert unmatched == 0, unmatched
+    spans = report()['spans']
+    # The order UPDATE is skipped when no status changes
+    assert spans['arrival']['queries'] <= spans['small_arrival']['queries'] + 1, spans
+
+    print(f"{len(lines)} tailles, {result.deliveries} livraisons, {result.receptions} réceptions, "
+          f"{len(result.order_statuses)} commandes mises à jour")
+    print(f"{spans['arrival']['queries']} requêtes en {spans['arrival']['total_ms']:.1f} ms "
+          f"({spans['small_arrival']['queries']} pour 3 tailles)")
+    print("OK: FIFO allocation, bulk writes and statuses")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Batch delivery recording check.
+
+Fills an in-memory SQLite database with benchmarks/datagen.py and records the
+deliveries of whole supplier orders with
+DeliveryTrackingService.record_deliveries, then asserts that:
+- every line gets its own result, invalid lines (unknown line item, more than
+  the remaining quantity, counting earlier lines of the same batch) are
+  rejected without blocking the others;
+- received totals, material deliveries and line item / order statuses match;
+- the statement count does not depend on the number of lines.
+
+Usage: python scripts/check_delivery_recording.py
+"""
+from __future__ import annotations
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.pool import StaticPool
+from datagen import generate
+from models.orders import DeliveryStatus, MaterialDelivery, SupplierOrder, SupplierOrderLineItem, SupplierOrderStatus
+from services.delivery_tracking_service import DeliveryLine, DeliveryTrackingService
+from utils.instrumentation import install, report, reset, span
+
+UNKNOWN_LINE_ID = 10 ** 9
+
+
+def open_orders(session: Session, count: int) -> list[SupplierOrder]:
+    return session.scalars(
+        select(SupplierOrder).where(SupplierOrder.status == SupplierOrderStatus.ORDERED)
+        .options(selectinload(SupplierOrder.line_items)).order_by(SupplierOrder.id).limit(count)
+    ).all()
+
+
+def main() -> int:
+    install()
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    generate(engine, 1_000)
+
+    with Session(engine) as session:
+        orders = open_orders(session, 30)
+        # Orders 0-14 are delivered completely, the others by half
+        lines, expected = [], []
+        for i, order in enumerate(orders):
+            for line in order.line_items:
+                remaining = line.quantity - line.total_received_quantity
+                lines.append(DeliveryLine(line.id, remaining if i < 15 else remaining // 2, f'BL-{order.id}'))
+                expected.append(True)
+        first = orders[-1].line_items[0]
+        # Second half of the same line, then one plaque too many
+        lines.append(DeliveryLine(first.id, first.quantity - first.total_received_quantity
+                                  - (first.quantity - first.total_received_quantity) // 2))
+        lines.append(DeliveryLine(first.id, 1))
+        lines.append(DeliveryLine(UNKNOWN_LINE_ID, 5))
+        expected += [True, False, False]
+        deliveries_before = session.scalar(select(func.count(MaterialDelivery.id)))
+        order_ids = [order.id for order in orders]
+        single_line_id = open_orders(session, 31)[-1].line_items[0].id
+
+    reset()
+    with DeliveryTrackingService(Session(engine)) as service:
+        with span('record_deliveries'):
+            results = service.record_deliveries(lines)
+        with span('record_delivery'):
+            single = service.record_delivery(single_line_id, 1)
+    spans = report()['spans']
+
+    assert [ok for ok, _ in results] == expected, results
+    assert results[-2] == (False, "Cannot receive 1 items. Only 0 remaining."), results[-2]
+    assert results[-1] == (False, f"Line item {UNKNOWN_LINE_ID} not found"), results[-1]
+    assert single[0], single
+    # The order UPDATE is skipped when no status changes
+    assert spans['record_deliveries']['queries'] <= spans['record_delivery']['queries'] + 1, spans
+
+    with Session(engine) as session:
+        deliveries = session.scalar(select(func.count(MaterialDelivery.id))) - deliveries_before
+        assert deliveries == sum(expected) + 1, deliveries
+        orders = session.scalars(select(SupplierOrder).where(SupplierOrder.id.in_(order_ids))
+                                 .options(selectinload(SupplierOrder.line_items)).order_by(SupplierOrder.id)).all()
+        for i, order in enumerate(orders):
+            complete = all(line.total_received_quantity >= line.quantity for line in order.line_items)
+            assert complete or i >= 15, order.id
+            for line in order.line_items:
+                status = (DeliveryStatus.COMPLETE if line.total_received_quantity >= line.quantity else
+                          DeliveryStatus.PARTIAL if line.total_received_quantity > 0 else DeliveryStatus.PENDING)
+                assert line.delivery_status is status, (line.id, line.delivery_status, status)
+            if complete:
+                assert order.status is SupplierOrderStatus.COMPLETED, (order.id, order.status)
+            elif any(line.total_received_quantity for line in order.line_items):
+                assert order.status is SupplierOrderStatus.PARTIALLY_DELIVERED, (order.id, order.status)
+        assert session.get(SupplierOrderLineItem, first.id).delivery_status is DeliveryStatus.COMPLETE
+
+    print(f"{len(lines)} livraisons ({sum(expected)} acceptées) sur {len(order_ids)} commandes: "
+          f"{spans['record_deliveries']['queries']} requêtes en {spans['record_deliveries']['total_ms']:.1f} ms")
+    print(f"1 livraison: {spans['record_delivery']['queries']} requêtes")
+    print("OK: per-line results, bulk insert and statuses")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
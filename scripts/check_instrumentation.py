@@ -0,0 +1,73 @@
+"""
+Query instrumentation check.
+
+Runs a grid refresh and a deliberate N+1 loop inside named spans against an
+in-memory SQLite database, then asserts that:
+- every statement is attributed to the enclosing spans (nested spans included);
+- the N+1 loop is reported as a hotspot, the grid refresh is not;
+- statements over SLOW_QUERY_MS reach the slow-query log sink.
+Prints the report summary; pass a path to also export it as JSON.
+
+Usage: python scripts/check_instrumentation.py [report.json]
+"""
+from __future__ import annotations
+import os
+import sys
+from pathlib import Path
+
+# Every statement is "slow", so the slow-query sink receives them all
+os.environ['SLOW_QUERY_MS'] = '0'
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from loguru import logger
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from models import Base, Client
+from services.grid_data_loader import GRID_TABLE_DEPENDENCIES, GridDataLoader
+from utils.instrumentation import N_PLUS_ONE_THRESHOLD, export_report, install, report, span
+
+CLIENTS = 30
+
+
+def main() -> int:
+    install()
+    slow_messages: list[str] = []
+    logger.remove()
+    logger.add(slow_messages.append, filter=lambda record: record['extra'].get('slow_query', False))
+
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(Client(name=f'Client {i}') for i in range(CLIENTS))
+        session.commit()
+
+    with Session(engine) as session:
+        with span('refresh_all'):
+            GridDataLoader(session).load(set(GRID_TABLE_DEPENDENCIES))
+        with span('action'):
+            with span('action.n_plus_one'):
+                for client_id in range(1, CLIENTS + 1):
+                    session.get(Client, client_id)
+                    session.expunge_all()
+
+    summary = report()
+    spans = summary['spans']
+    hotspots = {row['span'] for row in summary['n_plus_one']}
+    assert spans['action']['queries'] == spans['action.n_plus_one']['queries'] == CLIENTS, spans
+    assert spans['refresh_all']['queries'] > 0, spans
+    assert hotspots == {'action', 'action.n_plus_one'}, summary['n_plus_one']
+    assert len(slow_messages) >= CLIENTS, len(slow_messages)
+
+    for name, row in spans.items():
+        print(f"{name:20s}: {row['calls']} appel(s), {row['total_ms']:8.2f} ms, {row['queries']:3d} requêtes")
+    for row in summary['n_plus_one']:
+        print(f"N+1 [{row['span']}] x{row['executions']}: {row['statement'][:80]}")
+    if len(sys.argv) > 1:
+        print(f"Rapport: {export_report(sys.argv[1])}")
+    print(f"OK: spans, N+1 hotspots (>= {N_PLUS_ONE_THRESHOLD} executions) and slow-query log")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
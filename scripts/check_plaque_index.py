@@ -0,0 +1,84 @@
+"""
+Plaque dimension index check.
+
+Fills an in-memory SQLite database with benchmarks/datagen.py and asserts
+that PlaqueIndex answers the same as the former per-entry scan of every open
+supplier order:
+- within_tolerance() returns the line items within ±10/±10/±5 mm, for plaques
+  taken from the orders (and shifted around the tolerance edges) and for
+  plaques matching nothing;
+- the open orders index is built with a single query.
+
+Usage: python scripts/check_plaque_index.py [scale]
+"""
+from __future__ import annotations
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.pool import StaticPool
+from datagen import generate
+from models.orders import SupplierOrder
+from services.plaque_index import FLAP_TOLERANCE, LENGTH_TOLERANCE, OPEN_ORDER_STATUSES, WIDTH_TOLERANCE, PlaqueIndex
+from utils.instrumentation import install, report, reset, span
+
+LOOKUPS = 500
+
+
+def brute_force(orders, width: int, length: int, flap: int) -> list[int]:
+    return sorted(
+        line_item.id for order in orders for line_item in order.line_items
+        if abs(line_item.plaque_width_mm - width) <= WIDTH_TOLERANCE
+        and abs(line_item.plaque_length_mm - length) <= LENGTH_TOLERANCE
+        and abs(line_item.plaque_flap_mm - flap) <= FLAP_TOLERANCE
+    )
+
+
+def main() -> int:
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    install()
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    generate(engine, scale)
+    rng = random.Random(3)
+
+    with Session(engine) as session:
+        reset()
+        with span('index'):
+            start = time.perf_counter()
+            index = PlaqueIndex.load_open_orders(session)
+            load_ms = (time.perf_counter() - start) * 1000
+        assert report()['spans']['index']['queries'] == 1, report()['spans']
+
+        orders = session.scalars(select(SupplierOrder).where(SupplierOrder.status.in_(OPEN_ORDER_STATUSES))
+                                 .options(selectinload(SupplierOrder.line_items))).all()
+        plaques = [(li.plaque_width_mm, li.plaque_length_mm, li.plaque_flap_mm)
+                   for order in orders for li in order.line_items]
+        assert len(index) == len(plaques), (len(index), len(plaques))
+        lookups = [(w + rng.randint(-12, 12), l + rng.randint(-12, 12), f + rng.randint(-6, 6))
+                   for w, l, f in rng.sample(plaques, min(LOOKUPS, len(plaques)))]
+        lookups += [(7, 7, 1), (9999, 9999, 999)]
+
+        matched = 0
+        lookup_ms = 0.0
+        for dims in lookups:
+            start = time.perf_counter()
+            found = [li.id for li in index.within_tolerance(*dims)]
+            lookup_ms += (time.perf_counter() - start) * 1000
+            assert sorted(found) == brute_force(orders, *dims), dims
+            matched += bool(found)
+
+    print(f"{len(index)} lignes ouvertes indexées en {load_ms:.1f} ms (1 requête)")
+    print(f"{len(lookups)} recherches ({matched} avec correspondance) en {lookup_ms:.1f} ms")
+    print("OK: tolerance lookups match the full scan")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
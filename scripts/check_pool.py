@@ -0,0 +1,108 @@
+"""
+Connection pool and unit-of-work check.
+
+Runs against a temporary SQLite database with a small pool and asserts that:
+- session_scope() commits on success, rolls back on error and always closes;
+- a checkout that finds the pool exhausted is counted as a wait, and as a
+  timeout when no connection is freed within DB_POOL_TIMEOUT;
+- a session dropped without close() is counted as a leak;
+- a connection idle for longer than DB_POOL_IDLE_CHECK is checked before use,
+  and replaced when it no longer answers.
+Prints pool_stats() at the end.
+
+Usage: python scripts/check_pool.py
+"""
+from __future__ import annotations
+import gc
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+IDLE_CHECK = 1
+_tmp_dir = tempfile.mkdtemp(prefix='pool_check_')
+os.environ.update(
+    DB_URL=f"sqlite:///{Path(_tmp_dir) / 'pool.db'}",
+    DB_POOL_SIZE='2', DB_MAX_OVERFLOW='0', DB_POOL_TIMEOUT='1', DB_POOL_IDLE_CHECK=str(IDLE_CHECK),
+)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from config.database import SessionLocal, get_engine, pool_stats, session_scope
+
+
+def check_session_scope() -> None:
+    with session_scope() as session:
+        session.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        session.execute(text("INSERT INTO items (name) VALUES ('kept')"))
+    try:
+        with session_scope() as session:
+            session.execute(text("INSERT INTO items (name) VALUES ('rolled back')"))
+            raise RuntimeError('abort')
+    except RuntimeError:
+        pass
+    with session_scope() as session:
+        names = session.execute(text("SELECT name FROM items")).scalars().all()
+    assert names == ['kept'], names
+    assert pool_stats()['checked_out'] == 0, pool_stats()
+
+
+def check_waits_and_timeouts() -> None:
+    engine = get_engine()
+    held = [engine.connect() for _ in range(2)]
+    start = pool_stats()
+    try:
+        with engine.connect():
+            pass
+        raise AssertionError('checkout should have timed out')
+    except PoolTimeout:
+        pass
+    # Freed while the next checkout waits
+    threading.Timer(0.2, held.pop().close).start()
+    with engine.connect():
+        pass
+    held.pop().close()
+    stats = pool_stats()
+    assert stats['timeouts'] - start['timeouts'] == 1, stats
+    assert stats['waits'] - start['waits'] == 2, stats
+    assert stats['wait_max_ms'] >= 150, stats
+
+
+def check_leak() -> None:
+    start = pool_stats()['leaks']
+    session = SessionLocal.session_factory()
+    session.execute(text("SELECT 1"))
+    del session
+    gc.collect()
+    assert pool_stats()['leaks'] - start == 1, pool_stats()
+
+
+def check_idle() -> None:
+    engine = get_engine()
+    start = pool_stats()
+    # Kill the connection behind the pool's back while it is idle
+    engine.pool._pool.queue[0].dbapi_connection.close()
+    time.sleep(IDLE_CHECK + 0.2)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM items")).scalar() == 1
+    stats = pool_stats()
+    assert stats['idle_checks'] > start['idle_checks'], stats
+    assert stats['stale_replaced'] - start['stale_replaced'] == 1, stats
+
+
+def main() -> int:
+    check_session_scope()
+    check_waits_and_timeouts()
+    check_leak()
+    check_idle()
+    for name, value in pool_stats().items():
+        print(f"{name:18s}: {value}")
+    print("OK: session_scope, waits, timeouts, leaks and idle checks are tracked")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Reference-data cache check.
+
+Runs against a temporary SQLite database and asserts that:
+- once loaded, the client / supplier lists are served without any query;
+- an ORM commit creating, updating or deleting a client / supplier
+  invalidates its list, a rolled back one does not;
+- a change the ORM events cannot see (raw SQL, another workstation) is picked
+  up by the version check once the revalidation delay is over;
+- a version check with unchanged marks reloads nothing.
+
+Usage: python scripts/check_reference_data.py
+"""
+from __future__ import annotations
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_tmp_dir = tempfile.mkdtemp(prefix='reference_check_')
+os.environ['DB_URL'] = f"sqlite:///{Path(_tmp_dir) / 'reference.db'}"
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from sqlalchemy import text
+from config.database import get_engine, session_scope
+from models import Base, Client, Supplier
+from services.reference_data import reference_data
+from utils.instrumentation import report, reset, span
+
+REVALIDATE = 0.5
+
+
+def queries(action) -> tuple[object, int]:
+    reset()
+    with span('action'):
+        result = action()
+    return result, report()['spans']['action']['queries']
+
+
+def names(records) -> list[str]:
+    return [record.name for record in records]
+
+
+def main() -> int:
+    Base.metadata.create_all(get_engine())
+    reference_data.revalidate_seconds = REVALIDATE
+    with session_scope() as session:
+        session.add_all([Client(name='Alpha'), Client(name='Beta'), Supplier(name='Carton Plus')])
+
+    clients, count = queries(reference_data.clients)
+    assert names(clients) == ['Alpha', 'Beta'] and count > 0, (clients, count)
+    suppliers, count = queries(reference_data.suppliers)
+    assert names(suppliers) == ['Carton Plus'] and count == 0, count
+    _, count = queries(reference_data.clients)
+    assert count == 0, count
+
+    # ORM writes invalidate the list they touch
+    with session_scope() as session:
+        session.add(Client(name='Gamma'))
+    assert names(reference_data.clients()) == ['Alpha', 'Beta', 'Gamma']
+    _, count = queries(reference_data.suppliers)
+    assert count == 0, count
+    with session_scope() as session:
+        session.query(Client).filter_by(name='Beta').one().name = 'Beta SARL'
+    assert names(reference_data.clients()) == ['Alpha', 'Beta SARL', 'Gamma']
+    with session_scope() as session:
+        session.delete(session.query(Supplier).one())
+    assert reference_data.suppliers() == ()
+    try:
+        with session_scope() as session:
+            session.add(Supplier(name='Annulé'))
+            session.flush()
+            raise RuntimeError('abort')
+    except RuntimeError:
+        pass
+    _, count = queries(reference_data.suppliers)
+    assert count == 0, count
+
+    # Raw SQL bypasses the ORM events: seen after the revalidation delay
+    with get_engine().begin() as conn:
+        conn.execute(text("INSERT INTO clients (name) VALUES ('Delta')"))
+    assert 'Delta' not in names(reference_data.clients())
+    time.sleep(REVALIDATE + 0.1)
+    assert names(reference_data.clients())[-1] == 'Delta'
+
+    # Marks unchanged (and older than their one second resolution): nothing reloaded
+    time.sleep(1.1)
+    with session_scope() as session:
+        reference_data.sync(session)
+        reloaded = reference_data.sync(session)
+    assert reloaded == set(), reloaded
+
+    print(f"clients: {', '.join(names(reference_data.clients()))}")
+    print("OK: cached lists, ORM invalidation and version check")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
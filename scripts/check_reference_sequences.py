@@ -0,0 +1,82 @@
+"""
+Concurrency check for ReferenceGenerator sequence allocation.
+
+Spawns many threads generating references for the same document type, one
+at a time or by reserved blocks, and asserts that no reference is handed out
+twice and that numbering continues after the references already stored in
+the database.
+
+Runs against a temporary SQLite file by default; pass a SQLAlchemy URL to
+check another database (e.g. a scratch MySQL schema) instead:
+
+Usage: python scripts/check_reference_sequences.py [DB_URL]
+"""
+from __future__ import annotations
+import os
+import sys
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+THREADS = 16
+PER_THREAD = 25
+# Odd threads reserve their references in blocks of this size
+BLOCK_SIZE = 5
+# Reference stored before the first allocation; numbering must continue after it
+EXISTING_REFERENCE = 'DV041'
+
+
+def main() -> int:
+    tmp_dir = None
+    if len(sys.argv) > 1:
+        os.environ['DB_URL'] = sys.argv[1]
+    else:
+        tmp_dir = tempfile.TemporaryDirectory()
+        os.environ['DB_URL'] = f"sqlite:///{Path(tmp_dir.name) / 'sequences.db'}"
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+    from sqlalchemy import delete
+    from config.database import SessionLocal, engine
+    from models import Base, Client, Quotation, ReferenceSequence
+    from utils.reference_generator import ReferenceGenerator
+
+    Base.metadata.create_all(engine)
+    with SessionLocal() as session:
+        session.execute(delete(ReferenceSequence).where(ReferenceSequence.prefix == 'DV'))
+        client = Client(name='Client séquence')
+        session.add(client)
+        session.flush()
+        session.add(Quotation(client_id=client.id, reference=EXISTING_REFERENCE, notes=''))
+        session.commit()
+    SessionLocal.remove()
+
+    def worker(n: int) -> list[str]:
+        if n % 2:
+            blocks = [ReferenceGenerator.reserve('quotation', BLOCK_SIZE) for _ in range(PER_THREAD // BLOCK_SIZE)]
+            return [ref for block in blocks for ref in block]
+        return [ReferenceGenerator.generate('quotation') for _ in range(PER_THREAD)]
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        references = [ref for batch in pool.map(worker, range(THREADS)) for ref in batch]
+
+    expected = THREADS * PER_THREAD
+    duplicates = [ref for ref, n in Counter(references).items() if n > 1]
+    numbers = sorted(int(ref[2:]) for ref in references)
+    first = int(EXISTING_REFERENCE[2:]) + 1
+    print(f"{len(references)} references from {THREADS} threads: {references[0]} .. {max(references, key=lambda r: int(r[2:]))}")
+    engine.dispose()
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+    if duplicates:
+        print(f"FAIL: duplicate references {duplicates[:10]}")
+        return 1
+    if numbers != list(range(first, first + expected)):
+        print(f"FAIL: expected {first}..{first + expected - 1} without gaps")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
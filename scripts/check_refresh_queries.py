@@ -0,0 +1,100 @@
+"""
+Query-count regression check for the main window grid loader.
+
+Seeds an in-memory SQLite database at two different sizes and asserts that
+``GridDataLoader.load_all`` issues the same, bounded number of queries for
+both: the refresh must not grow with the number of rows (no N+1 lookups).
+
+Usage: python scripts/check_refresh_queries.py
+"""
+from __future__ import annotations
+import sys
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from models import Base, Client, Supplier, Quotation, QuotationLineItem, ClientOrder, SupplierOrder, SupplierOrderLineItem, Reception, ProductionBatch
+from models.orders import SupplierOrderStatus
+from services.grid_data_loader import GridDataLoader
+
+# Upper bound on the number of SELECTs issued by one full refresh
+MAX_REFRESH_QUERIES = 20
+
+
+def seed(session: Session, n: int) -> None:
+    """Populate every table read by the grid loader with ``n`` rows per entity."""
+    statuses = list(SupplierOrderStatus)
+    supplier = Supplier(name='Fournisseur Test', phone='0550000000')
+    session.add(supplier)
+    for i in range(n):
+        client = Client(name=f'Client {i}', email=f'client{i}@example.com')
+        session.add(client)
+        session.flush()
+
+        quotation = Quotation(client_id=client.id, reference=f'DV{i:05d}', notes='', total_amount=Decimal('100'))
+        session.add(quotation)
+        session.flush()
+        for line in range(3):
+            session.add(QuotationLineItem(
+                quotation_id=quotation.id, line_number=line + 1, description=f'Caisse {i}-{line}',
+                quantity='1000', length_mm=300, width_mm=200, height_mm=100 + line, cardboard_type='BC'))
+
+        supplier_order = SupplierOrder(
+            supplier_id=supplier.id, reference=f'BC{i:05d}', bon_commande_ref=f'BC{i:05d}',
+            status=statuses[i % len(statuses)], notes='', total_amount=Decimal('50'), order_date=date(2025, 1, 1))
+        session.add(supplier_order)
+        session.flush()
+        for line in range(2):
+            session.add(SupplierOrderLineItem(
+                supplier_order_id=supplier_order.id, client_id=client.id, line_number=line + 1, code_article=f'A{i}',
+                caisse_length_mm=300, caisse_width_mm=200, caisse_height_mm=100,
+                plaque_width_mm=500, plaque_length_mm=1000, plaque_flap_mm=50 + line,
+                prix_uttc_plaque=Decimal('10'), quantity=100))
+
+        client_order = ClientOrder(
+            client_id=client.id, quotation_id=quotation.id, supplier_order_id=supplier_order.id,
+            reference=f'CM{i:05d}', notes='')
+        session.add(client_order)
+        session.flush()
+
+        session.add(Reception(supplier_order_id=supplier_order.id, quantity=50, notes='Arrivée matière: 500x1000x50mm'))
+        session.add(ProductionBatch(client_order_id=client_order.id, batch_code=f'PD{i:05d}', quantity=10,
+                                    production_date=date(2025, 2, 1)))
+    session.commit()
+
+
+def count_refresh_queries(n: int) -> int:
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    Base.metadata.create_all(engine)
+    with Session(engine, expire_on_commit=False) as session:
+        seed(session, n)
+
+    statements: list[str] = []
+    event.listen(engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+    with Session(engine) as session:
+        snapshot = GridDataLoader(session).load_all()
+    assert len(snapshot.quotations.rows) == n, 'every seeded devis should be listed'
+    assert len(snapshot.production.rows) > 0, 'production batches should be listed'
+    return len(statements)
+
+
+def main() -> int:
+    small, large = count_refresh_queries(5), count_refresh_queries(200)
+    print(f"Refresh queries: {small} for 5 rows/entity, {large} for 200 rows/entity")
+    if small != large:
+        print("FAIL: query count grows with the number of rows (N+1 lookup)")
+        return 1
+    if large > MAX_REFRESH_QUERIES:
+        print(f"FAIL: {large} queries exceeds the budget of {MAX_REFRESH_QUERIES}")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
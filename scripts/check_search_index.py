@@ -0,0 +1,124 @@
+"""
+Global search index check.
+
+Fills an in-memory SQLite database with benchmarks/datagen.py (bulk inserts,
+no document yet), indexes it with search_index.catch_up and asserts that:
+- every devis, commande MP, réception, lot, client and fournisseur has its
+  document, and a search is a single query;
+- references, names, material references and dimension tokens are found, and
+  FTS5 finds what the LIKE fallback finds;
+- ORM writes keep the documents current in the same transaction: new devis,
+  renamed client and fournisseur (documents quoting them included), archived
+  and deleted devis, rolled back changes;
+- the receptions bulk inserted by an arrival are indexed.
+
+Usage: python scripts/check_search_index.py
+"""
+from __future__ import annotations
+import sys
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from datagen import generate
+from models import Client, ProductionBatch, Quotation, QuotationLineItem, Reception, SearchDocument, Supplier, SupplierOrder
+from services.arrival_allocation import ArrivalLine, record_arrival
+from services.search_index import catch_up, install as install_search_index, search
+from utils.instrumentation import install, report, reset, span
+
+UNORDERED = (9991, 9992, 993)
+
+
+def found(session: Session, text: str, entity: str, entity_id: int, mode: str | None = None) -> bool:
+    return any(hit.entity == entity and hit.entity_id == entity_id for hit in search(session, text, limit=1_000, mode=mode))
+
+
+def main() -> int:
+    install()
+    install_search_index()
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    generate(engine, 1_000)
+
+    with Session(engine) as session:
+        added = catch_up(session)
+        session.commit()
+        expected = sum(session.scalar(select(func.count(model.id))) for model in
+                       (Quotation, SupplierOrder, Reception, ProductionBatch, Client, Supplier))
+        assert added == expected == session.scalar(select(func.count(SearchDocument.id))), (added, expected)
+        assert catch_up(session) == 0
+
+        quotation = session.scalars(select(Quotation).where(Quotation.archived_at.is_(None)).limit(1)).one()
+        line = quotation.line_items[0]
+        dims = f"{line.length_mm}×{line.width_mm}×{line.height_mm}"
+        order = session.scalars(select(SupplierOrder).limit(1)).one()
+        # The first search on an engine also detects its full-text support
+        search(session, order.bon_commande_ref)
+        reset()
+        with span('search'):
+            hits = search(session, quotation.reference)
+        assert report()['spans']['search']['queries'] == 1, report()['spans']
+        assert (hits[0].entity, hits[0].entity_id) == ('quotation', quotation.id), hits[:3]
+        assert found(session, f"{quotation.client.name} {dims}", 'quotation', quotation.id)
+        assert found(session, line.material_reference, 'quotation', quotation.id)
+        assert found(session, order.bon_commande_ref, 'supplier_order', order.id)
+        assert found(session, order.supplier.name, 'supplier_order', order.id)
+        for text in (quotation.client.name, dims, line.material_reference, order.supplier.name, 'caisse 500x'):
+            fts = {(h.entity, h.entity_id) for h in search(session, text, limit=10_000, mode='fts5')}
+            like = {(h.entity, h.entity_id) for h in search(session, text, limit=10_000, mode='like')}
+            assert fts and fts <= like, text
+
+        # ORM writes, indexed on flush
+        new_quotation = Quotation(client_id=quotation.client_id, reference='DV-RECHERCHE-1', notes='Urgent')
+        new_quotation.line_items.append(QuotationLineItem(
+            line_number=1, description='Caisse fruits export', quantity='100',
+            length_mm=612, width_mm=412, height_mm=233, material_reference='MR-TEST'))
+        session.add(new_quotation)
+        session.commit()
+        assert found(session, 'fruits 612x412x233', 'quotation', new_quotation.id)
+
+        client = quotation.client
+        client.name = 'Emballages Zénith'
+        order.supplier.name = 'Cartonnerie Horizon'
+        session.commit()
+        assert found(session, 'zenith', 'client', client.id)
+        assert found(session, 'zenith', 'quotation', quotation.id)
+        assert found(session, 'horizon', 'supplier_order', order.id)
+        receptions = session.scalars(select(Reception.id).where(Reception.supplier_order_id == order.id)).all()
+        assert all(found(session, 'horizon', 'reception', reception_id) for reception_id in receptions)
+
+        quotation.archived_at = datetime.now()
+        session.commit()
+        hit = next(h for h in search(session, quotation.reference) if h.entity_id == quotation.id)
+        assert hit.archived, hit
+
+        session.delete(new_quotation)
+        session.flush()
+        assert not found(session, 'DV-RECHERCHE-1', 'quotation', new_quotation.id)
+        session.rollback()
+        assert found(session, 'DV-RECHERCHE-1', 'quotation', new_quotation.id)
+        session.delete(session.get(Quotation, new_quotation.id))
+        session.commit()
+        assert not search(session, 'DV-RECHERCHE-1')
+
+        # Bulk inserted receptions
+        result = record_arrival(session, [ArrivalLine(*UNORDERED, 5)])
+        session.commit()
+        assert result.receptions == 1
+        hits = search(session, 'x'.join(map(str, UNORDERED)))
+        assert [h.entity for h in hits] == ['reception'], hits
+        assert catch_up(session) == 0
+
+    print(f"{added} documents indexés")
+    print(f"recherche: {report()['spans']['search']['total_ms']:.1f} ms")
+    print("OK: full-text search and index maintenance on write")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,71 +1,212 @@
 from __future__ import annotations
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.orm import Session, sessionmaker, scoped_session
 from .settings import settings
+from database.migrations import ARCHIVABLE_TABLES, ARCHIVED_AT_TYPE, backfill_archived_at, backfill_reception_columns
+from database.pool import InstrumentedQueuePool, instrument_engine, snapshot
+from services.search_index import install as install_search_index
+from utils.instrumentation import install as install_query_instrumentation
+from contextlib import contextmanager
 from loguru import logger
-from sqlalchemy.exc import OperationalError
 from pathlib import Path
+from typing import Iterator
 
-# Initialize engine with fallback logic
-_engine = None
-try:
-    _engine = create_engine(
-        settings.dsn(),
-        echo=settings.db_echo,
-        pool_pre_ping=True,
-        pool_recycle=3600,
-        future=True
-    )
-    with _engine.connect() as _conn:
-        _conn.execute(text('SELECT 1'))
-    engine = _engine
-except OperationalError as e:
-    logger.error("Primary DB connection failed ({}). Falling back to SQLite.", e)
-    fallback_path = (Path(settings.reports_dir).parent / 'world_embalage_fallback.db').resolve()
-    engine = create_engine(f'sqlite:///{fallback_path}', future=True)
-    logger.warning("Using fallback SQLite database at {}", fallback_path)
+# Bump when a runtime schema guard below is added or changed, so every database runs them again
+SCHEMA_GUARDS_VERSION = 2
+
+
+def _create_engine(url: str):
+    """Engine with the pool configured from settings and instrumented (see database.pool)."""
+    db_url = make_url(url)
+    options = {}
+    if db_url.get_backend_name() in ('mysql', 'mariadb'):
+        # An unreachable server fails after this delay instead of the OS TCP timeout
+        options['connect_args'] = {'connect_timeout': settings.db_connect_timeout}
+    if not (db_url.get_backend_name() == 'sqlite' and db_url.database in (None, '', ':memory:')):
+        # In-memory SQLite keeps its single-connection pool
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    new_engine = create_engine(db_url, echo=settings.db_echo, future=True, **options)
+    instrument_engine(new_engine, settings.db_pool_idle_check)
+    return new_engine
+
+
+# Statement timings and the slow-query log, for every engine
+install_query_instrumentation()
+# Global search documents kept current by every ORM flush, whichever code path writes
+install_search_index()
+
+# No connection is opened at import: database.connection.bootstrap_db() checks the
+# server once at startup and switches to the SQLite fallback when it does not answer
+engine = _create_engine(settings.dsn())
 
 SessionLocal = scoped_session(sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True))
 
 
-def _ensure_client_activity_column() -> None:
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """Unit of work on a session of its own: commit on success, rollback on error, always closed.
+
+    Usage:
+        with session_scope() as session:
+            session.add(...)
+    """
+    session = SessionLocal.session_factory()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def pool_stats() -> dict:
+    """Connection pool counters and current state, for diagnostics."""
+    pool = engine.pool
+    stats = snapshot(pool).as_dict()
+    stats['status'] = pool.status()
+    if stats['waits']:
+        stats['wait_avg_ms'] = stats['wait_total_ms'] / stats['waits']
+    return stats
+
+
+def get_engine():
+    """Engine in use (the primary one, or the SQLite fallback after use_fallback_engine)."""
+    return engine
+
+
+def use_fallback_engine() -> Path:
+    """Bind the engine and the sessions to the local SQLite fallback database."""
+    global engine
+    fallback_path = (Path(settings.reports_dir).parent / 'world_embalage_fallback.db').resolve()
+    engine.dispose()
+    engine = _create_engine(f'sqlite:///{fallback_path}')
+    SessionLocal.remove()
+    SessionLocal.configure(bind=engine)
+    logger.warning("Using fallback SQLite database at {}", fallback_path)
+    return fallback_path
+
+
+def _ensure_client_activity_column() -> bool:
     """Ensure the optional 'activity' column exists on the clients table.
     This guards against environments where Alembic migrations haven't been applied yet.
-    Safe to run multiple times.
+    Safe to run multiple times. Returns False when the guard failed.
     """
     try:
-        dialect = engine.dialect.name.lower()
-        with engine.connect() as conn:
-            if dialect == 'sqlite':
-                # Inspect columns via PRAGMA
-                res = conn.execute(text("PRAGMA table_info(clients)"))
-                cols = {row[1] for row in res.fetchall()}  # row[1] is the column name
-                if 'activity' not in cols:
-                    conn.execute(text("ALTER TABLE clients ADD COLUMN activity VARCHAR(128)"))
-            elif dialect in ('mysql', 'mariadb'):
-                # Check INFORMATION_SCHEMA
-                check_sql = (
-                    "SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS "
-                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'clients' AND COLUMN_NAME = 'activity'"
-                )
-                exists = conn.execute(text(check_sql)).scalar() or 0
-                if int(exists) == 0:
-                    # IF NOT EXISTS is supported in MySQL 8, but use defensive check above for broad compatibility
-                    conn.execute(text("ALTER TABLE clients ADD COLUMN activity VARCHAR(128) NULL"))
-            # else: other dialects not used in this app; skip
+        with engine.begin() as conn:
+            cols = _table_columns(conn, 'clients')
+            # Fresh database (or unsupported dialect): create_all will build the table with the column
+            if cols and 'activity' not in cols:
+                null_sql = ' NULL' if conn.dialect.name.lower() in ('mysql', 'mariadb') else ''
+                conn.execute(text(f"ALTER TABLE clients ADD COLUMN activity VARCHAR(128){null_sql}"))
     except Exception as exc:
         # Non-fatal: log and continue
         try:
             logger.warning("Schema guard skipped or failed: {}", exc)
         except Exception:
             pass
+        return False
+    return True
+
+
+def _table_columns(conn, table: str) -> set[str]:
+    """Column names of a table (empty when the table does not exist yet)."""
+    dialect = conn.dialect.name.lower()
+    if dialect == 'sqlite':
+        return {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})")).fetchall()}
+    if dialect in ('mysql', 'mariadb'):
+        return {row[0] for row in conn.execute(text(
+            "SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+        ), {'table': table}).fetchall()}
+    return set()
+
+
+# Structured reception columns, previously only encoded in notes ("Arrivée matière: 100x200x50mm")
+_RECEPTION_COLUMNS = {
+    'plaque_width_mm': 'INTEGER NULL',
+    'plaque_length_mm': 'INTEGER NULL',
+    'plaque_flap_mm': 'INTEGER NULL',
+    'client_id': 'INTEGER NULL',
+}
+
+
+def _ensure_reception_columns() -> bool:
+    """Ensure the structured dimension/client columns exist on the receptions table,
+    and backfill them from the notes when they are added (same conversion as the
+    Alembic revision, see database.migrations).
+    Same purpose as _ensure_client_activity_column; safe to run multiple times.
+    """
+    try:
+        with engine.begin() as conn:
+            cols = _table_columns(conn, 'receptions')
+            # Fresh database (or unsupported dialect): create_all will build the table with the columns
+            if not cols:
+                return True
+            missing = [name for name in _RECEPTION_COLUMNS if name not in cols]
+            if not missing:
+                return True
+            for name in missing:
+                conn.execute(text(f"ALTER TABLE receptions ADD COLUMN {name} {_RECEPTION_COLUMNS[name]}"))
+            conn.execute(text(
+                "CREATE INDEX ix_receptions_plaque_dims_client "
+                "ON receptions (plaque_width_mm, plaque_length_mm, plaque_flap_mm, client_id)"
+            ))
+            conn.execute(text("CREATE INDEX ix_receptions_client_id ON receptions (client_id)"))
+            filled = backfill_reception_columns(conn)
+            logger.info("Colonnes structurées ajoutées à receptions ({} réceptions renseignées)", filled)
+    except Exception as exc:
+        try:
+            logger.warning("Schema guard skipped or failed: {}", exc)
+        except Exception:
+            pass
+        return False
+    return True
+
+
+def _ensure_archived_at_columns() -> bool:
+    """Ensure the archived_at column exists on every archivable table, and convert
+    rows still archived with the '[ARCHIVED]' prefix when it is added (same
+    conversion as the Alembic revision, see database.migrations).
+    Same purpose as _ensure_client_activity_column; safe to run multiple times.
+    """
+    try:
+        with engine.begin() as conn:
+            for table, column in ARCHIVABLE_TABLES.items():
+                cols = _table_columns(conn, table)
+                if not cols or 'archived_at' in cols:
+                    continue
+                # Same type as the Alembic revision and the models, compiled for this dialect
+                type_sql = ARCHIVED_AT_TYPE.compile(dialect=conn.dialect)
+                null_sql = ' NULL' if conn.dialect.name.lower() in ('mysql', 'mariadb') else ''
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN archived_at {type_sql}{null_sql}"))
+                conn.execute(text(f"CREATE INDEX ix_{table}_archived_at ON {table} (archived_at)"))
+                converted = backfill_archived_at(conn, table, column)
+                logger.info("Colonne archived_at ajoutée à {} ({} ligne(s) archivée(s) convertie(s))", table, converted)
+    except Exception as exc:
+        try:
+            logger.warning("Schema guard skipped or failed: {}", exc)
+        except Exception:
+            pass
+        return False
+    return True
 
 
-# Best-effort schema guard at import time (after engine is ready)
-try:
-    _ensure_client_activity_column()
-except Exception:
-    pass
+def run_schema_guards() -> bool:
+    """Run every best-effort schema guard; True when all of them succeeded."""
+    results = [
+        _ensure_client_activity_column(),
+        _ensure_reception_columns(),
+        _ensure_archived_at_columns(),
+    ]
+    return all(results)
 
 
 def get_session():
@@ -80,4 +221,4 @@ def get_session():
     finally:
         db.close()
 
-__all__ = ['engine', 'SessionLocal', 'get_session']
+__all__ = ['engine', 'SessionLocal', 'session_scope', 'pool_stats', 'get_session', 'get_engine', 'use_fallback_engine', 'run_schema_guards', 'SCHEMA_GUARDS_VERSION']
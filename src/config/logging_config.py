@@ -8,6 +8,7 @@ LOG_DIR = Path(__file__).resolve().parents[2] / 'logs'
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 
 LOG_FILE = LOG_DIR / 'app.log'
+SLOW_QUERY_LOG_FILE = LOG_DIR / 'slow_queries.log'
 
 # Remove default handler to avoid duplicate logs
 logger.remove()
@@ -20,4 +21,9 @@ logger.add(sys.stderr, level='DEBUG', enqueue=True, colorize=True,
 logger.add(LOG_FILE, level='INFO', rotation='10 MB', retention='30 days', enqueue=True,
            format='{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}')
 
+# Slow-query log (messages bound with slow_query=True, see utils.instrumentation)
+logger.add(SLOW_QUERY_LOG_FILE, level='WARNING', rotation='10 MB', retention='30 days', enqueue=True, delay=True,
+           filter=lambda record: record['extra'].get('slow_query', False),
+           format='{time:YYYY-MM-DD HH:mm:ss} | {message}')
+
 __all__ = ['logger']
@@ -23,8 +23,25 @@ class Settings:
     db_port: int = int(os.getenv('DB_PORT', '3306'))
     db_name: str = os.getenv('DB_NAME', 'world_embalage')
     db_echo: bool = os.getenv('DB_ECHO', '0') == '1'
+    # Seconds to wait for the database server before falling back (instead of the OS TCP timeout)
+    db_connect_timeout: int = int(os.getenv('DB_CONNECT_TIMEOUT', '5'))
+    # Connection pool: kept connections, extra ones allowed under load, seconds to wait for a free one
+    db_pool_size: int = int(os.getenv('DB_POOL_SIZE', '5'))
+    db_max_overflow: int = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    db_pool_timeout: int = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+    # Connections older than this are reopened (below the server's wait_timeout)
+    db_pool_recycle: int = int(os.getenv('DB_POOL_RECYCLE', '3600'))
+    # A connection idle in the pool for longer than this is checked before use (-1: never)
+    db_pool_idle_check: int = int(os.getenv('DB_POOL_IDLE_CHECK', '300'))
+    # Statements slower than this (milliseconds) go to logs/slow_queries.log
+    slow_query_ms: int = int(os.getenv('SLOW_QUERY_MS', '200'))
+    # When set, the query/latency report (utils.instrumentation) is written to this file on exit
+    perf_report: str = os.getenv('PERF_REPORT', '')
     locale: str = os.getenv('APP_LOCALE', 'fr_FR')
     reports_dir: Path = PROJECT_ROOT / 'generated_reports'
+    # Bounds of the documents kept by the document cache (oldest / least recently reprinted deleted first)
+    reports_max_mb: int = int(os.getenv('REPORTS_MAX_MB', '500'))
+    reports_max_age_days: int = int(os.getenv('REPORTS_MAX_AGE_DAYS', '180'))
     db_url: str = os.getenv('DB_URL', '')  # Full SQLAlchemy URL overrides individual parts when set
 
     def dsn(self) -> str:
@@ -1,21 +1,148 @@
 from __future__ import annotations
-from sqlalchemy import text
-from config.database import engine
+import hashlib
+import json
+import threading
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError, OperationalError
+from config.database import get_engine, use_fallback_engine, run_schema_guards, SCHEMA_GUARDS_VERSION
+from config.settings import settings
 from models.base import Base
 from loguru import logger
 
+# schema_state row describing the application schema
+SCHEMA_STATE_NAME = 'app'
 
-def init_db():
-    """Create all tables. In production prefer migrations."""
+
+def _import_models() -> None:
     import models.suppliers  # noqa: F401
     import models.clients  # noqa: F401
     import models.plaques  # noqa: F401
     import models.orders  # noqa: F401
     import models.production  # noqa: F401
+    import models.sequences  # noqa: F401
+    import models.schema_state  # noqa: F401
+    import models.search  # noqa: F401
+
+
+def init_db():
+    """Create all tables. In production prefer migrations."""
+    _import_models()
 
     logger.info("Création des tables de base de données si inexistantes...")
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     logger.info("Initialisation de la base de données terminée")
 
 
-__all__ = ['init_db']
+def schema_fingerprint() -> str:
+    """sha256 of the tables and columns declared by the models and of the schema guards version."""
+    _import_models()
+    tables = {
+        name: sorted(f"{column.name}:{type(column.type).__name__}" for column in table.columns)
+        for name, table in Base.metadata.tables.items()
+    }
+    payload = json.dumps({'guards': SCHEMA_GUARDS_VERSION, 'tables': tables}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def read_schema_fingerprint() -> str | None:
+    """Connect to the database and return the fingerprint stored by the last verification.
+
+    Raises OperationalError when the server does not answer (within
+    settings.db_connect_timeout); None when nothing was stored yet.
+    """
+    from models.schema_state import SchemaState
+    with get_engine().connect() as conn:
+        try:
+            return conn.execute(
+                select(SchemaState.fingerprint).where(SchemaState.name == SCHEMA_STATE_NAME)
+            ).scalar_one_or_none()
+        except DBAPIError:
+            # schema_state does not exist yet
+            return None
+
+
+def store_schema_fingerprint(fingerprint: str) -> None:
+    from models.schema_state import SchemaState
+    table = SchemaState.__table__
+    with get_engine().begin() as conn:
+        updated = conn.execute(
+            table.update().where(table.c.name == SCHEMA_STATE_NAME).values(fingerprint=fingerprint)
+        ).rowcount
+        if not updated:
+            conn.execute(table.insert().values(name=SCHEMA_STATE_NAME, fingerprint=fingerprint))
+
+
+def _check_database() -> str | None:
+    """read_schema_fingerprint bounded by settings.db_connect_timeout as a whole.
+
+    The driver's connect timeout only covers the TCP connection: a server (or
+    proxy) that accepts it but never completes the handshake would still block.
+    """
+    outcome: dict = {}
+
+    def check():
+        try:
+            outcome['fingerprint'] = read_schema_fingerprint()
+        except Exception as exc:
+            outcome['error'] = exc
+
+    # Daemon thread: an attempt still hanging after the deadline does not delay the exit
+    thread = threading.Thread(target=check, name='db-health-check', daemon=True)
+    thread.start()
+    thread.join(settings.db_connect_timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"pas de réponse après {settings.db_connect_timeout} s")
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('fingerprint')
+
+
+def _catch_up_search_index() -> bool:
+    """Index the rows the global search does not know yet (new table, bulk imports,
+    writes made without the session events); True on success."""
+    from config.database import session_scope
+    from services.search_index import catch_up
+    try:
+        with session_scope() as session:
+            added = catch_up(session)
+    except Exception as exc:
+        logger.warning("Index de recherche non mis à jour: {}", exc)
+        return False
+    if added:
+        logger.info("Index de recherche: {} document(s) ajouté(s)", added)
+    return True
+
+
+def bootstrap_db() -> None:
+    """Startup database stage; runs on a background thread while the splash is shown.
+
+    A single connection checks that the server answers and reads the schema
+    fingerprint stored by a previous start; when the server does not answer
+    the SQLite fallback is used. Table creation and the runtime schema guards
+    only run when the stored fingerprint differs from the current models, so
+    later starts against the same database skip them. The search index catch
+    up (an anti-join per entity) then runs on a background thread at every
+    start, without delaying the window.
+    """
+    try:
+        stored = _check_database()
+    except (OperationalError, TimeoutError) as e:
+        logger.error("Impossible de se connecter à la base de données: {}", e)
+        logger.error("Dépannage: 1) Vérifiez la connexion mysql: mysql -u {} -p -h {} -P {} 2) Si échec: ALTER USER '{}'@'localhost' IDENTIFIED WITH mysql_native_password BY 'StrongPassword123'; FLUSH PRIVILEGES;", settings.db_user, settings.db_host, settings.db_port, settings.db_user)
+        use_fallback_engine()
+        stored = read_schema_fingerprint()
+
+    fingerprint = schema_fingerprint()
+    if stored == fingerprint:
+        logger.info("Schéma de la base de données déjà vérifié")
+    else:
+        guards_ok = run_schema_guards()
+        init_db()
+        if guards_ok:
+            store_schema_fingerprint(fingerprint)
+
+    # Daemon thread: an unfinished catch up is simply resumed at the next start
+    threading.Thread(target=_catch_up_search_index, name='search-index-catch-up', daemon=True).start()
+
+
+__all__ = ['init_db', 'bootstrap_db', 'schema_fingerprint', 'read_schema_fingerprint', 'store_schema_fingerprint']
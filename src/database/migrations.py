@@ -0,0 +1,99 @@
+"""
+Data conversions run by the runtime schema guards in config.database.
+
+A database can get a new column either from its Alembic revision or, when
+migrations have not been applied, from the matching guard. The guards convert
+the legacy data the same way as the revision (c4d5e6f7a8b9, d5e6f7a8b9c0),
+which keeps its own copy: a revision must not depend on application code that
+may change after it ships.
+"""
+from __future__ import annotations
+import re
+from datetime import datetime
+from sqlalchemy import DateTime, text
+
+
+# Structured reception columns, previously only encoded in notes ("Arrivée matière: 100x200x50mm")
+ARRIVAL_DIMS_RE = re.compile(r"Arrivée matière:\s*([0-9]+)x([0-9]+)x([0-9]+)mm")
+
+
+def backfill_reception_columns(conn) -> int:
+    """Fill the structured reception columns of rows that predate them.
+    Dimensions are parsed from the arrival notes; the client is the supplier
+    order's only client (left empty when it has several). Returns the number
+    of receptions whose dimensions were recovered.
+    """
+    rows = conn.execute(text(
+        "SELECT id, notes FROM receptions "
+        "WHERE plaque_width_mm IS NULL AND notes LIKE '%Arrivée matière:%'"
+    )).fetchall()
+    params = []
+    for reception_id, notes in rows:
+        m = ARRIVAL_DIMS_RE.search(notes or '')
+        if m:
+            params.append({'id': reception_id, 'w': int(m.group(1)), 'l': int(m.group(2)), 'f': int(m.group(3))})
+    if params:
+        conn.execute(text(
+            "UPDATE receptions SET plaque_width_mm = :w, plaque_length_mm = :l, plaque_flap_mm = :f WHERE id = :id"
+        ), params)
+    conn.execute(text(
+        "UPDATE receptions SET client_id = ("
+        " SELECT MIN(li.client_id) FROM supplier_order_line_items li"
+        " WHERE li.supplier_order_id = receptions.supplier_order_id"
+        ") WHERE client_id IS NULL AND ("
+        " SELECT COUNT(DISTINCT li.client_id) FROM supplier_order_line_items li"
+        " WHERE li.supplier_order_id = receptions.supplier_order_id"
+        ") = 1"
+    ))
+    return len(params)
+
+
+# Tables archived through their archived_at column, and the text column that
+# used to carry the '[ARCHIVED]' marker
+ARCHIVED_MARKER = '[ARCHIVED]'
+ARCHIVABLE_TABLES = {
+    'quotations': 'notes',
+    'client_orders': 'notes',
+    'supplier_orders': 'notes',
+    'receptions': 'notes',
+    'production_batches': 'batch_code',
+}
+# Type of archived_at, as declared on the models
+ARCHIVED_AT_TYPE = DateTime(timezone=True)
+# Receptions were archived as "[ARCHIVED] YYYY-MM-DD HH:MM | description"
+ARCHIVED_RECEPTION_RE = re.compile(r"^\[ARCHIVED\]\s*(\d{4}-\d{2}-\d{2} \d{2}:\d{2})\s*\|\s*(.*)$", re.DOTALL)
+
+
+def backfill_archived_at(conn, table: str, column: str) -> int:
+    """Move the legacy '[ARCHIVED]' marker of a table into archived_at.
+    The marker is stripped from the text column; the archive time is the one
+    written in reception notes, else the row's last update. A batch code is
+    left untouched when its unprefixed form is already taken (unique column).
+    Returns the number of rows converted.
+    """
+    rows = conn.execute(text(
+        f"SELECT id, {column}, updated_at FROM {table} WHERE {column} LIKE :marker AND archived_at IS NULL"
+    ), {'marker': ARCHIVED_MARKER + '%'}).fetchall()
+    for row_id, value, updated_at in rows:
+        archived_at = updated_at or datetime.now()
+        m = ARCHIVED_RECEPTION_RE.match(value) if table == 'receptions' else None
+        if m:
+            archived_at = datetime.strptime(m.group(1), '%Y-%m-%d %H:%M')
+            stripped = m.group(2).strip()
+        else:
+            stripped = value[len(ARCHIVED_MARKER):].strip()
+        if column == 'batch_code':
+            taken = conn.execute(text(f"SELECT 1 FROM {table} WHERE batch_code = :code"), {'code': stripped}).first()
+            new_value = value if (taken or not stripped) else stripped
+        else:
+            new_value = stripped or None
+        conn.execute(text(
+            f"UPDATE {table} SET archived_at = :archived_at, {column} = :value WHERE id = :id"
+        ), {'archived_at': archived_at, 'value': new_value, 'id': row_id})
+    return len(rows)
+
+
+__all__ = [
+    'ARRIVAL_DIMS_RE', 'backfill_reception_columns',
+    'ARCHIVED_MARKER', 'ARCHIVABLE_TABLES', 'ARCHIVED_AT_TYPE', 'ARCHIVED_RECEPTION_RE', 'backfill_archived_at',
+]
@@ -0,0 +1,141 @@
+"""
+Connection pool instrumentation.
+
+InstrumentedQueuePool counts checkouts and the checkouts that had to wait for
+a free connection. instrument_engine() adds the pool listeners that:
+- check a connection that sat idle in the pool for more than
+  settings.db_pool_idle_check seconds before handing it out (instead of
+  pool_pre_ping, which costs a round-trip on every checkout); a connection
+  that no longer answers is replaced transparently;
+- count leaks: connections returned by the garbage collector because the
+  session or connection holding them was never closed.
+
+The counters live on the pool (pool.stats) and are read through
+config.database.pool_stats().
+"""
+from __future__ import annotations
+import threading
+import time
+import weakref
+from dataclasses import dataclass, replace
+from loguru import logger
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+
+@dataclass(slots=True)
+class PoolStats:
+    checkouts: int = 0
+    checkins: int = 0
+    checked_out: int = 0
+    peak_checked_out: int = 0
+    # Checkouts that found no free connection and had to wait for one
+    waits: int = 0
+    wait_total_ms: float = 0.0
+    wait_max_ms: float = 0.0
+    # Checkouts that gave up after the pool timeout
+    timeouts: int = 0
+    # Connections returned by the garbage collector (never closed by their owner)
+    leaks: int = 0
+    # Idle connections checked before use, and the ones found dead and replaced
+    idle_checks: int = 0
+    stale_replaced: int = 0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool recording how often and how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        self.stats_lock = threading.Lock()
+
+    def _do_get(self):
+        # Every connection is in use and no overflow is left: this checkout will block
+        exhausted = self._pool.empty() and -1 < self._max_overflow <= self._overflow
+        if not exhausted:
+            return super()._do_get()
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self.stats_lock:
+                self.stats.timeouts += 1
+            raise
+        finally:
+            waited = (time.perf_counter() - start) * 1000
+            with self.stats_lock:
+                self.stats.waits += 1
+                self.stats.wait_total_ms += waited
+                self.stats.wait_max_ms = max(self.stats.wait_max_ms, waited)
+
+    def recreate(self):
+        # Keep the counters across pool recreation (engine.dispose())
+        pool = super().recreate()
+        pool.stats, pool.stats_lock = self.stats, self.stats_lock
+        return pool
+
+
+def instrument_engine(engine, idle_check_seconds: float) -> None:
+    """Attach the idle check and the checkout/leak counters to the engine's pool."""
+    pool = engine.pool
+    if not hasattr(pool, 'stats'):
+        pool.stats = PoolStats()
+        pool.stats_lock = threading.Lock()
+    stats, lock = pool.stats, pool.stats_lock
+    dialect = engine.dialect
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        connection_record.info['last_checkin'] = time.monotonic()
+
+    @event.listens_for(engine, 'checkout')
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        idle = time.monotonic() - connection_record.info.get('last_checkin', 0.0)
+        if idle_check_seconds >= 0 and idle > idle_check_seconds:
+            with lock:
+                stats.idle_checks += 1
+            try:
+                alive = dialect.do_ping(dbapi_connection)
+            except Exception:
+                alive = False
+            if not alive:
+                with lock:
+                    stats.stale_replaced += 1
+                # The pool discards this connection and checks out a new one
+                raise exc.DisconnectionError("Connexion inactive fermée par le serveur")
+        # Dead reference at checkin = the holder was garbage collected without closing
+        connection_record.info['holder'] = weakref.ref(connection_proxy)
+        with lock:
+            stats.checkouts += 1
+            stats.checked_out += 1
+            stats.peak_checked_out = max(stats.peak_checked_out, stats.checked_out)
+
+    @event.listens_for(engine, 'checkin')
+    def _on_checkin(dbapi_connection, connection_record):
+        connection_record.info['last_checkin'] = time.monotonic()
+        holder = connection_record.info.pop('holder', None)
+        if holder is None:
+            return
+        leaked = holder() is None
+        with lock:
+            stats.checkins += 1
+            stats.checked_out -= 1
+            if leaked:
+                stats.leaks += 1
+        if leaked:
+            logger.warning("Connexion à la base non fermée, récupérée par le ramasse-miettes")
+
+
+def snapshot(pool) -> PoolStats:
+    """Copy of the pool counters (zeros when the pool is not instrumented)."""
+    if not hasattr(pool, 'stats'):
+        return PoolStats()
+    with pool.stats_lock:
+        return replace(pool.stats)
+
+
+__all__ = ['PoolStats', 'InstrumentedQueuePool', 'instrument_engine', 'snapshot']
@@ -1,36 +1,38 @@
 from __future__ import annotations
 import sys
-from PyQt6.QtWidgets import QApplication
+from PyQt6.QtWidgets import QApplication, QMessageBox
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QIcon
 from pathlib import Path
 from config.logging_config import logger
-from database.connection import init_db
-from ui.main_window import MainWindow
+from database.connection import bootstrap_db
 from ui.styles import StyleManager
 from config.settings import settings
-from sqlalchemy.exc import OperationalError
-from config.database import engine
 from ui.splash import SplashScreen
+from services.pdf_backend import available_library
+from services.document_cache import document_cache
 import signal
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Safety net: show the main window even if the dashboard never reports back
+SPLASH_TIMEOUT_MS = 15000
 
 
 def main():
     logger.info("Démarrage de l'application World Embalage")
     logger.info("Base de données DSN (masqué utilisateur@hôte/db): {}@{}/{}", settings.db_user, settings.db_host, settings.db_name)
-    # Quick connection test before creating tables
-    try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))  # type: ignore[name-defined]
-    except NameError:
-        from sqlalchemy import text  # lazy import to keep earlier code concise
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-    except OperationalError as e:
-        logger.error("Impossible de se connecter à la base de données: {}", e)
-        logger.error("Dépannage: 1) Vérifiez la connexion mysql: mysql -u {} -p -h {} -P {} 2) Si échec: ALTER USER '{}'@'localhost' IDENTIFIED WITH mysql_native_password BY 'StrongPassword123'; FLUSH PRIVILEGES;", settings.db_user, settings.db_host, settings.db_port, settings.db_user)
-        return
-    init_db()
+    # Connection check (bounded by DB_CONNECT_TIMEOUT) and schema verification, off the GUI thread
+    bootstrap_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-bootstrap')
+    bootstrap = bootstrap_executor.submit(bootstrap_db)
+    bootstrap_executor.shutdown(wait=False)
+
+    # The PDF library itself is imported with the first document
+    pdf_library = available_library()
+    if pdf_library:
+        logger.info("Moteur PDF: {}", pdf_library)
+    else:
+        logger.warning("Ni PyPDF2 ni pypdf installé: les documents seront générés sans le fond des modèles")
 
     app = QApplication(sys.argv)
     
@@ -56,26 +58,45 @@ def main():
     # Apply theme first
     StyleManager.apply_white_theme(app) 
 
-    # Show splash screen with timer-based auto-close
+    # Show splash screen; it closes as soon as the dashboard data is displayed
     splash = SplashScreen(logo_path)
     splash.show()
-    
-    # Create and prepare main window
+    splash.set_progress(20, "Connexion base de données ...")
+
+    # Imported once the splash is visible (the other tabs, dialogs and PDF modules load on first use)
+    from ui.main_window import MainWindow
+
+    # The window queries the database: wait for the bootstrap, keeping the splash responsive
+    while not wait([bootstrap], timeout=0.02).done:
+        app.processEvents()
+    try:
+        bootstrap.result()
+    except Exception as e:
+        logger.error("Initialisation de la base de données impossible: {}", e)
+        try:
+            splash.close()
+        except Exception:
+            pass
+        QMessageBox.critical(None, "World Embalage",
+                             f"Initialisation de la base de données impossible:\n{e}")
+        sys.exit(1)
+    splash.set_progress(40, "Préparation interface ...")
     window = MainWindow()
+    splash.set_progress(70, "Chargement tableau de bord ...")
     if logo_path.exists():
         window.setWindowIcon(QIcon(str(logo_path)))
     window.resize(1400, 800)
 
-    # Use QTimer to launch main window after splash
+    # Launch the main window once the dashboard is ready
     _launch_state = {"launched": False}
     def launch_main_window():
-        # Guard against double-launch from both timer and splash signal
+        # Guard against double-launch from both the dashboard signal and the fallback timer
         if _launch_state.get("launched"):
             return
         _launch_state["launched"] = True
         logger.info("Lancement de la fenêtre principale...")
         try:
-            splash.close()
+            splash.finish()
         except Exception:
             pass
         # Start maximized to fill screen, while keeping window controls (minimize/restore/close)
@@ -105,31 +126,45 @@ def main():
         except Exception:
             pass
         logger.info("Fenêtre principale lancée")
+        # Extra enforcement for some Linux window managers: re-apply maximized shortly after show
+        QTimer.singleShot(50, _enforce_maximize)
+        # Keep generated_reports bounded (age and size limits from settings), once the window is up
+        QTimer.singleShot(0, _evict_old_documents)
 
-    # Start splash and schedule main window launch
-    splash.start()
-    
-    # Alternative: use QTimer as backup
-    timer = QTimer()
-    timer.setSingleShot(True)
-    timer.timeout.connect(launch_main_window)
-    timer.start(3000)  # 3 seconds fallback
-    
-    # Also connect to splash signal
-    splash.signals.finished.connect(launch_main_window)
-
-    # Extra enforcement for some Linux window managers: re-apply maximized shortly after show
     def _enforce_maximize():
         try:
             window.setWindowState(window.windowState() | Qt.WindowState.WindowMaximized)
             window.showMaximized()
         except Exception:
             pass
-    QTimer.singleShot(50, _enforce_maximize)
+
+    def _evict_old_documents():
+        removed = document_cache.evict()
+        if removed:
+            logger.info("{} ancien(s) document(s) supprimé(s) de {}", removed, settings.reports_dir)
+
+    window.dashboard.dataLoaded.connect(launch_main_window)
+
+    # Fallback in case the dashboard never reports back (database unreachable, ...)
+    timer = QTimer()
+    timer.setSingleShot(True)
+    timer.timeout.connect(launch_main_window)
+    timer.start(SPLASH_TIMEOUT_MS)
+
+    if settings.perf_report:
+        app.aboutToQuit.connect(_export_perf_report)
 
     sys.exit(app.exec())
 
 
+def _export_perf_report():
+    from utils.instrumentation import export_report
+    path = export_report(settings.perf_report)
+    logger.info("Rapport de performance écrit dans {}", path)
+
+
 if __name__ == '__main__':
+    # Worker processes of the document renderer start through this entry point in the packaged build
+    multiprocessing.freeze_support()
     main()
 
@@ -13,6 +13,9 @@ from .orders import (
 from .production import ProductionBatch
 from .plaques import Plaque
 from .documents import LineItem, QuotationDocument
+from .sequences import ReferenceSequence
+from .schema_state import SchemaState
+from .search import SearchDocument
 
 __all__ = [
 	'Base',
@@ -27,5 +30,8 @@ __all__ = [
 	'ProductionBatch',
 	'Plaque',
 	'LineItem',
-	'QuotationDocument'
+	'QuotationDocument',
+	'ReferenceSequence',
+	'SchemaState',
+	'SearchDocument'
 ]
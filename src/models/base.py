@@ -12,10 +12,16 @@ class TimestampMixin:
     updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
 
+class ArchivableMixin:
+    """Archive marker: NULL while the row is active, the archiving time otherwise.
+    Indexed so that active and archive listings are index range scans."""
+    archived_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), index=True)
+
+
 class PKMixin:
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
 
 __all__ = [
-    'Base', 'TimestampMixin', 'PKMixin'
+    'Base', 'TimestampMixin', 'PKMixin', 'ArchivableMixin'
 ]
@@ -1,8 +1,8 @@
 from __future__ import annotations
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, Date, Enum, ForeignKey, Numeric, Text, DateTime, Boolean
+from sqlalchemy import String, Integer, Date, Enum, ForeignKey, Numeric, Text, DateTime, Boolean, Index
 from sqlalchemy.sql import func
-from .base import Base, PKMixin, TimestampMixin
+from .base import Base, PKMixin, TimestampMixin, ArchivableMixin
 import enum
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:  # pragma: no cover
@@ -37,7 +37,7 @@ class BoxColor(str, enum.Enum):
     BRUN = 'brun'
 
 
-class SupplierOrder(PKMixin, TimestampMixin, Base):
+class SupplierOrder(PKMixin, TimestampMixin, ArchivableMixin, Base):
     __tablename__ = 'supplier_orders'
 
     supplier_id: Mapped[int] = mapped_column(ForeignKey('suppliers.id', ondelete='RESTRICT'), index=True, nullable=False)
@@ -102,15 +102,25 @@ class SupplierOrderLineItem(PKMixin, TimestampMixin, Base):
     material_deliveries: Mapped[list['MaterialDelivery']] = relationship(back_populates='line_item', cascade='all, delete-orphan')
 
 
-class Reception(PKMixin, TimestampMixin, Base):
+class Reception(PKMixin, TimestampMixin, ArchivableMixin, Base):
     __tablename__ = 'receptions'
 
     supplier_order_id: Mapped[int] = mapped_column(ForeignKey('supplier_orders.id', ondelete='CASCADE'), index=True, nullable=False)
     reception_date: Mapped[Date] = mapped_column(Date, server_default=func.current_date(), index=True)
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
     notes: Mapped[str | None] = mapped_column(Text())
+    # Plaque dimensions and client of the received material (stock grouping keys)
+    plaque_width_mm: Mapped[int | None] = mapped_column(Integer)
+    plaque_length_mm: Mapped[int | None] = mapped_column(Integer)
+    plaque_flap_mm: Mapped[int | None] = mapped_column(Integer)
+    client_id: Mapped[int | None] = mapped_column(ForeignKey('clients.id', ondelete='SET NULL'), index=True)
 
     supplier_order: Mapped['SupplierOrder'] = relationship(back_populates='receptions')
+    client: Mapped['Client | None'] = relationship()  # type: ignore[name-defined]
+
+    __table_args__ = (
+        Index('ix_receptions_plaque_dims_client', 'plaque_width_mm', 'plaque_length_mm', 'plaque_flap_mm', 'client_id'),
+    )
 
 
 class Return(PKMixin, TimestampMixin, Base):
@@ -140,7 +150,7 @@ class MaterialDelivery(PKMixin, TimestampMixin, Base):
     line_item: Mapped['SupplierOrderLineItem'] = relationship(back_populates='material_deliveries')
 
 
-class Quotation(PKMixin, TimestampMixin, Base):
+class Quotation(PKMixin, TimestampMixin, ArchivableMixin, Base):
     __tablename__ = 'quotations'
 
     client_id: Mapped[int] = mapped_column(ForeignKey('clients.id', ondelete='RESTRICT'), nullable=False, index=True)
@@ -188,7 +198,7 @@ class QuotationLineItem(PKMixin, TimestampMixin, Base):
         return int(numbers[-1]) if numbers else 0
 
 
-class ClientOrder(PKMixin, TimestampMixin, Base):
+class ClientOrder(PKMixin, TimestampMixin, ArchivableMixin, Base):
     __tablename__ = 'client_orders'
 
     client_id: Mapped[int] = mapped_column(ForeignKey('clients.id', ondelete='RESTRICT'), nullable=False, index=True)
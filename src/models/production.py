@@ -2,11 +2,11 @@ from __future__ import annotations
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import String, Integer, ForeignKey, Date
 from sqlalchemy.sql import func
-from .base import Base, PKMixin, TimestampMixin
+from .base import Base, PKMixin, TimestampMixin, ArchivableMixin
 from datetime import date
 
 
-class ProductionBatch(PKMixin, TimestampMixin, Base):
+class ProductionBatch(PKMixin, TimestampMixin, ArchivableMixin, Base):
     __tablename__ = 'production_batches'
 
     client_order_id: Mapped[int] = mapped_column(ForeignKey('client_orders.id', ondelete='CASCADE'), index=True, nullable=False)
@@ -0,0 +1,18 @@
+from __future__ import annotations
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String
+from .base import Base, TimestampMixin
+
+
+class SchemaState(TimestampMixin, Base):
+    """Fingerprint of the schema last verified on this database (tables created, runtime guards applied)."""
+    __tablename__ = 'schema_state'
+
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<SchemaState {self.name}={self.fingerprint[:12]}>"
+
+
+__all__ = ['SchemaState']
@@ -0,0 +1,64 @@
+from __future__ import annotations
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Boolean, Index, Integer, String, Text, UniqueConstraint, event
+from sqlalchemy.exc import DBAPIError
+from loguru import logger
+from .base import Base, PKMixin
+
+# SQLite full-text table over search_documents (external content, kept in sync by triggers)
+SQLITE_FTS_TABLE = 'search_documents_fts'
+SQLITE_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5("
+    "title, body, content='search_documents', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    f"CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END",
+    f"CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+    f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+)
+
+
+class SearchDocument(PKMixin, Base):
+    """Searchable text of one entity (devis, commande MP, réception, lot, client, fournisseur).
+
+    Maintained on write by services.search_index; queried through a FULLTEXT
+    index on MySQL and the search_documents_fts FTS5 table on SQLite.
+    """
+    __tablename__ = 'search_documents'
+    __table_args__ = (
+        UniqueConstraint('entity', 'entity_id', name='uq_search_documents_entity'),
+        Index('ix_search_documents_fulltext', 'title', 'body', mysql_prefix='FULLTEXT').ddl_if(dialect=('mysql', 'mariadb')),
+    )
+
+    entity: Mapped[str] = mapped_column(String(32), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    title: Mapped[str] = mapped_column(String(255), nullable=False, default='')
+    body: Mapped[str] = mapped_column(Text(), nullable=False, default='')
+    archived: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<SearchDocument {self.entity}:{self.entity_id}>"
+
+
+@event.listens_for(SearchDocument.__table__, 'after_create')
+def _create_sqlite_fts(target, connection, **kw) -> None:
+    if connection.dialect.name != 'sqlite':
+        return
+    try:
+        for statement in SQLITE_FTS_DDL:
+            connection.exec_driver_sql(statement)
+    except DBAPIError as exc:
+        # SQLite built without FTS5: the search falls back to LIKE
+        logger.warning("Index plein texte SQLite non créé: {}", exc)
+
+
+@event.listens_for(SearchDocument.__table__, 'before_drop')
+def _drop_sqlite_fts(target, connection, **kw) -> None:
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}")
+
+
+__all__ = ['SearchDocument', 'SQLITE_FTS_TABLE', 'SQLITE_FTS_DDL']
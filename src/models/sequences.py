@@ -0,0 +1,18 @@
+from __future__ import annotations
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer
+from .base import Base, TimestampMixin
+
+
+class ReferenceSequence(TimestampMixin, Base):
+    """Last reference number handed out per document prefix (DV, BC, CM, ...)."""
+    __tablename__ = 'reference_sequences'
+
+    prefix: Mapped[str] = mapped_column(String(8), primary_key=True)
+    last_value: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<ReferenceSequence {self.prefix}={self.last_value}>"
+
+
+__all__ = ['ReferenceSequence']
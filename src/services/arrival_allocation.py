@@ -0,0 +1,234 @@
+"""
+Raw material arrival allocation.
+
+An arrival (plaque sizes and quantities) is allocated in one pass:
+- the line items still waiting for any of the arrived sizes are fetched with
+  a single tuple IN query (locked FOR UPDATE where the database supports it);
+- each size is allocated FIFO: oldest order date first, then order and line
+  item id, so the same arrival always lands on the same lines;
+- material deliveries and receptions are written with bulk inserts (the
+  receptions then indexed for the global search), the received totals with
+  one executemany UPDATE, and the line item / order
+  statuses of every touched order are recomputed once, in SQL
+  (refresh_supplier_order_statuses);
+- everything is committed in a single short transaction.
+
+The rules are those of the arrival dialog: exact plaque dimensions, one
+reception per (supplier order, size), and sizes matching no line at all are
+received under UNMATCHED_SUPPLIER_ORDER_ID. A size whose lines are all fully
+received, or the part of a size exceeding what its lines still wait for, is
+not received: it is reported in ArrivalResult.unallocated for the user.
+"""
+from __future__ import annotations
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable
+from sqlalchemy import func, insert, select, tuple_, update
+from sqlalchemy.orm import Session, selectinload
+from models.orders import (
+    ClientOrder, MaterialDelivery, Quotation, Reception, SupplierOrder, SupplierOrderLineItem, SupplierOrderStatus
+)
+from config.database import session_scope
+from services.delivery_tracking_service import refresh_supplier_order_statuses
+from services.search_index import index_new
+
+# Supplier order the receptions of unordered plaques are attached to
+UNMATCHED_SUPPLIER_ORDER_ID = 1
+
+Dims = tuple[int, int, int]
+
+
+@dataclass(slots=True)
+class ArrivalLine:
+    width: int
+    length: int
+    flap: int
+    quantity: int
+
+    @property
+    def dims(self) -> Dims:
+        return self.width, self.length, self.flap
+
+
+@dataclass(slots=True)
+class Allocation:
+    line_item_id: int
+    supplier_order_id: int
+    client_id: int | None
+    dims: Dims
+    quantity: int
+    received_before: int
+    ordered: int
+
+    @property
+    def received_after(self) -> int:
+        return self.received_before + self.quantity
+
+
+@dataclass(slots=True)
+class ArrivalResult:
+    allocations: list[Allocation] = field(default_factory=list)
+    # Quantity left over per ordered size once every waiting line was filled (not received)
+    unallocated: dict[Dims, int] = field(default_factory=dict)
+    receptions: int = 0
+    # supplier_order_id -> (bon_commande_ref, status) after the arrival
+    order_statuses: dict[int, tuple[str, SupplierOrderStatus]] = field(default_factory=dict)
+
+    @property
+    def deliveries(self) -> int:
+        return len(self.allocations)
+
+
+def _merge_lines(lines: Iterable[ArrivalLine]) -> dict[Dims, int]:
+    quantities: dict[Dims, int] = defaultdict(int)
+    for line in lines:
+        if line.quantity > 0:
+            quantities[line.dims] += line.quantity
+    return dict(quantities)
+
+
+def allocate(session: Session, quantities: dict[Dims, int]) -> ArrivalResult:
+    """Plan the allocation of the arrived quantities (no writes)."""
+    result = ArrivalResult()
+    if not quantities:
+        return result
+    dims_cols = (SupplierOrderLineItem.plaque_width_mm, SupplierOrderLineItem.plaque_length_mm,
+                 SupplierOrderLineItem.plaque_flap_mm)
+    stmt = (
+        select(SupplierOrderLineItem.id, SupplierOrderLineItem.supplier_order_id, SupplierOrderLineItem.client_id,
+               *dims_cols, SupplierOrderLineItem.quantity, SupplierOrderLineItem.total_received_quantity)
+        .join(SupplierOrderLineItem.supplier_order)
+        .where(tuple_(*dims_cols).in_(list(quantities)),
+               SupplierOrderLineItem.quantity > SupplierOrderLineItem.total_received_quantity)
+        .order_by(SupplierOrder.order_date, SupplierOrder.id, SupplierOrderLineItem.id)
+        .with_for_update(of=SupplierOrderLineItem)
+    )
+    remaining = dict(quantities)
+    for line_id, order_id, client_id, width, length, flap, ordered, received in session.execute(stmt):
+        dims = (width, length, flap)
+        left = remaining[dims]
+        if left <= 0:
+            continue
+        applied = min(left, ordered - (received or 0))
+        result.allocations.append(Allocation(line_id, order_id, client_id, dims, applied, received or 0, ordered))
+        remaining[dims] = left - applied
+    result.unallocated = {dims: qty for dims, qty in remaining.items() if qty > 0}
+    return result
+
+
+def _order_descriptions(session: Session, supplier_order_ids: set[int]) -> dict[int, str]:
+    """Description of the quotation behind each supplier order (first line of its first line item's client)."""
+    if not supplier_order_ids:
+        return {}
+    first_lines = (
+        select(func.min(SupplierOrderLineItem.id))
+        .where(SupplierOrderLineItem.supplier_order_id.in_(supplier_order_ids))
+        .group_by(SupplierOrderLineItem.supplier_order_id)
+    )
+    order_clients = dict(session.execute(
+        select(SupplierOrderLineItem.supplier_order_id, SupplierOrderLineItem.client_id)
+        .where(SupplierOrderLineItem.id.in_(first_lines))
+    ).all())
+    client_ids = {client_id for client_id in order_clients.values() if client_id}
+    if not client_ids:
+        return {}
+    client_orders = session.scalars(
+        select(ClientOrder)
+        .where(ClientOrder.client_id.in_(client_ids), ClientOrder.quotation_id.isnot(None))
+        .options(selectinload(ClientOrder.quotation).selectinload(Quotation.line_items))
+        .order_by(ClientOrder.id)
+    ).all()
+    by_client: dict[int, str] = {}
+    for client_order in client_orders:
+        quotation = client_order.quotation
+        if client_order.client_id in by_client or quotation is None:
+            continue
+        description = next((line.description.strip() for line in sorted(quotation.line_items, key=lambda l: l.id)
+                            if line.description and line.description.strip()), None)
+        if not description and quotation.notes and quotation.notes.strip():
+            description = quotation.notes.strip()
+        if description:
+            by_client[client_order.client_id] = description
+    return {order_id: by_client[client_id] for order_id, client_id in order_clients.items() if client_id in by_client}
+
+
+def record_arrival(session: Session, lines: Iterable[ArrivalLine], batch_reference: str | None = None) -> ArrivalResult:
+    """Allocate and write an arrival in the session's transaction (the caller commits)."""
+    quantities = _merge_lines(lines)
+    result = allocate(session, quantities)
+    if not quantities:
+        return result
+    batch_reference = batch_reference or f"ARR-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+    # One reception per (supplier order, size), with the client when all its lines share one
+    reception_quantities: dict[tuple[int, Dims], int] = defaultdict(int)
+    for allocation in result.allocations:
+        reception_quantities[(allocation.supplier_order_id, allocation.dims)] += allocation.quantity
+    dims_cols = (SupplierOrderLineItem.plaque_width_mm, SupplierOrderLineItem.plaque_length_mm,
+                 SupplierOrderLineItem.plaque_flap_mm)
+    ordered_dims = set(session.execute(
+        select(*dims_cols).where(tuple_(*dims_cols).in_(list(quantities))).distinct()
+    ).tuples())
+    for dims, quantity in quantities.items():
+        if dims not in ordered_dims:
+            reception_quantities[(UNMATCHED_SUPPLIER_ORDER_ID, dims)] += quantity
+            result.unallocated.pop(dims, None)
+
+    order_ids = {allocation.supplier_order_id for allocation in result.allocations}
+    reception_clients: dict[tuple[int, Dims], set[int]] = defaultdict(set)
+    for allocation in result.allocations:
+        if allocation.client_id:
+            reception_clients[(allocation.supplier_order_id, allocation.dims)].add(allocation.client_id)
+    descriptions = _order_descriptions(session, {order_id for order_id, _ in reception_quantities})
+
+    if result.allocations:
+        session.execute(insert(MaterialDelivery), [{
+            'supplier_order_line_item_id': allocation.line_item_id,
+            'received_quantity': allocation.quantity,
+            'batch_reference': batch_reference,
+            'quality_notes': "",
+        } for allocation in result.allocations])
+        session.execute(update(SupplierOrderLineItem), [{
+            'id': allocation.line_item_id,
+            'total_received_quantity': allocation.received_after,
+        } for allocation in result.allocations])
+    receptions = []
+    for (order_id, (width, length, flap)), quantity in reception_quantities.items():
+        # Dimensions always lead the notes: stock grouping relies on them
+        notes = f"Arrivée matière: {width}x{length}x{flap}mm"
+        if order_id in descriptions:
+            notes = f"{notes} — {descriptions[order_id]}"
+        clients = reception_clients.get((order_id, (width, length, flap)), set())
+        receptions.append({
+            'supplier_order_id': order_id,
+            'quantity': quantity,
+            'notes': notes,
+            'plaque_width_mm': width,
+            'plaque_length_mm': length,
+            'plaque_flap_mm': flap,
+            'client_id': next(iter(clients)) if len(clients) == 1 else None,
+        })
+    if receptions:
+        session.execute(insert(Reception), receptions)
+        result.receptions = len(receptions)
+        # The bulk insert bypasses the session events that maintain the search index
+        index_new(session, 'reception')
+
+    refresh_supplier_order_statuses(session, order_ids)
+    if order_ids:
+        result.order_statuses = {order_id: (reference, status) for order_id, reference, status in session.execute(
+            select(SupplierOrder.id, SupplierOrder.bon_commande_ref, SupplierOrder.status)
+            .where(SupplierOrder.id.in_(order_ids)).order_by(SupplierOrder.id)
+        )}
+    return result
+
+
+def save_arrival(lines: Iterable[ArrivalLine], batch_reference: str | None = None) -> ArrivalResult:
+    """record_arrival() in its own unit of work, committed once."""
+    with session_scope() as session:
+        return record_arrival(session, lines, batch_reference)
+
+
+__all__ = ['ArrivalLine', 'Allocation', 'ArrivalResult', 'allocate', 'record_arrival', 'save_arrival',
+           'UNMATCHED_SUPPLIER_ORDER_ID']
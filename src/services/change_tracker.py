@@ -0,0 +1,107 @@
+"""
+Change detection for incremental grid refreshes.
+
+Tracks a per-table high-water mark (``MAX(updated_at)``, ``MAX(id)`` and
+``COUNT(*)``) read in a single round-trip, so callers can skip re-querying
+tables that did not change since the previous poll.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Iterable
+from loguru import logger
+from sqlalchemy import Table, func, literal, select, union_all
+from sqlalchemy.orm import Session
+from models.base import Base
+
+
+@dataclass(frozen=True, slots=True)
+class TableMark:
+    max_updated_at: Any
+    max_id: int | None
+    row_count: int
+    # Database clock when the mark was read
+    read_at: Any = None
+
+    def is_ambiguous(self) -> bool:
+        """True when rows may still be updated within the timestamp of the newest row.
+
+        ``updated_at`` has a one second resolution: a row updated later in the
+        same second as the newest one would not move the mark.
+        """
+        if self.max_updated_at is None or self.read_at is None:
+            return False
+        try:
+            return self.max_updated_at >= self.read_at
+        except TypeError:
+            return True
+
+
+class TableChangeTracker:
+    """Reports which tables changed between two calls to ``poll``."""
+
+    def __init__(self, table_names: Iterable[str]):
+        self.table_names = sorted(set(table_names))
+        self._marks: dict[str, TableMark] = {}
+
+    def _tables(self) -> list[Table]:
+        return [Base.metadata.tables[name] for name in self.table_names]
+
+    def read_marks(self, session: Session) -> dict[str, TableMark]:
+        """Read the current mark of every tracked table with one UNION ALL query."""
+        stmt = union_all(*[
+            select(
+                literal(table.name).label('table_name'),
+                func.max(table.c.updated_at).label('max_updated_at'),
+                func.max(table.c.id).label('max_id'),
+                func.count().label('row_count'),
+                func.now().label('read_at'),
+            ).select_from(table)
+            for table in self._tables()
+        ])
+        return {
+            row.table_name: TableMark(row.max_updated_at, row.max_id, int(row.row_count or 0), row.read_at)
+            for row in session.execute(stmt)
+        }
+
+    def poll(self, session: Session) -> set[str]:
+        """Return the names of the tables changed since the previous poll.
+
+        Every tracked table is reported on the first poll, or when the marks
+        cannot be read.
+        """
+        marks = self.try_read_marks(session)
+        changed = self.changed_tables(marks)
+        self.commit(marks)
+        return changed
+
+    def try_read_marks(self, session: Session) -> dict[str, TableMark]:
+        """Like ``read_marks`` but returns no marks (forcing a full refresh) on failure."""
+        try:
+            return self.read_marks(session)
+        except Exception as exc:
+            logger.warning("Change detection unavailable, full refresh: {}", exc)
+            return {}
+
+    def changed_tables(self, marks: dict[str, TableMark]) -> set[str]:
+        """Compare marks against the last committed ones without recording them."""
+        changed = set()
+        for name in self.table_names:
+            previous = self._marks.get(name)
+            current = marks.get(name)
+            if previous is None or current is None or previous.is_ambiguous():
+                changed.add(name)
+            elif (previous.max_updated_at, previous.max_id, previous.row_count) != \
+                    (current.max_updated_at, current.max_id, current.row_count):
+                changed.add(name)
+        return changed
+
+    def commit(self, marks: dict[str, TableMark]) -> None:
+        """Record marks once the grids they were compared for have been refreshed."""
+        self._marks = dict(marks)
+
+    def reset(self) -> None:
+        """Forget every mark so the next poll reports all tables as changed."""
+        self._marks = {}
+
+
+__all__ = ['TableChangeTracker', 'TableMark']
@@ -0,0 +1,141 @@
+"""
+Dashboard figures.
+
+Plain-value computations behind the dashboard cards and tables, run by the
+dashboard on a background thread (and by the benchmarks without any widget).
+Each figure degrades to an empty value when its query fails.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.sql import func
+from models.orders import ClientOrder, SupplierOrder, SupplierOrderLineItem, StockMovement, StockMovementType, Quotation, Reception
+from models.orders import SupplierOrderStatus
+from models.production import ProductionBatch
+
+
+def load_dashboard_data(session: Session) -> Dict[str, Any]:
+    """Every figure shown by the dashboard, as plain values."""
+    # Removed non-essential KPI updates (clients, fournisseurs, commandes, en production)
+    return {
+        'plaques_stock': compute_plaques_stock(session),
+        'devis_unconfirmed': count_unconfirmed_quotations(session),
+        'supplier_initial': count_initial_supplier_orders(session),
+        # PF top-10 table removed
+        'supplier_rows': load_supplier_rows(session),
+        'activities': load_recent_activities(session),
+    }
+
+
+def compute_plaques_stock(session: Session) -> int:
+    """Approximate plaques stock = total deliveries - stock OUT/WASTE movements."""
+    try:
+        # Align with stock grid: count only non-archived receptions as incoming plaques
+        delivered = (
+            session.query(func.coalesce(func.sum(Reception.quantity), 0))
+            .join(Reception.supplier_order)
+            .filter(
+                SupplierOrder.archived_at.is_(None),
+                Reception.archived_at.is_(None)
+            )
+            .scalar() or 0
+        )
+    except Exception:
+        delivered = 0
+    try:
+        outs = session.query(func.coalesce(func.sum(StockMovement.quantity), 0)).filter(
+            StockMovement.movement_type.in_([StockMovementType.OUT, StockMovementType.WASTE])
+        ).scalar() or 0
+    except Exception:
+        outs = 0
+    return max(0, int(delivered) - int(outs))
+
+
+def count_unconfirmed_quotations(session: Session) -> int:
+    """Count quotations not converted to client orders."""
+    try:
+        # Quotations with no linked client_order
+        return session.query(Quotation).filter(Quotation.client_order == None).count()
+    except Exception:
+        return 0
+
+
+def count_initial_supplier_orders(session: Session) -> int:
+    """Count supplier orders not yet passed (status INITIAL)."""
+    try:
+        return session.query(SupplierOrder).filter(SupplierOrder.status == SupplierOrderStatus.INITIAL).count()
+    except Exception:
+        return 0
+
+
+def load_supplier_rows(session: Session) -> List[List[Any]]:
+    """Rows of the supplier orders progress table: 7 text cells followed by the percentage."""
+    rows: List[List[Any]] = []
+    try:
+        q = session.query(SupplierOrderLineItem, SupplierOrder).join(SupplierOrder, SupplierOrderLineItem.supplier_order_id == SupplierOrder.id)
+        q = q.options(joinedload(SupplierOrderLineItem.client))
+        q = q.filter(SupplierOrder.status != SupplierOrderStatus.COMPLETED)
+        items = q.order_by(SupplierOrder.order_date.desc(), SupplierOrderLineItem.line_number.asc()).limit(50).all()
+        for li, so in items:
+            ordered = int(li.quantity or 0)
+            received = int(li.total_received_quantity or 0)
+            remaining = max(0, ordered - received)
+            percent = int(round((received / ordered) * 100)) if ordered > 0 else 0
+            rows.append([
+                so.reference or so.bon_commande_ref,
+                str(li.line_number),
+                li.client.name if li.client else "",
+                li.material_reference or li.cardboard_type or "Article",
+                str(ordered),
+                str(received),
+                str(remaining),
+                percent,
+            ])
+    except Exception as e:
+        print(f"Supplier table update failed: {e}")
+    return rows
+
+
+def load_recent_activities(session: Session) -> List[tuple[str, str, str]]:
+    """Recent activities as (icon, text, color), oldest first"""
+    activities: List[tuple[str, str, str]] = []
+    # Get recent orders with error handling
+    try:
+        recent_orders = session.query(ClientOrder).order_by(ClientOrder.id.desc()).limit(5).all()
+    except Exception:
+        recent_orders = []
+
+    try:
+        recent_supplier_orders = session.query(SupplierOrder).order_by(SupplierOrder.id.desc()).limit(3).all()
+    except Exception:
+        recent_supplier_orders = []
+
+    try:
+        recent_batches = session.query(ProductionBatch).order_by(ProductionBatch.id.desc()).limit(3).all()
+    except Exception:
+        recent_batches = []
+
+    for order in recent_orders:
+        try:
+            activities.append(("D", f"Commande client {order.reference} - {order.status.value}", "#FFC107"))
+        except Exception:
+            pass
+    for order in recent_supplier_orders:
+        try:
+            activities.append(("CM", f"Commande fournisseur {order.reference} - {order.status.value}", "#6F42C1"))
+        except Exception:
+            pass
+    for batch in recent_batches:
+        try:
+            activities.append((
+                "P",
+                f"Production lot {batch.batch_code} - {batch.production_date.strftime('%Y-%m-%d') if batch.production_date else 'N/A'}",
+                "#20C997"
+            ))
+        except Exception:
+            pass
+    return activities
+
+
+__all__ = ['load_dashboard_data', 'compute_plaques_stock', 'count_unconfirmed_quotations',
+           'count_initial_supplier_orders', 'load_supplier_rows', 'load_recent_activities']
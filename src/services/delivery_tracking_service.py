@@ -2,7 +2,9 @@
 Service for managing material deliveries and partial delivery tracking
 """
 from __future__ import annotations
-from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+from sqlalchemy import case, func, insert, literal, select, update
 from sqlalchemy.orm import Session
 from models.orders import (
     SupplierOrder, SupplierOrderLineItem, MaterialDelivery, 
@@ -12,17 +14,83 @@ from config.database import SessionLocal
 from datetime import datetime
 
 
+@dataclass(slots=True)
+class DeliveryLine:
+    """One delivery to record with DeliveryTrackingService.record_deliveries"""
+    line_item_id: int
+    received_quantity: int
+    batch_reference: Optional[str] = None
+    quality_notes: Optional[str] = None
+
+
+def refresh_supplier_order_statuses(session: Session, supplier_order_ids: Iterable[int]) -> None:
+    """
+    Recompute line item delivery statuses and supplier order statuses in SQL
+    A line item is COMPLETE once fully received, PARTIAL when partly received,
+    PENDING otherwise. An order is COMPLETED when ALL its line items are
+    complete, PARTIALLY_DELIVERED when some received something, and keeps its
+    status otherwise. One UPDATE for the line items, one grouped SUM for the
+    completion of every order, one UPDATE for the orders whose status changes.
+    """
+    supplier_order_ids = set(supplier_order_ids)
+    if not supplier_order_ids:
+        return
+    line = SupplierOrderLineItem
+    status_type = line.delivery_status.type
+    session.execute(
+        update(line)
+        .where(line.supplier_order_id.in_(supplier_order_ids))
+        .values(delivery_status=case(
+            (line.total_received_quantity >= line.quantity, literal(DeliveryStatus.COMPLETE, status_type)),
+            (line.total_received_quantity > 0, literal(DeliveryStatus.PARTIAL, status_type)),
+            else_=literal(DeliveryStatus.PENDING, status_type),
+        ))
+        .execution_options(synchronize_session=False)
+    )
+    
+    completion = session.execute(
+        select(
+            SupplierOrder.id,
+            SupplierOrder.status,
+            func.count(line.id),
+            func.sum(case((line.total_received_quantity >= line.quantity, 1), else_=0)),
+            func.sum(case((line.total_received_quantity > 0, 1), else_=0)),
+        )
+        .join(SupplierOrder.line_items)
+        .where(SupplierOrder.id.in_(supplier_order_ids))
+        .group_by(SupplierOrder.id, SupplierOrder.status)
+    ).all()
+    changes = []
+    for order_id, status, total_items, complete_items, received_items in completion:
+        if complete_items == total_items:
+            new_status = SupplierOrderStatus.COMPLETED
+        elif received_items > 0:
+            new_status = SupplierOrderStatus.PARTIALLY_DELIVERED
+        else:
+            # If no items received, keep current status (usually ORDERED)
+            continue
+        if new_status != status:
+            changes.append({'id': order_id, 'status': new_status})
+    if changes:
+        session.execute(update(SupplierOrder), changes)
+
+
 class DeliveryTrackingService:
     """Service for tracking partial deliveries of raw materials"""
     
     def __init__(self, session: Optional[Session] = None):
-        self.session = session or SessionLocal()
+        # Without a session, the service opens its own (not the thread's shared one): close() or use as a context manager
+        self.session = session or SessionLocal.session_factory()
         self._own_session = session is None
     
     def __enter__(self):
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def close(self):
+        """Close the session if the service opened it."""
         if self._own_session:
             self.session.close()
     
@@ -64,97 +132,79 @@ class DeliveryTrackingService:
         Record a new delivery for a line item
         Returns (success, message)
         """
+        return self.record_deliveries([DeliveryLine(line_item_id, received_quantity, batch_reference, quality_notes)])[0]
+    
+    def record_deliveries(self, deliveries: List[DeliveryLine]) -> List[Tuple[bool, str]]:
+        """
+        Record deliveries for many line items in one transaction
+        Remaining quantities are checked with one query (several deliveries of the
+        same line item are checked together), valid deliveries are inserted in bulk
+        and the statuses of each affected order are recomputed once.
+        Returns (success, message) per delivery, in the given order; invalid
+        deliveries are skipped without preventing the others.
+        """
+        if not deliveries:
+            return []
         try:
-            line_item = self.session.get(SupplierOrderLineItem, line_item_id)
-            if not line_item:
-                return False, f"Line item {line_item_id} not found"
-            
-            # Check if we can receive this quantity
-            needs = self.calculate_delivery_needs(line_item)
-            if received_quantity > needs['remaining']:
-                return False, f"Cannot receive {received_quantity} items. Only {needs['remaining']} remaining."
-            
-            # Create delivery record if table exists
-            try:
-                delivery = MaterialDelivery(
-                    supplier_order_line_item_id=line_item_id,
-                    received_quantity=received_quantity,
-                    batch_reference=batch_reference or f"BATCH-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
-                    quality_notes=quality_notes
+            line_ids = {delivery.line_item_id for delivery in deliveries}
+            rows = self.session.execute(
+                select(
+                    SupplierOrderLineItem.id,
+                    SupplierOrderLineItem.supplier_order_id,
+                    SupplierOrderLineItem.quantity,
+                    SupplierOrderLineItem.total_received_quantity,
                 )
-                self.session.add(delivery)
-            except Exception as e:
-                # MaterialDelivery table might not exist yet, continue without it
-                print(f"Delivery tracking not available: {e}")
-            
-            # Update line item quantities
-            if not hasattr(line_item, 'total_received_quantity'):
-                # Add the attribute if it doesn't exist (for backwards compatibility)
-                line_item.total_received_quantity = 0
+                .where(SupplierOrderLineItem.id.in_(line_ids))
+                .with_for_update()
+            ).all()
+            orders = {line_id: order_id for line_id, order_id, _, _ in rows}
+            ordered = {line_id: quantity for line_id, _, quantity, _ in rows}
+            received = {line_id: total or 0 for line_id, _, _, total in rows}
             
-            line_item.total_received_quantity = (line_item.total_received_quantity or 0) + received_quantity
+            results: List[Optional[Tuple[bool, str]]] = []
+            accepted: List[DeliveryLine] = []
+            for delivery in deliveries:
+                line_id = delivery.line_item_id
+                if line_id not in ordered:
+                    results.append((False, f"Line item {line_id} not found"))
+                    continue
+                remaining = max(0, ordered[line_id] - received[line_id])
+                if delivery.received_quantity > remaining:
+                    results.append((False, f"Cannot receive {delivery.received_quantity} items. Only {remaining} remaining."))
+                    continue
+                received[line_id] += delivery.received_quantity
+                accepted.append(delivery)
+                results.append(None)
             
-            # Update delivery status
-            if hasattr(line_item, 'delivery_status'):
-                if line_item.total_received_quantity >= line_item.quantity:
-                    line_item.delivery_status = DeliveryStatus.COMPLETE
-                elif line_item.total_received_quantity > 0:
-                    line_item.delivery_status = DeliveryStatus.PARTIAL
-                else:
-                    line_item.delivery_status = DeliveryStatus.PENDING
-            
-            # Check if entire supplier order is complete
-            self._update_supplier_order_status(line_item.supplier_order_id)
+            if accepted:
+                default_batch = f"BATCH-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+                self.session.execute(insert(MaterialDelivery), [{
+                    'supplier_order_line_item_id': delivery.line_item_id,
+                    'received_quantity': delivery.received_quantity,
+                    'batch_reference': delivery.batch_reference or default_batch,
+                    'quality_notes': delivery.quality_notes,
+                } for delivery in accepted])
+                updated = {delivery.line_item_id for delivery in accepted}
+                self.session.execute(update(SupplierOrderLineItem), [
+                    {'id': line_id, 'total_received_quantity': received[line_id]} for line_id in updated
+                ])
+                refresh_supplier_order_statuses(self.session, {orders[line_id] for line_id in updated})
+                self.session.commit()
             
-            self.session.commit()
-            return True, f"Delivery recorded successfully. {line_item.total_received_quantity}/{line_item.quantity} received."
+            # Running totals: each accepted delivery reports the total once it is applied
+            totals = {line_id: total or 0 for line_id, _, _, total in rows}
+            final: List[Tuple[bool, str]] = []
+            for delivery, result in zip(deliveries, results):
+                if result is None:
+                    totals[delivery.line_item_id] += delivery.received_quantity
+                    result = (True, f"Delivery recorded successfully. "
+                                    f"{totals[delivery.line_item_id]}/{ordered[delivery.line_item_id]} received.")
+                final.append(result)
+            return final
             
         except Exception as e:
             self.session.rollback()
-            return False, f"Error recording delivery: {str(e)}"
-    
-    def _update_supplier_order_status(self, supplier_order_id: int):
-        """Update supplier order status based on line item completion"""
-        supplier_order = self.session.get(SupplierOrder, supplier_order_id)
-        if not supplier_order:
-            return
-        
-        line_items = supplier_order.line_items
-        if not line_items:
-            return
-        
-        # Check completion status of all line items
-        total_items = len(line_items)
-        complete_items = 0
-        partial_items = 0
-        
-        for item in line_items:
-            received_qty = getattr(item, 'total_received_quantity', 0) or 0
-            ordered_qty = item.quantity
-            
-            if received_qty >= ordered_qty:
-                complete_items += 1
-                # Update delivery status if available
-                if hasattr(item, 'delivery_status'):
-                    item.delivery_status = DeliveryStatus.COMPLETE
-            elif received_qty > 0:
-                partial_items += 1
-                # Update delivery status if available
-                if hasattr(item, 'delivery_status'):
-                    item.delivery_status = DeliveryStatus.PARTIAL
-            else:
-                # No delivery yet
-                if hasattr(item, 'delivery_status'):
-                    item.delivery_status = DeliveryStatus.PENDING
-        
-        # Update supplier order status based on ALL line items
-        if complete_items == total_items:
-            # ALL line items are complete - use COMPLETED status
-            supplier_order.status = SupplierOrderStatus.COMPLETED
-        elif complete_items > 0 or partial_items > 0:
-            # Some items complete/partial but not all - use PARTIALLY_DELIVERED
-            supplier_order.status = SupplierOrderStatus.PARTIALLY_DELIVERED
-        # If no items received, keep current status (usually ORDERED)
+            return [(False, f"Error recording delivery: {str(e)}") for _ in deliveries]
     
     def get_delivery_summary(self, supplier_order_id: int) -> Dict[str, Any]:
         """Get delivery summary for a supplier order"""
@@ -0,0 +1,213 @@
+"""
+Content-addressed cache for generated documents.
+
+A document is identified by a hash of its kind, its prepared data dictionary,
+the output directory and a fingerprint of the template it is drawn on. An
+identical reprint returns the file generated the first time instead of
+rendering a new timestamped copy. The index (key -> file name) lives in
+``<reports_dir>/.cache/index.json``.
+
+Delivery notes are not cached: every print takes a new delivery reference,
+so no two prints carry the same data, and two deliveries of the same goods
+on the same day must not share a note.
+
+The cached documents are kept bounded: the ones older than
+``settings.reports_max_age_days`` are deleted, then the least recently used
+ones (cache hits refresh a file's modification time) until they fit in
+``settings.reports_max_mb``. Only files listed in the index are deleted; the
+other reports in the directory are left alone.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable
+from config.settings import settings
+
+# Bump when the drawing code changes so earlier outputs are not reused
+CACHE_VERSION = 1
+# Minimum delay between two automatic evictions after a store (seconds)
+EVICT_INTERVAL = 600
+
+
+class DocumentCache:
+    """Maps prepared document data to the file already generated for it."""
+
+    def __init__(self, directory: Path | None = None, max_bytes: int | None = None, max_age_days: int | None = None):
+        # None: follow settings (the reports directory may be changed at runtime)
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._fingerprints: Dict[Path, tuple[int, int, str]] = {}
+        self._last_evict = 0.0
+        # (key, path) entries kept in memory instead of written, see defer_writes()
+        self._deferred: list[tuple[str, str]] | None = None
+
+    @property
+    def directory(self) -> Path:
+        return self._directory or settings.reports_dir
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes if self._max_bytes is not None else settings.reports_max_mb * 1024 * 1024
+
+    @property
+    def max_age_days(self) -> int:
+        return self._max_age_days if self._max_age_days is not None else settings.reports_max_age_days
+
+    @property
+    def _index_path(self) -> Path:
+        return self.directory / '.cache' / 'index.json'
+
+    def template_fingerprint(self, template_path: Path | None) -> str:
+        """sha256 of the template file, recomputed only when its size or mtime changes."""
+        if template_path is None:
+            return ''
+        stat = template_path.stat()
+        cached = self._fingerprints.get(template_path)
+        if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            digest = hashlib.sha256(template_path.read_bytes()).hexdigest()
+            cached = (stat.st_mtime_ns, stat.st_size, digest)
+            self._fingerprints[template_path] = cached
+        return cached[2]
+
+    def key(self, kind: str, data: Dict[str, Any], template_path: Path | None = None,
+            output_dir: Path | None = None) -> str:
+        payload = json.dumps({
+            'version': CACHE_VERSION,
+            'kind': kind,
+            'template': self.template_fingerprint(template_path),
+            'output_dir': str(output_dir or self.directory),
+            'data': data,
+        }, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Path | None:
+        """Path of the document stored under key if it still exists (marking it as recently used)."""
+        with self._lock:
+            path_str = self._read_index().get(key)
+        if not path_str:
+            return None
+        path = Path(path_str)
+        if not path.exists():
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, key: str, path: Path) -> None:
+        if self._deferred is not None:
+            self._deferred.append((key, str(path)))
+            return
+        self.put_many([(key, str(path))])
+
+    def put_many(self, entries: Iterable[tuple[str, str]]) -> None:
+        """Store (key, path) entries with a single rewrite of the index."""
+        entries = list(entries)
+        if not entries:
+            return
+        with self._lock:
+            # A file name reused for other data (e.g. same-day devis names) invalidates the older entries
+            paths = {path for _, path in entries}
+            index = {other: p for other, p in self._read_index().items() if p not in paths}
+            index.update(entries)
+            self._write_index(index)
+        if time.monotonic() - self._last_evict > EVICT_INTERVAL:
+            self.evict()
+
+    def defer_writes(self) -> None:
+        """Keep stored entries in memory instead of writing the index.
+
+        The index is rewritten as a whole, so two processes storing at the
+        same time would drop each other's entries: render worker processes
+        only read it, and hand their entries (take_deferred) to the parent,
+        which stores them with put_many.
+        """
+        self._deferred = []
+
+    def take_deferred(self) -> list[tuple[str, str]]:
+        """Entries stored since the last call while writes are deferred."""
+        if self._deferred is None:
+            return []
+        entries, self._deferred = self._deferred, []
+        return entries
+
+    def get_or_render(self, kind: str, data: Dict[str, Any], template_path: Path | None,
+                      render: Callable[[], Path], output_dir: Path | None = None) -> Path:
+        """Existing document for identical data, else render() and remember its output."""
+        key = self.key(kind, data, template_path, output_dir)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        path = render()
+        self.put(key, path)
+        return path
+
+    def evict(self) -> int:
+        """Delete expired cached PDFs, then least recently used ones over the size limit. Returns the number deleted.
+
+        Only the files listed in the index are considered: invoices, delivery
+        notes, fiches and other reports the cache did not store are never deleted.
+        """
+        self._last_evict = time.monotonic()
+        with self._lock:
+            index = self._read_index()
+        files = []
+        for path_str in set(index.values()):
+            try:
+                stat = os.stat(path_str)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, Path(path_str)))
+        files.sort()  # oldest (least recently used) first
+
+        cutoff = time.time() - self.max_age_days * 86400
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for mtime, size, path in files:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        with self._lock:
+            # Read again: entries may have been stored meanwhile
+            index = self._read_index()
+            kept = {key: p for key, p in index.items() if Path(p).exists()}
+            if len(kept) != len(index):
+                self._write_index(kept)
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._write_index({})
+
+    def _read_index(self) -> Dict[str, str]:
+        try:
+            return json.loads(self._index_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index: Dict[str, str]) -> None:
+        # Written to a temporary file then renamed, so readers never see a partial index
+        index_path = self._index_path
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = index_path.with_name(f'index.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp_path.write_text(json.dumps(index), encoding='utf-8')
+        os.replace(tmp_path, index_path)
+
+
+document_cache = DocumentCache()
+
+
+__all__ = ['DocumentCache', 'document_cache', 'CACHE_VERSION']
@@ -0,0 +1,129 @@
+"""
+Parallel rendering of PDF documents for bulk exports.
+
+A render job is a document kind plus the data dictionary the single-document
+exports already prepare (``_prepare_order_data``,
+``_prepare_finished_product_data``, ...). Jobs are rendered in a
+ProcessPoolExecutor so ReportLab and PyPDF2 work spreads over the CPU cores;
+only the job data goes to the workers and only output paths (and document
+cache entries, stored by the parent) come back, so jobs must not carry ORM
+objects.
+"""
+from __future__ import annotations
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable
+
+# PDFFormFiller method per document kind
+FORM_FILLER_KINDS = {
+    'devis': 'fill_devis_template',
+    'supplier_order': 'fill_supplier_order_template',
+    'finished_product': 'fill_finished_product_template',
+    'raw_material_label': 'fill_raw_material_label_template',
+    'invoice': 'fill_invoice_template',
+}
+# DocumentService method per document kind (data holds the keyword arguments)
+DOCUMENT_SERVICE_KINDS = {
+    'delivery_note': 'build_delivery_note',
+}
+# Below this many jobs the pool start-up costs more than it saves
+MIN_PARALLEL_JOBS = 4
+
+
+@dataclass(slots=True)
+class RenderJob:
+    kind: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    output_filename: str | None = None
+
+
+@dataclass(slots=True)
+class RenderResult:
+    job: RenderJob
+    path: Path | None = None
+    error: str | None = None
+
+
+def render_job(job: RenderJob) -> Path:
+    """Render one job in the current process and return the output path."""
+    if job.kind in FORM_FILLER_KINDS:
+        from services.pdf_form_filler import PDFFormFiller
+        fill = getattr(PDFFormFiller(), FORM_FILLER_KINDS[job.kind])
+        return fill(job.data, job.output_filename)
+    if job.kind in DOCUMENT_SERVICE_KINDS:
+        from services.document_service import DocumentService
+        return getattr(DocumentService(), DOCUMENT_SERVICE_KINDS[job.kind])(**job.data)
+    raise ValueError(f"Unknown document kind: {job.kind}")
+
+
+def _init_worker() -> None:
+    # Workers leave the document cache index to the parent (see DocumentCache.defer_writes)
+    from services.document_cache import document_cache
+    document_cache.defer_writes()
+
+
+def _render_in_worker(job: RenderJob) -> tuple[Path, list[tuple[str, str]]]:
+    """render_job in a worker process; also returns the cache entries to store."""
+    from services.document_cache import document_cache
+    # Drop what a previous job that failed in this worker left behind
+    document_cache.take_deferred()
+    return render_job(job), document_cache.take_deferred()
+
+
+class DocumentRenderer:
+    """Renders batches of documents on a pool of worker processes."""
+
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def render(self, jobs: Iterable[RenderJob],
+               progress: Callable[[int, int], None] | None = None) -> list[RenderResult]:
+        """Render all jobs; results are in job order.
+
+        progress(done, total) is called in the calling process after each
+        document. A failing job is reported in its result and does not stop
+        the others.
+        """
+        jobs = list(jobs)
+        results = [RenderResult(job) for job in jobs]
+        total = len(jobs)
+        if total == 0:
+            return results
+
+        if self.max_workers <= 1 or total < MIN_PARALLEL_JOBS:
+            for done, result in enumerate(results, 1):
+                self._run_inline(result)
+                if progress:
+                    progress(done, total)
+            return results
+
+        from services.document_cache import document_cache
+        # spawn, not fork: the GUI process runs threads (Qt, thread pools, logging) whose
+        # locks a forked child could inherit held
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, total), initializer=_init_worker,
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {pool.submit(_render_in_worker, job): index for index, job in enumerate(jobs)}
+            for done, future in enumerate(as_completed(futures), 1):
+                result = results[futures[future]]
+                try:
+                    result.path, cache_entries = future.result()
+                except Exception as e:
+                    result.error = str(e)
+                else:
+                    document_cache.put_many(cache_entries)
+                if progress:
+                    progress(done, total)
+        return results
+
+    @staticmethod
+    def _run_inline(result: RenderResult) -> None:
+        try:
+            result.path = render_job(result.job)
+        except Exception as e:
+            result.error = str(e)
+
+
+__all__ = ['DocumentRenderer', 'RenderJob', 'RenderResult', 'render_job', 'MIN_PARALLEL_JOBS']
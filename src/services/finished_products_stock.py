@@ -0,0 +1,167 @@
+"""
+Finished products stock figures for the dashboard.
+
+Stock per client order is ``produced - delivered`` (non-archived production
+batches minus deliveries). Everything is computed with grouped queries: the
+stock of every order is aggregated in SQL, only the top rows are loaded, and
+the matching raw material quantity is summed per (client, box dimensions)
+instead of one pair of queries per order.
+"""
+from __future__ import annotations
+from typing import Any
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session, selectinload
+from models.orders import ClientOrder, SupplierOrder, SupplierOrderLineItem, MaterialDelivery, Delivery, Reception, Quotation
+from models.production import ProductionBatch
+
+# Rows shown in the dashboard table
+TOP_ROWS = 10
+
+
+def _first_line(items) -> Any:
+    return min(items, key=lambda i: i.id) if items else None
+
+
+def _designation_and_dims(order: ClientOrder) -> tuple[str, tuple[int, int, int] | None]:
+    """Designation (quotation line, else client order line, else dimensions) and target box dimensions."""
+    designation = "Produit fini"
+    qli = _first_line(order.quotation.line_items) if order.quotation else None
+    cli = _first_line(order.line_items)
+    if qli is not None:
+        if qli.description:
+            designation = qli.description
+        elif qli.length_mm and qli.width_mm and qli.height_mm:
+            designation = f"Caisse carton {qli.length_mm}×{qli.width_mm}×{qli.height_mm}"
+    elif cli is not None:
+        if cli.description:
+            designation = cli.description
+        elif cli.length_mm and cli.width_mm and cli.height_mm:
+            designation = f"Caisse carton {cli.length_mm}×{cli.width_mm}×{cli.height_mm}"
+
+    dims = None
+    if qli is not None and qli.length_mm and qli.width_mm and qli.height_mm:
+        dims = (int(qli.length_mm), int(qli.width_mm), int(qli.height_mm))
+    if dims is None and cli is not None and cli.length_mm and cli.width_mm and cli.height_mm:
+        dims = (int(cli.length_mm), int(cli.width_mm), int(cli.height_mm))
+    return designation, dims
+
+
+def _raw_quantities(session: Session, targets: set[tuple[int, int, int, int]]) -> tuple[dict, dict]:
+    """Raw material quantities for (client_id, L, W, H) targets.
+
+    Returns (received, delivered_by_order): non-archived receptions whose plaque
+    dimensions equal the box dimensions of a matching supplier line item, and
+    material deliveries of matching line items per supplier order.
+    """
+    line_key = (SupplierOrderLineItem.client_id, SupplierOrderLineItem.caisse_length_mm,
+                SupplierOrderLineItem.caisse_width_mm, SupplierOrderLineItem.caisse_height_mm)
+    in_targets = tuple_(*line_key).in_(list(targets))
+
+    received = {
+        tuple(row[:4]): int(row[4] or 0) for row in session.execute(
+            select(*line_key, func.sum(Reception.quantity))
+            .join(SupplierOrder, Reception.supplier_order_id == SupplierOrder.id)
+            .join(SupplierOrderLineItem, SupplierOrderLineItem.supplier_order_id == SupplierOrder.id)
+            .where(
+                in_targets,
+                SupplierOrder.archived_at.is_(None),
+                Reception.archived_at.is_(None),
+                Reception.plaque_width_mm == SupplierOrderLineItem.caisse_length_mm,
+                Reception.plaque_length_mm == SupplierOrderLineItem.caisse_width_mm,
+                Reception.plaque_flap_mm == SupplierOrderLineItem.caisse_height_mm,
+            )
+            .group_by(*line_key)
+        )
+    }
+
+    delivered_by_order: dict[tuple[int, int, int, int], dict[int, int]] = {}
+    for *key, supplier_order_id, quantity in session.execute(
+        select(*line_key, SupplierOrderLineItem.supplier_order_id, func.sum(MaterialDelivery.received_quantity))
+        .join(SupplierOrder, SupplierOrderLineItem.supplier_order_id == SupplierOrder.id)
+        .join(MaterialDelivery, MaterialDelivery.supplier_order_line_item_id == SupplierOrderLineItem.id)
+        .where(in_targets, SupplierOrder.archived_at.is_(None))
+        .group_by(*line_key, SupplierOrderLineItem.supplier_order_id)
+    ):
+        delivered_by_order.setdefault(tuple(key), {})[supplier_order_id] = int(quantity or 0)
+    return received, delivered_by_order
+
+
+def compute_finished_products_stock(session: Session, limit: int = TOP_ROWS) -> tuple[int, list[dict]]:
+    """Total finished products stock and the ``limit`` client orders with the most stock.
+    Rows contain designation, client, produced, delivered, stock and percent
+    (stock relative to the linked raw material received).
+    """
+    produced = (
+        select(ProductionBatch.client_order_id.label('order_id'), func.sum(ProductionBatch.quantity).label('qty'))
+        .where(ProductionBatch.archived_at.is_(None))
+        .group_by(ProductionBatch.client_order_id)
+        .subquery()
+    )
+    delivered = (
+        select(Delivery.client_order_id.label('order_id'), func.sum(Delivery.quantity).label('qty'))
+        .group_by(Delivery.client_order_id)
+        .subquery()
+    )
+    delivered_qty = func.coalesce(delivered.c.qty, 0)
+    stock_expr = produced.c.qty - delivered_qty
+    stock = (
+        select(ClientOrder.id.label('order_id'), produced.c.qty.label('produced'),
+               delivered_qty.label('delivered'), stock_expr.label('stock'))
+        .join(produced, produced.c.order_id == ClientOrder.id)
+        .outerjoin(delivered, delivered.c.order_id == ClientOrder.id)
+        .where(stock_expr > 0)
+        .cte('order_stock')
+    )
+
+    total_stock = int(session.execute(select(func.coalesce(func.sum(stock.c.stock), 0))).scalar() or 0)
+    if total_stock <= 0:
+        return 0, []
+    top = session.execute(
+        select(stock.c.order_id, stock.c.produced, stock.c.delivered, stock.c.stock)
+        .order_by(stock.c.stock.desc(), stock.c.order_id)
+        .limit(limit)
+    ).all()
+
+    orders = {
+        order.id: order for order in session.query(ClientOrder).options(
+            selectinload(ClientOrder.client),
+            selectinload(ClientOrder.quotation).selectinload(Quotation.line_items),
+            selectinload(ClientOrder.line_items),
+        ).filter(ClientOrder.id.in_([row.order_id for row in top]))
+    }
+
+    details: dict[int, tuple[str, tuple[int, int, int, int] | None]] = {}
+    for row in top:
+        order = orders[row.order_id]
+        designation, dims = _designation_and_dims(order)
+        details[row.order_id] = (designation, (order.client_id, *dims) if dims else None)
+    targets = {target for _, target in details.values() if target is not None}
+    received, delivered_by_order = _raw_quantities(session, targets) if targets else ({}, {})
+
+    rows: list[dict] = []
+    for row in top:
+        order = orders[row.order_id]
+        designation, target = details[row.order_id]
+        raw_qty = 0
+        if target is not None:
+            raw_qty = received.get(target, 0)
+            # Fallback: deliveries of the matching line items (restricted to the order's supplier order)
+            if raw_qty == 0:
+                per_order = delivered_by_order.get(target, {})
+                if order.supplier_order_id:
+                    raw_qty = per_order.get(order.supplier_order_id, 0)
+                else:
+                    raw_qty = sum(per_order.values())
+        stock_qty = int(row.stock)
+        rows.append({
+            'designation': designation,
+            'client': order.client.name if order.client else "",
+            'produced': int(row.produced),
+            'delivered': int(row.delivered),
+            'stock': stock_qty,
+            'percent': int(round((stock_qty / raw_qty) * 100)) if raw_qty > 0 else 0,
+        })
+    return total_stock, rows
+
+
+__all__ = ['compute_finished_products_stock', 'TOP_ROWS']
@@ -0,0 +1,609 @@
+"""
+Read-model loader for the main window grids.
+
+Builds the row lists displayed by ``MainWindow`` (suppliers, clients, devis,
+supplier orders, stock) using eager loading so that the number of queries is
+fixed, whatever the number of rows in the database.
+"""
+from __future__ import annotations
+import datetime
+import json
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.orm import Session, contains_eager, joinedload, selectinload
+from models.clients import Client
+from models.suppliers import Supplier
+from models.orders import ClientOrder, SupplierOrder, SupplierOrderLineItem, Reception, Quotation
+from models.production import ProductionBatch
+
+
+# Display labels for internal status values
+CLIENT_ORDER_STATUS_DISPLAY = {
+    'en_préparation': 'En Préparation',
+    'en_production': 'En Production',
+    'terminé': 'Terminé',
+    'confirmed': 'Confirmé'
+}
+
+SUPPLIER_ORDER_STATUS_DISPLAY = {
+    'commande_initial': 'Commande Initial',
+    'commande_passee': 'Commande Passée',
+    'commande_arrivee': 'Commande Arrivée',
+    'partiellement_livre': 'Partiellement Livré',
+    'termine': 'Terminé'
+}
+
+CLIENT_ORDER_STATUS_COLORS = {
+    'en_préparation': '#FFF3E0',  # Light orange for preparation
+    'en_production': '#E3F2FD',   # Light blue for production
+    'terminé': '#E8F5E8',         # Light green for complete
+    'confirmed': '#F3E5F5',       # Light purple for confirmed
+}
+
+SUPPLIER_ORDER_STATUS_COLORS = {
+    'commande_initial': '#FFF3E0',     # Light orange for initial
+    'commande_passee': '#E3F2FD',      # Light blue for ordered
+    'commande_arrivee': '#E8F5E8',     # Light green for received
+    'partiellement_livre': '#FFF9C4',  # Light yellow for partially delivered
+    'termine': '#C8E6C9',              # Darker green for completed
+}
+
+def _norm_text(s: str) -> str:
+    try:
+        return " ".join(s.strip().lower().split())
+    except Exception:
+        return s.strip().lower() if s else ""
+
+
+def _truncate_notes(notes: str | None) -> str:
+    return str((notes[:25] + "..." if notes and len(notes) > 25 else notes) or "")
+
+
+def _sorted_by_id(items) -> list[Any]:
+    return sorted(items or [], key=lambda i: i.id)
+
+
+def _quotation_description(quotation: Quotation | None) -> str:
+    """First non-empty line item description of a quotation, else its notes, else 'N/A'."""
+    if not quotation:
+        return "N/A"
+    for line in _sorted_by_id(quotation.line_items):
+        if line.description and line.description.strip():
+            return line.description.strip()
+    if quotation.notes and quotation.notes.strip():
+        return quotation.notes.strip()
+    return "N/A"
+
+
+def _id_list_aggregate(session: Session, column):
+    """Aggregate collecting the ids of a GROUP BY group (decoded by _parse_id_list)."""
+    dialect = session.get_bind().dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        # JSON_ARRAYAGG is not truncated like GROUP_CONCAT (group_concat_max_len)
+        return func.json_arrayagg(column)
+    if dialect == 'sqlite':
+        return func.json_group_array(column)
+    return func.array_agg(column)
+
+
+def _parse_id_list(value) -> list[int]:
+    if isinstance(value, (str, bytes)):
+        value = json.loads(value)
+    return [int(v) for v in value or []]
+
+
+@dataclass(slots=True)
+class GridRows:
+    """Plain row data (and optional row colors) for one DataGrid."""
+    rows: list[list[str]] = field(default_factory=list)
+    colors: list[str] | None = None
+
+
+@dataclass(slots=True)
+class SupplierOrderSections:
+    """Supplier order rows split between the four QuadView sections."""
+    initial: GridRows = field(default_factory=GridRows)
+    ordered: GridRows = field(default_factory=GridRows)
+    partial: GridRows = field(default_factory=GridRows)
+    completed: GridRows = field(default_factory=GridRows)
+
+
+@dataclass(slots=True)
+class GridSnapshot:
+    """Row data for the grids refreshed by ``MainWindow.refresh_all``.
+
+    Sections that were not loaded are left to ``None``.
+    """
+    suppliers: GridRows | None = None
+    clients: GridRows | None = None
+    quotations: GridRows | None = None
+    client_orders: GridRows | None = None
+    supplier_orders: SupplierOrderSections | None = None
+    receptions: GridRows | None = None
+    production: GridRows | None = None
+
+
+# Tables read to build each GridSnapshot section
+GRID_TABLE_DEPENDENCIES: dict[str, tuple[str, ...]] = {
+    'suppliers': ('suppliers',),
+    'clients': ('clients',),
+    'quotations': ('quotations', 'quotation_line_items', 'clients'),
+    'client_orders': ('client_orders', 'clients'),
+    'supplier_orders': ('supplier_orders', 'supplier_order_line_items', 'suppliers', 'clients'),
+    'receptions': ('receptions', 'supplier_orders', 'supplier_order_line_items', 'suppliers', 'clients',
+                   'client_orders', 'quotations', 'quotation_line_items'),
+    'production': ('production_batches', 'client_orders', 'supplier_orders', 'supplier_order_line_items',
+                   'clients', 'quotations', 'quotation_line_items'),
+}
+
+
+def sections_for_tables(changed_tables: set[str]) -> list[str]:
+    """Names of the snapshot sections depending on at least one of the given tables."""
+    return [name for name, tables in GRID_TABLE_DEPENDENCIES.items() if changed_tables.intersection(tables)]
+
+
+class GridDataLoader:
+    """Loads the main window grids with a fixed number of queries."""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self._client_descriptions: dict[int, str] | None = None
+
+    def load_all(self) -> GridSnapshot:
+        return self.load(GRID_TABLE_DEPENDENCIES)
+
+    def load(self, sections: Iterable[str]) -> GridSnapshot:
+        """Load only the requested snapshot sections."""
+        snapshot = GridSnapshot()
+        for name in sections:
+            if name not in GRID_TABLE_DEPENDENCIES:
+                raise ValueError(f"Unknown grid section: {name}")
+            setattr(snapshot, name, getattr(self, name)())
+        return snapshot
+
+    def suppliers(self) -> GridRows:
+        # Plain columns: the grid does not need Supplier objects
+        suppliers = self.session.execute(
+            select(Supplier.id, Supplier.name, Supplier.phone, Supplier.email, Supplier.address).order_by(Supplier.id)
+        )
+        return GridRows([
+            [
+                str(s.id),
+                s.name or "",
+                s.phone or "",
+                s.email or "",
+                s.address or "",
+            ]
+            for s in suppliers
+        ])
+
+    def clients(self) -> GridRows:
+        clients = self.session.execute(
+            select(Client.id, Client.name, Client.phone, Client.email, Client.address, Client.activity)
+            .order_by(Client.id)
+        )
+        return GridRows([
+            [
+                str(c.id),
+                c.name or "",
+                c.phone or "",
+                c.email or "",
+                c.address or "",
+                c.activity or "",
+            ]
+            for c in clients
+        ])
+
+    def quotations(self) -> GridRows:
+        """Active (non archived) devis with a summary of their line items."""
+        quotations = self.session.query(Quotation).join(Quotation.client).options(
+            contains_eager(Quotation.client),
+            selectinload(Quotation.line_items),
+        ).filter(
+            Quotation.archived_at.is_(None)
+        ).all()
+
+        result = GridRows(colors=[])
+        for q in quotations:
+            if not q.client:
+                continue
+
+            line_items = _sorted_by_id(q.line_items)
+            dimensions = []
+            quantities = []
+            cardboard_types = set()
+            for item in line_items:
+                if item.length_mm and item.width_mm and item.height_mm:
+                    dimensions.append(f"{item.length_mm}×{item.width_mm}×{item.height_mm}")
+                quantities.append(str(item.quantity))
+                if item.cardboard_type:
+                    cardboard_types.add(item.cardboard_type)
+
+            if dimensions:
+                dimensions_str = ", ".join(dimensions[:2])  # Show first 2 dimensions
+                if len(dimensions) > 2:
+                    dimensions_str += f" (+{len(dimensions)-2} autres)"
+            else:
+                dimensions_str = "N/A"
+
+            if quantities:
+                quantities_str = ", ".join(quantities[:2])
+                if len(quantities) > 2:
+                    quantities_str += f" (+{len(quantities)-2} autres)"
+            else:
+                quantities_str = "N/A"
+
+            if cardboard_types:
+                cardboard_str = ", ".join(sorted(cardboard_types)[:2])
+                if len(cardboard_types) > 2:
+                    cardboard_str += f" (+{len(cardboard_types)-2} autres)"
+            else:
+                cardboard_str = "Standard"
+
+            result.rows.append([
+                str(q.id),
+                str(q.reference or ""),
+                str(q.client.name if q.client else "N/A"),
+                str(q.issue_date) if q.issue_date else "N/A",
+                str(q.valid_until) if q.valid_until else "N/A",
+                "Devis Initial" if q.is_initial else "Devis Final",
+                f"{len(line_items)} article(s)",
+                dimensions_str,
+                quantities_str,
+                cardboard_str,
+                f"{q.total_amount:,.2f}" if q.total_amount is not None else "0.00",
+                _truncate_notes(q.notes)
+            ])
+            # Light blue for initial devis, light green for final devis
+            result.colors.append("#E3F2FD" if q.is_initial else "#E8F5E8")
+        return result
+
+    def client_orders(self) -> GridRows:
+        client_orders = self.session.query(ClientOrder).join(ClientOrder.client).options(
+            contains_eager(ClientOrder.client),
+        ).filter(
+            ClientOrder.archived_at.is_(None)
+        ).all()
+
+        result = GridRows(colors=[])
+        for co in client_orders:
+            if not co.client:
+                continue
+
+            creation_date_str = ""
+            if co.created_at:
+                if isinstance(co.created_at, datetime.datetime):
+                    creation_date_str = co.created_at.strftime("%d/%m/%Y")
+                else:
+                    creation_date_str = str(co.created_at)
+
+            status_value = co.status.value if co.status else ""
+            result.rows.append([
+                str(co.id),
+                str(co.reference or ""),
+                str(co.client.name if co.client else "N/A"),
+                CLIENT_ORDER_STATUS_DISPLAY.get(status_value, "N/A"),
+                creation_date_str,
+                f"{co.total_amount:,.2f}" if co.total_amount else "0.00",
+                _truncate_notes(co.notes)
+            ])
+            result.colors.append(CLIENT_ORDER_STATUS_COLORS.get(status_value or "en_préparation", "#FFFFFF"))
+        return result
+
+    def supplier_orders(self) -> SupplierOrderSections:
+        """Active supplier orders split between the four status sections."""
+        supplier_orders = self.session.query(SupplierOrder).join(SupplierOrder.supplier).options(
+            contains_eager(SupplierOrder.supplier),
+            selectinload(SupplierOrder.line_items).joinedload(SupplierOrderLineItem.client),
+        ).filter(
+            SupplierOrder.archived_at.is_(None)
+        ).all()
+
+        sections = SupplierOrderSections(
+            initial=GridRows(colors=[]),
+            ordered=GridRows(colors=[]),
+            partial=GridRows(colors=[]),
+            completed=GridRows(colors=[]),
+        )
+        for so in supplier_orders:
+            clients_set = {item.client.name for item in so.line_items or [] if item.client}
+            clients_display = ", ".join(sorted(clients_set)) if clients_set else "N/A"
+            if len(clients_display) > 50:
+                clients_display = clients_display[:47] + "..."
+
+            order_date_str = ""
+            if so.order_date:
+                if isinstance(so.order_date, datetime.date):
+                    order_date_str = so.order_date.strftime("%d/%m/%Y")
+                else:
+                    order_date_str = str(so.order_date)
+
+            status_value = so.status.value if so.status else ""
+            status_label = SUPPLIER_ORDER_STATUS_DISPLAY.get(status_value, "N/A")
+            color = SUPPLIER_ORDER_STATUS_COLORS.get(status_value or "commande_initial", "#FFFFFF")
+            row = [
+                str(so.id),
+                getattr(so, 'bon_commande_ref', getattr(so, 'reference', '')) or "",
+                so.supplier.name if so.supplier else "N/A",
+                status_label,
+                order_date_str,
+                f"{so.total_amount:,.2f} {so.currency}" if so.total_amount else "0.00 DZD",
+                str(len(so.line_items or [])),
+                clients_display
+            ]
+
+            if status_label == "Commande Initial":
+                # Initial orders get simplified data (no status column)
+                section = sections.initial
+                row = [row[0], row[1], row[2], row[4], row[5], row[6], row[7]]
+            elif status_label == "Partiellement Livré":
+                section = sections.partial
+            elif status_label == "Terminé":
+                section = sections.completed
+            else:
+                # "Commande Passée" and any other status go to the ordered section
+                section = sections.ordered
+            section.rows.append(row)
+            section.colors.append(color)
+        return sections
+
+    def client_descriptions(self) -> dict[int, str]:
+        """Map client id -> first description found on that client's quotations.
+
+        Mirrors the per-row fallback lookup: client orders having a quotation
+        are scanned in id order, and the first quotation yielding a line item
+        description (or notes) wins.
+        """
+        if self._client_descriptions is None:
+            orders = self.session.query(ClientOrder).options(
+                selectinload(ClientOrder.quotation).selectinload(Quotation.line_items),
+            ).filter(
+                ClientOrder.quotation_id.isnot(None)
+            ).order_by(ClientOrder.id).all()
+
+            descriptions: dict[int, str] = {}
+            for co in orders:
+                if co.client_id in descriptions:
+                    continue
+                description = _quotation_description(co.quotation)
+                if description != "N/A":
+                    descriptions[co.client_id] = description
+            self._client_descriptions = descriptions
+        return self._client_descriptions
+
+    def receptions(self) -> GridRows:
+        """Raw material stock, grouped by client, plaque dimensions and description.
+
+        Receptions are merged only when all three attributes are known; any
+        reception with a missing component is displayed on its own row. The
+        grouping runs as one SQL GROUP BY on the structured reception columns
+        (split per supplier order for display); only descriptions differing
+        by case or spacing are merged afterwards.
+        """
+        dims_known = and_(
+            Reception.plaque_width_mm.isnot(None),
+            Reception.plaque_length_mm.isnot(None),
+            Reception.plaque_flap_mm.isnot(None),
+        )
+        desc_known = and_(
+            Reception.notes.isnot(None),
+            func.trim(Reception.notes) != '',
+            or_(Reception.notes.contains('—'), ~Reception.notes.like('Arrivée matière:%')),
+        )
+        mergeable = and_(dims_known, Reception.client_id.isnot(None), desc_known)
+        # Non-mergeable receptions get their own group
+        split_key = case((mergeable, 0), else_=Reception.id)
+        group_columns = (
+            Reception.plaque_width_mm, Reception.plaque_length_mm, Reception.plaque_flap_mm,
+            Reception.client_id, Reception.supplier_order_id, Reception.notes, split_key,
+        )
+        first_id = func.min(Reception.id)
+        stmt = select(
+            *group_columns[:-1],
+            first_id,
+            _id_list_aggregate(self.session, Reception.id),
+            func.sum(Reception.quantity),
+            func.max(Reception.reception_date),
+        ).join(Reception.supplier_order).where(
+            SupplierOrder.archived_at.is_(None),
+            Reception.archived_at.is_(None)
+        ).group_by(*group_columns).order_by(first_id)
+        groups = self.session.execute(stmt).all()
+
+        supplier_orders = {
+            so.id: so for so in self.session.query(SupplierOrder).options(
+                joinedload(SupplierOrder.supplier),
+                selectinload(SupplierOrder.line_items).joinedload(SupplierOrderLineItem.client),
+            ).filter(SupplierOrder.id.in_({g[4] for g in groups}))
+        } if groups else {}
+
+        grouped_receptions: dict[str, dict[str, Any]] = {}
+        for width, length, flap, client_id, supplier_order_id, notes, _, id_list, quantity, last_date in groups:
+            ids = sorted(_parse_id_list(id_list))
+            dimensions_key = f"{width}x{length}x{flap}mm" if width is not None and length is not None and flap is not None else "unknown"
+
+            bon_commande_ref = ""
+            clients_list: list[str] = []
+            supplier_name = "N/A"
+
+            so = supplier_orders.get(supplier_order_id)
+            if so:
+                bon_commande_ref = getattr(so, 'bon_commande_ref', getattr(so, 'reference', ''))
+                supplier_name = so.supplier.name if so.supplier else "N/A"
+                clients_list = sorted({item.client.name for item in so.line_items or [] if item.client})
+
+            clients_display = ", ".join(clients_list) if clients_list else "N/A"
+            if len(clients_display) > 40:
+                clients_display = clients_display[:37] + "..."
+
+            desc_key = "n/a"
+            if notes and notes.strip():
+                if "—" in notes:
+                    desc_key = _norm_text(notes.split("—", 1)[1])
+                elif not notes.startswith("Arrivée matière:"):
+                    desc_key = _norm_text(notes)
+
+            if dimensions_key != "unknown" and client_id is not None and desc_key != "n/a":
+                group_key = f"{dimensions_key}|client:{client_id}|desc:{desc_key}"
+            else:
+                group_key = f"{dimensions_key}|client:{client_id or 'N/A'}|desc:{desc_key}|id:{ids[0]}"
+
+            reception_date = last_date.isoformat() if last_date else ""
+            if group_key not in grouped_receptions:
+                grouped_receptions[group_key] = {
+                    'ids': ids,
+                    'quantity': int(quantity or 0),
+                    'supplier': supplier_name,
+                    'bon_commande': bon_commande_ref or "N/A",
+                    'clients': clients_display,
+                    'date': reception_date,
+                    'dimensions': dimensions_key,
+                    'notes': notes,
+                    'supplier_order': so,
+                }
+                continue
+
+            group = grouped_receptions[group_key]
+            group['ids'].extend(ids)
+            group['quantity'] += int(quantity or 0)
+            # Keep the most recent date
+            if reception_date > group['date']:
+                group['date'] = reception_date
+            current_bon = bon_commande_ref or "N/A"
+            if current_bon != group['bon_commande'] and current_bon != "N/A":
+                if group['bon_commande'] == "N/A":
+                    group['bon_commande'] = current_bon
+                else:
+                    group['bon_commande'] = f"{group['bon_commande']}, {current_bon}"
+            if clients_display != group['clients'] and clients_display != "N/A":
+                if group['clients'] == "N/A":
+                    group['clients'] = clients_display
+                else:
+                    combined_clients = f"{group['clients']}, {clients_display}"
+                    if len(combined_clients) > 40:
+                        combined_clients = combined_clients[:37] + "..."
+                    group['clients'] = combined_clients
+
+        result = GridRows()
+        for group in grouped_receptions.values():
+            description = "N/A"
+            notes = group['notes']
+            # Prefer a meaningful description stored in notes by the arrival logic
+            if notes and notes.strip() and not notes.startswith("Arrivée matière:"):
+                description = notes.strip()
+            if description == "N/A" and group['supplier_order']:
+                line_items = _sorted_by_id(group['supplier_order'].line_items)
+                if line_items and line_items[0].client_id:
+                    description = self.client_descriptions().get(line_items[0].client_id, "N/A")
+
+            # Enrich description with dimension token so '100x200x50' searches match reliably
+            desc_with_dims = description
+            if group['dimensions'] != 'unknown':
+                dims_ascii = group['dimensions'].replace('×', 'x')
+                desc_with_dims = f"{description} [{dims_ascii}]" if description != "N/A" else dims_ascii
+
+            result.rows.append([
+                ",".join(map(str, group['ids'])),  # All IDs for context menu
+                str(group['quantity']),
+                group['supplier'],
+                group['bon_commande'],
+                group['clients'],
+                desc_with_dims,
+                group['date'],
+            ])
+        return result
+
+    def production(self) -> GridRows:
+        """Finished products stock, grouped by client, caisse dimensions and description."""
+        batches = self.session.query(ProductionBatch).options(
+            joinedload(ProductionBatch.client_order).joinedload(ClientOrder.client),
+            joinedload(ProductionBatch.client_order)
+            .selectinload(ClientOrder.supplier_order)
+            .selectinload(SupplierOrder.line_items)
+            .joinedload(SupplierOrderLineItem.client),
+            joinedload(ProductionBatch.client_order)
+            .selectinload(ClientOrder.quotation)
+            .selectinload(Quotation.line_items),
+        ).filter(
+            ProductionBatch.archived_at.is_(None)
+        ).all()
+
+        grouped_items: dict[tuple, dict[str, Any]] = {}
+        for pb in batches:
+            client_name = "N/A"
+            client_id = None
+            caisse_dims = "N/A"
+            client_order = pb.client_order
+
+            if client_order:
+                # Priority: client from the first supplier order line item (most accurate)
+                if client_order.supplier_order:
+                    supplier_lines = _sorted_by_id(client_order.supplier_order.line_items)
+                    first_line = supplier_lines[0] if supplier_lines else None
+                    if first_line and first_line.client_id:
+                        if first_line.client:
+                            client_name = first_line.client.name
+                            client_id = first_line.client.id
+                        if first_line.caisse_length_mm and first_line.caisse_width_mm and first_line.caisse_height_mm:
+                            caisse_dims = f"{first_line.caisse_length_mm}×{first_line.caisse_width_mm}×{first_line.caisse_height_mm}"
+
+                # Fallback: client of the client order
+                if client_name == "N/A" and client_order.client:
+                    client_name = client_order.client.name
+                    client_id = client_order.client.id
+
+                # Dimensions from the first quotation line item
+                if caisse_dims == "N/A" and client_order.quotation:
+                    quotation_lines = _sorted_by_id(client_order.quotation.line_items)
+                    first_ql = quotation_lines[0] if quotation_lines else None
+                    if first_ql and first_ql.length_mm and first_ql.width_mm and first_ql.height_mm:
+                        caisse_dims = f"{first_ql.length_mm}×{first_ql.width_mm}×{first_ql.height_mm}"
+
+            # Priority 0: description persisted on the batch at creation
+            if pb.description and pb.description.strip():
+                description = pb.description.strip()
+            else:
+                description = _quotation_description(client_order.quotation if client_order else None)
+                if description == "N/A" and client_id:
+                    description = self.client_descriptions().get(client_id, "N/A")
+
+            production_date = pb.production_date.strftime('%Y-%m-%d') if pb.production_date else "N/A"
+
+            # STRICT GROUPING: same client id + same caisse dimensions + same description
+            desc_key = _norm_text(description) if description and description != "N/A" else None
+            if client_id is not None and caisse_dims != "N/A" and desc_key:
+                group_key: tuple = (client_id, caisse_dims, desc_key)
+            else:
+                group_key = (f"ungroupable_{pb.id}", f"batch_{pb.id}")
+
+            group_item = grouped_items.setdefault(group_key, {
+                'ids': [],
+                'client_name': client_name,
+                'dimensions': caisse_dims,
+                'total_quantity': 0,
+                'production_dates': [],
+                'description': description
+            })
+            group_item['ids'].append(str(pb.id))
+            group_item['total_quantity'] += int(pb.quantity or 0)
+            if production_date != "N/A":
+                group_item['production_dates'].append(production_date)
+            if group_item['description'] == 'N/A' and description != 'N/A':
+                group_item['description'] = description
+
+        result = GridRows()
+        for group_data in grouped_items.values():
+            result.rows.append([
+                # Exact list of IDs so downstream actions (like invoicing) can resolve them
+                ",".join(group_data['ids']),
+                group_data['client_name'],
+                group_data['dimensions'],
+                str(group_data['total_quantity']),
+                group_data['description'],
+                max(group_data['production_dates']) if group_data['production_dates'] else "N/A"
+            ])
+        return result
+
+
+__all__ = ['GridDataLoader', 'GridSnapshot', 'GridRows', 'SupplierOrderSections', 'GRID_TABLE_DEPENDENCIES', 'sections_for_tables']
@@ -10,22 +10,29 @@ from config.database import SessionLocal
 from models.production import ProductionBatch
 from models.orders import ClientOrder, Quotation
 from models.clients import Client
+from utils.instrumentation import timed
 
 
 class InvoiceService:
     """Service for handling invoice operations."""
     
     def __init__(self, session=None):
-        self.session = session or SessionLocal()
+        # Without a session, the service opens its own (not the thread's shared one): close() or use as a context manager
+        self.session = session or SessionLocal.session_factory()
         self._close_session = session is None
     
     def __enter__(self):
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def close(self):
+        """Close the session if the service opened it."""
         if self._close_session:
             self.session.close()
     
+    @timed('invoice.prepare')
     def prepare_invoice_data(self, production_ids: List[int], include_tva: bool = True) -> Dict[str, Any]:
         """
         Prepare invoice data from production batch IDs.
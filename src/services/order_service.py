@@ -6,6 +6,7 @@ from models.clients import Client
 from sqlalchemy import select
 from decimal import Decimal
 from typing import Sequence, Any, cast
+from utils.instrumentation import timed
 
 
 class OrderService:
@@ -109,6 +110,7 @@ class OrderService:
     def list_orders(self) -> list[ClientOrder]:
         return list(self.db.scalars(select(ClientOrder)).all())
 
+    @timed('quotation.prepare_pdf')
     def get_quotation_for_pdf(self, quotation_id: int) -> dict[str, Any]:
         """
         Get complete quotation data formatted for PDF generation.
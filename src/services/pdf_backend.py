@@ -0,0 +1,134 @@
+"""
+PDF library backends for the form filler.
+
+The library used to read templates and merge overlays is probed once per
+process (PyPDF2, then pypdf) and the matching backend is reused for every
+document. Without either library the overlay-only backend writes the
+ReportLab overlay as the document, without the template background.
+"""
+from __future__ import annotations
+import importlib
+import importlib.util
+import io
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+# Probed in this order; both expose the same PdfReader/PdfWriter API
+PDF_LIBRARIES = ('PyPDF2', 'pypdf')
+# How to get a template-capable backend (the version is pinned in requirements.txt)
+INSTALL_HINT = "pip install PyPDF2"
+
+
+class PDFBackendUnavailable(Exception):
+    """A template operation needs a PDF library that is not installed."""
+
+    def __init__(self, operation: str):
+        super().__init__(f"{operation} need {' or '.join(PDF_LIBRARIES)} ({INSTALL_HINT})")
+
+
+class PDFBackend:
+    """Template operations needed by PDFFormFiller."""
+
+    name = 'overlay-only'
+    # False when templates are not used at all (overlay written as is)
+    uses_templates = False
+    # Capabilities checked by PDFFormFiller before calling fill_fields / write_overlay_pages
+    supports_fields = False
+    supports_multipage = False
+
+    def open_template(self, data: bytes) -> Any:
+        return data
+
+    def has_fields(self, template: Any) -> bool:
+        return False
+
+    def fill_fields(self, template: Any, field_data: Dict[str, str], output_path: Path) -> None:
+        raise PDFBackendUnavailable("Form fields")
+
+    def merge_overlay(self, template: Any, overlay: io.BytesIO, output_path: Path,
+                      include_remaining_pages: bool = False) -> None:
+        output_path.write_bytes(overlay.getvalue())
+
+    def write_overlay_pages(self, template: Any, overlays: Iterable[io.BytesIO], output_path: Path) -> int:
+        raise PDFBackendUnavailable("Multi-page documents")
+
+
+class PyPDFBackend(PDFBackend):
+    """PyPDF2 or pypdf (same API)."""
+
+    uses_templates = True
+    supports_fields = True
+    supports_multipage = True
+
+    def __init__(self, module):
+        self.module = module
+        self.name = module.__name__
+
+    def open_template(self, data: bytes) -> Any:
+        return self.module.PdfReader(io.BytesIO(data))
+
+    def has_fields(self, template: Any) -> bool:
+        return bool(template.get_fields())
+
+    def fill_fields(self, template: Any, field_data: Dict[str, str], output_path: Path) -> None:
+        pdf_writer = self.module.PdfWriter()
+        for page in template.pages:
+            pdf_writer.add_page(page)
+        pdf_writer.update_page_form_field_values(pdf_writer.pages[0], field_data)
+        with open(output_path, 'wb') as output_file:
+            pdf_writer.write(output_file)
+
+    def merge_overlay(self, template: Any, overlay: io.BytesIO, output_path: Path,
+                      include_remaining_pages: bool = False) -> None:
+        overlay_page = self.module.PdfReader(overlay).pages[0]
+        pdf_writer = self.module.PdfWriter()
+        # add_page copies the page, the cached template is left untouched
+        page = pdf_writer.add_page(template.pages[0])
+        page.merge_page(overlay_page)
+        if include_remaining_pages:
+            for template_page in template.pages[1:]:
+                pdf_writer.add_page(template_page)
+        with open(output_path, 'wb') as output_file:
+            pdf_writer.write(output_file)
+
+    def write_overlay_pages(self, template: Any, overlays: Iterable[io.BytesIO], output_path: Path) -> int:
+        pdf_writer = self.module.PdfWriter()
+        for overlay in overlays:
+            page = pdf_writer.add_page(template.pages[0])
+            page.merge_page(self.module.PdfReader(overlay).pages[0])
+        if pdf_writer.pages:
+            with open(output_path, 'wb') as output_file:
+                pdf_writer.write(output_file)
+        return len(pdf_writer.pages)
+
+
+def detect_backend() -> PDFBackend:
+    """Backend for the first importable PDF library, else overlay-only."""
+    for library in PDF_LIBRARIES:
+        try:
+            return PyPDFBackend(importlib.import_module(library))
+        except ImportError:
+            continue
+    return PDFBackend()
+
+
+def available_library() -> str | None:
+    """Name of the library get_backend() will use, found without importing it."""
+    for library in PDF_LIBRARIES:
+        if importlib.util.find_spec(library) is not None:
+            return library
+    return None
+
+
+_backend: PDFBackend | None = None
+
+
+def get_backend() -> PDFBackend:
+    """Backend selected by the one-time probe (probing on first use)."""
+    global _backend
+    if _backend is None:
+        _backend = detect_backend()
+    return _backend
+
+
+__all__ = ['PDFBackend', 'PyPDFBackend', 'PDFBackendUnavailable', 'INSTALL_HINT', 'detect_backend', 'get_backend', 'available_library', 'PDF_LIBRARIES']
@@ -4,14 +4,17 @@ Professional PDF export service for supplier orders using templates.
 
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Iterable
 from datetime import datetime, date
 from config.database import SessionLocal
 from models.orders import SupplierOrder
 from models.suppliers import Supplier
+from services.document_renderer import RenderJob
 from services.pdf_form_filler import PDFFormFiller, PDFFillError
+from utils.instrumentation import timed
 
 
+@timed('pdf.export_supplier_order')
 def export_supplier_order_to_pdf(order_id: int) -> Path | None:
     """
     Export a supplier order to PDF using the page.pdf template.
@@ -53,6 +56,51 @@ def export_supplier_order_to_pdf(order_id: int) -> Path | None:
         session.close()
 
 
+def prepare_supplier_order_jobs(order_ids: list[int]) -> Dict[int, RenderJob]:
+    """
+    Prepare one supplier_order render job per order, in one session, for bulk
+    exports (e.g. month-end re-exports) rendered with DocumentRenderer.
+    
+    Args:
+        order_ids: IDs of the supplier orders to export
+        
+    Returns:
+        RenderJob per order ID, in the given order (orders not found or without supplier are left out)
+    """
+    from sqlalchemy.orm import selectinload
+    
+    session = SessionLocal()
+    try:
+        # Workers only get plain dictionaries
+        orders = {
+            order.id: order for order in session.query(SupplierOrder).options(
+                selectinload(SupplierOrder.supplier),
+                selectinload(SupplierOrder.line_items)
+            ).filter(SupplierOrder.id.in_(order_ids))
+        }
+        jobs: Dict[int, RenderJob] = {}
+        for order_id in order_ids:
+            order = orders.get(order_id)
+            if order and order.supplier:
+                jobs[order_id] = RenderJob('supplier_order', _prepare_order_data(order, order.supplier))
+        return jobs
+    finally:
+        session.close()
+
+
+def supplier_order_ids_for_month(year: int, month: int) -> list[int]:
+    """IDs of the supplier orders dated in the given month (archived ones included), by date."""
+    start = date(year, month, 1)
+    end = date(year + (month == 12), month % 12 + 1, 1)
+    session = SessionLocal()
+    try:
+        return [order_id for (order_id,) in session.query(SupplierOrder.id).filter(
+            SupplierOrder.order_date >= start, SupplierOrder.order_date < end
+        ).order_by(SupplierOrder.order_date, SupplierOrder.id)]
+    finally:
+        session.close()
+
+
 def _prepare_order_data(order: SupplierOrder, supplier: Supplier) -> Dict[str, Any]:
     """
     Prepare supplier order data for PDF template.
@@ -104,9 +152,10 @@ def _prepare_order_data(order: SupplierOrder, supplier: Supplier) -> Dict[str, A
     }
 
 
+@timed('pdf.export_finished_product_fiche')
 def export_finished_product_fiche(production_batch_id: int, quantity: int, 
                                  copy_number: int = 1, total_copies: int = 1, 
-                                 dimensions: str | None = None) -> Path | None:
+                                 dimensions: str | None = None, reference: str | None = None) -> Path | None:
     """
     Export a finished product fiche to PDF using the PF.pdf template.
     
@@ -116,6 +165,8 @@ def export_finished_product_fiche(production_batch_id: int, quantity: int,
         copy_number: The copy number (for multiple pallets)
         total_copies: Total number of copies being generated
         dimensions: Optional dimensions string from UI grid
+        reference: Fiche reference, e.g. from ReferenceGenerator.reserve() for multi-copy
+            runs; a new FP reference is generated when omitted
         
     Returns:
         Path to the generated PDF file, or None if export failed
@@ -143,7 +194,7 @@ def export_finished_product_fiche(production_batch_id: int, quantity: int,
             return None
         
         # Prepare data for PDF template
-        product_data = _prepare_finished_product_data(batch, client_order, quantity, copy_number, total_copies, dimensions)
+        product_data = _prepare_finished_product_data(batch, client_order, quantity, copy_number, total_copies, dimensions, reference)
         
         # Generate PDF using template
         pdf_filler = PDFFormFiller()
@@ -166,8 +217,82 @@ def export_finished_product_fiche(production_batch_id: int, quantity: int,
         session.close()
 
 
-def _prepare_finished_product_data(batch, client_order, quantity: int, copy_number: int, total_copies: int, dimensions_override: str | None = None) -> Dict[str, Any]:
-    """Prepare finished product data for PDF template."""
+@timed('pdf.export_finished_product_fiches')
+def export_finished_product_fiches(pallets: list[tuple[int, int]], dimensions: str | None = None,
+                                   references: Iterable[str] | None = None) -> Path | None:
+    """
+    Export the fiches of several pallets to a single multi-page PDF using the PF.pdf template.
+    
+    Args:
+        pallets: (production_batch_id, quantity) per pallet, one fiche (page) each
+        dimensions: Optional dimensions string from UI grid
+        references: Fiche references, one per pallet; a block is reserved when omitted
+        
+    Returns:
+        Path to the generated PDF file, or None if export failed
+    """
+    from models.production import ProductionBatch
+    from models.orders import ClientOrder, Quotation
+    from sqlalchemy.orm import selectinload
+    from utils.reference_generator import ReferenceGenerator
+    
+    if not pallets:
+        return None
+    
+    session = SessionLocal()
+    try:
+        # Load every batch and client order of the run once
+        batches = {
+            batch.id: batch for batch in
+            session.query(ProductionBatch).filter(ProductionBatch.id.in_({batch_id for batch_id, _ in pallets}))
+        }
+        client_orders = {
+            order.id: order for order in session.query(ClientOrder).options(
+                selectinload(ClientOrder.client),
+                selectinload(ClientOrder.line_items),
+                selectinload(ClientOrder.quotation).selectinload(Quotation.line_items)
+            ).filter(ClientOrder.id.in_({batch.client_order_id for batch in batches.values()}))
+        }
+        fiches = [
+            (batches[batch_id], client_orders[batches[batch_id].client_order_id], quantity)
+            for batch_id, quantity in pallets
+            if batch_id in batches and batches[batch_id].client_order_id in client_orders
+        ]
+        if not fiches:
+            return None
+        
+        total_copies = len(fiches)
+        if references is None:
+            references = ReferenceGenerator.reserve('finished_product', total_copies)
+        references = iter(references)
+        # Each page is prepared and rendered only when the writer reaches it
+        pages = (
+            _prepare_finished_product_data(batch, client_order, quantity, copy_number, total_copies,
+                                           dimensions, next(references), session=session)
+            for copy_number, (batch, client_order, quantity) in enumerate(fiches, 1)
+        )
+        
+        pdf_filler = PDFFormFiller()
+        try:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            first_order = fiches[0][1]
+            client_name = first_order.client.name if first_order.client else 'client'
+            filename = f"fiches_produit_fini_{client_name}_{total_copies}p_{timestamp}.pdf"
+            
+            return pdf_filler.fill_finished_product_pages(pages, filename)
+        except PDFFillError as e:
+            print(f"PDF generation error: {e}")
+            return None
+            
+    except Exception as e:
+        print(f"Error exporting finished product fiches to PDF: {e}")
+        return None
+    finally:
+        session.close()
+
+
+def _prepare_finished_product_data(batch, client_order, quantity: int, copy_number: int, total_copies: int, dimensions_override: str | None = None, reference: str | None = None, session=None) -> Dict[str, Any]:
+    """Prepare finished product data for PDF template (session: optional open session to reuse for lookups)."""
     
     # Format production date
     production_date = ""
@@ -198,11 +323,10 @@ def _prepare_finished_product_data(batch, client_order, quantity: int, copy_numb
     if not dimensions and client_order and client_order.client:
         from models.orders import Quotation, QuotationLineItem
         from sqlalchemy import desc
-        from config.database import SessionLocal
         
-        session = SessionLocal()
+        lookup_session = session or SessionLocal()
         try:
-            most_recent_quotation = session.query(Quotation).filter(
+            most_recent_quotation = lookup_session.query(Quotation).filter(
                 Quotation.client_id == client_order.client.id
             ).order_by(desc(Quotation.issue_date)).first()
             
@@ -213,7 +337,8 @@ def _prepare_finished_product_data(batch, client_order, quantity: int, copy_numb
                     designation = quotation_line_item.description
                     print(f"DEBUG Product Sheet: Found recent quotation description: '{dimensions}'")
         finally:
-            session.close()
+            if session is None:
+                lookup_session.close()
     
     # Fallback to client order line items
     if not dimensions and client_order and client_order.line_items:
@@ -234,9 +359,10 @@ def _prepare_finished_product_data(batch, client_order, quantity: int, copy_numb
     if not designation:
         designation = dimensions
     
-    # Generate unique reference for this fiche using unified system
-    from utils.reference_generator import generate_finished_product_reference
-    reference = generate_finished_product_reference(f"COPIE{copy_number:03d}")
+    # Generate unique reference for this fiche using unified system (unless reserved by the caller)
+    if reference is None:
+        from utils.reference_generator import generate_finished_product_reference
+        reference = generate_finished_product_reference(f"COPIE{copy_number:03d}")
     
     # Add copy information if multiple copies
     copy_info = ""
@@ -255,6 +381,7 @@ def _prepare_finished_product_data(batch, client_order, quantity: int, copy_numb
     }
 
 
+@timed('pdf.export_raw_material_label')
 def export_raw_material_label(reception_ids: list[int], remark: str = "") -> Path | None:
     """
     Export a raw material label to PDF using the MP.pdf template.
@@ -266,72 +393,17 @@ def export_raw_material_label(reception_ids: list[int], remark: str = "") -> Pat
     Returns:
         Path to the generated PDF file, or None if export failed
     """
-    from models.orders import SupplierOrderLineItem, SupplierOrder, Reception
-    from models.clients import Client
-    from sqlalchemy.orm import joinedload
+    from models.orders import Reception
     
     session = SessionLocal()
     try:
         # Get the receptions
         receptions = session.query(Reception).filter(Reception.id.in_(reception_ids)).all()
         
-        if not receptions:
+        label = _raw_material_label_data(receptions, reception_ids, remark, session=session)
+        if label is None:
             return None
-        
-        # Use the first reception as the primary one for extracting information
-        primary_reception = receptions[0]
-        supplier_order = primary_reception.supplier_order
-        
-        if not supplier_order:
-            return None
-        
-        # Calculate total quantity from all receptions
-        total_quantity = sum(r.quantity for r in receptions)
-        
-        # Get the most recent arrival date
-        latest_date = None
-        if receptions:
-            for r in receptions:
-                if r.reception_date:
-                    latest_date = r.reception_date
-                    break  # Use the first available date for now
-        
-        # Extract information from supplier order and line items
-        line_items = supplier_order.line_items if hasattr(supplier_order, 'line_items') else []
-        
-        # Get client information from line items
-        clients = set()
-        plaque_dimensions = ""
-        caisse_dimensions = ""
-        total_ordered = 0
-        is_cliche = False  # Default to False as SupplierOrderLineItem doesn't have is_cliche field
-        
-        for item in line_items:
-            if hasattr(item, 'client') and item.client:
-                clients.add(item.client.name)
-            
-            total_ordered += item.quantity
-            
-            # Get plaque dimensions from the first line item, formatted as: largeur x longueur R<rabat>
-            # Example: 440 x 350 R400 (no 'mm' suffix as requested)
-            if not plaque_dimensions and item.plaque_width_mm and item.plaque_length_mm:
-                base = f"{item.plaque_width_mm} x {item.plaque_length_mm}"
-                if getattr(item, 'plaque_flap_mm', None):
-                    base += f" R{item.plaque_flap_mm}"
-                plaque_dimensions = base
-            
-            if not caisse_dimensions and item.caisse_length_mm and item.caisse_width_mm and item.caisse_height_mm:
-                caisse_dimensions = f"{item.caisse_length_mm} x {item.caisse_width_mm} x {item.caisse_height_mm} mm"
-        
-        # Calculate remaining quantity
-        remaining_quantity = max(0, total_ordered - total_quantity)
-        
-        # Prepare data for PDF template
-        label_data = _prepare_raw_material_label_data_simple(
-            reception_ids, total_quantity, latest_date, supplier_order, 
-            clients, plaque_dimensions, caisse_dimensions, is_cliche, 
-            remaining_quantity, remark
-        )
+        label_data, clients = label
         
         # Generate PDF using template
         pdf_filler = PDFFormFiller()
@@ -355,11 +427,146 @@ def export_raw_material_label(reception_ids: list[int], remark: str = "") -> Pat
         session.close()
 
 
+@timed('pdf.export_raw_material_labels')
+def export_raw_material_labels(reception_groups: list[list[int]], remark: str = "") -> Path | None:
+    """
+    Export the labels of a whole arrival to a single multi-page PDF using the MP.pdf template.
+    
+    Args:
+        reception_groups: Reception IDs per label (one page per group, grouped receptions share a label)
+        remark: Optional remark to include on every label
+        
+    Returns:
+        Path to the generated PDF file, or None if export failed
+    """
+    from models.orders import SupplierOrder, SupplierOrderLineItem, Reception
+    from sqlalchemy.orm import selectinload
+    from utils.reference_generator import ReferenceGenerator
+    
+    reception_groups = [group for group in reception_groups if group]
+    if not reception_groups:
+        return None
+    
+    session = SessionLocal()
+    try:
+        # Load every reception of the arrival (and their supplier orders) once
+        all_ids = {reception_id for group in reception_groups for reception_id in group}
+        receptions = {
+            reception.id: reception for reception in session.query(Reception).options(
+                selectinload(Reception.supplier_order)
+                .selectinload(SupplierOrder.line_items)
+                .selectinload(SupplierOrderLineItem.client)
+            ).filter(Reception.id.in_(all_ids))
+        }
+        groups = [
+            (group, [receptions[reception_id] for reception_id in group if reception_id in receptions])
+            for group in reception_groups
+        ]
+        # A label needs the supplier order of its first reception
+        groups = [(group, found) for group, found in groups if found and found[0].supplier_order]
+        if not groups:
+            return None
+        
+        label_numbers = ReferenceGenerator.reserve('raw_material_label', len(groups))
+        # Each label is prepared and rendered only when the writer reaches it
+        pages = (
+            _raw_material_label_data(group_receptions, group, remark, session=session,
+                                     label_number=next(label_numbers))[0]
+            for group, group_receptions in groups
+        )
+        
+        pdf_filler = PDFFormFiller()
+        try:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            clients = {
+                item.client.name
+                for _, group_receptions in groups
+                for item in group_receptions[0].supplier_order.line_items
+                if item.client
+            }
+            client_names = "_".join(sorted(clients)) if clients else 'client'
+            filename = f"etiquettes_mp_{client_names}_{len(groups)}p_{timestamp}.pdf"
+            
+            return pdf_filler.fill_raw_material_label_pages(pages, filename)
+        except PDFFillError as e:
+            print(f"PDF generation error: {e}")
+            return None
+            
+    except Exception as e:
+        print(f"Error exporting raw material labels to PDF: {e}")
+        return None
+    finally:
+        session.close()
+
+
+def _raw_material_label_data(receptions: list, reception_ids: list[int], remark: str, session=None,
+                             label_number: str | None = None) -> tuple[Dict[str, Any], set] | None:
+    """Label data and client names for a group of receptions, or None without a supplier order."""
+    if not receptions:
+        return None
+    
+    # Use the first reception as the primary one for extracting information
+    primary_reception = receptions[0]
+    supplier_order = primary_reception.supplier_order
+    
+    if not supplier_order:
+        return None
+    
+    # Calculate total quantity from all receptions
+    total_quantity = sum(r.quantity for r in receptions)
+    
+    # Get the most recent arrival date
+    latest_date = None
+    if receptions:
+        for r in receptions:
+            if r.reception_date:
+                latest_date = r.reception_date
+                break  # Use the first available date for now
+    
+    # Extract information from supplier order and line items
+    line_items = supplier_order.line_items if hasattr(supplier_order, 'line_items') else []
+    
+    # Get client information from line items
+    clients = set()
+    plaque_dimensions = ""
+    caisse_dimensions = ""
+    total_ordered = 0
+    is_cliche = False  # Default to False as SupplierOrderLineItem doesn't have is_cliche field
+    
+    for item in line_items:
+        if hasattr(item, 'client') and item.client:
+            clients.add(item.client.name)
+        
+        total_ordered += item.quantity
+        
+        # Get plaque dimensions from the first line item, formatted as: largeur x longueur R<rabat>
+        # Example: 440 x 350 R400 (no 'mm' suffix as requested)
+        if not plaque_dimensions and item.plaque_width_mm and item.plaque_length_mm:
+            base = f"{item.plaque_width_mm} x {item.plaque_length_mm}"
+            if getattr(item, 'plaque_flap_mm', None):
+                base += f" R{item.plaque_flap_mm}"
+            plaque_dimensions = base
+        
+        if not caisse_dimensions and item.caisse_length_mm and item.caisse_width_mm and item.caisse_height_mm:
+            caisse_dimensions = f"{item.caisse_length_mm} x {item.caisse_width_mm} x {item.caisse_height_mm} mm"
+    
+    # Calculate remaining quantity
+    remaining_quantity = max(0, total_ordered - total_quantity)
+    
+    # Prepare data for PDF template
+    label_data = _prepare_raw_material_label_data_simple(
+        reception_ids, total_quantity, latest_date, supplier_order, 
+        clients, plaque_dimensions, caisse_dimensions, is_cliche, 
+        remaining_quantity, remark, session=session, label_number=label_number
+    )
+    return label_data, clients
+
+
 def _prepare_raw_material_label_data_simple(reception_ids: list[int], total_quantity: int, latest_date, 
                                            supplier_order, clients: set, plaque_dimensions: str, 
                                            caisse_dimensions: str, is_cliche: bool, remaining_quantity: int, 
-                                           remark: str) -> Dict[str, Any]:
-    """Prepare raw material label data for PDF template."""
+                                           remark: str, session=None, label_number: str | None = None) -> Dict[str, Any]:
+    """Prepare raw material label data for PDF template (session: optional open session to reuse for lookups)."""
     
     # Format arrival date
     arrival_date = ""
@@ -377,9 +584,8 @@ def _prepare_raw_material_label_data_simple(reception_ids: list[int], total_quan
     if supplier_order and supplier_order.line_items:
         from models.orders import Quotation, QuotationLineItem
         from sqlalchemy import desc
-        from config.database import SessionLocal
         
-        session = SessionLocal()
+        lookup_session = session or SessionLocal()
         try:
             # Get the first client from supplier order line items
             first_line_item = supplier_order.line_items[0]
@@ -387,7 +593,7 @@ def _prepare_raw_material_label_data_simple(reception_ids: list[int], total_quan
                 client = first_line_item.client
                 
                 # Look for most recent quotation for this client
-                most_recent_quotation = session.query(Quotation).filter(
+                most_recent_quotation = lookup_session.query(Quotation).filter(
                     Quotation.client_id == client.id
                 ).order_by(desc(Quotation.issue_date)).first()
                 
@@ -399,7 +605,8 @@ def _prepare_raw_material_label_data_simple(reception_ids: list[int], total_quan
         except Exception as e:
             print(f"DEBUG Raw Material Label: Error getting quotation description: {e}")
         finally:
-            session.close()
+            if session is None:
+                lookup_session.close()
     
     # If no quotation description, leave designation empty or use a generic label,
     # but DO NOT override caisse_dimensions (should remain pure mm values)
@@ -408,9 +615,10 @@ def _prepare_raw_material_label_data_simple(reception_ids: list[int], total_quan
         print(f"DEBUG Raw Material Label: No quotation description; using fallback designation: '{quotation_description}'")
     
     # Generate unique label number using unified system
-    from utils.reference_generator import generate_raw_material_label_reference
-    ids_str = "_".join(map(str, reception_ids))
-    label_number = generate_raw_material_label_reference(ids_str)
+    if label_number is None:
+        from utils.reference_generator import generate_raw_material_label_reference
+        ids_str = "_".join(map(str, reception_ids))
+        label_number = generate_raw_material_label_reference(ids_str)
     
     # Get bon de commande reference
     bon_commande = ""
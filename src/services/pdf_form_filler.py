@@ -1,23 +1,26 @@
 """
 PDF Form Filler Service for populating PDF templates with data.
-This service handles filling PDF forms using PyPDF2.
+Templates are read and merged through the PDF backend probed once per process
+(see services.pdf_backend).
 """
 
 from __future__ import annotations
-import subprocess
-import sys
+import io
+import threading
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import date
 from decimal import Decimal
-from typing import Any, Dict
-import tempfile
-import shutil
+from typing import Any, Dict, Iterable
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import Table, TableStyle, Paragraph
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib import colors
 from config.settings import settings
+from services.pdf_backend import PDFBackend, PDFBackendUnavailable, get_backend
+from services.document_cache import document_cache
+from utils.instrumentation import timed
 
 
 class PDFFillError(Exception):
@@ -25,27 +28,100 @@ class PDFFillError(Exception):
     pass
 
 
+@dataclass(slots=True)
+class _CachedTemplate:
+    mtime_ns: int
+    backend: str
+    reader: Any
+    has_fields: bool
+
+
+class TemplateCache:
+    """Parsed PDF templates, kept in memory and reparsed only when the file changes.
+
+    Templates are read into memory once and parsed by the PDF backend; later
+    fills reuse the parsed reader. Pages taken from a cached reader must be added to
+    a new PdfWriter (which copies them) before being modified.
+    """
+
+    def __init__(self):
+        self._templates: Dict[Path, _CachedTemplate] = {}
+        self._lock = threading.Lock()
+        self.parse_count = 0
+
+    def get(self, template_path: Path, backend: PDFBackend | None = None) -> _CachedTemplate:
+        backend = backend or get_backend()
+        template_path = Path(template_path)
+        mtime_ns = template_path.stat().st_mtime_ns
+        with self._lock:
+            cached = self._templates.get(template_path)
+            if cached is None or cached.mtime_ns != mtime_ns or cached.backend != backend.name:
+                reader = backend.open_template(template_path.read_bytes())
+                cached = _CachedTemplate(mtime_ns, backend.name, reader, backend.has_fields(reader))
+                self._templates[template_path] = cached
+                self.parse_count += 1
+            return cached
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+
+
+template_cache = TemplateCache()
+
+
 class PDFFormFiller:
     """Service for filling PDF forms with data."""
     
-    def __init__(self):
+    def __init__(self, backend: PDFBackend | None = None):
         self.template_dir = Path(__file__).parent.parent.parent / "template"
         self.output_dir = settings.reports_dir
-        
-    def _ensure_pypdf_installed(self) -> bool:
-        """Ensure PyPDF2 is installed, install if needed."""
-        try:
-            import PyPDF2  # type: ignore
-            return True
-        except ImportError:
-            try:
-                # Try to install PyPDF2
-                subprocess.check_call([sys.executable, "-m", "pip", "install", "PyPDF2"])
-                import PyPDF2  # type: ignore
-                return True
-            except (subprocess.CalledProcessError, ImportError):
-                return False
+        self.backend = backend or get_backend()
     
+    def _fill_form_fields(self, template_path: Path, field_data: Dict[str, str], output_path: Path) -> bool:
+        """Fill the form fields of a template into output_path. Returns False when the template has none."""
+        template = template_cache.get(template_path, self.backend)
+        if not template.has_fields or not self.backend.supports_fields:
+            return False
+        self.backend.fill_fields(template.reader, field_data, output_path)
+        return True
+
+    def _merge_overlay(self, template_path: Path, overlay: io.BytesIO, output_path: Path,
+                       include_remaining_pages: bool = False) -> None:
+        """Merge an in-memory overlay onto the first page of the cached template and write output_path."""
+        template = template_cache.get(template_path, self.backend)
+        self.backend.merge_overlay(template.reader, overlay, output_path, include_remaining_pages)
+
+    def _write_overlay_pages(self, template_path: Path, overlays: Iterable[io.BytesIO], output_path: Path) -> int:
+        """Merge each overlay onto its own copy of the template's first page and write them all to output_path.
+
+        Overlays are consumed one at a time, so a generator renders each page only when it is appended.
+        Returns the number of pages written (nothing is written when there are none).
+        """
+        template = template_cache.get(template_path, self.backend)
+        return self.backend.write_overlay_pages(template.reader, overlays, output_path)
+
+    def _fill_pages(self, template_name: str, create_overlay, pages: Iterable[Dict[str, Any]], output_filename: str) -> Path:
+        """Render one template page per data dictionary into a single PDF."""
+        template_path = self.template_dir / template_name
+        if not template_path.exists():
+            raise PDFFillError(f"Template not found: {template_path}")
+        if not self.backend.supports_multipage:
+            raise PDFFillError(str(PDFBackendUnavailable("Multi-page documents")))
+
+        output_path = self.output_dir / output_filename
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            count = self._write_overlay_pages(template_path, (create_overlay(data) for data in pages), output_path)
+        except PDFFillError:
+            raise
+        except Exception as e:
+            raise PDFFillError(f"Failed to create multi-page PDF from {template_name}: {str(e)}")
+        if count == 0:
+            raise PDFFillError("No page to render")
+        return output_path
+
+    @timed('pdf.devis')
     def fill_devis_template(self, quotation_data: Dict[str, Any], output_filename: str | None = None) -> Path:
         """
         Fill the Devis PDF template with quotation data.
@@ -62,6 +138,13 @@ class PDFFormFiller:
         if not template_path.exists():
             raise PDFFillError(f"Template not found: {template_path}")
         
+        # An identical reprint returns the document generated the first time (explicit filenames always render)
+        cache_key = None if output_filename else document_cache.key('devis', quotation_data, template_path, self.output_dir)
+        if cache_key:
+            cached = document_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         # Generate output filename if not provided
         if not output_filename:
             ref = quotation_data.get('reference', 'devis')
@@ -71,13 +154,13 @@ class PDFFormFiller:
         output_path = self.output_dir / output_filename
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Try to use PyPDF2 for form filling if available
-        if self._ensure_pypdf_installed():
-            return self._fill_with_pypdf(template_path, quotation_data, output_path)
-        else:
-            # Fallback to overlay method
-            return self._fill_with_overlay(template_path, quotation_data, output_path)
+        # Form fields when the template has them, otherwise a positioned-text overlay
+        output_path = self._fill_with_fields(template_path, quotation_data, output_path)
+        if cache_key:
+            document_cache.put(cache_key, output_path)
+        return output_path
     
+    @timed('pdf.material_label')
     def fill_material_label_template(self, label_data: Dict[str, Any], output_filename: str | None = None) -> Path:
         """
         Fill the material label PDF template with raw material data.
@@ -103,99 +186,40 @@ class PDFFormFiller:
         output_path = self.output_dir / output_filename
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Try to use PyPDF2 for form filling if available
-        if self._ensure_pypdf_installed():
-            return self._fill_material_label_pypdf(template_path, label_data, output_path)
-        else:
-            # Fallback to overlay method
-            return self._fill_material_label_overlay(template_path, label_data, output_path)
+        # Form fields when the template has them, otherwise a positioned-text overlay
+        return self._fill_material_label_fields(template_path, label_data, output_path)
     
-    def _fill_material_label_pypdf(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
-        """Fill material label PDF using PyPDF2 form fields."""
+    def _fill_material_label_fields(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
+        """Fill material label PDF using template form fields."""
         try:
-            import PyPDF2  # type: ignore
-        except ImportError:
-            raise PDFFillError("PyPDF2 not available")
-        
-        try:
-            with open(template_path, 'rb') as template_file:
-                pdf_reader = PyPDF2.PdfReader(template_file)
-                pdf_writer = PyPDF2.PdfWriter()
-                
-                # Check if PDF has form fields
-                if pdf_reader.get_fields():
-                    # Fill form fields
-                    field_data = self._prepare_material_label_form_data(data)
-                    
-                    for page in pdf_reader.pages:
-                        pdf_writer.add_page(page)
-                    
-                    # Update form fields
-                    pdf_writer.update_page_form_field_values(
-                        pdf_writer.pages[0], field_data
-                    )
-                    
-                    with open(output_path, 'wb') as output_file:
-                        pdf_writer.write(output_file)
-                else:
-                    # No form fields, use overlay method
-                    return self._fill_material_label_overlay(template_path, data, output_path)
+            field_data = self._prepare_material_label_form_data(data)
+            if not self._fill_form_fields(template_path, field_data, output_path):
+                # No form fields, use overlay method
+                return self._fill_material_label_overlay(template_path, data, output_path)
                     
         except Exception as e:
-            raise PDFFillError(f"Failed to fill material label PDF with PyPDF2: {str(e)}")
+            raise PDFFillError(f"Failed to fill material label PDF form fields: {str(e)}")
         
         return output_path
     
     def _fill_material_label_overlay(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
         """Fill material label PDF by creating an overlay with positioned text."""
         try:
-            import PyPDF2  # type: ignore
-        except ImportError:
-            # Fallback to simple copy with a warning
-            shutil.copy2(template_path, output_path)
-            print(f"Warning: PyPDF2 not available. Template copied to: {output_path}")
-            return output_path
-        
-        try:
-            # Create overlay with text
-            overlay_path = self._create_material_label_overlay(data)
-            
-            # Merge overlay with template
-            with open(template_path, 'rb') as template_file, \
-                 open(overlay_path, 'rb') as overlay_file:
-                
-                template_pdf = PyPDF2.PdfReader(template_file)
-                overlay_pdf = PyPDF2.PdfReader(overlay_file)
-                
-                pdf_writer = PyPDF2.PdfWriter()
-                
-                # Merge first page
-                template_page = template_pdf.pages[0]
-                overlay_page = overlay_pdf.pages[0]
-                template_page.merge_page(overlay_page)
-                pdf_writer.add_page(template_page)
-                
-                # Add remaining pages if any
-                for i in range(1, len(template_pdf.pages)):
-                    pdf_writer.add_page(template_pdf.pages[i])
-                
-                with open(output_path, 'wb') as output_file:
-                    pdf_writer.write(output_file)
-            
-            # Clean up temporary overlay file
-            Path(overlay_path).unlink(missing_ok=True)
+            # Render the overlay in memory and merge it onto the cached template
+            overlay = self._create_material_label_overlay(data)
+            self._merge_overlay(template_path, overlay, output_path, include_remaining_pages=True)
             
         except Exception as e:
             raise PDFFillError(f"Failed to create material label PDF overlay: {str(e)}")
         
         return output_path
     
-    def _create_material_label_overlay(self, data: Dict[str, Any]) -> str:
+    def _create_material_label_overlay(self, data: Dict[str, Any]) -> io.BytesIO:
         """Create a transparent PDF overlay with positioned text for material labels."""
-        temp_fd, temp_path = tempfile.mkstemp(suffix='.pdf')
+        buffer = io.BytesIO()
         
         try:
-            c = canvas.Canvas(temp_path, pagesize=A4)
+            c = canvas.Canvas(buffer, pagesize=A4)
             width, height = A4
             
 
@@ -282,12 +306,9 @@ class PDFFormFiller:
             
         except Exception as e:
             raise PDFFillError(f"Failed to create material label overlay: {str(e)}")
-        finally:
-            # Close the file descriptor
-            import os
-            os.close(temp_fd)
         
-        return temp_path
+        buffer.seek(0)
+        return buffer
     
     def _prepare_material_label_form_data(self, data: Dict[str, Any]) -> Dict[str, str]:
         """Prepare data for material label PDF form fields."""
@@ -316,6 +337,7 @@ class PDFFormFiller:
         
         return form_data
 
+    @timed('pdf.supplier_order')
     def fill_supplier_order_template(self, order_data: Dict[str, Any], output_filename: str | None = None) -> Path:
         """
         Fill the supplier order PDF template with order data.
@@ -332,6 +354,15 @@ class PDFFormFiller:
         if not template_path.exists():
             raise PDFFillError(f"Template not found: {template_path}")
         
+        # An identical reprint returns the document generated the first time (explicit filenames always render)
+        # (the overlay prints today's date, so a reprint on another day renders again)
+        cache_key = None if output_filename else document_cache.key(
+            'supplier_order', {'order': order_data, 'printed_on': date.today()}, template_path, self.output_dir)
+        if cache_key:
+            cached = document_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         # Generate output filename if not provided
         if not output_filename:
             ref = order_data.get('reference', 'commande')
@@ -341,179 +372,68 @@ class PDFFormFiller:
         output_path = self.output_dir / output_filename
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Try to use PyPDF2 for form filling if available
-        if self._ensure_pypdf_installed():
-            return self._fill_supplier_order_pypdf(template_path, order_data, output_path)
-        else:
-            # Fallback to overlay method
-            return self._fill_supplier_order_overlay(template_path, order_data, output_path)
+        # Form fields when the template has them, otherwise a positioned-text overlay
+        output_path = self._fill_supplier_order_fields(template_path, order_data, output_path)
+        if cache_key:
+            document_cache.put(cache_key, output_path)
+        return output_path
     
-    def _fill_supplier_order_pypdf(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
-        """Fill supplier order PDF using PyPDF2 form fields."""
-        try:
-            import PyPDF2  # type: ignore
-        except ImportError:
-            raise PDFFillError("PyPDF2 not available")
-        
+    def _fill_supplier_order_fields(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
+        """Fill supplier order PDF using template form fields."""
         try:
-            with open(template_path, 'rb') as template_file:
-                pdf_reader = PyPDF2.PdfReader(template_file)
-                pdf_writer = PyPDF2.PdfWriter()
-                
-                # Check if PDF has form fields
-                if pdf_reader.get_fields():
-                    # Fill form fields
-                    field_data = self._prepare_supplier_order_form_data(data)
-                    
-                    for page in pdf_reader.pages:
-                        pdf_writer.add_page(page)
-                    
-                    # Update form fields
-                    pdf_writer.update_page_form_field_values(
-                        pdf_writer.pages[0], field_data
-                    )
-                    
-                    with open(output_path, 'wb') as output_file:
-                        pdf_writer.write(output_file)
-                else:
-                    # No form fields, use overlay method
-                    return self._fill_supplier_order_overlay(template_path, data, output_path)
+            field_data = self._prepare_supplier_order_form_data(data)
+            if not self._fill_form_fields(template_path, field_data, output_path):
+                # No form fields, use overlay method
+                return self._fill_supplier_order_overlay(template_path, data, output_path)
                     
         except Exception as e:
-            raise PDFFillError(f"Failed to fill supplier order PDF with PyPDF2: {str(e)}")
+            raise PDFFillError(f"Failed to fill supplier order PDF form fields: {str(e)}")
         
         return output_path
     
     def _fill_supplier_order_overlay(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
         """Fill supplier order PDF by creating an overlay with positioned text."""
         try:
-            import PyPDF2  # type: ignore
-        except ImportError:
-            # Fallback to simple copy with a warning
-            shutil.copy2(template_path, output_path)
-            print(f"Warning: PyPDF2 not available. Template copied to: {output_path}")
-            return output_path
-        
-        try:
-            # Create overlay with text
-            overlay_path = self._create_supplier_order_overlay(data)
-            
-            # Merge overlay with template
-            with open(template_path, 'rb') as template_file, \
-                 open(overlay_path, 'rb') as overlay_file:
-                
-                template_pdf = PyPDF2.PdfReader(template_file)
-                overlay_pdf = PyPDF2.PdfReader(overlay_file)
-                
-                pdf_writer = PyPDF2.PdfWriter()
-                
-                # Merge first page
-                template_page = template_pdf.pages[0]
-                overlay_page = overlay_pdf.pages[0]
-                template_page.merge_page(overlay_page)
-                pdf_writer.add_page(template_page)
-                
-                # Add remaining pages if any
-                for i in range(1, len(template_pdf.pages)):
-                    pdf_writer.add_page(template_pdf.pages[i])
-                
-                with open(output_path, 'wb') as output_file:
-                    pdf_writer.write(output_file)
-            
-            # Clean up temporary overlay file
-            Path(overlay_path).unlink(missing_ok=True)
+            # Render the overlay in memory and merge it onto the cached template
+            overlay = self._create_supplier_order_overlay(data)
+            self._merge_overlay(template_path, overlay, output_path, include_remaining_pages=True)
             
         except Exception as e:
             raise PDFFillError(f"Failed to create supplier order PDF overlay: {str(e)}")
         
         return output_path
     
-    def _fill_with_pypdf(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
-        """Fill PDF using PyPDF2 form fields."""
-        try:
-            import PyPDF2  # type: ignore
-        except ImportError:
-            raise PDFFillError("PyPDF2 not available")
-        
+    def _fill_with_fields(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
+        """Fill PDF using template form fields."""
         try:
-            with open(template_path, 'rb') as template_file:
-                pdf_reader = PyPDF2.PdfReader(template_file)
-                pdf_writer = PyPDF2.PdfWriter()
-                
-                # Check if PDF has form fields
-                if pdf_reader.get_fields():
-                    # Fill form fields
-                    field_data = self._prepare_form_data(data)
-                    
-                    for page in pdf_reader.pages:
-                        pdf_writer.add_page(page)
-                    
-                    # Update form fields
-                    pdf_writer.update_page_form_field_values(
-                        pdf_writer.pages[0], field_data
-                    )
-                    
-                    with open(output_path, 'wb') as output_file:
-                        pdf_writer.write(output_file)
-                else:
-                    # No form fields, use overlay method
-                    return self._fill_with_overlay(template_path, data, output_path)
+            field_data = self._prepare_form_data(data)
+            if not self._fill_form_fields(template_path, field_data, output_path):
+                # No form fields, use overlay method
+                return self._fill_with_overlay(template_path, data, output_path)
                     
         except Exception as e:
-            raise PDFFillError(f"Failed to fill PDF with PyPDF2: {str(e)}")
+            raise PDFFillError(f"Failed to fill PDF form fields: {str(e)}")
         
         return output_path
     
     def _fill_with_overlay(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
         """Fill PDF by creating an overlay with positioned text."""
         try:
-            import PyPDF2  # type: ignore
-        except ImportError:
-            # Fallback to simple copy with a warning
-            shutil.copy2(template_path, output_path)
-            print(f"Warning: PyPDF2 not available. Template copied to: {output_path}")
-            return output_path
-        
-        try:
-            # Create overlay with text
-            overlay_path = self._create_text_overlay(data)
-            
-            # Merge overlay with template
-            with open(template_path, 'rb') as template_file, \
-                 open(overlay_path, 'rb') as overlay_file:
-                
-                template_pdf = PyPDF2.PdfReader(template_file)
-                overlay_pdf = PyPDF2.PdfReader(overlay_file)
-                
-                pdf_writer = PyPDF2.PdfWriter()
-                
-                # Merge first page
-                template_page = template_pdf.pages[0]
-                overlay_page = overlay_pdf.pages[0]
-                template_page.merge_page(overlay_page)
-                pdf_writer.add_page(template_page)
-                
-                # Add remaining pages if any
-                for i in range(1, len(template_pdf.pages)):
-                    pdf_writer.add_page(template_pdf.pages[i])
-                
-                with open(output_path, 'wb') as output_file:
-                    pdf_writer.write(output_file)
-            
-            # Clean up temporary overlay file
-            Path(overlay_path).unlink(missing_ok=True)
+            # Render the overlay in memory and merge it onto the cached template
+            overlay = self._create_text_overlay(data)
+            self._merge_overlay(template_path, overlay, output_path, include_remaining_pages=True)
             
         except Exception as e:
             raise PDFFillError(f"Failed to create PDF overlay: {str(e)}")
         
         return output_path
     
-    def _create_text_overlay(self, data: Dict[str, Any]) -> str:
+    def _create_text_overlay(self, data: Dict[str, Any]) -> io.BytesIO:
         """Create a transparent PDF overlay with positioned text."""
-        temp_fd, temp_path = tempfile.mkstemp(suffix='.pdf')
+        buffer = io.BytesIO()
         
         try:
-            c = canvas.Canvas(temp_path, pagesize=A4)
+            c = canvas.Canvas(buffer, pagesize=A4)
             width, height = A4
             
             # Set font
@@ -630,19 +550,16 @@ class PDFFormFiller:
             
         except Exception as e:
             raise PDFFillError(f"Failed to create text overlay: {str(e)}")
-        finally:
-            # Close the file descriptor
-            import os
-            os.close(temp_fd)
         
-        return temp_path
+        buffer.seek(0)
+        return buffer
     
-    def _create_supplier_order_overlay(self, data: Dict[str, Any]) -> str:
+    def _create_supplier_order_overlay(self, data: Dict[str, Any]) -> io.BytesIO:
         """Create a transparent PDF overlay with positioned text for supplier orders."""
-        temp_fd, temp_path = tempfile.mkstemp(suffix='.pdf')
+        buffer = io.BytesIO()
         
         try:
-            c = canvas.Canvas(temp_path, pagesize=A4)
+            c = canvas.Canvas(buffer, pagesize=A4)
             width, height = A4
 
 
@@ -818,12 +735,9 @@ class PDFFormFiller:
             c.save()
         except Exception as e:
             raise PDFFillError(f"Failed to create supplier order overlay: {str(e)}")
-        finally:
-            # Close the file descriptor
-            import os
-            os.close(temp_fd)
         
-        return temp_path
+        buffer.seek(0)
+        return buffer
     
     def _prepare_form_data(self, data: Dict[str, Any]) -> Dict[str, str]:
         """Prepare data for PDF form fields."""
@@ -869,6 +783,7 @@ class PDFFormFiller:
         
         return form_data
 
+    @timed('pdf.finished_product')
     def fill_finished_product_template(self, product_data: Dict[str, Any], output_filename: str | None = None) -> Path:
         """
         Fill the finished product fiche PDF template (PF.pdf) with product data.
@@ -895,40 +810,30 @@ class PDFFormFiller:
         output_path = self.output_dir / output_filename
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Try to use PyPDF2 for form filling if available
-        if self._ensure_pypdf_installed():
-            return self._fill_finished_product_pypdf(template_path, product_data, output_path)
-        else:
-            # Fallback to overlay method
-            return self._fill_finished_product_overlay(template_path, product_data, output_path)
+        # Form fields when the template has them, otherwise a positioned-text overlay
+        return self._fill_finished_product_fields(template_path, product_data, output_path)
     
-    def _fill_finished_product_pypdf(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
-        """Fill finished product PDF using PyPDF2 form fields."""
-        try:
-            import PyPDF2  # type: ignore
-        except ImportError:
-            raise PDFFillError("PyPDF2 not available")
+    @timed('pdf.finished_product_pages')
+    def fill_finished_product_pages(self, pages: Iterable[Dict[str, Any]], output_filename: str) -> Path:
+        """
+        Fill several finished product fiches into a single multi-page PDF (one PF.pdf page per fiche).
         
+        Args:
+            pages: Product data dictionaries, one per fiche (consumed lazily)
+            output_filename: Filename for the output
+            
+        Returns:
+            Path to the generated PDF file
+        """
+        return self._fill_pages("PF.pdf", self._create_finished_product_overlay, pages, output_filename)
+    
+    def _fill_finished_product_fields(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
+        """Fill finished product PDF using template form fields."""
         try:
-            with open(template_path, 'rb') as template_file:
-                pdf_reader = PyPDF2.PdfReader(template_file)
-                pdf_writer = PyPDF2.PdfWriter()
-                
-                # Check if PDF has form fields
-                if pdf_reader.get_fields():
-                    # Fill form fields
-                    field_data = self._prepare_finished_product_form_data(data)
-                    
-                    for page in pdf_reader.pages:
-                        pdf_writer.add_page(page)
-                    
-                    pdf_writer.update_page_form_field_values(pdf_writer.pages[0], field_data)
-                    
-                    with open(output_path, 'wb') as output_file:
-                        pdf_writer.write(output_file)
-                else:
-                    # No form fields, use overlay method
-                    return self._fill_finished_product_overlay(template_path, data, output_path)
+            field_data = self._prepare_finished_product_form_data(data)
+            if not self._fill_form_fields(template_path, field_data, output_path):
+                # No form fields, use overlay method
+                return self._fill_finished_product_overlay(template_path, data, output_path)
                 
             return output_path
         except Exception as e:
@@ -937,32 +842,9 @@ class PDFFormFiller:
     def _fill_finished_product_overlay(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
         """Fill finished product PDF using overlay method."""
         try:
-            import PyPDF2  # type: ignore
-        except ImportError:
-            raise PDFFillError("PyPDF2 not available for overlay method")
-        
-        try:
-            # Create overlay with text
-            overlay_path = self._create_finished_product_overlay(data)
-            
-            # Merge overlay with template
-            with open(template_path, 'rb') as template_file, open(overlay_path, 'rb') as overlay_file:
-                template_pdf = PyPDF2.PdfReader(template_file)
-                overlay_pdf = PyPDF2.PdfReader(overlay_file)
-                
-                pdf_writer = PyPDF2.PdfWriter()
-                
-                # Merge pages
-                template_page = template_pdf.pages[0]
-                overlay_page = overlay_pdf.pages[0]
-                template_page.merge_page(overlay_page)
-                pdf_writer.add_page(template_page)
-                
-                with open(output_path, 'wb') as output_file:
-                    pdf_writer.write(output_file)
-            
-            # Clean up temporary overlay file
-            overlay_path.unlink()
+            # Render the overlay in memory and merge it onto the cached template
+            overlay = self._create_finished_product_overlay(data)
+            self._merge_overlay(template_path, overlay, output_path)
             
             return output_path
         except Exception as e:
@@ -981,12 +863,12 @@ class PDFFormFiller:
             'reference': str(data.get('reference', ''))
         }
     
-    def _create_finished_product_overlay(self, data: Dict[str, Any]) -> Path:
+    def _create_finished_product_overlay(self, data: Dict[str, Any]) -> io.BytesIO:
         """Create a text overlay for finished product data."""
-        overlay_path = Path(tempfile.mktemp(suffix='.pdf'))
+        buffer = io.BytesIO()
         
         # Create PDF with text at specific positions
-        c = canvas.Canvas(str(overlay_path), pagesize=A4)
+        c = canvas.Canvas(buffer, pagesize=A4)
         width, height = A4
         
         # Set font
@@ -1015,8 +897,10 @@ class PDFFormFiller:
         c.drawString(256.34, 219.48, str(dimensions))
         
         c.save()
-        return overlay_path
+        buffer.seek(0)
+        return buffer
 
+    @timed('pdf.raw_material_label')
     def fill_raw_material_label_template(self, label_data: Dict[str, Any], output_filename: str | None = None) -> Path:
         """
         Fill the raw material label PDF template (MP.pdf) with label data.
@@ -1043,40 +927,30 @@ class PDFFormFiller:
         output_path = self.output_dir / output_filename
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Try to use PyPDF2 for form filling if available
-        if self._ensure_pypdf_installed():
-            return self._fill_raw_material_label_pypdf(template_path, label_data, output_path)
-        else:
-            # Fallback to overlay method
-            return self._fill_raw_material_label_overlay(template_path, label_data, output_path)
+        # Form fields when the template has them, otherwise a positioned-text overlay
+        return self._fill_raw_material_label_fields(template_path, label_data, output_path)
     
-    def _fill_raw_material_label_pypdf(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
-        """Fill raw material label PDF using PyPDF2 form fields."""
-        try:
-            import PyPDF2  # type: ignore
-        except ImportError:
-            raise PDFFillError("PyPDF2 not available")
+    @timed('pdf.raw_material_label_pages')
+    def fill_raw_material_label_pages(self, pages: Iterable[Dict[str, Any]], output_filename: str) -> Path:
+        """
+        Fill several raw material labels into a single multi-page PDF (one MP.pdf page per label).
         
+        Args:
+            pages: Label data dictionaries, one per label (consumed lazily)
+            output_filename: Filename for the output
+            
+        Returns:
+            Path to the generated PDF file
+        """
+        return self._fill_pages("MP.pdf", self._create_raw_material_label_overlay, pages, output_filename)
+    
+    def _fill_raw_material_label_fields(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
+        """Fill raw material label PDF using template form fields."""
         try:
-            with open(template_path, 'rb') as template_file:
-                pdf_reader = PyPDF2.PdfReader(template_file)
-                pdf_writer = PyPDF2.PdfWriter()
-                
-                # Check if PDF has form fields
-                if pdf_reader.get_fields():
-                    # Fill form fields
-                    field_data = self._prepare_raw_material_label_form_data(data)
-                    
-                    for page in pdf_reader.pages:
-                        pdf_writer.add_page(page)
-                    
-                    pdf_writer.update_page_form_field_values(pdf_writer.pages[0], field_data)
-                    
-                    with open(output_path, 'wb') as output_file:
-                        pdf_writer.write(output_file)
-                else:
-                    # No form fields, use overlay method
-                    return self._fill_raw_material_label_overlay(template_path, data, output_path)
+            field_data = self._prepare_raw_material_label_form_data(data)
+            if not self._fill_form_fields(template_path, field_data, output_path):
+                # No form fields, use overlay method
+                return self._fill_raw_material_label_overlay(template_path, data, output_path)
                 
             return output_path
         except Exception as e:
@@ -1085,32 +959,9 @@ class PDFFormFiller:
     def _fill_raw_material_label_overlay(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
         """Fill raw material label PDF using overlay method."""
         try:
-            import PyPDF2  # type: ignore
-        except ImportError:
-            raise PDFFillError("PyPDF2 not available for overlay method")
-        
-        try:
-            # Create overlay with text
-            overlay_path = self._create_raw_material_label_overlay(data)
-            
-            # Merge overlay with template
-            with open(template_path, 'rb') as template_file, open(overlay_path, 'rb') as overlay_file:
-                template_pdf = PyPDF2.PdfReader(template_file)
-                overlay_pdf = PyPDF2.PdfReader(overlay_file)
-                
-                pdf_writer = PyPDF2.PdfWriter()
-                
-                # Merge pages
-                template_page = template_pdf.pages[0]
-                overlay_page = overlay_pdf.pages[0]
-                template_page.merge_page(overlay_page)
-                pdf_writer.add_page(template_page)
-                
-                with open(output_path, 'wb') as output_file:
-                    pdf_writer.write(output_file)
-            
-            # Clean up temporary overlay file
-            overlay_path.unlink()
+            # Render the overlay in memory and merge it onto the cached template
+            overlay = self._create_raw_material_label_overlay(data)
+            self._merge_overlay(template_path, overlay, output_path)
             
             return output_path
         except Exception as e:
@@ -1131,12 +982,12 @@ class PDFFormFiller:
             'reste': str(data.get('remaining_quantity', ''))
         }
     
-    def _create_raw_material_label_overlay(self, data: Dict[str, Any]) -> Path:
+    def _create_raw_material_label_overlay(self, data: Dict[str, Any]) -> io.BytesIO:
         """Create a text overlay for raw material label data."""
-        overlay_path = Path(tempfile.mktemp(suffix='.pdf'))
+        buffer = io.BytesIO()
         
         # Create PDF with text at specific positions
-        c = canvas.Canvas(str(overlay_path), pagesize=A4)
+        c = canvas.Canvas(buffer, pagesize=A4)
         width, height = A4
         
         # Set font
@@ -1193,8 +1044,10 @@ class PDFFormFiller:
         c.drawString(355.21, 94.06, str(remaining))
         
         c.save()
-        return overlay_path
+        buffer.seek(0)
+        return buffer
 
+    @timed('pdf.invoice')
     def fill_invoice_template(self, invoice_data: Dict[str, Any], output_filename: str | None = None) -> Path:
         """
         Fill the invoice PDF template (page.pdf) with invoice data.
@@ -1220,40 +1073,16 @@ class PDFFormFiller:
         output_path = self.output_dir / output_filename
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Try to use PyPDF2 for form filling if available
-        if self._ensure_pypdf_installed():
-            return self._fill_invoice_pypdf(template_path, invoice_data, output_path)
-        else:
-            # Fallback to overlay method
-            return self._fill_invoice_overlay(template_path, invoice_data, output_path)
+        # Form fields when the template has them, otherwise a positioned-text overlay
+        return self._fill_invoice_fields(template_path, invoice_data, output_path)
     
-    def _fill_invoice_pypdf(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
-        """Fill invoice PDF using PyPDF2 form fields."""
-        try:
-            import PyPDF2  # type: ignore
-        except ImportError:
-            raise PDFFillError("PyPDF2 not available")
-        
+    def _fill_invoice_fields(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
+        """Fill invoice PDF using template form fields."""
         try:
-            with open(template_path, 'rb') as template_file:
-                pdf_reader = PyPDF2.PdfReader(template_file)
-                pdf_writer = PyPDF2.PdfWriter()
-                
-                # Check if PDF has form fields
-                if pdf_reader.get_fields():
-                    # Fill form fields
-                    field_data = self._prepare_invoice_form_data(data)
-                    
-                    for page in pdf_reader.pages:
-                        pdf_writer.add_page(page)
-                    
-                    pdf_writer.update_page_form_field_values(pdf_writer.pages[0], field_data)
-                    
-                    with open(output_path, 'wb') as output_file:
-                        pdf_writer.write(output_file)
-                else:
-                    # No form fields, use overlay method
-                    return self._fill_invoice_overlay(template_path, data, output_path)
+            field_data = self._prepare_invoice_form_data(data)
+            if not self._fill_form_fields(template_path, field_data, output_path):
+                # No form fields, use overlay method
+                return self._fill_invoice_overlay(template_path, data, output_path)
                 
             return output_path
         except Exception as e:
@@ -1262,32 +1091,9 @@ class PDFFormFiller:
     def _fill_invoice_overlay(self, template_path: Path, data: Dict[str, Any], output_path: Path) -> Path:
         """Fill invoice PDF using overlay method."""
         try:
-            import PyPDF2  # type: ignore
-        except ImportError:
-            raise PDFFillError("PyPDF2 not available for overlay method")
-        
-        try:
-            # Create overlay with text
-            overlay_path = self._create_invoice_overlay(data)
-            
-            # Merge overlay with template
-            with open(template_path, 'rb') as template_file, open(overlay_path, 'rb') as overlay_file:
-                template_pdf = PyPDF2.PdfReader(template_file)
-                overlay_pdf = PyPDF2.PdfReader(overlay_file)
-                
-                pdf_writer = PyPDF2.PdfWriter()
-                
-                # Merge pages
-                template_page = template_pdf.pages[0]
-                overlay_page = overlay_pdf.pages[0]
-                template_page.merge_page(overlay_page)
-                pdf_writer.add_page(template_page)
-                
-                with open(output_path, 'wb') as output_file:
-                    pdf_writer.write(output_file)
-            
-            # Clean up temporary overlay file
-            overlay_path.unlink()
+            # Render the overlay in memory and merge it onto the cached template
+            overlay = self._create_invoice_overlay(data)
+            self._merge_overlay(template_path, overlay, output_path)
             
             return output_path
         except Exception as e:
@@ -1319,12 +1125,12 @@ class PDFFormFiller:
             'date_signature': str(data.get('signature_date', ''))
         }
     
-    def _create_invoice_overlay(self, data: Dict[str, Any]) -> Path:
+    def _create_invoice_overlay(self, data: Dict[str, Any]) -> io.BytesIO:
         """Create a text overlay for invoice data with professional styling."""
-        overlay_path = Path(tempfile.mktemp(suffix='.pdf'))
+        buffer = io.BytesIO()
         
         # Create PDF with text at specific positions
-        c = canvas.Canvas(str(overlay_path), pagesize=A4)
+        c = canvas.Canvas(buffer, pagesize=A4)
         width, height = A4
         
         # Define night blue color
@@ -1587,7 +1393,8 @@ class PDFFormFiller:
         c.drawString(signature_x, signature_y - 20, f"Bejaia le: {signature_date}")
         
         c.save()
-        return overlay_path
+        buffer.seek(0)
+        return buffer
 
 
-__all__ = ['PDFFormFiller', 'PDFFillError']
+__all__ = ['PDFFormFiller', 'PDFFillError', 'TemplateCache', 'template_cache']
@@ -0,0 +1,82 @@
+"""
+Plaque dimension index for raw material arrivals.
+
+The open supplier order line items are loaded once (one joined query with
+their order and supplier) and bucketed in a grid hash: each bucket key is
+(width, length, flap) divided by the matching tolerance, so every line item
+within tolerance of a plaque lies in the plaque's bucket or one of its 26
+neighbours. Tolerance lookups only look at those 27 buckets instead of
+scanning every order.
+"""
+from __future__ import annotations
+from collections import defaultdict
+from itertools import product
+from typing import Iterable
+from sqlalchemy import select
+from sqlalchemy.orm import Session, contains_eager
+from models.orders import SupplierOrder, SupplierOrderLineItem, SupplierOrderStatus
+
+# Tolerances (mm) under which an arrived plaque matches an ordered one
+WIDTH_TOLERANCE = 10
+LENGTH_TOLERANCE = 10
+FLAP_TOLERANCE = 5
+
+# Orders whose plaques are still expected
+OPEN_ORDER_STATUSES = (SupplierOrderStatus.ORDERED, SupplierOrderStatus.PARTIALLY_DELIVERED)
+
+Dims = tuple[int, int, int]
+
+
+def _cell(width: int, length: int, flap: int) -> Dims:
+    return width // WIDTH_TOLERANCE, length // LENGTH_TOLERANCE, flap // FLAP_TOLERANCE
+
+
+class PlaqueIndex:
+    """Line items indexed by plaque dimensions (width, length, flap)."""
+
+    __slots__ = ('_cells',)
+
+    def __init__(self, line_items: Iterable[SupplierOrderLineItem] = ()):
+        self._cells: dict[Dims, list[SupplierOrderLineItem]] = defaultdict(list)
+        for line_item in line_items:
+            self.add(line_item)
+
+    @classmethod
+    def load_open_orders(cls, session: Session) -> 'PlaqueIndex':
+        """Line items of ORDERED/PARTIALLY_DELIVERED orders, with their order and supplier loaded."""
+        stmt = (
+            select(SupplierOrderLineItem)
+            .join(SupplierOrderLineItem.supplier_order)
+            .where(SupplierOrder.status.in_(OPEN_ORDER_STATUSES))
+            .options(contains_eager(SupplierOrderLineItem.supplier_order).joinedload(SupplierOrder.supplier))
+            .order_by(SupplierOrder.id, SupplierOrderLineItem.id)
+        )
+        return cls(session.scalars(stmt).unique())
+
+    def add(self, line_item: SupplierOrderLineItem) -> None:
+        width, length, flap = line_item.plaque_width_mm, line_item.plaque_length_mm, line_item.plaque_flap_mm
+        if not (width and length and flap):
+            return
+        self._cells[_cell(width, length, flap)].append(line_item)
+
+    def within_tolerance(self, width: int, length: int, flap: int) -> list[SupplierOrderLineItem]:
+        """Line items within WIDTH/LENGTH/FLAP_TOLERANCE of the plaque, by (order id, line item id)."""
+        cw, cl, cf = _cell(width, length, flap)
+        matches = []
+        for dw, dl, df in product((-1, 0, 1), repeat=3):
+            for line_item in self._cells.get((cw + dw, cl + dl, cf + df), ()):
+                if (abs(line_item.plaque_width_mm - width) <= WIDTH_TOLERANCE
+                        and abs(line_item.plaque_length_mm - length) <= LENGTH_TOLERANCE
+                        and abs(line_item.plaque_flap_mm - flap) <= FLAP_TOLERANCE):
+                    matches.append(line_item)
+        matches.sort(key=lambda li: (li.supplier_order_id, li.id))
+        return matches
+
+    def has_match(self, width: int, length: int, flap: int) -> bool:
+        return bool(self.within_tolerance(width, length, flap))
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._cells.values())
+
+
+__all__ = ['PlaqueIndex', 'WIDTH_TOLERANCE', 'LENGTH_TOLERANCE', 'FLAP_TOLERANCE', 'OPEN_ORDER_STATUSES']
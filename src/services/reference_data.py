@@ -0,0 +1,160 @@
+"""
+In-process cache of the client and supplier lists.
+
+Dialogs only need (id, name) and a few contact fields to fill their combo
+boxes; the cache keeps them as immutable records so opening a dialog does not
+query the database nor materialize ORM objects.
+
+Freshness:
+- any ORM commit that inserted, updated or deleted a Client / Supplier
+  invalidates the matching list (session events, installed once);
+- changes made elsewhere (another workstation) are caught by a version check,
+  the ``MAX(updated_at)`` / ``MAX(id)`` / ``COUNT(*)`` marks of
+  services.change_tracker, read at most every REVALIDATE_SECONDS on access and
+  on every grid refresh (refresh_all passes the marks it already read);
+- a list is reloaded only when its marks moved.
+"""
+from __future__ import annotations
+import threading
+import time
+from dataclasses import dataclass, fields
+from typing import Any
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from models.clients import Client
+from models.suppliers import Supplier
+from services.change_tracker import TableChangeTracker, TableMark
+from config.database import SessionLocal
+
+# Seconds during which the cached lists are used without any version check
+REVALIDATE_SECONDS = 30.0
+
+
+@dataclass(frozen=True, slots=True)
+class ClientRecord:
+    id: int
+    name: str
+    contact_name: str | None = None
+    email: str | None = None
+    phone: str | None = None
+    address: str | None = None
+    city: str | None = None
+    country: str | None = None
+    activity: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class SupplierRecord:
+    id: int
+    name: str
+    contact_name: str | None = None
+    email: str | None = None
+    phone: str | None = None
+    address: str | None = None
+    city: str | None = None
+    country: str | None = None
+
+
+# table -> (model, record type)
+_SOURCES: dict[str, tuple[Any, Any]] = {
+    'clients': (Client, ClientRecord),
+    'suppliers': (Supplier, SupplierRecord),
+}
+
+
+def _load_records(session: Session, table: str) -> tuple:
+    model, record = _SOURCES[table]
+    columns = [getattr(model, f.name) for f in fields(record)]
+    return tuple(record(*row) for row in session.execute(select(*columns).order_by(model.id)))
+
+
+class ReferenceDataCache:
+    """Client and supplier records, revalidated by table marks."""
+
+    def __init__(self, revalidate_seconds: float = REVALIDATE_SECONDS):
+        self.revalidate_seconds = revalidate_seconds
+        self._tracker = TableChangeTracker(_SOURCES)
+        self._records: dict[str, tuple] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def clients(self) -> tuple[ClientRecord, ...]:
+        """Every client, by id."""
+        return self._get('clients')
+
+    def suppliers(self) -> tuple[SupplierRecord, ...]:
+        """Every supplier, by id."""
+        return self._get('suppliers')
+
+    def _get(self, table: str) -> tuple:
+        records = self._records.get(table)
+        if records is not None and time.monotonic() - self._checked_at < self.revalidate_seconds:
+            return records
+        session = SessionLocal.session_factory()
+        try:
+            self.sync(session)
+        finally:
+            session.close()
+        return self._records[table]
+
+    def sync(self, session: Session, marks: dict[str, TableMark] | None = None) -> set[str]:
+        """Reload the lists whose table marks moved; returns the reloaded tables.
+
+        marks: marks already read by the caller (they may cover more tables),
+        read here otherwise.
+        """
+        with self._lock:
+            if marks is None or not set(_SOURCES).issubset(marks):
+                marks = self._tracker.try_read_marks(session)
+            # Tables never loaded or invalidated have no mark and always count as changed
+            changed = self._tracker.changed_tables(marks) | (set(_SOURCES) - set(self._records))
+            for table in changed:
+                self._records[table] = _load_records(session, table)
+            self._tracker.commit({table: mark for table, mark in marks.items() if table in _SOURCES})
+            self._checked_at = time.monotonic()
+            return changed
+
+    def invalidate(self, table: str | None = None) -> None:
+        """Drop one list (or both); it is reloaded on next access."""
+        with self._lock:
+            for name in ([table] if table else list(_SOURCES)):
+                self._records.pop(name, None)
+
+
+reference_data = ReferenceDataCache()
+
+_installed = False
+
+
+def _after_flush(session, flush_context):
+    touched = session.info.setdefault('reference_tables', set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(instance, '__tablename__', None)
+        if table in _SOURCES:
+            touched.add(table)
+
+
+def _after_commit(session):
+    for table in session.info.pop('reference_tables', ()):
+        reference_data.invalidate(table)
+
+
+def _after_rollback(session):
+    session.info.pop('reference_tables', None)
+
+
+def install() -> None:
+    """Invalidate the cached lists when a session commits client / supplier changes (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Session, 'after_flush', _after_flush)
+    event.listen(Session, 'after_commit', _after_commit)
+    event.listen(Session, 'after_rollback', _after_rollback)
+    _installed = True
+
+
+install()
+
+
+__all__ = ['ReferenceDataCache', 'reference_data', 'ClientRecord', 'SupplierRecord', 'REVALIDATE_SECONDS', 'install']
@@ -0,0 +1,414 @@
+"""
+Global search over every tab.
+
+Each searchable entity (devis, commande MP, réception, lot de production,
+client, fournisseur) has one search_documents row: a title (reference or name)
+and a body gathering the client / supplier names, descriptions, notes,
+material references and dimension tokens ("500x1000x50"). Searches go through
+the FTS5 table on SQLite and the FULLTEXT index on MySQL (LIKE when neither is
+available), so archived entities and tabs never opened are found without
+loading any grid.
+
+Maintenance:
+- ORM flushes reindex, in the same transaction, the entities they inserted,
+  updated or deleted and the documents quoting them (a renamed client is part
+  of its devis, commandes, réceptions and lots); session events, installed by
+  config.database with the session factory (install());
+- bulk inserts bypass the session events: their callers run index_new();
+- catch_up() indexes the rows without a document and drops the documents whose
+  row is gone; it runs in the background at every startup
+  (database.connection.bootstrap_db).
+"""
+from __future__ import annotations
+import re
+import weakref
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator
+from loguru import logger
+from sqlalchemy import column, delete, event, exists, func, insert, inspect, literal_column, or_, select, table
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from models.clients import Client
+from models.suppliers import Supplier
+from models.orders import ClientOrder, Quotation, QuotationLineItem, Reception, SupplierOrder, SupplierOrderLineItem
+from models.production import ProductionBatch
+from models.search import SQLITE_FTS_TABLE, SearchDocument
+
+ENTITY_LABELS = {
+    'quotation': 'Devis',
+    'supplier_order': 'Commande MP',
+    'reception': 'Réception',
+    'production_batch': 'Production',
+    'client': 'Client',
+    'supplier': 'Fournisseur',
+}
+DEFAULT_LIMIT = 200
+# Relevance weight of a title match against a body match (FTS5 bm25)
+TITLE_WEIGHT = 10.0
+# MySQL FULLTEXT does not index shorter words (innodb_ft_min_token_size); they are matched with LIKE
+MYSQL_MIN_TOKEN = 3
+# Ids per DELETE statement
+CHUNK = 1_000
+
+# (entity_id, title, body, archived)
+Document = tuple[int, str, str, bool]
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+@dataclass(frozen=True, slots=True)
+class SearchHit:
+    entity: str
+    entity_id: int
+    title: str
+    body: str
+    archived: bool
+
+    @property
+    def label(self) -> str:
+        return ENTITY_LABELS.get(self.entity, self.entity)
+
+
+def _text(*parts: Any) -> str:
+    """Non-empty parts joined by spaces; '×' is written 'x' so a dimension stays one token."""
+    return ' '.join(str(p).strip() for p in parts if p is not None and str(p).strip()).replace('×', 'x')
+
+
+def _dims(*values: int | None) -> str | None:
+    return 'x'.join(map(str, values)) if all(values) else None
+
+
+def _quotation_documents(conn: Connection, condition) -> Iterator[Document]:
+    ids = select(Quotation.id).where(condition)
+    lines: dict[int, list[str]] = defaultdict(list)
+    for quotation_id, description, cardboard, material, notes, length, width, height in conn.execute(
+        select(QuotationLineItem.quotation_id, QuotationLineItem.description, QuotationLineItem.cardboard_type,
+               QuotationLineItem.material_reference, QuotationLineItem.notes,
+               QuotationLineItem.length_mm, QuotationLineItem.width_mm, QuotationLineItem.height_mm)
+        .where(QuotationLineItem.quotation_id.in_(ids)).order_by(QuotationLineItem.id)
+    ):
+        lines[quotation_id].append(_text(description, cardboard, material, notes, _dims(length, width, height)))
+    orders: dict[int, list[str]] = defaultdict(list)
+    for quotation_id, reference in conn.execute(
+        select(ClientOrder.quotation_id, ClientOrder.reference).where(ClientOrder.quotation_id.in_(ids))
+    ):
+        orders[quotation_id].append(reference)
+    for quotation_id, reference, notes, archived_at, client_name in conn.execute(
+        select(Quotation.id, Quotation.reference, Quotation.notes, Quotation.archived_at, Client.name)
+        .outerjoin(Client, Client.id == Quotation.client_id).where(condition)
+    ):
+        body = _text(client_name, *orders[quotation_id], notes, *lines[quotation_id])
+        yield quotation_id, reference, body, archived_at is not None
+
+
+def _supplier_order_documents(conn: Connection, condition) -> Iterator[Document]:
+    line = SupplierOrderLineItem
+    lines: dict[int, list[str]] = defaultdict(list)
+    for (order_id, client_name, code, cardboard, material, notes,
+         width, length, flap, box_length, box_width, box_height) in conn.execute(
+        select(line.supplier_order_id, Client.name, line.code_article, line.cardboard_type,
+               line.material_reference, line.notes, line.plaque_width_mm, line.plaque_length_mm,
+               line.plaque_flap_mm, line.caisse_length_mm, line.caisse_width_mm, line.caisse_height_mm)
+        .outerjoin(Client, Client.id == line.client_id)
+        .where(line.supplier_order_id.in_(select(SupplierOrder.id).where(condition))).order_by(line.id)
+    ):
+        lines[order_id].append(_text(client_name, code, cardboard, material, notes,
+                                     _dims(width, length, flap), _dims(box_length, box_width, box_height)))
+    for order_id, bon_commande_ref, reference, notes, archived_at, supplier_name in conn.execute(
+        select(SupplierOrder.id, SupplierOrder.bon_commande_ref, SupplierOrder.reference, SupplierOrder.notes,
+               SupplierOrder.archived_at, Supplier.name)
+        .outerjoin(Supplier, Supplier.id == SupplierOrder.supplier_id).where(condition)
+    ):
+        legacy = reference if reference != bon_commande_ref else None
+        body = _text(supplier_name, legacy, notes, *lines[order_id])
+        yield order_id, bon_commande_ref or reference, body, archived_at is not None
+
+
+def _reception_documents(conn: Connection, condition) -> Iterator[Document]:
+    for (reception_id, notes, reception_date, archived_at, width, length, flap,
+         bon_commande_ref, order_archived_at, supplier_name, client_name) in conn.execute(
+        select(Reception.id, Reception.notes, Reception.reception_date, Reception.archived_at,
+               Reception.plaque_width_mm, Reception.plaque_length_mm, Reception.plaque_flap_mm,
+               SupplierOrder.bon_commande_ref, SupplierOrder.archived_at, Supplier.name, Client.name)
+        .outerjoin(SupplierOrder, SupplierOrder.id == Reception.supplier_order_id)
+        .outerjoin(Supplier, Supplier.id == SupplierOrder.supplier_id)
+        .outerjoin(Client, Client.id == Reception.client_id).where(condition)
+    ):
+        body = _text(supplier_name, client_name, reception_date, _dims(width, length, flap), notes)
+        # The stock tab hides the receptions of archived orders as well
+        archived = archived_at is not None or order_archived_at is not None
+        yield reception_id, bon_commande_ref or '', body, archived
+
+
+def _production_batch_documents(conn: Connection, condition) -> Iterator[Document]:
+    for batch_id, batch_code, description, production_date, archived_at, order_reference, client_name in conn.execute(
+        select(ProductionBatch.id, ProductionBatch.batch_code, ProductionBatch.description,
+               ProductionBatch.production_date, ProductionBatch.archived_at, ClientOrder.reference, Client.name)
+        .outerjoin(ClientOrder, ClientOrder.id == ProductionBatch.client_order_id)
+        .outerjoin(Client, Client.id == ClientOrder.client_id).where(condition)
+    ):
+        body = _text(client_name, order_reference, production_date, description)
+        yield batch_id, batch_code, body, archived_at is not None
+
+
+def _client_documents(conn: Connection, condition) -> Iterator[Document]:
+    for client_id, name, *details in conn.execute(
+        select(Client.id, Client.name, Client.contact_name, Client.email, Client.phone, Client.address,
+               Client.city, Client.country, Client.activity, Client.numero_rc, Client.nis, Client.nif, Client.ai)
+        .where(condition)
+    ):
+        yield client_id, name, _text(*details), False
+
+
+def _supplier_documents(conn: Connection, condition) -> Iterator[Document]:
+    for supplier_id, name, *details in conn.execute(
+        select(Supplier.id, Supplier.name, Supplier.contact_name, Supplier.email, Supplier.phone,
+               Supplier.address, Supplier.city, Supplier.country)
+        .where(condition)
+    ):
+        yield supplier_id, name, _text(*details), False
+
+
+# entity -> (model, document builder taking a condition on the model's table)
+_SOURCES: dict[str, tuple[Any, Callable[[Connection, Any], Iterator[Document]]]] = {
+    'quotation': (Quotation, _quotation_documents),
+    'supplier_order': (SupplierOrder, _supplier_order_documents),
+    'reception': (Reception, _reception_documents),
+    'production_batch': (ProductionBatch, _production_batch_documents),
+    'client': (Client, _client_documents),
+    'supplier': (Supplier, _supplier_documents),
+}
+
+
+def _insert(conn: Connection, entity: str, documents: list[Document]) -> None:
+    if documents:
+        conn.execute(insert(SearchDocument), [
+            {'entity': entity, 'entity_id': entity_id, 'title': (title or '')[:255], 'body': body, 'archived': archived}
+            for entity_id, title, body, archived in documents
+        ])
+
+
+def _replace(conn: Connection, entity: str, condition, stale_ids: Iterable[int] = ()) -> int:
+    """Rebuild the documents of the rows matching condition; stale_ids (deleted rows) lose theirs."""
+    documents = list(_SOURCES[entity][1](conn, condition))
+    ids = sorted(set(stale_ids) | {document[0] for document in documents})
+    for start in range(0, len(ids), CHUNK):
+        conn.execute(delete(SearchDocument).where(
+            SearchDocument.entity == entity, SearchDocument.entity_id.in_(ids[start:start + CHUNK])
+        ))
+    _insert(conn, entity, documents)
+    return len(documents)
+
+
+def reindex(session: Session, entity: str, ids: Iterable[int]) -> int:
+    """Rebuild the documents of the given rows (rows no longer present lose theirs); returns the documents written."""
+    ids = set(ids)
+    if not ids:
+        return 0
+    model = _SOURCES[entity][0]
+    return _replace(session.connection(), entity, model.id.in_(ids), ids)
+
+
+def index_new(session: Session, entity: str) -> int:
+    """Index the rows inserted after the newest indexed one (bulk inserts bypass the session events).
+
+    Called by write paths: like the session events it never blocks the write,
+    a failure is logged and 0 returned.
+    """
+    model, build = _SOURCES[entity]
+    newest = select(func.coalesce(func.max(SearchDocument.entity_id), 0)).where(
+        SearchDocument.entity == entity
+    ).scalar_subquery()
+    try:
+        conn = session.connection()
+        documents = list(build(conn, model.id > newest))
+        _insert(conn, entity, documents)
+    except Exception as exc:
+        logger.warning("Index de recherche non mis à jour: {}", exc)
+        return 0
+    return len(documents)
+
+
+def catch_up(session: Session, entities: Iterable[str] | None = None) -> int:
+    """Index the rows without a document and drop the documents whose row is gone; returns the documents added."""
+    conn = session.connection()
+    added = 0
+    for entity in entities or _SOURCES:
+        model, build = _SOURCES[entity]
+        conn.execute(delete(SearchDocument).where(
+            SearchDocument.entity == entity, ~exists().where(model.id == SearchDocument.entity_id)
+        ))
+        indexed = exists().where(SearchDocument.entity == entity, SearchDocument.entity_id == model.id)
+        documents = list(build(conn, ~indexed))
+        _insert(conn, entity, documents)
+        added += len(documents)
+    return added
+
+
+def rebuild(session: Session) -> int:
+    """Drop every document and index everything again; returns the documents written."""
+    session.connection().execute(delete(SearchDocument))
+    return catch_up(session)
+
+
+# Search -----------------------------------------------------------------
+
+_modes: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _search_mode(conn: Connection) -> str:
+    """'fulltext' (MySQL), 'fts5' (SQLite with the FTS table) or 'like'; detected once per engine."""
+    mode = _modes.get(conn.engine)
+    if mode is None:
+        dialect = conn.dialect.name
+        if dialect in ('mysql', 'mariadb'):
+            mode = 'fulltext'
+        elif dialect == 'sqlite' and inspect(conn).has_table(SQLITE_FTS_TABLE):
+            mode = 'fts5'
+        else:
+            mode = 'like'
+        _modes[conn.engine] = mode
+    return mode
+
+
+def query_tokens(text: str | None) -> list[str]:
+    """Lowercase words and numbers of a query; '500×1000' and '500x1000' give the same token."""
+    return _TOKEN_RE.findall((text or '').lower().replace('×', 'x'))
+
+
+def _contains(token: str):
+    return or_(func.lower(SearchDocument.title).contains(token, autoescape=True),
+               func.lower(SearchDocument.body).contains(token, autoescape=True))
+
+
+def search(session: Session, text: str, limit: int = DEFAULT_LIMIT, mode: str | None = None) -> list[SearchHit]:
+    """Documents containing every word of text (as a word prefix), active entities first, best matches first.
+
+    mode: force 'fts5', 'fulltext' or 'like' instead of the engine's.
+    """
+    tokens = query_tokens(text)
+    if not tokens:
+        return []
+    conn = session.connection()
+    mode = mode or _search_mode(conn)
+    doc = SearchDocument
+    stmt = select(doc.entity, doc.entity_id, doc.title, doc.body, doc.archived)
+    words = [token for token in tokens if len(token) >= MYSQL_MIN_TOKEN]
+    if mode == 'fts5':
+        fts = table(SQLITE_FTS_TABLE, column('rowid'))
+        fts_table = literal_column(SQLITE_FTS_TABLE)
+        stmt = stmt.join(fts, fts.c.rowid == doc.id).where(
+            fts_table.op('MATCH')(' '.join(f'"{token}"*' for token in tokens))
+        ).order_by(doc.archived, func.bm25(fts_table, TITLE_WEIGHT, 1.0))
+    elif mode == 'fulltext' and words:
+        score = match(doc.title, doc.body, against=' '.join(f'+{word}*' for word in words)).in_boolean_mode()
+        stmt = stmt.where(score, *[_contains(token) for token in tokens if token not in words]).order_by(
+            doc.archived, score.desc()
+        )
+    else:
+        stmt = stmt.where(*[_contains(token) for token in tokens]).order_by(doc.archived, doc.id.desc())
+    return [SearchHit(*row) for row in conn.execute(stmt.limit(limit))]
+
+
+# Maintenance on write ---------------------------------------------------
+
+_PENDING_KEY = 'search_index_pending'
+
+
+@dataclass(slots=True)
+class _Pending:
+    """Documents to rebuild after a flush: rows by id, and rows quoting a changed one by condition."""
+    ids: dict[str, set[int]] = field(default_factory=lambda: defaultdict(set))
+    conditions: dict[str, list] = field(default_factory=lambda: defaultdict(list))
+
+
+def _changed(instance, *attributes: str) -> bool:
+    state = inspect(instance)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+def _collect(pending: _Pending, instance, is_new: bool) -> None:
+    ids, conditions = pending.ids, pending.conditions
+    if isinstance(instance, Quotation):
+        ids['quotation'].add(instance.id)
+    elif isinstance(instance, QuotationLineItem):
+        ids['quotation'].add(instance.quotation_id)
+    elif isinstance(instance, ClientOrder):
+        if instance.quotation_id:
+            ids['quotation'].add(instance.quotation_id)
+        if not is_new and _changed(instance, 'reference', 'client_id'):
+            conditions['production_batch'].append(ProductionBatch.client_order_id == instance.id)
+    elif isinstance(instance, SupplierOrder):
+        ids['supplier_order'].add(instance.id)
+        if not is_new and _changed(instance, 'bon_commande_ref', 'supplier_id', 'archived_at'):
+            conditions['reception'].append(Reception.supplier_order_id == instance.id)
+    elif isinstance(instance, SupplierOrderLineItem):
+        ids['supplier_order'].add(instance.supplier_order_id)
+    elif isinstance(instance, Reception):
+        ids['reception'].add(instance.id)
+    elif isinstance(instance, ProductionBatch):
+        ids['production_batch'].add(instance.id)
+    elif isinstance(instance, Client):
+        ids['client'].add(instance.id)
+        if not is_new and _changed(instance, 'name'):
+            conditions['quotation'].append(Quotation.client_id == instance.id)
+            conditions['reception'].append(Reception.client_id == instance.id)
+            conditions['supplier_order'].append(SupplierOrder.id.in_(
+                select(SupplierOrderLineItem.supplier_order_id).where(SupplierOrderLineItem.client_id == instance.id)
+            ))
+            conditions['production_batch'].append(ProductionBatch.client_order_id.in_(
+                select(ClientOrder.id).where(ClientOrder.client_id == instance.id)
+            ))
+    elif isinstance(instance, Supplier):
+        ids['supplier'].add(instance.id)
+        if not is_new and _changed(instance, 'name'):
+            conditions['supplier_order'].append(SupplierOrder.supplier_id == instance.id)
+            conditions['reception'].append(Reception.supplier_order_id.in_(
+                select(SupplierOrder.id).where(SupplierOrder.supplier_id == instance.id)
+            ))
+
+
+def _after_flush(session, flush_context):
+    # Histories are still those of the flush here, the rows are written after it (postexec)
+    pending = _Pending()
+    for instance in session.new:
+        _collect(pending, instance, True)
+    for instance in (*session.dirty, *session.deleted):
+        _collect(pending, instance, False)
+    session.info[_PENDING_KEY] = pending
+
+
+def _after_flush_postexec(session, flush_context):
+    pending: _Pending | None = session.info.pop(_PENDING_KEY, None)
+    if pending is None or not (pending.ids or pending.conditions):
+        return
+    try:
+        conn = session.connection()
+        for entity, (model, _build) in _SOURCES.items():
+            ids = pending.ids.get(entity, set()) - {None}
+            conditions = pending.conditions.get(entity, [])
+            if ids or conditions:
+                _replace(conn, entity, or_(model.id.in_(ids), *conditions), ids)
+    except Exception as exc:
+        # The index must never block a write; rebuild() repairs the documents
+        logger.warning("Index de recherche non mis à jour: {}", exc)
+
+
+_installed = False
+
+
+def install() -> None:
+    """Maintain the search documents on every ORM flush (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Session, 'after_flush', _after_flush)
+    event.listen(Session, 'after_flush_postexec', _after_flush_postexec)
+    _installed = True
+
+
+
+__all__ = ['SearchHit', 'ENTITY_LABELS', 'DEFAULT_LIMIT', 'search', 'query_tokens', 'reindex', 'index_new',
+           'catch_up', 'rebuild', 'install']
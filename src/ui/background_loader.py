@@ -0,0 +1,128 @@
+"""
+Background data loading for widgets.
+
+Runs database reads on a QThreadPool worker with its own thread-local session
+and hands the plain result (row lists, counters) back to the GUI thread
+through a queued signal, so the Qt event loop never blocks on the database.
+"""
+from __future__ import annotations
+import threading
+import traceback
+from typing import Any, Callable, Optional
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from sqlalchemy.orm import Session
+from config.database import SessionLocal
+
+
+class _LoaderSignals(QObject):
+    # (generation, result) / (generation, error message)
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+
+class _LoadTask(QRunnable):
+    """Executes one load function with a session bound to the worker thread."""
+
+    def __init__(self, fn: Callable[[Session], Any], generation: int, signals: _LoaderSignals):
+        super().__init__()
+        self.fn = fn
+        self.generation = generation
+        self.signals = signals
+        self.cancelled = threading.Event()
+
+    def run(self):
+        # Always report back, even when cancelled, so the loader can start the queued request
+        if self.cancelled.is_set():
+            self.signals.finished.emit(self.generation, None)
+            return
+        # SessionLocal is a scoped_session: each pool thread gets its own session
+        session = SessionLocal()
+        try:
+            result = self.fn(session)
+        except Exception as e:
+            if not self.cancelled.is_set():
+                traceback.print_exc()
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        finally:
+            session.close()
+            SessionLocal.remove()
+        self.signals.finished.emit(self.generation, result)
+
+
+class BackgroundLoader(QObject):
+    """Runs at most one load at a time off the GUI thread, coalescing requests.
+
+    A request made while a load is in flight cancels the in-flight result and is
+    queued; further requests replace the queued one. Only the newest result is
+    delivered to its callback, on the GUI thread.
+    """
+
+    def __init__(self, parent=None, pool: Optional[QThreadPool] = None):
+        super().__init__(parent)
+        self._pool = pool or QThreadPool.globalInstance()
+        self._signals = _LoaderSignals()
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+        self._generation = 0
+        self._current: _LoadTask | None = None
+        self._callbacks: tuple[Callable[[Any], None], Callable[[str], None] | None] | None = None
+        self._pending: tuple[Callable[[Session], Any], Callable[[Any], None], Callable[[str], None] | None] | None = None
+
+    def submit(self, fn: Callable[[Session], Any], on_done: Callable[[Any], None],
+               on_error: Callable[[str], None] | None = None) -> None:
+        """Run fn(session) on a worker thread and call on_done(result) on the GUI thread."""
+        if self._current is not None:
+            # Drop the in-flight result and run the newest request once it is done
+            self._current.cancelled.set()
+            if self._pool.tryTake(self._current):
+                self._current = None
+            else:
+                self._pending = (fn, on_done, on_error)
+                return
+        self._start(fn, on_done, on_error)
+
+    def cancel(self) -> None:
+        """Cancel the in-flight load (its result is discarded) and any queued request."""
+        self._pending = None
+        if self._current is not None:
+            self._current.cancelled.set()
+            if self._pool.tryTake(self._current):
+                self._current = None
+
+    def is_busy(self) -> bool:
+        return self._current is not None
+
+    def _start(self, fn, on_done, on_error) -> None:
+        self._generation += 1
+        task = _LoadTask(fn, self._generation, self._signals)
+        task.setAutoDelete(False)
+        self._current = task
+        self._callbacks = (on_done, on_error)
+        self._pool.start(task)
+
+    def _task_done(self, generation: int) -> bool:
+        """Release the finished task; return True when its result is still wanted."""
+        current = self._current
+        if current is None or current.generation != generation:
+            return False
+        self._current = None
+        wanted = not current.cancelled.is_set()
+        if self._pending is not None:
+            fn, on_done, on_error = self._pending
+            self._pending = None
+            self._start(fn, on_done, on_error)
+        return wanted
+
+    def _on_finished(self, generation: int, result: Any) -> None:
+        callbacks = self._callbacks
+        if self._task_done(generation) and callbacks:
+            callbacks[0](result)
+
+    def _on_failed(self, generation: int, message: str) -> None:
+        callbacks = self._callbacks
+        if self._task_done(generation) and callbacks and callbacks[1]:
+            callbacks[1](message)
+
+
+__all__ = ['BackgroundLoader']
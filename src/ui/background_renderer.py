@@ -0,0 +1,80 @@
+"""
+Background document rendering for bulk exports.
+
+Runs DocumentRenderer on a QThreadPool worker (which itself fans the jobs out
+to worker processes) and reports progress and results to the GUI thread
+through queued signals, with a progress dialog in the meantime.
+"""
+from __future__ import annotations
+import traceback
+from typing import Callable, Optional
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtWidgets import QProgressDialog, QWidget
+from services.document_renderer import DocumentRenderer, RenderJob, RenderResult
+
+
+# Tasks started by render_in_background that have not reported back yet
+_running: set[DocumentRenderTask] = set()
+
+
+class _RenderSignals(QObject):
+    # (done, total) / results / error message
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class DocumentRenderTask(QRunnable):
+    """Renders a list of jobs off the GUI thread."""
+
+    def __init__(self, jobs: list[RenderJob], renderer: Optional[DocumentRenderer] = None):
+        super().__init__()
+        self.jobs = jobs
+        self.renderer = renderer or DocumentRenderer()
+        self.signals = _RenderSignals()
+
+    def run(self):
+        try:
+            results = self.renderer.render(self.jobs, progress=self.signals.progress.emit)
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(results)
+
+
+def render_in_background(parent: QWidget, jobs: list[RenderJob], on_done: Callable[[list[RenderResult]], None],
+                         label: str = "Génération des documents...",
+                         pool: Optional[QThreadPool] = None) -> DocumentRenderTask:
+    """Render jobs on a worker thread with a progress dialog; on_done(results) runs on the GUI thread."""
+    dialog = QProgressDialog(label, None, 0, len(jobs), parent)
+    dialog.setWindowTitle("Génération")
+    dialog.setWindowModality(Qt.WindowModality.WindowModal)
+    dialog.setMinimumDuration(300)
+    dialog.setValue(0)
+
+    task = DocumentRenderTask(jobs)
+    task.setAutoDelete(False)
+    # Keep the task (and its signals) alive until it reports back
+    _running.add(task)
+
+    def _finish():
+        _running.discard(task)
+        dialog.close()
+
+    def _on_finished(results):
+        _finish()
+        on_done(results)
+
+    def _on_failed(message: str):
+        _finish()
+        on_done([RenderResult(job, error=message) for job in jobs])
+
+    task.signals.progress.connect(lambda done, total: dialog.setValue(done))
+    task.signals.finished.connect(_on_finished)
+    task.signals.failed.connect(_on_failed)
+    (pool or QThreadPool.globalInstance()).start(task)
+    return task
+
+
+__all__ = ['DocumentRenderTask', 'render_in_background']
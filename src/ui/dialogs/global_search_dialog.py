@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QLabel, QTableWidget,
+    QTableWidgetItem, QHeaderView, QAbstractItemView, QPushButton
+)
+from PyQt6.QtCore import QTimer, pyqtSignal
+from PyQt6.QtGui import QColor
+from config.database import session_scope
+from services.search_index import DEFAULT_LIMIT, SearchHit, search
+
+# Delay after the last keystroke before the index is queried
+SEARCH_DELAY_MS = 250
+# Characters of the document body shown in the results
+DETAIL_LENGTH = 140
+
+
+class GlobalSearchDialog(QDialog):
+    """Search every tab (archives included) through the search index; a result opens its tab and row."""
+
+    # (entity, entity_id, archived) of the activated result
+    resultActivated = pyqtSignal(str, int, bool)
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Recherche globale")
+        self.setModal(False)
+        self.resize(900, 500)
+        self._hits: list[SearchHit] = []
+
+        layout = QVBoxLayout(self)
+
+        row = QHBoxLayout()
+        self.query_field = QLineEdit()
+        self.query_field.setPlaceholderText("Référence, client, fournisseur, description, 500x1000x50...")
+        self.query_field.setClearButtonEnabled(True)
+        row.addWidget(self.query_field, 1)
+        open_btn = QPushButton("Ouvrir")
+        open_btn.clicked.connect(self._activate_current)
+        row.addWidget(open_btn)
+        layout.addLayout(row)
+
+        self.results_table = QTableWidget(0, 4)
+        self.results_table.setHorizontalHeaderLabels(["Type", "Référence / Nom", "Détail", "Archivé"])
+        self.results_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.results_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.results_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.results_table.setAlternatingRowColors(True)
+        self.results_table.verticalHeader().setVisible(False)
+        header = self.results_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
+        self.results_table.cellDoubleClicked.connect(lambda row, _col: self._activate(row))
+        layout.addWidget(self.results_table)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(SEARCH_DELAY_MS)
+        self._timer.timeout.connect(self.run_search)
+        self.query_field.textChanged.connect(lambda _text: self._timer.start())
+        self.query_field.returnPressed.connect(self._on_return)
+
+    def set_query(self, text: str) -> None:
+        """Fill the query field and search at once."""
+        self.query_field.setText(text)
+        self.run_search()
+
+    def run_search(self) -> None:
+        self._timer.stop()
+        text = self.query_field.text().strip()
+        if not text:
+            self._show([])
+            return
+        try:
+            with session_scope() as session:
+                hits = search(session, text)
+        except Exception as e:
+            self._show([])
+            self.status_label.setText(f"Erreur de recherche: {e}")
+            return
+        self._show(hits)
+
+    def _show(self, hits: list[SearchHit]) -> None:
+        self._hits = hits
+        self.results_table.setRowCount(len(hits))
+        archived_color = QColor("#f2f2f2")
+        for row, hit in enumerate(hits):
+            detail = hit.body if len(hit.body) <= DETAIL_LENGTH else hit.body[:DETAIL_LENGTH - 3] + "..."
+            for col, text in enumerate([hit.label, hit.title, detail, "Oui" if hit.archived else ""]):
+                item = QTableWidgetItem(text)
+                if hit.archived:
+                    item.setBackground(archived_color)
+                self.results_table.setItem(row, col, item)
+        if hits:
+            self.results_table.selectRow(0)
+        if not self.query_field.text().strip():
+            self.status_label.setText("")
+        elif len(hits) >= DEFAULT_LIMIT:
+            self.status_label.setText(f"{len(hits)} premiers résultats, précisez la recherche")
+        else:
+            self.status_label.setText(f"{len(hits)} résultat(s)")
+
+    def _on_return(self) -> None:
+        # Enter right after typing searches first; a second Enter opens the selected result
+        if self._timer.isActive():
+            self.run_search()
+        else:
+            self._activate_current()
+
+    def _activate_current(self) -> None:
+        self._activate(self.results_table.currentRow())
+
+    def _activate(self, row: int) -> None:
+        if 0 <= row < len(self._hits):
+            hit = self._hits[row]
+            self.resultActivated.emit(hit.entity, hit.entity_id, hit.archived)
@@ -7,12 +7,14 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
 from config.database import SessionLocal
-from models.orders import Reception, Quotation, SupplierOrder, SupplierOrderLineItem, MaterialDelivery, DeliveryStatus, SupplierOrderStatus, ClientOrder
+from models.orders import Quotation, SupplierOrder
 from services.delivery_tracking_service import DeliveryTrackingService
+from services.plaque_index import PlaqueIndex
+from services.arrival_allocation import ArrivalLine, save_arrival
 from models.suppliers import Supplier
 from models.plaques import Plaque
-from typing import List, Dict, Any, cast
-from datetime import datetime
+from typing import List, Dict, Any
+from utils.instrumentation import timed
 
 
 class RawMaterialArrivalDialog(QDialog):
@@ -25,6 +27,7 @@ class RawMaterialArrivalDialog(QDialog):
         # Data storage
         self.material_entries: List[Dict[str, Any]] = []
         self.related_supplier_orders: List[SupplierOrder] = []
+        self._open_orders_index: PlaqueIndex | None = None
         
         self._build_ui()
         self._load_initial_data()
@@ -284,42 +287,23 @@ class RawMaterialArrivalDialog(QDialog):
             self.orders_table.setRowCount(0)
             return
         
-        session = SessionLocal()
         try:
             # Clear current orders
             self.orders_table.setRowCount(0)
             self.related_supplier_orders = []
             
-            # Search for supplier orders with line items that have similar dimensions
-            # Only show orders in "passé" (ORDERED) or "partiellement livrée" (PARTIALLY_DELIVERED) status
+            # Only "passé" (ORDERED) and "partiellement livrée" (PARTIALLY_DELIVERED) orders are indexed
+            index = self._plaque_index()
             for entry in self.material_entries:
-                # Query supplier orders with line items that might match dimensions
-                # Filter for "passé" and "partiellement livrée" status orders
-                supplier_orders = session.query(SupplierOrder).filter(
-                    SupplierOrder.line_items.any(),
-                    SupplierOrder.status.in_([SupplierOrderStatus.ORDERED, SupplierOrderStatus.PARTIALLY_DELIVERED])
-                ).all()
-                
-                for supplier_order in supplier_orders:
-                    # Check if any line item has dimensions that match our plates
-                    for line_item in supplier_order.line_items:
-                        if (line_item.plaque_width_mm and line_item.plaque_length_mm and 
-                            hasattr(line_item, 'plaque_flap_mm') and line_item.plaque_flap_mm):
-                            
-                            # Check if the entered dimensions match order dimensions (with some tolerance)
-                            width_match = abs(line_item.plaque_width_mm - entry['width']) <= 10
-                            height_match = abs(line_item.plaque_length_mm - entry['height']) <= 10
-                            rabat_match = abs(line_item.plaque_flap_mm - entry['rabat']) <= 5
-                            
-                            if width_match and height_match and rabat_match and supplier_order not in self.related_supplier_orders:
-                                self.related_supplier_orders.append(supplier_order)
-                                self._add_supplier_order_to_table(supplier_order, entry, line_item)
-                                break
+                # First matching line item of each order not listed yet
+                for line_item in index.within_tolerance(entry['width'], entry['height'], entry['rabat']):
+                    supplier_order = line_item.supplier_order
+                    if supplier_order not in self.related_supplier_orders:
+                        self.related_supplier_orders.append(supplier_order)
+                        self._add_supplier_order_to_table(supplier_order, entry, line_item)
         
         except Exception as e:
             print(f"Error searching related supplier orders: {e}")
-        finally:
-            session.close()
 
     def _add_supplier_order_to_table(self, supplier_order: SupplierOrder, matching_entry: Dict[str, Any], line_item):
         """Add a supplier order to the related orders table"""
@@ -346,6 +330,7 @@ class RawMaterialArrivalDialog(QDialog):
             self._format_date(supplier_order.order_date) if hasattr(supplier_order, 'order_date') and supplier_order.order_date else "N/A"
         ))
 
+    @timed('save.arrival')
     def _save_arrival(self):
         """Save the raw material arrival with partial delivery tracking"""
         if not self.material_entries:
@@ -353,222 +338,43 @@ class RawMaterialArrivalDialog(QDialog):
             return
         
         try:
-            session = SessionLocal()
-            try:
-                saved_deliveries = []
-                updated_line_items = []
-                supplier_orders_used: set[int] = set()  # Track which supplier orders we used - initialize at method level
-                # Aggregate receptions by (supplier_order_id, width, height, rabat)
-                reception_aggregates: dict[tuple[int, int, int, int], int] = {}
-                
-                # Process each material entry
-                for entry in self.material_entries:
-                    # Find matching supplier order line items
-                    matching_line_items = session.query(SupplierOrderLineItem).filter(
-                        SupplierOrderLineItem.plaque_width_mm == entry['width'],
-                        SupplierOrderLineItem.plaque_length_mm == entry['height'],
-                        SupplierOrderLineItem.plaque_flap_mm == entry['rabat']
-                    ).all()
-                    
-                    if matching_line_items:
-                        # If there are matches, distribute the received quantity
-                        remaining_quantity = entry['quantity']
-                        
-                        for line_item in matching_line_items:
-                            if remaining_quantity <= 0:
-                                break
-                                
-                            # Calculate how much we can apply to this line item
-                            needed_quantity = line_item.quantity - (line_item.total_received_quantity or 0)
-                            if needed_quantity <= 0:
-                                continue  # This line item is already complete
-                                
-                            applied_quantity = min(remaining_quantity, needed_quantity)
-                            
-                            # Track supplier order for Reception creation
-                            supplier_orders_used.add(cast(int, line_item.supplier_order_id))
-                            # Aggregate reception quantity by (supplier_order_id, dimensions)
-                            agg_key: tuple[int, int, int, int] = (
-                                cast(int, line_item.supplier_order_id), entry['width'], entry['height'], entry['rabat']
-                            )
-                            reception_aggregates[agg_key] = reception_aggregates.get(agg_key, 0) + applied_quantity
-                            
-                            # Create delivery record
-                            try:
-                                delivery = MaterialDelivery(  # type: ignore[call-arg]
-                                    supplier_order_line_item_id=line_item.id,
-                                    received_quantity=applied_quantity,
-                                    batch_reference=f"ARR-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
-                                    quality_notes=""
-                                )
-                                session.add(delivery)
-                                saved_deliveries.append(delivery)
-                                
-                                # Update line item totals
-                                line_item.total_received_quantity = (line_item.total_received_quantity or 0) + applied_quantity
-                                
-                                # Update delivery status
-                                if line_item.total_received_quantity >= line_item.quantity:
-                                    line_item.delivery_status = DeliveryStatus.COMPLETE  # type: ignore[attr-defined]
-                                else:
-                                    line_item.delivery_status = DeliveryStatus.PARTIAL  # type: ignore[attr-defined]
-                                    
-                                updated_line_items.append(line_item)
-                                remaining_quantity -= applied_quantity
-                                
-                            except Exception as delivery_error:
-                                # If MaterialDelivery table doesn't exist yet, skip delivery tracking
-                                print(f"Delivery tracking not available: {delivery_error}")
-                                # Just update the line item quantities directly
-                                line_item.total_received_quantity = (line_item.total_received_quantity or 0) + applied_quantity
-                                if hasattr(line_item, 'delivery_status'):
-                                    if line_item.total_received_quantity >= line_item.quantity:
-                                        line_item.delivery_status = DeliveryStatus.COMPLETE  # type: ignore[attr-defined]
-                                    else:
-                                        line_item.delivery_status = DeliveryStatus.PARTIAL  # type: ignore[attr-defined]
-                                updated_line_items.append(line_item)
-                                remaining_quantity -= applied_quantity
-
-                    
-                    else:
-                        # No matching orders - this was already confirmed by user
-                        # Aggregate unmatched reception under a default/dummy supplier order
-                        key = (1, entry['width'], entry['height'], entry['rabat'])
-                        reception_aggregates[key] = reception_aggregates.get(key, 0) + entry['quantity']
-
-                # After processing all entries, update supplier orders' statuses once
-                for supplier_order_id in supplier_orders_used:
-                    supplier_order = session.query(SupplierOrder).filter(SupplierOrder.id == supplier_order_id).first()
-                    if supplier_order:
-                        # Check completion status of ALL line items
-                        total_line_items = len(cast(list[SupplierOrderLineItem], supplier_order.line_items))
-                        completed_line_items = 0
-                        partially_received_line_items = 0
-                        
-                        for line_item in supplier_order.line_items:
-                            received_qty = getattr(line_item, 'total_received_quantity', 0) or 0
-                            ordered_qty = line_item.quantity
-                            
-                            if received_qty >= ordered_qty:
-                                # This line item is fully received
-                                completed_line_items += 1
-                                # Update delivery status if available
-                                if hasattr(line_item, 'delivery_status'):
-                                    line_item.delivery_status = DeliveryStatus.COMPLETE  # type: ignore[attr-defined]
-                            elif received_qty > 0:
-                                # This line item is partially received
-                                partially_received_line_items += 1
-                                # Update delivery status if available
-                                if hasattr(line_item, 'delivery_status'):
-                                    line_item.delivery_status = DeliveryStatus.PARTIAL  # type: ignore[attr-defined]
-                            else:
-                                # This line item hasn't been received yet
-                                if hasattr(line_item, 'delivery_status'):
-                                    line_item.delivery_status = DeliveryStatus.PENDING  # type: ignore[attr-defined]
-                        
-                        # Update supplier order status based on ALL line items
-                        if completed_line_items == total_line_items:
-                            # ALL line items are complete
-                            supplier_order.status = SupplierOrderStatus.COMPLETED
-                        elif completed_line_items > 0 or partially_received_line_items > 0:
-                            # Some line items are complete or partial, but not all are complete
-                            supplier_order.status = SupplierOrderStatus.PARTIALLY_DELIVERED
-                        # If no line items have been received, keep the current status (usually ORDERED)
-                        
-                        print(f"Updated supplier order {supplier_order_id} status to: {supplier_order.status.value}")
-                        print(f"  Line items: {completed_line_items}/{total_line_items} complete, {partially_received_line_items} partial")
-
-                # Create a single Reception per (supplier_order_id, dimensions)
-                for (supplier_order_id, w, h, r), qty in reception_aggregates.items():
-                    # Always keep dimensions in notes to allow reliable grouping later
-                    base_description = f"Arrivée matière: {w}x{h}x{r}mm"
-                    extra_description = None  # Any additional context from related quotation
-                    
-                    try:
-                        # Find supplier order and get description from related quotation
-                        supplier_order = session.query(SupplierOrder).filter(SupplierOrder.id == supplier_order_id).first()
-                        if supplier_order and hasattr(supplier_order, 'line_items') and supplier_order.line_items:
-                            first_line_item = supplier_order.line_items[0]
-                            
-                            # Find client order through client_id
-                            if hasattr(first_line_item, 'client_id') and first_line_item.client_id:
-                                # Look for ANY client order for this client that has a quotation with descriptions
-                                # We need to be flexible since supplier_order_id linking isn't always consistent
-                                client_orders = session.query(ClientOrder).filter(
-                                    ClientOrder.client_id == first_line_item.client_id,
-                                    ClientOrder.quotation_id.isnot(None)
-                                ).all()
-                                
-                                for client_order in client_orders:
-                                    if client_order.quotation:
-                                        quotation = client_order.quotation
-                                        
-                                        # Try line items first (priority)
-                                        if quotation.line_items:
-                                            for quotation_line in quotation.line_items:
-                                                if quotation_line.description and quotation_line.description.strip():
-                                                    extra_description = quotation_line.description.strip()
-                                                    break  # Use first non-empty description found
-                                        
-                                        # Fallback to quotation notes if no line item description found
-                                        if (not extra_description) and quotation.notes and quotation.notes.strip():
-                                            extra_description = quotation.notes.strip()
-                                        
-                                        # If we found a good description, break out of client_orders loop
-                                        if extra_description:
-                                            break
-                    except Exception as e:
-                        print(f"Warning: Could not fetch description for supplier order {supplier_order_id}: {e}")
-                    
-                    # Combine base (dimensions) with any extra description found
-                    combined_notes = base_description if not extra_description else f"{base_description} — {extra_description}"
-
-                    reception = Reception(  # type: ignore[call-arg]
-                        supplier_order_id=supplier_order_id,
-                        quantity=qty,
-                        notes=combined_notes
-                    )
-                    session.add(reception)
-                    session.flush()  # ensure reception.id is available for linking
-
-                    # Do not create another MaterialDelivery here; deliveries were already created per line item above.
-                    # Keeping only one delivery record per receipt prevents duplicates in Historique.
-                
-                session.commit()
-                
-                total_entries = len(self.material_entries)
-                total_quantity = sum(entry['quantity'] for entry in self.material_entries)
-                
-                # Prepare status update information
-                status_info = ""
-                if supplier_orders_used:
-                    status_info = f"\nCommandes mises à jour: {len(supplier_orders_used)}"
-                    for supplier_order_id in supplier_orders_used:
-                        supplier_order = session.query(SupplierOrder).filter(SupplierOrder.id == supplier_order_id).first()
-                        if supplier_order:
-                            status_info += f"\n  - Commande {getattr(supplier_order, 'bon_commande_ref', supplier_order_id)}: {supplier_order.status.value}"
-                
-                QMessageBox.information(
-                    self,
-                    "Succès",
-                    f"Arrivée de matière première enregistrée avec succès!\n\n"
-                    f"Entrées: {total_entries}\n"
-                    f"Quantité totale: {total_quantity} plaques\n"
-                    f"Livraisons partielles: {len(saved_deliveries)}\n"
-                    f"Articles mis à jour: {len(updated_line_items)}"
-                    f"{status_info}"
-                )
-                
-                self.accept()
-                
-            except Exception as e:
-                session.rollback()
-                QMessageBox.critical(self, "Erreur", f"Erreur lors de l'enregistrement: {str(e)}")
-            finally:
-                session.close()
-                
+            # Allocation (oldest orders first), deliveries, receptions and statuses in one transaction
+            result = save_arrival(
+                ArrivalLine(entry['width'], entry['height'], entry['rabat'], entry['quantity'])
+                for entry in self.material_entries
+            )
         except Exception as e:
-            QMessageBox.critical(self, "Erreur", f"Erreur: {str(e)}")
+            QMessageBox.critical(self, "Erreur", f"Erreur lors de l'enregistrement: {str(e)}")
+            return
+        
+        total_entries = len(self.material_entries)
+        total_quantity = sum(entry['quantity'] for entry in self.material_entries)
+        
+        # Prepare status update information
+        status_info = ""
+        if result.order_statuses:
+            status_info = f"\nCommandes mises à jour: {len(result.order_statuses)}"
+            for supplier_order_id, (reference, status) in result.order_statuses.items():
+                status_info += f"\n  - Commande {reference or supplier_order_id}: {status.value}"
+        
+        # Quantities beyond what the matching orders still wait for are not received
+        if result.unallocated:
+            status_info += "\n\nQuantités non réceptionnées (commandes déjà soldées):"
+            for (width, length, flap), quantity in result.unallocated.items():
+                status_info += f"\n  - {width}x{length}x{flap}mm: {quantity} plaques"
+        
+        QMessageBox.information(
+            self,
+            "Succès",
+            f"Arrivée de matière première enregistrée avec succès!\n\n"
+            f"Entrées: {total_entries}\n"
+            f"Quantité totale: {total_quantity} plaques\n"
+            f"Livraisons partielles: {result.deliveries}\n"
+            f"Articles mis à jour: {len({a.line_item_id for a in result.allocations})}"
+            f"{status_info}"
+        )
+        
+        self.accept()
 
     def get_material_entries(self) -> List[Dict[str, Any]]:
         """Get the list of material entries"""
@@ -580,37 +386,21 @@ class RawMaterialArrivalDialog(QDialog):
 
     def _check_plate_matches(self, width: int, height: int, rabat: int) -> bool:
         """Check if the plate dimensions match any existing supplier orders"""
-        session = SessionLocal()
         try:
-            # Query supplier orders with "passé" status that have line items
-            supplier_orders = session.query(SupplierOrder).filter(
-                SupplierOrder.status.in_([
-                    SupplierOrderStatus.ORDERED,
-                    SupplierOrderStatus.PARTIALLY_DELIVERED
-                ]),
-                SupplierOrder.line_items.any()
-            ).all()
-            
-            for supplier_order in supplier_orders:
-                for line_item in supplier_order.line_items:
-                    if (line_item.plaque_width_mm and line_item.plaque_length_mm and 
-                        hasattr(line_item, 'plaque_flap_mm') and line_item.plaque_flap_mm):
-                        
-                        # Check if the dimensions match (with some tolerance)
-                        width_match = abs(line_item.plaque_width_mm - width) <= 10
-                        height_match = abs(line_item.plaque_length_mm - height) <= 10
-                        rabat_match = abs(line_item.plaque_flap_mm - rabat) <= 5
-                        
-                        if width_match and height_match and rabat_match:
-                            return True
-            
-            return False
-            
+            return self._plaque_index().has_match(width, height, rabat)
         except Exception as e:
             print(f"Error checking plate matches: {e}")
             return False
-        finally:
-            session.close()
+
+    def _plaque_index(self) -> PlaqueIndex:
+        """Open supplier order line items, loaded once for the lifetime of the dialog"""
+        if self._open_orders_index is None:
+            session = SessionLocal()
+            try:
+                self._open_orders_index = PlaqueIndex.load_open_orders(session)
+            finally:
+                session.close()
+        return self._open_orders_index
 
     def _format_date(self, date_obj) -> str:
         """Format date object to string"""
@@ -6,47 +6,48 @@ import os
 import subprocess
 from decimal import Decimal
 from pathlib import Path
-from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QMenuBar, QMenu, QMessageBox, QTabWidget, QToolBar, QLineEdit, QStatusBar, QDialog, QPushButton, QCompleter
+from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QMenuBar, QMenu, QMessageBox, QTabWidget, QToolBar, QLineEdit, QStatusBar, QDialog, QPushButton, QCompleter
 from PyQt6.QtGui import QAction, QIcon
-from PyQt6.QtCore import Qt, QSize, QStringListModel
+from PyQt6.QtCore import Qt, QSize, QStringListModel, QTimer
 from config.database import SessionLocal
 from models.suppliers import Supplier
 from models.clients import Client
 from models.orders import ClientOrder, SupplierOrder, SupplierOrderLineItem
 from models.orders import SupplierOrderStatus, ClientOrderStatus, Reception, Quotation, QuotationLineItem
 from models.production import ProductionBatch
-from ui.dialogs.supplier_dialog import SupplierDialog
-from ui.dialogs.client_dialog import ClientDialog
-from ui.dialogs.supplier_detail_dialog import SupplierDetailDialog
-from ui.dialogs.client_detail_dialog import ClientDetailDialog
-from ui.dialogs.raw_material_order_dialog import RawMaterialOrderDialog
-from ui.dialogs.quotation_dialog import QuotationDialog
-from ui.dialogs.edit_quotation_dialog import EditQuotationDialog
-from ui.dialogs.reception_dialog import ReceptionDialog
-from ui.dialogs.production_dialog import ProductionDialog
-from ui.dialogs.quotation_detail_dialog import QuotationDetailDialog
 from ui.widgets.data_grid import DataGrid
 from ui.widgets.dashboard import Dashboard
 from ui.widgets.split_view import SplitView
 from ui.widgets.quad_view import QuadView
 from ui.styles import IconManager
 from services.order_service import OrderService
-from services.pdf_form_filler import PDFFormFiller, PDFFillError
-from services.pdf_export_service import export_supplier_order_to_pdf
-from typing import cast, Any
+from services.grid_data_loader import GridDataLoader, GridSnapshot, GRID_TABLE_DEPENDENCIES, sections_for_tables
+from services.change_tracker import TableChangeTracker
+from services.reference_data import reference_data
+from ui.background_loader import BackgroundLoader
+from utils.instrumentation import span, timed
+from typing import Callable, cast, Any
 from ui.widgets.split_view import SplitView
 from ui.widgets.data_grid import DataGrid
 from ui.widgets.dashboard import Dashboard
 from models.orders import QuotationLineItem, ClientOrderLineItem
 
+# Delay after the last keystroke before the search filter is applied
+SEARCH_DEBOUNCE_MS = 150
+# Tab showing each entity of the global search (archived entities: Archive tab)
+SEARCH_RESULT_TABS = {
+    'client': 1, 'supplier': 1, 'quotation': 2, 'supplier_order': 3, 'reception': 4, 'production_batch': 4,
+}
+ARCHIVE_TAB = 5
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
         # Initialize UI component references
-        self.supplier_orders_quad: QuadView
-        self.client_orders_grid: DataGrid
-        self.orders_grid: DataGrid
-        self.clients_suppliers_split: SplitView
+        self.supplier_orders_quad: QuadView | None
+        self.client_orders_grid: DataGrid | None
+        self.orders_grid: DataGrid | None
+        self.clients_suppliers_split: SplitView | None
         self.dashboard: Dashboard
         
         super().__init__()
@@ -58,6 +59,21 @@ class MainWindow(QMainWindow):
             self.setWindowFlag(Qt.WindowType.WindowMaximizeButtonHint, True)
         except Exception:
             pass
+        # Per-table high-water marks used by refresh_all to skip unchanged grids
+        self._change_tracker = TableChangeTracker(
+            name for tables in GRID_TABLE_DEPENDENCIES.values() for name in tables
+        )
+        self._force_full_refresh = False
+        # Tab index -> (page, build function, grid sections) for the tabs not shown yet
+        self._lazy_tabs: dict[int, tuple[QWidget, Callable[[], QWidget], tuple[str, ...]]] = {}
+        # Grid sections whose tab is built / that must be reloaded whatever the change detection says
+        self._built_sections: set[str] = set()
+        self._stale_sections: set[str] = set()
+        # Grid rows are built off the GUI thread; overlapping refreshes are coalesced
+        self._grid_loader = BackgroundLoader(self)
+        # Global search panel (created on first use) and the result waiting for its tab to load
+        self._global_search_dialog = None
+        self._pending_search_jump: tuple[str, int, bool] | None = None
         self._build_ui()
 
     def _build_ui(self) -> None:
@@ -95,6 +111,8 @@ class MainWindow(QMainWindow):
         self.tab_widget.setTabPosition(QTabWidget.TabPosition.North)
         self.tab_widget.setIconSize(QSize(20, 20)) # Set icon size for tabs
         content_layout.addWidget(self.tab_widget)
+        # Tabs other than the dashboard are built the first time they are shown
+        self.tab_widget.currentChanged.connect(self._ensure_tab_built)
         try:
             # Rebuild suggestions when switching tabs
             self.tab_widget.currentChanged.connect(lambda _i: self._rebuild_search_completions_safe())
@@ -105,7 +123,7 @@ class MainWindow(QMainWindow):
         self.dashboard = Dashboard()
         self.tab_widget.addTab(self.dashboard, IconManager.get_dashboard_icon(), "Tableau de Bord")
         
-        # Create data grids for different entities
+        # Register the (lazily built) tabs for the different entities
         self._create_data_grids()
         
         # Status bar
@@ -116,7 +134,7 @@ class MainWindow(QMainWindow):
         # Resize window
         self.resize(1400, 800)
         
-        # Load initial data
+        # Load initial data: only the dashboard, the other tabs load when first shown
         self.refresh_all()
 
     def _create_app_header(self, layout) -> None:
@@ -184,6 +202,11 @@ class MainWindow(QMainWindow):
         # File menu
         file_menu = menubar.addMenu('&Fichier')
         if file_menu:
+            reexport_action = QAction('Réexporter les bons de commande du mois...', self)
+            reexport_action.triggered.connect(self._reexport_supplier_orders_for_month)
+            file_menu.addAction(reexport_action)
+            file_menu.addSeparator()
+
             quit_action = QAction('&Quitter', self)
             quit_action.setShortcut('Ctrl+Q')
             quit_action.triggered.connect(self.close)
@@ -233,9 +256,13 @@ class MainWindow(QMainWindow):
         self.search_field = QLineEdit()
         self.search_field.setPlaceholderText("Rechercher...")
         self.search_field.setMaximumWidth(250)
-        # Live filtering as user types
+        # Live filtering as user types, applied once typing pauses
+        self._search_debounce = QTimer(self)
+        self._search_debounce.setSingleShot(True)
+        self._search_debounce.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_debounce.timeout.connect(self._apply_search_now)
         try:
-            self.search_field.textChanged.connect(self._on_search_changed)
+            self.search_field.textChanged.connect(lambda _text: self._search_debounce.start())
         except Exception:
             pass
         # Attach autocomplete (suggestions) to the search field
@@ -261,6 +288,14 @@ class MainWindow(QMainWindow):
             # Autocomplete is optional; continue without breaking toolbar
             logging.debug(f"Autocomplete setup skipped: {_completer_err}")
         toolbar.addWidget(self.search_field)
+        # Enter searches every tab (archives included) through the search index
+        self.search_field.setToolTip("Filtre l'onglet actif; Entrée: rechercher dans tous les onglets")
+        self.search_field.returnPressed.connect(lambda: self._open_global_search(self.search_field.text()))
+        global_search_action = QAction('Recherche globale', self)
+        global_search_action.setShortcut('Ctrl+Shift+F')
+        global_search_action.setToolTip('Rechercher dans tous les onglets, archives comprises (Ctrl+Shift+F)')
+        global_search_action.triggered.connect(lambda: self._open_global_search(self.search_field.text()))
+        toolbar.addAction(global_search_action)
         
         toolbar.addSeparator()
         
@@ -268,7 +303,7 @@ class MainWindow(QMainWindow):
         refresh_action = QAction('Actualiser', self)
         refresh_action.setIcon(IconManager.get_refresh_icon())
         refresh_action.setToolTip('Actualiser toutes les données')
-        refresh_action.triggered.connect(self.refresh_all)
+        refresh_action.triggered.connect(lambda: self.refresh_all())
         toolbar.addAction(refresh_action)
 
     def _rebuild_search_completions_safe(self) -> None:
@@ -447,6 +482,11 @@ class MainWindow(QMainWindow):
             except Exception:
                 pass
 
+    def _apply_search_now(self) -> None:
+        """Apply the search field immediately, skipping the typing debounce."""
+        self._search_debounce.stop()
+        self._on_search_changed(self.search_field.text())
+
     def _clear_global_filter(self) -> None:
         """Clear global search field and reapply empty filter across current view."""
         try:
@@ -454,12 +494,73 @@ class MainWindow(QMainWindow):
                 # Avoid emitting duplicate signals if already empty
                 if self.search_field.text():
                     self.search_field.clear()
+                    self._apply_search_now()
                 else:
                     # Explicitly trigger a filter refresh for safety
                     self._on_search_changed("")
         except Exception as e:
             logging.debug(f"Clear filter failed: {e}")
 
+    # ---------- Global search ----------
+    def _open_global_search(self, text: str = "") -> None:
+        """Show the global search panel, searching text at once when given."""
+        if self._global_search_dialog is None:
+            from ui.dialogs.global_search_dialog import GlobalSearchDialog
+            self._global_search_dialog = GlobalSearchDialog(self)
+            self._global_search_dialog.resultActivated.connect(self._jump_to_search_result)
+        dialog = self._global_search_dialog
+        if text.strip():
+            dialog.set_query(text.strip())
+        dialog.show()
+        dialog.raise_()
+        dialog.activateWindow()
+
+    def _jump_to_search_result(self, entity: str, entity_id: int, archived: bool) -> None:
+        """Open the tab showing a search result and select its row; a tab built on the way
+        selects it once its grids are loaded (_on_grid_snapshot_loaded)."""
+        tab = ARCHIVE_TAB if archived else SEARCH_RESULT_TABS.get(entity)
+        if tab is None:
+            return
+        loading = tab in self._lazy_tabs
+        self._pending_search_jump = (entity, entity_id, archived)
+        self.tab_widget.setCurrentIndex(tab)
+        self._ensure_tab_built(tab)
+        # The row may be hidden by the active tab filter
+        self._clear_global_filter()
+        if self._select_search_result():
+            return
+        if archived and entity != 'production_batch':
+            # The Archive tab lists production batches only
+            self.status_bar.showMessage("Élément archivé: visible dans l'onglet Archive avec son lot de production", 5000)
+        elif not loading and not archived:
+            self._pending_search_jump = None
+            self.status_bar.showMessage("Résultat de recherche introuvable dans l'onglet", 5000)
+
+    def _select_search_result(self) -> bool:
+        """Select the row of the pending search result in its (built) tab; True once done."""
+        if self._pending_search_jump is None:
+            return False
+        entity, entity_id, archived = self._pending_search_jump
+        if archived:
+            found = entity == 'production_batch' and self.archive_widget is not None and self.archive_widget.select_item(entity_id)
+            # The archive list selects it itself once loaded
+            self._pending_search_jump = None
+            return found
+        quad = self.supplier_orders_quad
+        grids = {
+            'client': [self.clients_grid],
+            'supplier': [self.suppliers_grid],
+            'quotation': [self.orders_grid],
+            'supplier_order': [quad.top_left_grid, quad.top_right_grid, quad.bottom_left_grid, quad.bottom_right_grid] if quad else [],
+            'reception': [self.receptions_grid],
+            'production_batch': [self.production_grid],
+        }.get(entity, [])
+        for grid in grids:
+            if grid and grid.select_row_by_id(entity_id):
+                self._pending_search_jump = None
+                return True
+        return False
+
     # ---------- Dimension search (Stock) ----------
     def _parse_dims_tokens(self, text: str) -> tuple[str | None, str | None, str | None]:
         """Parse dimension tokens from a string. Returns (a,b,c) possibly None.
@@ -657,11 +758,9 @@ class MainWindow(QMainWindow):
         """Show a list of clients to choose from; set the toolbar search to that name to filter.
         scope is informational only; filtering uses the global search handler for the active tab.
         """
-        session = None
         try:
             from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QComboBox, QDialogButtonBox
-            session = SessionLocal()
-            clients = session.query(Client).order_by(Client.name.asc()).all()
+            clients = sorted(reference_data.clients(), key=lambda c: c.name)
             if not clients:
                 QMessageBox.information(self, 'Information', 'Aucun client disponible.')
                 return
@@ -689,32 +788,79 @@ class MainWindow(QMainWindow):
                 if name:
                     # Set into the global search field to reuse the same filtering logic
                     self.search_field.setText(name)
+                    self._apply_search_now()
         except Exception as e:
             logging.error(f"Client filter prompt failed: {e}")
-        finally:
-            if session is not None:
-                session.close()
 
     def _create_data_grids(self) -> None:
-        """Create data grids for each entity type with new menu structure."""
-        
-        # 1. Client et Fournisseur (Split view)
+        """Register the entity tabs; each one is built and loaded the first time it is shown."""
+        # Grid references stay None until their tab is built
+        self.clients_suppliers_split = None
+        self.suppliers_grid = None
+        self.clients_grid = None
+        self.orders_grid = None
+        self.client_orders_grid = None
+        self.supplier_orders_quad = None
+        self.stock_split = None
+        self.receptions_grid = None
+        self.production_grid = None
+        self.archive_widget = None
+
+        self._add_lazy_tab(self._build_clients_suppliers_tab, ('suppliers', 'clients'),
+                           IconManager.get_client_icon(), "Client et Fournisseur")
+        self._add_lazy_tab(self._build_quotations_tab, ('quotations', 'client_orders'),
+                           IconManager.get_quotation_icon(), "Devis")
+        self._add_lazy_tab(self._build_supplier_orders_tab, ('supplier_orders',),
+                           IconManager.get_supplier_order_icon(), "Commande de matière première")
+        self._add_lazy_tab(self._build_stock_tab, ('receptions', 'production'),
+                           IconManager.get_reception_icon(), "Stock")
+        self._add_lazy_tab(self._build_archive_tab, (), IconManager.get_archive_icon(), "Archive")
+
+    def _add_lazy_tab(self, build: Callable[[], QWidget], sections: tuple[str, ...], icon: QIcon, label: str) -> None:
+        """Add an empty tab page; build() fills it and its grid sections are loaded on first display."""
+        page = QWidget()
+        page_layout = QVBoxLayout(page)
+        page_layout.setContentsMargins(0, 0, 0, 0)
+        index = self.tab_widget.addTab(page, icon, label)
+        self._lazy_tabs[index] = (page, build, sections)
+
+    def _ensure_tab_built(self, index: int) -> None:
+        """Build the tab at index if it is shown for the first time, then load its grids."""
+        pending = self._lazy_tabs.pop(index, None)
+        if pending is None:
+            return
+        page, build, sections = pending
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            page.layout().addWidget(build())
+        finally:
+            QApplication.restoreOverrideCursor()
+        if sections:
+            self._built_sections.update(sections)
+            self._stale_sections.update(sections)
+            self.refresh_all()
+
+    def _build_clients_suppliers_tab(self) -> QWidget:
+        """1. Client et Fournisseur (Split view)"""
         self.clients_suppliers_split = SplitView(
             "Fournisseurs", ["ID", "Nom", "Téléphone", "Email", "Adresse"],
             "Clients", ["ID", "Nom", "Téléphone", "Email", "Adresse", "Activité"]
         )
         self.clients_suppliers_split.add_left_action_button("➕ Nouveau Fournisseur", self._new_supplier)
         self.clients_suppliers_split.add_right_action_button("➕ Nouveau Client", self._new_client)
-        self.tab_widget.addTab(self.clients_suppliers_split, IconManager.get_client_icon(), "Client et Fournisseur")
-        
+
         # Store references to individual grids for refresh functionality
         self.suppliers_grid = self.clients_suppliers_split.left_grid
         self.clients_grid = self.clients_suppliers_split.right_grid
-        
-        # 2. Devis (Enhanced with comprehensive information)
+        self._setup_clients_suppliers_context_menus()
+        return self.clients_suppliers_split
+
+    def _build_quotations_tab(self) -> QWidget:
+        """2. Devis (Enhanced with comprehensive information)"""
         self.orders_grid = DataGrid(
-            ["ID", "Référence", "Client", "Date Création", "Date Validité", "Statut", 
-             "Articles", "Dimensions", "Quantités", "Types Carton", "Total HT (DA)", "Notes"]
+            ["ID", "Référence", "Client", "Date Création", "Date Validité", "Statut",
+             "Articles", "Dimensions", "Quantités", "Types Carton", "Total HT (DA)", "Notes"],
+            virtual=True
         )
         self.orders_grid.add_action_button("➕ Devis", self._new_quotation)
         # Quick customer filter button and a clear filter next to it
@@ -724,19 +870,20 @@ class MainWindow(QMainWindow):
             clear_btn_devis.setProperty("class", "secondary")
         except Exception:
             pass
-        
+
         # Connect double-click to show detail dialog
         self.orders_grid.rowDoubleClicked.connect(self._on_quotation_double_click)
-        
-        self.tab_widget.addTab(self.orders_grid, IconManager.get_quotation_icon(), "Devis")
-        
+
         # Keep client_orders_grid for backend logic but don't add to tabs
         self.client_orders_grid = DataGrid(
             ["ID", "Référence", "Client", "Statut", "Date Création", "Total HT (DA)", "Notes"]
         )
         # Note: Grid created for backend compatibility but not displayed in UI
-        
-        # 3. Commande de matière première (Quad view: 4 status sections)
+        self._setup_quotations_context_menus()
+        return self.orders_grid
+
+    def _build_supplier_orders_tab(self) -> QWidget:
+        """3. Commande de matière première (Quad view: 4 status sections)"""
         self.supplier_orders_quad = QuadView(
             "Commandes Initiales", ["ID", "Bon Commande", "Fournisseur", "Date", "Total UTTC", "Nb Articles", "Clients"],
             "Commandes Passées", ["ID", "Bon Commande", "Fournisseur", "Statut", "Date", "Total UTTC", "Nb Articles", "Clients"],
@@ -752,10 +899,11 @@ class MainWindow(QMainWindow):
                 clear_btn_so.setProperty("class", "secondary")
         except Exception:
             pass
-        
-        self.tab_widget.addTab(self.supplier_orders_quad, IconManager.get_supplier_order_icon(), "Commande de matière première")
-        
-        # 4. Stock (Split view: Raw materials and Finished products)
+        self._setup_supplier_orders_context_menus()
+        return self.supplier_orders_quad
+
+    def _build_stock_tab(self) -> QWidget:
+        """4. Stock (Split view: Raw materials and Finished products)"""
         self.stock_split = SplitView(
             "Matières Premières", ["ID", "Quantité", "Fournisseur", "Bon Commande", "Client", "Description", "Date Réception"],
             "Produits Finis", ["ID", "Client", "Dimensions Caisse", "Quantité", "Description", "Statut"]
@@ -778,8 +926,7 @@ class MainWindow(QMainWindow):
             except Exception:
                 pass
         # Note: We'll use receptions for raw materials and production for finished products
-        self.tab_widget.addTab(self.stock_split, IconManager.get_reception_icon(), "Stock")
-        
+
         # Store references for refresh functionality
         self.receptions_grid = self.stock_split.left_grid  # Raw materials
         self.production_grid = self.stock_split.right_grid  # Finished products
@@ -821,80 +968,85 @@ class MainWindow(QMainWindow):
             self._prod_dim_search.textChanged.connect(self._on_prod_dim_search_changed)
         except Exception as dim_err:
             logging.debug(f"Dimension search fields setup skipped: {dim_err}")
-        
-        # 6. Archive
+        self._setup_stock_context_menus()
+        return self.stock_split
+
+    def _build_archive_tab(self) -> QWidget:
+        """6. Archive (loads its own data)"""
         from ui.widgets.archive_widget import ArchiveWidget
         self.archive_widget = ArchiveWidget()
-        self.tab_widget.addTab(self.archive_widget, IconManager.get_archive_icon(), "Archive")
-        
-        # Setup context menus after all grids are created
-        self._setup_context_menus()
+        return self.archive_widget
 
-    def _setup_context_menus(self):
-        """Setup context menus for data grids"""
+    def _setup_clients_suppliers_context_menus(self):
+        """Setup context menus for the supplier and client grids"""
         # Suppliers context menu
         if self.suppliers_grid:
             self.suppliers_grid.add_context_action("edit", "✏️ Modifier fournisseur")
             self.suppliers_grid.add_context_action("delete", "🗑️ Supprimer fournisseur")
-            
+
             # Connect suppliers context menu signals
             self.suppliers_grid.contextMenuActionTriggered.connect(self._handle_suppliers_context_menu)
             self.suppliers_grid.rowDoubleClicked.connect(self._on_supplier_double_click)
-        
+
         # Clients context menu
         if self.clients_grid:
             self.clients_grid.add_context_action("edit", "✏️ Modifier client")
             self.clients_grid.add_context_action("delete", "🗑️ Supprimer client")
-            
+
             # Connect clients context menu signals
             self.clients_grid.contextMenuActionTriggered.connect(self._handle_clients_context_menu)
             self.clients_grid.rowDoubleClicked.connect(self._on_client_double_click)
-        
+
+    def _setup_quotations_context_menus(self):
+        """Setup context menus for the devis grid"""
         # Orders context menu - static actions only
         self.orders_grid.add_context_action("edit", "Modifier devis")
         self.orders_grid.add_context_action("print", "Imprimer devis")
         self.orders_grid.add_context_action("delete", "Supprimer devis")
         # Note: create_supplier_order is added dynamically based on devis type
-        
+
         # Connect context menu signals
         self.orders_grid.contextMenuActionTriggered.connect(self._handle_orders_context_menu)
         self.orders_grid.contextMenuAboutToShow.connect(self._customize_orders_context_menu)
 
-        # Supplier orders context menu (4 sections of quad view)
+    def _setup_supplier_orders_context_menus(self):
+        """Setup context menus for the 4 sections of the supplier orders quad view"""
         # Top Left (Initial Orders) - basic actions
         if hasattr(self.supplier_orders_quad, 'top_left_grid') and self.supplier_orders_quad.top_left_grid:
             self.supplier_orders_quad.top_left_grid.add_context_action("edit", "Modifier commande")
             self.supplier_orders_quad.top_left_grid.add_context_action("delete", "Supprimer commande")
             self.supplier_orders_quad.top_left_grid.add_context_action("export_pdf", "📄 Exporter en PDF")
             self.supplier_orders_quad.top_left_grid.add_context_action("status_ordered", "→ Passer commande")
-            
+
             self.supplier_orders_quad.top_left_grid.contextMenuActionTriggered.connect(self._handle_supplier_orders_context_menu)
             self.supplier_orders_quad.top_left_grid.rowDoubleClicked.connect(self._on_supplier_order_double_click)
-        
+
         # Top Right (Ordered) - status change actions
         if hasattr(self.supplier_orders_quad, 'top_right_grid') and self.supplier_orders_quad.top_right_grid:
             self.supplier_orders_quad.top_right_grid.add_context_action("delete", "Supprimer commande")
             self.supplier_orders_quad.top_right_grid.add_context_action("export_pdf", "📄 Exporter en PDF")
             self.supplier_orders_quad.top_right_grid.add_context_action("status_initial", "→ Commande annulée")
-            
+
             self.supplier_orders_quad.top_right_grid.contextMenuActionTriggered.connect(self._handle_supplier_orders_context_menu)
             self.supplier_orders_quad.top_right_grid.rowDoubleClicked.connect(self._on_supplier_order_double_click)
-        
+
         # Bottom Left (Partially Delivered) - status change actions
         if hasattr(self.supplier_orders_quad, 'bottom_left_grid') and self.supplier_orders_quad.bottom_left_grid:
             self.supplier_orders_quad.bottom_left_grid.add_context_action("delete", "Supprimer commande")
             self.supplier_orders_quad.bottom_left_grid.add_context_action("status_completed", "→ Terminé")
-            
+
             self.supplier_orders_quad.bottom_left_grid.contextMenuActionTriggered.connect(self._handle_supplier_orders_context_menu)
             self.supplier_orders_quad.bottom_left_grid.rowDoubleClicked.connect(self._on_supplier_order_double_click)
-        
+
         # Bottom Right (Completed) - status cannot be changed manually
         if hasattr(self.supplier_orders_quad, 'bottom_right_grid') and self.supplier_orders_quad.bottom_right_grid:
             self.supplier_orders_quad.bottom_right_grid.add_context_action("delete", "Supprimer commande")
-            
+
             self.supplier_orders_quad.bottom_right_grid.contextMenuActionTriggered.connect(self._handle_supplier_orders_context_menu)
             self.supplier_orders_quad.bottom_right_grid.rowDoubleClicked.connect(self._on_supplier_order_double_click)
 
+    def _setup_stock_context_menus(self):
+        """Setup context menus for the stock grids (raw materials and finished products)"""
         # Stock context menu (Raw materials)
         if self.receptions_grid:
             self.receptions_grid.add_context_action("edit", "✏️ Modifier réception")
@@ -902,7 +1054,7 @@ class MainWindow(QMainWindow):
             self.receptions_grid.add_context_action("print_label", "🏷️ Imprimer l'étiquette matière première")
             # New action: archive raw material reception(s)
             self.receptions_grid.add_context_action("move_to_archive", "📦 Archiver matière première")
-            
+
             # Connect stock context menu signals
             self.receptions_grid.contextMenuActionTriggered.connect(self._handle_stock_context_menu)
             self.receptions_grid.rowDoubleClicked.connect(self._on_stock_double_click)
@@ -915,10 +1067,10 @@ class MainWindow(QMainWindow):
             self.production_grid.add_context_action("print_delivery", "📋 Imprimer le bon de livraison")
             self.production_grid.add_context_action("create_invoice", "📝 Créer facture")
             self.production_grid.add_context_action("move_to_archive", "📦 Move to Archive")
-            
+
             # Add "Add finished product" button to production grid
             self.production_grid.add_action_button("➕ Ajouter Produit Fini", self._add_finished_product)
-            
+
             # Connect production context menu signals
             self.production_grid.contextMenuActionTriggered.connect(self._handle_production_context_menu)
             self.production_grid.contextMenuAboutToShow.connect(self._customize_production_context_menu)
@@ -1078,13 +1230,7 @@ class MainWindow(QMainWindow):
 
     def _on_quotation_double_click(self, row: int):
         """Handle double-click on quotation row to show detailed view"""
-        row_data = []
-        for col in range(self.orders_grid.table.columnCount()):
-            item = self.orders_grid.table.item(row, col)
-            if item:
-                row_data.append(item.text())
-            else:
-                row_data.append('')
+        row_data = self.orders_grid.get_row_data(row)
         
         if not row_data or len(row_data) < 2:
             return
@@ -1109,6 +1255,7 @@ class MainWindow(QMainWindow):
                 return
                 
             # Show detail dialog
+            from ui.dialogs.quotation_detail_dialog import QuotationDetailDialog
             detail_dialog = QuotationDetailDialog(quotation, self)
             detail_dialog.exec()
                 
@@ -1166,7 +1313,6 @@ class MainWindow(QMainWindow):
     def _create_supplier_order_for_quotation(self, quotation_id: int, reference: str):
         """Create a supplier order based on a quotation's materials with automatic dimension calculations"""
         from models.orders import Quotation, SupplierOrder
-        from models.suppliers import Supplier
         from ui.dialogs.supplier_order_dialog import SupplierOrderDialog
         from datetime import date
         
@@ -1185,7 +1331,7 @@ class MainWindow(QMainWindow):
                 return
             
             # Get suppliers for the dialog
-            suppliers = session.query(Supplier).all()
+            suppliers = reference_data.suppliers()
             if not suppliers:
                 QMessageBox.warning(self, 'Erreur', 'Aucun fournisseur disponible. Créez d\'abord un fournisseur.')
                 return
@@ -1366,14 +1512,16 @@ class MainWindow(QMainWindow):
 
     def _new_supplier(self) -> None:
         """Open dialog to create a new supplier."""
+        from ui.dialogs.supplier_dialog import SupplierDialog
         dlg = SupplierDialog(self)
         if dlg.exec():
             data = dlg.get_data()
             session = SessionLocal()
             try:
-                supplier = Supplier(**data)
-                session.add(supplier)
-                session.commit()
+                with span('save.supplier'):
+                    supplier = Supplier(**data)
+                    session.add(supplier)
+                    session.commit()
                 QMessageBox.information(self, 'Succès', f'Fournisseur {data["name"]} créé')
                 self.dashboard.add_activity("F", f"Nouveau fournisseur: {data['name']}", "#17A2B8")
                 self.refresh_all()
@@ -1385,14 +1533,16 @@ class MainWindow(QMainWindow):
 
     def _new_client(self) -> None:
         """Open dialog to create a new client."""
+        from ui.dialogs.client_dialog import ClientDialog
         dlg = ClientDialog(self)
         if dlg.exec():
             data = dlg.get_data()
             session = SessionLocal()
             try:
-                client = Client(**data)
-                session.add(client)
-                session.commit()
+                with span('save.client'):
+                    client = Client(**data)
+                    session.add(client)
+                    session.commit()
                 QMessageBox.information(self, 'Succès', f'Client {data["name"]} créé')
                 self.dashboard.add_activity("C", f"Nouveau client: {data['name']}", "#28A745")
                 self.refresh_all()
@@ -1408,13 +1558,7 @@ class MainWindow(QMainWindow):
             return
             
         # Get row data directly from table
-        row_data = []
-        for col in range(self.suppliers_grid.table.columnCount()):
-            item = self.suppliers_grid.table.item(row, col)
-            if item:
-                row_data.append(item.text())
-            else:
-                row_data.append('')
+        row_data = self.suppliers_grid.get_row_data(row)
                 
         if not row_data or len(row_data) < 1:
             return
@@ -1439,6 +1583,7 @@ class MainWindow(QMainWindow):
                 return
                 
             # Show detail dialog in read-only mode
+            from ui.dialogs.supplier_detail_dialog import SupplierDetailDialog
             detail_dialog = SupplierDetailDialog(supplier, self, read_only=True)
             detail_dialog.exec()
                 
@@ -1453,13 +1598,7 @@ class MainWindow(QMainWindow):
             return
             
         # Get row data directly from table
-        row_data = []
-        for col in range(self.clients_grid.table.columnCount()):
-            item = self.clients_grid.table.item(row, col)
-            if item:
-                row_data.append(item.text())
-            else:
-                row_data.append('')
+        row_data = self.clients_grid.get_row_data(row)
                 
         if not row_data or len(row_data) < 1:
             return
@@ -1484,6 +1623,7 @@ class MainWindow(QMainWindow):
                 return
                 
             # Show detail dialog in read-only mode
+            from ui.dialogs.client_detail_dialog import ClientDetailDialog
             detail_dialog = ClientDetailDialog(client, self, read_only=True)
             detail_dialog.exec()
                 
@@ -1517,6 +1657,7 @@ class MainWindow(QMainWindow):
 
             if action_name == "edit":
                 # Show edit dialog
+                from ui.dialogs.supplier_detail_dialog import SupplierDetailDialog
                 detail_dialog = SupplierDetailDialog(supplier, self, read_only=False)
                 if detail_dialog.exec():
                     # Update supplier with new data
@@ -1588,6 +1729,7 @@ class MainWindow(QMainWindow):
 
             if action_name == "edit":
                 # Show edit dialog
+                from ui.dialogs.client_detail_dialog import ClientDetailDialog
                 detail_dialog = ClientDetailDialog(client, self, read_only=False)
                 if detail_dialog.exec():
                     # Update client with new data (map only known fields)
@@ -1738,11 +1880,12 @@ class MainWindow(QMainWindow):
         """Open dialog to create a new quotation."""
         session = SessionLocal()
         try:
-            clients = session.query(Client).all()
+            clients = reference_data.clients()
             if not clients:
                 QMessageBox.warning(self, 'Attention', 'Aucun client disponible. Créez d\'abord un client.')
                 return
             
+            from ui.dialogs.quotation_dialog import QuotationDialog
             dlg = QuotationDialog(clients, self)
             if dlg.exec():
                 data = dlg.get_data()
@@ -1875,6 +2018,7 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, 'Attention', 'Aucune commande fournisseur en attente.')
                 return
                 
+            from ui.dialogs.reception_dialog import ReceptionDialog
             dlg = ReceptionDialog(orders, self)
             if dlg.exec():
                 data = dlg.get_data()
@@ -1904,6 +2048,7 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, 'Attention', 'Aucune commande client confirmée.')
                 return
                 
+            from ui.dialogs.production_dialog import ProductionDialog
             dlg = ProductionDialog(orders, self)
             if dlg.exec():
                 data = dlg.get_data()
@@ -1931,7 +2076,8 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, 'Erreur', 'Devis introuvable')
                 return
                 
-            clients = session.query(Client).all()
+            clients = reference_data.clients()
+            from ui.dialogs.edit_quotation_dialog import EditQuotationDialog
             dlg = EditQuotationDialog(quotation, clients, self)
             
             if dlg.exec():
@@ -2016,6 +2162,7 @@ class MainWindow(QMainWindow):
             quotation_data = order_service.get_quotation_for_pdf(quotation.id)
             
             # Generate PDF using template
+            from services.pdf_form_filler import PDFFormFiller, PDFFillError
             pdf_filler = PDFFormFiller()
             try:
                 output_path = pdf_filler.fill_devis_template(quotation_data)
@@ -2137,7 +2284,6 @@ class MainWindow(QMainWindow):
     def _create_supplier_order_for_multiple_quotations(self, selected_rows_data: list[list[str]]):
         """Create a single supplier order from multiple quotations using the multi-plaque dialog"""
         from models.orders import Quotation, SupplierOrder
-        from models.suppliers import Supplier
         
         session = SessionLocal()
         try:
@@ -2165,7 +2311,7 @@ class MainWindow(QMainWindow):
                 return
             
             # Get suppliers
-            suppliers = session.query(Supplier).all()
+            suppliers = reference_data.suppliers()
             if not suppliers:
                 QMessageBox.warning(self, 'Erreur', 'Aucun fournisseur disponible. Créez d\'abord un fournisseur.')
                 return
@@ -2386,11 +2532,12 @@ class MainWindow(QMainWindow):
                 )
                 return
                 
-            suppliers = session.query(Supplier).all()
+            suppliers = reference_data.suppliers()
             if not suppliers:
                 QMessageBox.warning(self, 'Attention', 'Aucun fournisseur disponible. Créez d\'abord un fournisseur.')
                 return
             
+            from ui.dialogs.raw_material_order_dialog import RawMaterialOrderDialog
             dlg = RawMaterialOrderDialog(suppliers, client_order, self)
             
             if dlg.exec():
@@ -2436,746 +2583,48 @@ class MainWindow(QMainWindow):
         finally:
             session.close()
 
-    def refresh_all(self) -> None:  # type: ignore[misc]
-        """Refresh all data grids."""
-        session = None
+    def refresh_all(self, force: bool = False) -> None:  # type: ignore[misc]
+        """Refresh the data grids whose underlying tables changed since the last refresh.
+        force=True reloads every grid regardless of change detection.
+        Only the grids of tabs already built are loaded; the others load when first shown.
+        Queries run on a background thread; grids are patched once the rows are ready.
+        """
+        self._force_full_refresh = self._force_full_refresh or force
+        tracker = self._change_tracker
+        full = self._force_full_refresh
+        built = set(self._built_sections)
+        stale = set(self._stale_sections)
+
+        @timed('refresh_all')
+        def load(session):
+            marks = tracker.try_read_marks(session)
+            # Same marks keep the client / supplier lists of the dialogs current
+            reference_data.sync(session, marks)
+            changed_tables = set(tracker.table_names) if full else tracker.changed_tables(marks)
+            sections = stale.union(sections_for_tables(changed_tables)).intersection(built)
+            snapshot = GridDataLoader(session).load(sections) if sections else None
+            return marks, bool(changed_tables), snapshot
+
+        self._grid_loader.submit(load, self._on_grid_snapshot_loaded, self._on_grid_refresh_failed)
+
+    @timed('refresh_all.apply')
+    def _on_grid_snapshot_loaded(self, result) -> None:
+        marks, changed, snapshot = result
+        self._change_tracker.commit(marks)
+        self._force_full_refresh = False
+        if snapshot is not None:
+            self._stale_sections -= {name for name in GRID_TABLE_DEPENDENCIES if getattr(snapshot, name) is not None}
+        if not changed and snapshot is None:
+            return
         try:
-            session = SessionLocal()
-            
-            # Refresh suppliers (left side of split view)
-            suppliers = session.query(Supplier).all()
-            suppliers_data = [
-                [
-                    str(s.id),
-                    s.name or "",
-                    s.phone or "",
-                    s.email or "",
-                    s.address or "",
-                ]
-                for s in suppliers
-            ]
-            self.clients_suppliers_split.load_left_data(suppliers_data)
-            
-            # Refresh clients (right side of split view)
-            clients = session.query(Client).all()
-            clients_data = [
-                [
-                    str(c.id),
-                    c.name or "",
-                    c.phone or "",
-                    c.email or "",
-                    c.address or "",
-                    getattr(c, 'activity', '') or "",
-                ]
-                for c in clients
-            ]
-            self.clients_suppliers_split.load_right_data(clients_data)
-            
-            # Refresh orders (quotations only) - filter out orphaned and archived records
-            quotations = session.query(Quotation).join(Quotation.client).filter(
-                ~Quotation.notes.like('[ARCHIVED]%')
-            ).all()
-            
-            orders_data = []
-            row_colors = []
-            
-            # Add quotations to the list with comprehensive information
-            for q in quotations:
-                # Skip quotations without valid client relationships
-                if not q.client:
-                    continue
-                    
-                # Collect detailed information from line items
-                line_items_count = len(q.line_items)
-                dimensions = []
-                quantities = []
-                cardboard_types = set()
-                
-                for item in q.line_items:
-                    # Collect dimensions
-                    if item.length_mm and item.width_mm and item.height_mm:
-                        dimensions.append(f"{item.length_mm}×{item.width_mm}×{item.height_mm}")
-                    
-                    # Collect quantities
-                    quantities.append(str(item.quantity))
-                    
-                    # Collect cardboard types
-                    if item.cardboard_type:
-                        cardboard_types.add(item.cardboard_type)
-                
-                # Format dimensions display
-                if dimensions:
-                    dimensions_str = ", ".join(dimensions[:2])  # Show first 2 dimensions
-                    if len(dimensions) > 2:
-                        dimensions_str += f" (+{len(dimensions)-2} autres)"
-                else:
-                    dimensions_str = "N/A"
-                
-                # Format quantities display
-                if quantities:
-                    quantities_str = ", ".join(quantities[:2])  # Show first 2 quantities  
-                    if len(quantities) > 2:
-                        quantities_str += f" (+{len(quantities)-2} autres)"
-                else:
-                    quantities_str = "N/A"
-                
-                # Format cardboard types
-                if cardboard_types:
-                    cardboard_str = ", ".join(sorted(cardboard_types)[:2])
-                    if len(cardboard_types) > 2:
-                        cardboard_str += f" (+{len(cardboard_types)-2} autres)"
-                else:
-                    cardboard_str = "Standard"
-                
-                # Determine status based on type
-                status = "Devis Initial" if q.is_initial else "Devis Final"
-                
-                # Format dates
-                issue_date_str = str(q.issue_date) if q.issue_date else "N/A"
-                valid_until_str = str(q.valid_until) if q.valid_until else "N/A"
-                
-                orders_data.append([
-                    str(q.id),
-                    str(q.reference or ""),
-                    str(q.client.name if q.client else "N/A"),
-                    str(issue_date_str),
-                    str(valid_until_str),
-                    str(status),
-                    f"{line_items_count} article(s)",
-                    str(dimensions_str),
-                    str(quantities_str),
-                    str(cardboard_str),
-                    f"{q.total_amount:,.2f}" if q.total_amount is not None else "0.00",
-                    str((q.notes[:25] + "..." if q.notes and len(q.notes) > 25 else q.notes) or "")
-                ])
-                
-                # Color coding: light blue for initial devis, light green for final devis
-                if q.is_initial:
-                    row_colors.append("#E3F2FD")  # Light blue for initial devis
-                else:
-                    row_colors.append("#E8F5E8")  # Light green for final devis
-                
-            self.orders_grid.load_rows_with_colors(orders_data, row_colors)
-            
-            # Refresh client orders - filter out archived ones
-            client_orders = session.query(ClientOrder).join(ClientOrder.client).filter(
-                ~ClientOrder.notes.like('[ARCHIVED]%')
-            ).all()
-            client_orders_data = []
-            client_order_colors = []
-            
-            # Map internal status values to display labels
-            client_status_display_map = {
-                'en_préparation': 'En Préparation',
-                'en_production': 'En Production', 
-                'terminé': 'Terminé',
-                'confirmed': 'Confirmé'
-            }
-            
-            for co in client_orders:
-                # Skip client orders without valid client relationships
-                if not co.client:
-                    continue
-                    
-                # Format date
-                creation_date_str = ""
-                if co.created_at:
-                    try:
-                        import datetime
-                        if isinstance(co.created_at, datetime.datetime):
-                            creation_date_str = co.created_at.strftime("%d/%m/%Y")
-                        else:
-                            creation_date_str = str(co.created_at)
-                    except (AttributeError, TypeError):
-                        creation_date_str = str(co.created_at)
-                
-                # Format total amount
-                total_amount_str = f"{co.total_amount:,.2f}" if hasattr(co, 'total_amount') and co.total_amount else "0.00"
-                
-                client_orders_data.append([
-                    str(co.id),
-                    str(co.reference or ""),
-                    str(co.client.name if co.client else "N/A"),
-                    client_status_display_map.get(co.status.value if co.status else "", "N/A"),
-                    creation_date_str,
-                    total_amount_str,
-                    str((co.notes[:25] + "..." if co.notes and len(co.notes) > 25 else co.notes) or "")
-                ])
-                
-                # Color coding based on status
-                status_value = co.status.value if co.status else "en_préparation"
-                if status_value == "en_préparation":
-                    client_order_colors.append("#FFF3E0")  # Light orange for preparation
-                elif status_value == "en_production":
-                    client_order_colors.append("#E3F2FD")  # Light blue for production
-                elif status_value == "terminé":
-                    client_order_colors.append("#E8F5E8")  # Light green for complete
-                elif status_value == "confirmed":
-                    client_order_colors.append("#F3E5F5")  # Light purple for confirmed
-                else:
-                    client_order_colors.append("#FFFFFF")  # White for unknown status
-            
-            self.client_orders_grid.load_rows_with_colors(client_orders_data, client_order_colors)
-            
-            # Refresh supplier orders with comprehensive information - filter out archived ones
-            supplier_orders = session.query(SupplierOrder).join(SupplierOrder.supplier).filter(
-                ~SupplierOrder.notes.like('[ARCHIVED]%')
-            ).all()
-            
-            # Map internal status values to display labels
-            status_display_map = {
-                'commande_initial': 'Commande Initial',
-                'commande_passee': 'Commande Passée', 
-                'commande_arrivee': 'Commande Arrivée',
-                'partiellement_livre': 'Partiellement Livré',
-                'termine': 'Terminé'
-            }
-            
-            supplier_orders_data = []
-            supplier_order_colors = []
-            
-            for so in supplier_orders:
-                # Count line items and get unique clients
-                line_items_count = len(so.line_items) if hasattr(so, 'line_items') and so.line_items else 0
-                
-                # Get unique clients from line items
-                clients_set = set()
-                if hasattr(so, 'line_items') and so.line_items:
-                    for item in so.line_items:
-                        if hasattr(item, 'client') and item.client:
-                            clients_set.add(item.client.name)
-                
-                clients_display = ", ".join(sorted(clients_set)) if clients_set else "N/A"
-                if len(clients_display) > 50:
-                    clients_display = clients_display[:47] + "..."
-                
-                # Format date
-                order_date_str = ""
-                if so.order_date:
-                    try:
-                        # Import datetime to handle conversion
-                        import datetime
-                        if isinstance(so.order_date, datetime.date):
-                            order_date_str = so.order_date.strftime("%d/%m/%Y")
-                        else:
-                            order_date_str = str(so.order_date)
-                    except (AttributeError, TypeError):
-                        order_date_str = str(so.order_date)
-                
-                # Format total amount
-                total_amount_str = f"{so.total_amount:,.2f} {so.currency}" if hasattr(so, 'total_amount') and so.total_amount else "0.00 DZD"
-                
-                supplier_orders_data.append([
-                    str(so.id),
-                    getattr(so, 'bon_commande_ref', getattr(so, 'reference', '')) or "",  # Use new field or fallback
-                    so.supplier.name if so.supplier else "N/A",
-                    status_display_map.get(so.status.value if so.status else "", "N/A"),
-                    order_date_str,
-                    total_amount_str,
-                    str(line_items_count),
-                    clients_display
-                ])
-                
-                # Color coding based on status
-                status_value = so.status.value if so.status else "commande_initial"
-                if status_value == "commande_initial":
-                    supplier_order_colors.append("#FFF3E0")  # Light orange for initial
-                elif status_value == "commande_passee":
-                    supplier_order_colors.append("#E3F2FD")  # Light blue for ordered
-                elif status_value == "commande_arrivee":
-                    supplier_order_colors.append("#E8F5E8")  # Light green for received
-                elif status_value == "partiellement_livre":
-                    supplier_order_colors.append("#FFF9C4")  # Light yellow for partially delivered
-                elif status_value == "termine":
-                    supplier_order_colors.append("#C8E6C9")  # Darker green for completed
-                else:
-                    supplier_order_colors.append("#FFFFFF")  # White for unknown status
-            
-            # Split data between the 4 status sections
-            initial_orders_data = []        # Top Left: "Commandes Initiales"
-            initial_order_colors = []
-            ordered_data = []              # Top Right: "Commandes Passées" 
-            ordered_colors = []
-            partial_data = []              # Bottom Left: "Partiellement Livrée"
-            partial_colors = []
-            completed_data = []            # Bottom Right: "Terminée"
-            completed_colors = []
-            
-            for i, so_data in enumerate(supplier_orders_data):
-                status_col = so_data[3]  # Status column
-                
-                if status_col == "Commande Initial":
-                    # Initial orders get simplified data (no status column)
-                    initial_data = [so_data[0], so_data[1], so_data[2], so_data[4], so_data[5], so_data[6], so_data[7]]
-                    initial_orders_data.append(initial_data)
-                    initial_order_colors.append(supplier_order_colors[i])
-                elif status_col == "Commande Passée":
-                    # Ordered status goes to top right
-                    ordered_data.append(so_data)
-                    ordered_colors.append(supplier_order_colors[i])
-                elif status_col == "Partiellement Livré":
-                    # Partially delivered goes to bottom left
-                    partial_data.append(so_data)
-                    partial_colors.append(supplier_order_colors[i])
-                elif status_col == "Terminé":
-                    # Completed goes to bottom right
-                    completed_data.append(so_data)
-                    completed_colors.append(supplier_order_colors[i])
-                else:
-                    # Default: other statuses go to ordered section
-                    ordered_data.append(so_data)
-                    ordered_colors.append(supplier_order_colors[i])
-            
-            # Load data into quad view sections
-            if self.supplier_orders_quad.top_left_grid:
-                self.supplier_orders_quad.top_left_grid.load_rows_with_colors(initial_orders_data, initial_order_colors)
-            if self.supplier_orders_quad.top_right_grid:
-                self.supplier_orders_quad.top_right_grid.load_rows_with_colors(ordered_data, ordered_colors)
-            if self.supplier_orders_quad.bottom_left_grid:
-                self.supplier_orders_quad.bottom_left_grid.load_rows_with_colors(partial_data, partial_colors)
-            if self.supplier_orders_quad.bottom_right_grid:
-                self.supplier_orders_quad.bottom_right_grid.load_rows_with_colors(completed_data, completed_colors)
-            
-            # Refresh stock - Raw materials (receptions) on left side
-            # Refresh stock - Raw materials (receptions) - filter out archived supplier orders
-            receptions = session.query(Reception).join(Reception.supplier_order).filter(
-                ~SupplierOrder.notes.like('[ARCHIVED]%'),
-                ~Reception.notes.like('[ARCHIVED]%')
-            ).all()
-            
-            # Group receptions (raw materials) with STRICT rules:
-            # - Same single client (exact one client_id)
-            # - Same dimensions (plaque dimensions parsed as 'WxLxRmm' from notes)
-            # - Same description (parsed from notes after ' — ' or using notes directly when not starting with label)
-            # - If any component is unknown/missing, do NOT merge (isolate by unique ID)
-            grouped_receptions = {}
-            reception_groups = {}  # To track which receptions belong to each group
-            
-            def _norm_text(s: str) -> str:
-                try:
-                    return " ".join(s.strip().lower().split())
-                except Exception:
-                    return s.strip().lower() if s else ""
-            
-            for r in receptions:
-                # Extract dimensions from notes (format: "Arrivée matière: 100x200x50mm")
-                dimensions_key = "unknown"
-                if r.notes and "Arrivée matière:" in r.notes:
-                    try:
-                        # Extract strictly the pattern '<W>x<L>x<R>mm' immediately following the label
-                        import re
-                        m = re.search(r"Arrivée matière:\s*([0-9]+x[0-9]+x[0-9]+)mm", r.notes)
-                        if m:
-                            dimensions_key = f"{m.group(1)}mm"  # e.g., '100x200x50mm'
-                    except Exception:
-                        pass
-                
-                # Get supplier order information
-                bon_commande_ref = ""
-                clients_list = []
-                clients_ids_set = set()
-                supplier_name = "N/A"
-                
-                if r.supplier_order:
-                    # Get the bon de commande reference
-                    bon_commande_ref = getattr(r.supplier_order, 'bon_commande_ref', 
-                                             getattr(r.supplier_order, 'reference', ''))
-                    supplier_name = r.supplier_order.supplier.name if r.supplier_order.supplier else "N/A"
-                    
-                    # Get unique clients from line items (for display) and stable client IDs (for grouping)
-                    if hasattr(r.supplier_order, 'line_items') and r.supplier_order.line_items:
-                        unique_clients = set()
-                        for item in r.supplier_order.line_items:
-                            if hasattr(item, 'client') and item.client:
-                                unique_clients.add(item.client.name)
-                            if hasattr(item, 'client_id') and item.client_id:
-                                clients_ids_set.add(item.client_id)
-                        clients_list = sorted(unique_clients)
-                
-                # Format clients display (keep exact list for grouping)
-                clients_display = ", ".join(clients_list) if clients_list else "N/A"
-                if len(clients_display) > 40:
-                    clients_display = clients_display[:37] + "..."
-                
-                # Determine single client id key (strict). If multiple or none, do not merge.
-                client_id_key = None
-                if len(clients_ids_set) == 1:
-                    client_id_key = str(next(iter(clients_ids_set)))
-
-                # Parse a description key from notes, when available
-                desc_key = "n/a"
-                try:
-                    if r.notes and r.notes.strip():
-                        if "—" in r.notes:
-                            desc_key = _norm_text(r.notes.split("—", 1)[1])
-                        elif not r.notes.startswith("Arrivée matière:"):
-                            desc_key = _norm_text(r.notes)
-                except Exception:
-                    pass
-
-                # Build grouping key only when all three strict attributes are known
-                if dimensions_key != "unknown" and client_id_key and desc_key != "n/a":
-                    group_key = f"{dimensions_key}|client:{client_id_key}|desc:{desc_key}"
-                else:
-                    # Treat each reception as its own group using a unique key
-                    group_key = f"{dimensions_key}|client:{client_id_key or 'N/A'}|desc:{desc_key}|id:{r.id}"
-                
-                if group_key not in grouped_receptions:
-                    # First reception for these dimensions
-                    grouped_receptions[group_key] = {
-                        'ids': [r.id],
-                        'reference': f"REC-{r.id}",
-                        'quantity': r.quantity,
-                        'supplier': supplier_name,
-                        'bon_commande': bon_commande_ref or "N/A",
-                        'clients': clients_display,
-                        'date': getattr(r, 'reception_date', None) and getattr(r, 'reception_date').isoformat() or "",
-                        'dimensions': dimensions_key
-                    }
-                else:
-                    # Merge with existing group
-                    group = grouped_receptions[group_key]
-                    group['ids'].append(r.id)
-                    group['quantity'] += r.quantity
-                    # Update reference to show it's merged
-                    if len(group['ids']) == 2:
-                        group['reference'] = f"REC-{min(group['ids'])}-{max(group['ids'])}"
-                    else:
-                        group['reference'] = f"REC-{min(group['ids'])}+{len(group['ids'])-1}"
-                    
-                    # Keep the most recent date
-                    current_date = getattr(r, 'reception_date', None) and getattr(r, 'reception_date').isoformat() or ""
-                    if current_date > group['date']:
-                        group['date'] = current_date
-                    
-                    # Merge bon commande references if different
-                    current_bon = bon_commande_ref or "N/A"
-                    if current_bon != group['bon_commande'] and current_bon != "N/A":
-                        if group['bon_commande'] == "N/A":
-                            group['bon_commande'] = current_bon
-                        else:
-                            group['bon_commande'] = f"{group['bon_commande']}, {current_bon}"
-                    
-                    # Merge clients if different
-                    if clients_display != group['clients'] and clients_display != "N/A":
-                        if group['clients'] == "N/A":
-                            group['clients'] = clients_display
-                        else:
-                            combined_clients = f"{group['clients']}, {clients_display}"
-                            if len(combined_clients) > 40:
-                                combined_clients = combined_clients[:37] + "..."
-                            group['clients'] = combined_clients
-            
-            # Convert grouped data to display format
-            receptions_data = []
-            for group_key, group in grouped_receptions.items():
-                # Get quotation description for raw materials
-                description = "N/A"
-
-                # Try to get description from first reception in group
-                if group['ids']:
-                    first_reception_id = group['ids'][0]
-                    try:
-                        reception = session.query(Reception).filter(Reception.id == first_reception_id).first()
-                        if reception:
-                            # If arrival logic already stored a meaningful description in notes, prefer it
-                            if reception.notes and reception.notes.strip() and not reception.notes.startswith("Arrivée matière:"):
-                                description = reception.notes.strip()
-
-                            if description == "N/A" and reception.supplier_order:
-                                supplier_order = reception.supplier_order
-
-                                # Get first line item to find client and quotation info
-                                if hasattr(supplier_order, 'line_items') and supplier_order.line_items:
-                                    first_line_item = supplier_order.line_items[0]
-
-                                    # Use flexible client-based lookup: ANY client order for this client having a quotation
-                                    if hasattr(first_line_item, 'client_id') and first_line_item.client_id:
-                                        client_orders = session.query(ClientOrder).filter(
-                                            ClientOrder.client_id == first_line_item.client_id,
-                                            ClientOrder.quotation_id.isnot(None)
-                                        ).all()
-
-                                        for client_order in client_orders:
-                                            if client_order.quotation:
-                                                quotation = client_order.quotation
-
-                                                # Search all line items for first non-empty description
-                                                if quotation.line_items:
-                                                    for q_line in quotation.line_items:
-                                                        if q_line.description and q_line.description.strip():
-                                                            description = q_line.description.strip()
-                                                            break
-
-                                                # Fallback to quotation notes if still not found
-                                                if description == "N/A" and quotation.notes and quotation.notes.strip():
-                                                    description = quotation.notes.strip()
-
-                                                if description != "N/A":
-                                                    break  # Stop once we have a description
-                    except Exception as e:
-                        print(f"Error fetching description for reception {first_reception_id}: {e}")
-                        # Keep description as N/A if failure
-                
-                # Enrich description with dimension token so '100x200x50' searches match reliably
-                desc_with_dims = description
-                if group.get('dimensions') and group['dimensions'] != 'unknown':
-                    try:
-                        dims_ascii = group['dimensions'].replace('×', 'x')
-                        desc_with_dims = f"{description} [{dims_ascii}]" if description != "N/A" else dims_ascii
-                    except Exception:
-                        pass
-
-                receptions_data.append([
-                    ",".join(map(str, group['ids'])),  # Store all IDs for context menu
-                    str(group['quantity']),  # Quantity (summed)
-                    group['supplier'],  # Supplier
-                    group['bon_commande'],  # Bon Commande (merged)
-                    group['clients'],  # Client(s) (merged)
-                    desc_with_dims,  # Description + dimensions token
-                    group['date'],  # Date (most recent)
-                ])
-            
-            self.stock_split.load_left_data(receptions_data)
-            
-            # Refresh stock - Finished products (production) on right side
-            # Filter out archived production batches
-            production_batches = session.query(ProductionBatch).filter(
-                ~ProductionBatch.batch_code.like('[ARCHIVED]%')
-            ).all()
-            
-            # Use a dictionary to group items by client and dimensions
-            grouped_items = {}
-            
-            for pb in production_batches:
-                try:
-                    # Get client order and related information
-                    client_name = "N/A"
-                    client_id = None
-                    plaque_dims = "N/A"
-                    caisse_dims = "N/A"
-                    material_type = "N/A"
-                    
-                    if pb.client_order_id:
-                        # Load client order first, then related data separately to avoid relationship issues
-                        client_order = session.query(ClientOrder).filter(
-                            ClientOrder.id == pb.client_order_id
-                        ).first()
-                        
-                        if client_order:
-                            # First, check supplier order line item for client info (priority)
-                            # This often has the most accurate client information
-                            if client_order.supplier_order_id:
-                                try:
-                                    supplier_order = session.query(SupplierOrder).filter(
-                                        SupplierOrder.id == client_order.supplier_order_id
-                                    ).first()
-                                    
-                                    if supplier_order:
-                                        supplier_line_items = session.query(SupplierOrderLineItem).filter(
-                                            SupplierOrderLineItem.supplier_order_id == supplier_order.id
-                                        ).first()
-                                        
-                                        if supplier_line_items and supplier_line_items.client_id:
-                                            # PRIORITY: Use client from supplier line item (most accurate)
-                                            client = session.query(Client).filter(
-                                                Client.id == supplier_line_items.client_id
-                                            ).first()
-                                            if client:
-                                                client_name = client.name
-                                                client_id = client.id
-                                            
-                                            # Get dimensions from supplier line item
-                                            if supplier_line_items.caisse_length_mm and supplier_line_items.caisse_width_mm and supplier_line_items.caisse_height_mm:
-                                                caisse_dims = f"{supplier_line_items.caisse_length_mm}×{supplier_line_items.caisse_width_mm}×{supplier_line_items.caisse_height_mm}"
-                                
-                                except Exception as supplier_error:
-                                    print(f"Error loading supplier order for client order {client_order.id}: {supplier_error}")
-                            
-                            # FALLBACK: Get client information from client order if not found above
-                            if client_name == "N/A" and client_order.client_id:
-                                client = session.query(Client).filter(
-                                    Client.id == client_order.client_id
-                                ).first()
-                                if client:
-                                    client_name = client.name
-                                    client_id = client.id
-                            
-                            # Get dimensions from quotation if available and not already found
-                            if caisse_dims == "N/A" and client_order.quotation_id:
-                                try:
-                                    quotation = session.query(Quotation).filter(
-                                        Quotation.id == client_order.quotation_id
-                                    ).first()
-                                    if quotation:
-                                        quotation_lines = session.query(QuotationLineItem).filter(
-                                            QuotationLineItem.quotation_id == quotation.id
-                                        ).first()
-                                        if quotation_lines and quotation_lines.length_mm and quotation_lines.width_mm and quotation_lines.height_mm:
-                                            caisse_dims = f"{quotation_lines.length_mm}×{quotation_lines.width_mm}×{quotation_lines.height_mm}"
-                                except Exception as quotation_error:
-                                    print(f"Error loading quotation for client order {client_order.id}: {quotation_error}")
-                    
-                    # Get quotation description for finished products
-                    description = "N/A"
-
-                    # Priority 0: Stored description on production batch (persisted at creation)
-                    if hasattr(pb, 'description') and pb.description and pb.description.strip():
-                        description = pb.description.strip()
-                    else:
-                        # Try to get description from client order -> quotation (direct link)
-                        if pb.client_order_id:
-                            try:
-                                client_order = session.query(ClientOrder).filter(
-                                    ClientOrder.id == pb.client_order_id
-                                ).first()
-
-                                if client_order and client_order.quotation:
-                                    quotation = client_order.quotation
-
-                                    # Try all line items to find first non-empty description
-                                    if quotation.line_items:
-                                        for ql in quotation.line_items:
-                                            if ql.description and ql.description.strip():
-                                                description = ql.description.strip()
-                                                break
-
-                                    # Fallback to quotation notes
-                                    if description == "N/A" and quotation.notes and quotation.notes.strip():
-                                        description = quotation.notes.strip()
-
-                                # FLEXIBLE FALLBACK: search other client orders for same client if still N/A
-                                if description == "N/A" and client_id:
-                                    related_orders = session.query(ClientOrder).filter(
-                                        ClientOrder.client_id == client_id,
-                                        ClientOrder.quotation_id.isnot(None)
-                                    ).all()
-                                    for co in related_orders:
-                                        if co.quotation:
-                                            q = co.quotation
-                                            # Prefer line items
-                                            if q.line_items:
-                                                for ql in q.line_items:
-                                                    if ql.description and ql.description.strip():
-                                                        description = ql.description.strip()
-                                                        break
-                                            if description != "N/A":
-                                                break
-                                            if q.notes and q.notes.strip():
-                                                description = q.notes.strip()
-                                                break
-                            except Exception as desc_error:
-                                print(f"Error fetching description for production batch {pb.id}: {desc_error}")
-                    
-                    # Format production date
-                    production_date = "N/A"
-                    if hasattr(pb, 'production_date') and pb.production_date:
-                        production_date = pb.production_date.strftime('%Y-%m-%d')
-                    
-                    # STRICT GROUPING for finished products:
-                    # Require SAME CLIENT ID + SAME EXACT CAISSE DIMENSIONS + SAME DESCRIPTION
-                    def _norm_text(s: str) -> str:
-                        try:
-                            return " ".join(s.strip().lower().split())
-                        except Exception:
-                            return s.strip().lower() if s else ""
-
-                    desc_key = _norm_text(description) if description and description != "N/A" else None
-                    group_key = None
-
-                    if client_id is not None and caisse_dims != "N/A" and desc_key:
-                        group_key = (client_id, caisse_dims, desc_key)
-                    else:
-                        # Create unique key for ungroupable items to prevent incorrect merging
-                        group_key = (f"ungroupable_{pb.id}", f"batch_{pb.id}")
-                    
-                    # Initialize group if it doesn't exist
-                    if group_key not in grouped_items:
-                        grouped_items[group_key] = {
-                            'ids': [],
-                            'client_name': client_name,
-                            'dimensions': caisse_dims,
-                            'total_quantity': 0,
-                            'production_dates': [],
-                            'description': description
-                        }
-                    
-                    # Add to grouped items
-                    group_item = grouped_items[group_key]
-                    group_item['ids'].append(str(pb.id))
-                    group_item['total_quantity'] += int(getattr(pb, 'quantity', 0) or 0)
-                    if production_date != "N/A":
-                        group_item['production_dates'].append(production_date)
-                    
-                    # If we don't have a description yet in the group, try to use this one
-                    if group_item.get('description', 'N/A') == 'N/A' and description != 'N/A':
-                        group_item['description'] = description
-                    
-                except Exception as e:
-                    # Log the error for debugging
-                    print(f"Error loading production batch {pb.id}: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
-                    
-                    # Fallback data if there's an error loading details - use simpler approach
-                    try:
-                        # Simple fallback: just get basic client info without complex relationships
-                        client_name = "Client inconnu"
-                        if pb.client_order_id:
-                            client_order = session.query(ClientOrder).filter(
-                                ClientOrder.id == pb.client_order_id
-                            ).first()
-                            if client_order and client_order.client_id:
-                                client = session.query(Client).filter(Client.id == client_order.client_id).first()
-                                if client:
-                                    client_name = client.name
-                        
-                        # Create simple group key without complex logic
-                        group_key = (f"simple_{pb.id}", "N/A")
-                        if group_key not in grouped_items:
-                            grouped_items[group_key] = {
-                                'ids': [],
-                                'client_name': client_name,
-                                'dimensions': "N/A",
-                                'total_quantity': 0,
-                                'production_dates': [],
-                                'description': "N/A"
-                            }
-                        
-                        group_item = grouped_items[group_key]
-                        group_item['ids'].append(str(pb.id))
-                        group_item['total_quantity'] += int(getattr(pb, 'quantity', 0) or 0)
-                        
-                    except Exception as fallback_error:
-                        print(f"Fallback error for batch {pb.id}: {str(fallback_error)}")
-                        # Ultimate fallback - just skip this batch
-                        continue
-            
-            # Convert grouped items to display format
-            production_data = []
-            for group_key, group_data in grouped_items.items():
-                # Always store the exact list of IDs in the first column (comma-separated)
-                # This ensures downstream actions (like invoicing) can resolve real IDs.
-                id_display = ",".join(group_data['ids'])
-                
-                # Use most recent production date if multiple
-                production_date = "N/A"
-                if group_data['production_dates']:
-                    production_date = max(group_data['production_dates'])
-                
-                production_data.append([
-                    id_display,
-                    group_data['client_name'],
-                    group_data['dimensions'],
-                    str(group_data['total_quantity']),
-                    group_data.get('description', 'N/A'),  # Description from quotation
-                    production_date
-                ])
-            
-            self.stock_split.load_right_data(production_data)
+            if snapshot is not None:
+                self._apply_grid_snapshot(snapshot)
+                if self._pending_search_jump is not None and not self._select_search_result():
+                    self._pending_search_jump = None
+                    self.status_bar.showMessage("Résultat de recherche introuvable dans l'onglet", 5000)
             
             # Update dashboard
-            if hasattr(self, 'dashboard'):
+            if changed and hasattr(self, 'dashboard'):
                 self.dashboard.refresh_data()
             # After data refresh, rebuild completer suggestions
             try:
@@ -3191,9 +2640,33 @@ class MainWindow(QMainWindow):
                 
         except Exception as e:
             QMessageBox.critical(self, 'Erreur', f'Erreur lors de l\'actualisation: {str(e)}')
-        finally:
-            if session is not None:
-                session.close()
+
+    def _on_grid_refresh_failed(self, message: str) -> None:
+        QMessageBox.critical(self, 'Erreur', f'Erreur lors de l\'actualisation: {message}')
+
+    def _apply_grid_snapshot(self, snapshot: GridSnapshot) -> None:
+        """Patch the loaded snapshot sections into their grids (sections left to None are skipped)."""
+        if snapshot.suppliers is not None and self.suppliers_grid:
+            self.suppliers_grid.update_rows(snapshot.suppliers.rows)
+        if snapshot.clients is not None and self.clients_grid:
+            self.clients_grid.update_rows(snapshot.clients.rows)
+        if snapshot.quotations is not None and self.orders_grid:
+            self.orders_grid.update_rows(snapshot.quotations.rows, snapshot.quotations.colors)
+        if snapshot.client_orders is not None and self.client_orders_grid:
+            self.client_orders_grid.update_rows(snapshot.client_orders.rows, snapshot.client_orders.colors)
+        if snapshot.supplier_orders is not None and self.supplier_orders_quad:
+            # Supplier orders split between the 4 status sections
+            sections = snapshot.supplier_orders
+            quad = self.supplier_orders_quad
+            for grid, section in [(quad.top_left_grid, sections.initial), (quad.top_right_grid, sections.ordered),
+                                  (quad.bottom_left_grid, sections.partial), (quad.bottom_right_grid, sections.completed)]:
+                if grid:
+                    grid.update_rows(section.rows, section.colors)
+        # Stock: raw materials (receptions) on left side, finished products on right side
+        if snapshot.receptions is not None and self.receptions_grid:
+            self.receptions_grid.update_rows(snapshot.receptions.rows)
+        if snapshot.production is not None and self.production_grid:
+            self.production_grid.update_rows(snapshot.production.rows)
 
     def _on_supplier_order_double_click(self, row: int):
         """Handle double-click on supplier order row to show detailed view"""
@@ -3280,6 +2753,7 @@ class MainWindow(QMainWindow):
         """Export supplier order as a professional PDF document using template"""
         try:
             # Generate PDF using the template-based export service
+            from services.pdf_export_service import export_supplier_order_to_pdf
             pdf_path = export_supplier_order_to_pdf(order_id)
             
             if pdf_path:
@@ -3319,6 +2793,48 @@ class MainWindow(QMainWindow):
                 f'Erreur lors de l\'export PDF: {str(e)}'
             )
 
+    def _reexport_supplier_orders_for_month(self):
+        """Re-export every supplier order of a month to PDF (month-end), rendered in the background"""
+        from PyQt6.QtWidgets import QInputDialog
+        from services.pdf_export_service import prepare_supplier_order_jobs, supplier_order_ids_for_month
+        from ui.background_renderer import render_in_background
+
+        # Current month first, then the eleven previous ones
+        today = datetime.date.today()
+        months = [((today.year * 12 + today.month - 1 - i) // 12, (today.month - 1 - i) % 12 + 1) for i in range(12)]
+        labels = [f"{month:02d}/{year}" for year, month in months]
+        label, ok = QInputDialog.getItem(self, 'Réexport mensuel', 'Mois des bons de commande:', labels, 0, False)
+        if not ok:
+            return
+        year, month = months[labels.index(label)]
+
+        try:
+            jobs = list(prepare_supplier_order_jobs(supplier_order_ids_for_month(year, month)).values())
+        except Exception as e:
+            QMessageBox.critical(self, 'Erreur', f'Erreur lors de la préparation des bons de commande: {str(e)}')
+            return
+        if not jobs:
+            QMessageBox.information(self, 'Réexport mensuel', f'Aucun bon de commande en {label}.')
+            return
+
+        def _on_rendered(results):
+            generated = [result.path for result in results if result.path]
+            errors = [f"{result.job.data.get('reference', '')}: {result.error}" for result in results if result.error]
+            message = f'{len(generated)} bon(s) de commande de {label} exporté(s).'
+            if generated:
+                message += f'\n\nEmplacement: {generated[0].parent}'
+            if errors:
+                error_text = "\n".join(errors[:5])
+                if len(errors) > 5:
+                    error_text += f"\n... et {len(errors) - 5} autres erreurs"
+                QMessageBox.warning(self, 'Réexport partiellement réussi', f'{message}\n\nErreurs rencontrées:\n{error_text}')
+            else:
+                QMessageBox.information(self, 'Réexport mensuel', message)
+            if generated:
+                self.dashboard.add_activity("PDF", f"Réexport des bons de commande {label}", "#DC3545")
+
+        render_in_background(self, jobs, _on_rendered, f"Export des bons de commande de {label}...")
+
     def _customize_supplier_orders_context_menu(self, row: int, row_data: list, menu):
         """Customize context menu based on supplier order status"""
         if not row_data or len(row_data) < 4:
@@ -3575,10 +3091,10 @@ class MainWindow(QMainWindow):
             self._move_reception_to_archive(row_data)
 
     def _move_reception_to_archive(self, row_data: list):
-        """Archive one or multiple receptions (raw materials) by prefixing notes with [ARCHIVED]."""
+        """Archive one or multiple receptions (raw materials) by setting their archived_at timestamp."""
         from PyQt6.QtWidgets import QMessageBox
         from datetime import datetime
-        from models.orders import Reception, ClientOrder, Quotation, QuotationLineItem, SupplierOrder, SupplierOrderLineItem
+        from models.orders import Reception
         session = SessionLocal()
         try:
             if not row_data:
@@ -3607,52 +3123,16 @@ class MainWindow(QMainWindow):
                 reception = session.query(Reception).filter(Reception.id == rid).first()
                 if not reception:
                     continue
-                if reception.notes and reception.notes.startswith('[ARCHIVED]'):
+                if reception.archived_at is not None:
                     continue  # already archived
-
-                # Attempt to enrich description if current notes are generic
-                enriched_description = None
-                try:
-                    # If notes exist and are not generic arrival auto text, reuse
-                    if reception.notes and reception.notes.strip() and not reception.notes.startswith('Arrivée matière:'):
-                        enriched_description = reception.notes.strip()
-                    else:
-                        # Derive from related supplier order -> client order -> quotation line items
-                        if reception.supplier_order_id:
-                            supplier_order = session.query(SupplierOrder).filter(SupplierOrder.id == reception.supplier_order_id).first()
-                            if supplier_order and supplier_order.line_items:
-                                so_line = supplier_order.line_items[0]
-                                # Find any client order for that client with quotation
-                                client_orders = session.query(ClientOrder).filter(
-                                    ClientOrder.client_id == so_line.client_id,
-                                    ClientOrder.quotation_id.isnot(None)
-                                ).all()
-                                for co in client_orders:
-                                    if co.quotation:
-                                        q = co.quotation
-                                        if q.line_items:
-                                            for ql in q.line_items:
-                                                if ql.description and ql.description.strip():
-                                                    enriched_description = ql.description.strip()
-                                                    break
-                                            if enriched_description:
-                                                break
-                                        if (not enriched_description) and q.notes and q.notes.strip():
-                                            enriched_description = q.notes.strip()
-                                    if enriched_description:
-                                        break
-                except Exception as enrich_err:
-                    print(f"Warning: could not derive description for reception {rid}: {enrich_err}")
-
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
-                base_desc = enriched_description or (reception.notes.strip() if reception.notes else 'Matière première')
-                reception.notes = f"[ARCHIVED] {timestamp} | {base_desc}"
+                # Notes (dimensions, description) are kept as is
+                reception.archived_at = datetime.now()
                 archived_count += 1
 
             session.commit()
             QMessageBox.information(self, 'Archivage terminé', f'{archived_count} réception(s) archivée(s).')
             self.refresh_all()
-            if hasattr(self, 'archive_widget'):
+            if self.archive_widget:
                 self.archive_widget.refresh_all_data()
         except Exception as e:
             session.rollback()
@@ -3666,13 +3146,7 @@ class MainWindow(QMainWindow):
             return
             
         # Get row data directly from table
-        row_data = []
-        for col in range(self.receptions_grid.table.columnCount()):
-            item = self.receptions_grid.table.item(row, col)
-            if item:
-                row_data.append(item.text())
-            else:
-                row_data.append('')
+        row_data = self.receptions_grid.get_row_data(row)
                 
         if row_data:
             self._show_reception_details(row_data)
@@ -3837,9 +3311,9 @@ class MainWindow(QMainWindow):
 
             # Archive ONLY the production batches themselves (no cascading)
             for pb in production_batches:
-                # Mark production batch as archived by modifying batch_code
-                if not pb.batch_code.startswith("[ARCHIVED]"):
-                    pb.batch_code = f"[ARCHIVED] {pb.batch_code}"
+                # Mark production batch as archived (batch_code is left unchanged)
+                if pb.archived_at is None:
+                    pb.archived_at = datetime.now()
                 
                 archived_items.append(f"Produit fini: {pb.batch_code}")
             
@@ -3889,13 +3363,7 @@ class MainWindow(QMainWindow):
             return
             
         # Get row data directly from table
-        row_data = []
-        for col in range(self.production_grid.table.columnCount()):
-            item = self.production_grid.table.item(row, col)
-            if item:
-                row_data.append(item.text())
-            else:
-                row_data.append('')
+        row_data = self.production_grid.get_row_data(row)
                 
         if row_data:
             self._show_production_details(row_data)
@@ -3966,6 +3434,7 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, 'Erreur', f'Erreur lors de l\'édition: {str(e)}')
 
+    @timed('save.reception')
     def _save_single_reception_edit(self, dialog: QDialog, reception_id: int, new_quantity: str):
         """Save changes to a single reception"""
         try:
@@ -4070,6 +3539,7 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, 'Erreur', f'Erreur lors de l\'ouverture du dialogue: {str(e)}')
 
+    @timed('save.receptions')
     def _save_merged_reception_quantities(self, dialog: QDialog, table, receptions: list):
         """Save quantity changes for merged receptions"""
         try:
@@ -4322,10 +3792,9 @@ Détails individuels:"""
                     existing_batch.quantity += data['quantity_produced']
 
                     # If the existing batch was archived, automatically restore it
-                    if existing_batch.batch_code.startswith('[ARCHIVED]'):
-                        restored_code = existing_batch.batch_code.replace('[ARCHIVED]', '').strip()
-                        print(f"DEBUG: Existing batch {existing_batch.id} was archived. Restoring code to '{restored_code}'")
-                        existing_batch.batch_code = restored_code
+                    if existing_batch.archived_at is not None:
+                        logging.debug(f"Existing batch {existing_batch.id} was archived, restoring it")
+                        existing_batch.archived_at = None
                         # Optional: notify user it was restored
                         try:
                             QMessageBox.information(
@@ -4797,36 +4266,24 @@ Détails individuels:"""
                 delivery_options = delivery_dialog.get_delivery_options()
                 pallets = delivery_dialog.calculate_pallets()
                 
-                # Generate PDFs based on pallet distribution
-                from services.pdf_export_service import export_finished_product_fiche
+                # Generate all pallet fiches into one multi-page PDF
+                from services.pdf_export_service import export_finished_product_fiches
                 
+                # For merged items, use the first batch ID as representative
+                representative_batch_id = batch_ids[0]
+                fiche_pallets = [
+                    (representative_batch_id, quantity_per_pallet)
+                    for quantity_per_pallet, num_copies in pallets
+                    for _ in range(num_copies)
+                ]
                 generated_files = []
-                copy_number = 1
-                total_copies = sum(copies for _, copies in pallets)
-                
-                for quantity_per_pallet, num_copies in pallets:
-                    for copy in range(num_copies):
-                        try:
-                            # For merged items, use the first batch ID as representative
-                            representative_batch_id = batch_ids[0]
-                            pdf_path = export_finished_product_fiche(
-                                representative_batch_id, 
-                                quantity_per_pallet, 
-                                copy_number, 
-                                total_copies,
-                                dimensions  # Pass dimensions from grid
-                            )
-                            if pdf_path:
-                                generated_files.append(pdf_path)
-                            copy_number += 1
-                        except Exception as e:
-                            print(f"Error generating PDF for copy {copy_number}: {e}")
-                            continue
+                pdf_path = export_finished_product_fiches(fiche_pallets, dimensions) if fiche_pallets else None
+                if pdf_path:
+                    generated_files.append(pdf_path)
                 
                 if generated_files:
-                    # Show success message with file count
-                    file_count = len(generated_files)
-                    message = f"{file_count} fiche(s) de produit fini générée(s) avec succès.\n\n"
+                    # Show success message with fiche count
+                    message = f"{len(fiche_pallets)} fiche(s) de produit fini générée(s) avec succès.\n\n"
                     message += "Fichiers générés:\n"
                     for file_path in generated_files:
                         message += f"- {file_path.name}\n"
@@ -4852,6 +4309,18 @@ Détails individuels:"""
             print(f"Error printing finished product fiche: {e}")
             QMessageBox.critical(self, "Erreur", f"Erreur lors de la génération de la fiche: {str(e)}")
 
+    def _selected_reception_groups(self) -> list[list[int]]:
+        """Reception IDs of each selected row of the stock grid (one list per grouped row)."""
+        if not self.receptions_grid or not hasattr(self.receptions_grid, 'get_selected_rows_data'):
+            return []
+        groups = []
+        for row in self.receptions_grid.get_selected_rows_data() or []:
+            try:
+                groups.append([int(part.strip()) for part in str(row[0]).split(',') if part.strip()])
+            except (ValueError, IndexError):
+                continue
+        return [group for group in groups if group]
+
     def _print_raw_material_label(self, row_data: list):
         """Handle printing raw material label with optional remark"""
         try:
@@ -4892,16 +4361,23 @@ Détails individuels:"""
             if label_dialog.exec() == QDialog.DialogCode.Accepted:
                 remark = label_dialog.get_remark()
                 
-                # Generate PDF label
-                from services.pdf_export_service import export_raw_material_label
+                # Generate PDF label(s)
+                from services.pdf_export_service import export_raw_material_label, export_raw_material_labels
                 
                 try:
-                    pdf_path = export_raw_material_label(reception_ids, remark)
+                    # With several rows selected (a whole arrival), all labels go into one PDF
+                    reception_groups = self._selected_reception_groups()
+                    if len(reception_groups) > 1 and reception_ids in reception_groups:
+                        pdf_path = export_raw_material_labels(reception_groups, remark)
+                        success_text = f"{len(reception_groups)} étiquettes matière première générées avec succès!"
+                    else:
+                        pdf_path = export_raw_material_label(reception_ids, remark)
+                        success_text = "Étiquette matière première générée avec succès!"
                     
                     if pdf_path:
                         QMessageBox.information(
                             self, "Succès", 
-                            f"Étiquette matière première générée avec succès!\n\n"
+                            f"{success_text}\n\n"
                             f"Fichier sauvegardé: {pdf_path.name}"
                         )
                         
@@ -5117,8 +4593,8 @@ Détails individuels:"""
                             if remaining_to_deliver >= total_quantity:
                                 # Fully delivered: archive all involved batches so they disappear from stock view
                                 for b in batches:
-                                    if not getattr(b, 'batch_code', '').startswith('[ARCHIVED]'):
-                                        b.batch_code = f"[ARCHIVED] {b.batch_code}"
+                                    if b.archived_at is None:
+                                        b.archived_at = datetime.datetime.now()
                             else:
                                 # Partial delivery: decrement quantities across batches in order
                                 for b in batches:
@@ -5131,8 +4607,8 @@ Détails individuels:"""
                                     b.quantity = max(0, q - take)
                                     remaining_to_deliver -= take
                                     # If a batch hits zero, archive it
-                                    if b.quantity == 0 and not getattr(b, 'batch_code', '').startswith('[ARCHIVED]'):
-                                        b.batch_code = f"[ARCHIVED] {b.batch_code}"
+                                    if b.quantity == 0 and b.archived_at is None:
+                                        b.archived_at = datetime.datetime.now()
                         except Exception as stock_err:
                             # Don't block delivery recording if stock update fails
                             print(f"Warning: Failed to update production stock on delivery: {stock_err}")
@@ -5225,7 +4701,8 @@ Détails individuels:"""
         from models.production import ProductionBatch
         from models.orders import ClientOrder, Quotation
         from models.clients import Client
-        from services.document_service import DocumentService
+        from services.document_renderer import RenderJob
+        from ui.background_renderer import render_in_background
         from utils.reference_generator import generate_delivery_reference
         from datetime import date
         from sqlalchemy.orm import joinedload
@@ -5317,8 +4794,8 @@ Détails individuels:"""
                             'designation': designation
                         })
                     
-                    # Generate delivery note for each client group
-                    generated_count = 0
+                    # Prepare one delivery note per client group; rendering runs in the background
+                    jobs = []
                     errors = []
                     
                     for client_id, items in client_groups.items():
@@ -5372,45 +4849,51 @@ Détails individuels:"""
                                     'quantity': str(total_quantity)
                                 })
                             
-                            # Generate PDF
-                            doc_service = DocumentService()
-                            pdf_path = doc_service.build_delivery_note(
-                                reference=delivery_reference,
-                                client_name=client.name,
-                                delivery_date=date.today(),
-                                lines=lines,
-                                client_details=client_details
-                            )
-                            
-                            # Open the PDF (only for the first one to avoid opening too many)
-                            if generated_count == 0:
-                                try:
-                                    if platform.system() == 'Darwin':  # macOS
-                                        subprocess.call(['open', str(pdf_path)])
-                                    elif platform.system() == 'Windows':  # Windows
-                                        subprocess.call(['start', str(pdf_path)], shell=True)
-                                    else:  # Linux
-                                        subprocess.call(['xdg-open', str(pdf_path)])
-                                except Exception:
-                                    pass  # Ignore PDF opening errors
-                            
-                            generated_count += 1
+                            jobs.append(RenderJob('delivery_note', {
+                                'reference': delivery_reference,
+                                'client_name': client.name,
+                                'delivery_date': date.today(),
+                                'lines': lines,
+                                'client_details': client_details
+                            }))
                             
                         except Exception as e:
                             # Use client name if available, otherwise use client_id
                             client_name = items[0]['client'].name if items and 'client' in items[0] and items[0]['client'] else f"Client ID {client_id}"
                             errors.append(f"Client {client_name}: {str(e)}")
+                        
+                finally:
+                    session.close()
+                
+                def _on_rendered(results):
+                    generated = [result.path for result in results if result.path]
+                    render_errors = errors + [
+                        f"Client {result.job.data.get('client_name', '')}: {result.error}"
+                        for result in results if result.error
+                    ]
+                    
+                    # Open the PDF (only for the first one to avoid opening too many)
+                    if generated:
+                        try:
+                            if platform.system() == 'Darwin':  # macOS
+                                subprocess.call(['open', str(generated[0])])
+                            elif platform.system() == 'Windows':  # Windows
+                                subprocess.call(['start', str(generated[0])], shell=True)
+                            else:  # Linux
+                                subprocess.call(['xdg-open', str(generated[0])])
+                        except Exception:
+                            pass  # Ignore PDF opening errors
                     
                     # Show summary
-                    if errors:
-                        error_text = "\n".join(errors[:5])  # Show first 5 errors
-                        if len(errors) > 5:
-                            error_text += f"\n... et {len(errors) - 5} autres erreurs"
+                    if render_errors:
+                        error_text = "\n".join(render_errors[:5])  # Show first 5 errors
+                        if len(render_errors) > 5:
+                            error_text += f"\n... et {len(render_errors) - 5} autres erreurs"
                         
                         QMessageBox.warning(
                             self,
                             "Génération partiellement réussie",
-                            f"{generated_count} bon(s) de livraison généré(s) avec succès.\n\n"
+                            f"{len(generated)} bon(s) de livraison généré(s) avec succès.\n\n"
                             f"Erreurs rencontrées:\n{error_text}"
                         )
                     else:
@@ -5420,12 +4903,11 @@ Détails individuels:"""
                         QMessageBox.information(
                             self,
                             "Génération réussie",
-                            f"{generated_count} bon(s) de livraison généré(s) avec succès!\n"
+                            f"{len(generated)} bon(s) de livraison généré(s) avec succès!\n"
                             f"{merged_info}"
                         )
-                        
-                finally:
-                    session.close()
+                
+                render_in_background(self, jobs, _on_rendered, "Génération des bons de livraison...")
                     
             except Exception as e:
                 QMessageBox.critical(
@@ -5434,6 +4916,41 @@ Détails individuels:"""
                     f"Erreur lors de la génération multiple: {str(e)}"
                 )
 
+    @staticmethod
+    def _production_ids_from_rows(rows: list) -> list[int]:
+        """Production batch IDs of finished products grid rows (first column)"""
+        production_ids = []
+        for row in rows:
+            if len(row) < 1:
+                continue
+            raw = (row[0] or "").strip()
+            if not raw:
+                continue
+            # Support formats:
+            #  - "123"
+            #  - "12,13,18"
+            #  - "10-15 (6)" (fallback: assume consecutive IDs)
+            try:
+                if "," in raw:
+                    for part in raw.split(","):
+                        part = part.strip()
+                        if part.isdigit():
+                            production_ids.append(int(part))
+                elif "-" in raw:
+                    # Extract range like "10-15" optionally followed by count
+                    range_part = raw.split(" ")[0]
+                    a_str, b_str = range_part.split("-", 1)
+                    a = int(a_str)
+                    b = int(b_str)
+                    if a <= b:
+                        production_ids.extend(list(range(a, b + 1)))
+                else:
+                    production_ids.append(int(raw))
+            except (ValueError, TypeError):
+                # Skip unparsable entries
+                continue
+        return production_ids
+
     def _create_invoice_for_selection(self, row_data: list):
         """Create invoice for selected finished product(s)"""
         # Check if production grid is available
@@ -5452,36 +4969,7 @@ Détails individuels:"""
         
         try:
             # Extract production IDs
-            production_ids = []
-            for row in selected_rows_data:
-                if len(row) < 1:
-                    continue
-                raw = (row[0] or "").strip()
-                if not raw:
-                    continue
-                # Support formats:
-                #  - "123"
-                #  - "12,13,18"
-                #  - "10-15 (6)" (fallback: assume consecutive IDs)
-                try:
-                    if "," in raw:
-                        for part in raw.split(","):
-                            part = part.strip()
-                            if part.isdigit():
-                                production_ids.append(int(part))
-                    elif "-" in raw:
-                        # Extract range like "10-15" optionally followed by count
-                        range_part = raw.split(" ")[0]
-                        a_str, b_str = range_part.split("-", 1)
-                        a = int(a_str)
-                        b = int(b_str)
-                        if a <= b:
-                            production_ids.extend(list(range(a, b + 1)))
-                    else:
-                        production_ids.append(int(raw))
-                except (ValueError, TypeError):
-                    # Skip unparsable entries
-                    continue
+            production_ids = self._production_ids_from_rows(selected_rows_data)
             
             if not production_ids:
                 QMessageBox.warning(self, 'Erreur', 'Aucun produit fini valide sélectionné')
@@ -5492,33 +4980,10 @@ Détails individuels:"""
             from services.pdf_form_filler import PDFFormFiller, PDFFillError
             
             # Ask options: TVA and payment mode
-            try:
-                from ui.dialogs.invoice_options_dialog import InvoiceOptionsDialog
-            except Exception:
-                InvoiceOptionsDialog = None  # type: ignore
-            include_tva = True
-            selected_payment_mode = "Espèces"
-            if InvoiceOptionsDialog is not None:
-                opt_dlg = InvoiceOptionsDialog(self)
-                if opt_dlg.exec():
-                    include_tva, selected_payment_mode = opt_dlg.get_values()
-                else:
-                    return
-            else:
-                # Fallback simple message box when dialog import fails
-                from PyQt6.QtWidgets import QMessageBox as _QMessageBox
-                tva_dialog = _QMessageBox(self)
-                tva_dialog.setWindowTitle('TVA')
-                tva_dialog.setText('Inclure la TVA (19%) dans la facture ?')
-                tva_dialog.setIcon(_QMessageBox.Icon.Question)
-                btn_with_tva = tva_dialog.addButton('Avec TVA', _QMessageBox.ButtonRole.YesRole)
-                btn_without_tva = tva_dialog.addButton('Sans TVA', _QMessageBox.ButtonRole.NoRole)
-                tva_dialog.addButton(_QMessageBox.StandardButton.Cancel)
-                tva_dialog.exec()
-                clicked = tva_dialog.clickedButton()
-                if clicked == tva_dialog.button(_QMessageBox.StandardButton.Cancel):
-                    return
-                include_tva = (clicked == btn_with_tva)
+            options = self._ask_invoice_options()
+            if options is None:
+                return
+            include_tva, selected_payment_mode = options
 
             # Prepare invoice data with TVA choice
             with InvoiceService() as invoice_service:
@@ -5527,6 +4992,7 @@ Détails individuels:"""
                 invoice_data["payment_mode"] = selected_payment_mode
             
             # Generate PDF invoice
+            from services.pdf_form_filler import PDFFormFiller, PDFFillError
             pdf_filler = PDFFormFiller()
             try:
                 output_path = pdf_filler.fill_invoice_template(invoice_data)
@@ -5585,23 +5051,97 @@ Détails individuels:"""
             # Single selection - use existing method
             self._print_invoice(selected_rows_data[0])
         else:
-            # Multiple selection
-            production_count = len(selected_rows_data)
-            batch_ids = [row[0] for row in selected_rows_data if len(row) > 0]
-            clients = [row[1] for row in selected_rows_data if len(row) > 1]
-            total_quantity = sum(int(row[3]) if len(row) > 3 and row[3].isdigit() else 0 for row in selected_rows_data)
-            
-            # TODO: Implement multiple invoice generation
-            QMessageBox.information(
-                self,
-                "Factures multiples",
-                f"Fonctionnalité en cours de développement.\n\n"
-                f"{production_count} factures à générer:\n"
-                f"Lots: {', '.join(batch_ids)}\n"
-                f"Clients: {', '.join(set(clients))}\n"
-                f"Quantité totale: {total_quantity}\n\n"
-                f"La génération multiple sera implémentée prochainement."
-            )
+            # Multiple selection - one invoice per client, rendered in the background
+            self._print_invoices_by_client(selected_rows_data)
+
+    def _ask_invoice_options(self) -> tuple[bool, str] | None:
+        """(include_tva, payment_mode) chosen for the invoices, or None when cancelled"""
+        try:
+            from ui.dialogs.invoice_options_dialog import InvoiceOptionsDialog
+        except Exception:
+            InvoiceOptionsDialog = None  # type: ignore
+        if InvoiceOptionsDialog is not None:
+            opt_dlg = InvoiceOptionsDialog(self)
+            if not opt_dlg.exec():
+                return None
+            return opt_dlg.get_values()
+        # Fallback simple message box when dialog import fails
+        tva_dialog = QMessageBox(self)
+        tva_dialog.setWindowTitle('TVA')
+        tva_dialog.setText('Inclure la TVA (19%) dans la facture ?')
+        tva_dialog.setIcon(QMessageBox.Icon.Question)
+        btn_with_tva = tva_dialog.addButton('Avec TVA', QMessageBox.ButtonRole.YesRole)
+        tva_dialog.addButton('Sans TVA', QMessageBox.ButtonRole.NoRole)
+        tva_dialog.addButton(QMessageBox.StandardButton.Cancel)
+        tva_dialog.exec()
+        clicked = tva_dialog.clickedButton()
+        if clicked == tva_dialog.button(QMessageBox.StandardButton.Cancel):
+            return None
+        return clicked == btn_with_tva, "Espèces"
+
+    def _print_invoices_by_client(self, selected_rows_data: list):
+        """Generate one invoice per client of the selected finished products, rendered in the background"""
+        from collections import defaultdict
+        from services.document_renderer import RenderJob
+        from services.invoice_service import InvoiceService
+        from ui.background_renderer import render_in_background
+
+        # An invoice covers a single client (second column of the grid)
+        rows_by_client = defaultdict(list)
+        for row in selected_rows_data:
+            if len(row) > 1:
+                rows_by_client[row[1]].append(row)
+        if not rows_by_client:
+            QMessageBox.warning(self, 'Erreur', 'Aucun produit fini valide sélectionné')
+            return
+
+        options = self._ask_invoice_options()
+        if options is None:
+            return
+        include_tva, payment_mode = options
+
+        jobs = []
+        errors = []
+        try:
+            with InvoiceService() as invoice_service:
+                for client_name, rows in rows_by_client.items():
+                    production_ids = self._production_ids_from_rows(rows)
+                    if not production_ids:
+                        continue
+                    try:
+                        invoice_data = invoice_service.prepare_invoice_data(production_ids, include_tva=include_tva)
+                    except Exception as e:
+                        errors.append(f"Client {client_name}: {str(e)}")
+                        continue
+                    invoice_data["payment_mode"] = payment_mode
+                    jobs.append(RenderJob('invoice', invoice_data))
+        except Exception as e:
+            QMessageBox.critical(self, 'Erreur', f'Erreur lors de la création des factures:\n{str(e)}')
+            logging.error(f"Error creating invoices: {e}")
+            return
+        if not jobs:
+            QMessageBox.warning(self, 'Erreur', 'Aucune facture générée:\n' + "\n".join(errors[:5]))
+            return
+
+        def _on_rendered(results):
+            generated = [result for result in results if result.path]
+            render_errors = errors + [
+                f"Client {result.job.data.get('client_name', '')}: {result.error}"
+                for result in results if result.error
+            ]
+            for result in generated:
+                self.dashboard.add_activity("F", f"Facture créée: {result.job.data.get('invoice_number', 'N/A')}", "#28A745")
+            message = f'{len(generated)} facture(s) générée(s) avec succès.'
+            if generated:
+                message += f'\n\nEmplacement: {generated[0].path.parent}'
+            if render_errors:
+                error_text = "\n".join(render_errors[:5])
+                if len(render_errors) > 5:
+                    error_text += f"\n... et {len(render_errors) - 5} autres erreurs"
+                QMessageBox.warning(self, 'Génération partiellement réussie', f'{message}\n\nErreurs rencontrées:\n{error_text}')
+            else:
+                QMessageBox.information(self, 'Factures', message)
 
+        render_in_background(self, jobs, _on_rendered, "Génération des factures...")
 
 __all__ = ['MainWindow']
\ No newline at end of file
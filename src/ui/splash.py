@@ -1,8 +1,8 @@
 from __future__ import annotations
 from pathlib import Path
-from PyQt6.QtCore import Qt, QTimer, QEasingCurve, QPropertyAnimation, pyqtSignal, QObject
+from PyQt6.QtCore import Qt, QEasingCurve, QPropertyAnimation, pyqtSignal, QObject
 from PyQt6.QtGui import QPixmap, QFont
-from PyQt6.QtWidgets import QSplashScreen, QLabel, QVBoxLayout, QWidget, QProgressBar
+from PyQt6.QtWidgets import QApplication, QSplashScreen, QLabel, QVBoxLayout, QWidget, QProgressBar
 
 
 class SplashFinishedSignal(QObject):
@@ -75,40 +75,18 @@ class SplashScreen(QWidget):
             geo = scr.availableGeometry()
             self.move(geo.center().x() - self.width() // 2, geo.center().y() - self.height() // 2)
 
-    def start(self, simulated_steps: int = 8, interval_ms: int = 250):
-        self._progress = 0
-        self.progress.setValue(0)
-        self._steps_total = simulated_steps
-        self._timer = QTimer(self)
-        self._timer.timeout.connect(self._advance)
-        self._timer.start(interval_ms)
-
-    def _advance(self):
-        self._progress += 1
-        percent = int(self._progress / self._steps_total * 100)
+    def set_progress(self, percent: int, message: str):
+        """Show the current startup step (the splash is repainted immediately)."""
+        self._progress = percent
         self.progress.setValue(percent)
-        self.info_label.setText({
-            1: "Chargement configuration ...",
-            2: "Connexion base de données ...",
-            3: "Initialisation modèles ...",
-            4: "Préparation interface ...",
-            5: "Chargement services ...",
-            6: "Application du thème ...",
-            7: "Finalisation ...",
-        }.get(self._progress, "Prêt"))
-        if self._progress >= self._steps_total:
-            self._timer.stop()
-            self._finish()
-
-    def _finish(self):
-        print("Splash finishing...")  # Debug print
-        # Emit signal immediately, no fade animation for debugging
-        self.signals.finished.emit()
-        print("Signal emitted")  # Debug print
-        self.close()
-
-    def _emit_finished(self):
-        # Backup method (not used in simplified version)
+        self.info_label.setText(message)
+        app = QApplication.instance()
+        if app is not None:
+            app.processEvents()
+
+    def finish(self):
+        """Close the splash once the main window is ready."""
+        self.progress.setValue(100)
         self.signals.finished.emit()
         self.close()
 
@@ -6,11 +6,11 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTabWidg
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont, QIcon, QPalette, QColor
 from config.database import SessionLocal
+from ui.background_loader import BackgroundLoader
 from models.production import ProductionBatch
 from models.orders import ClientOrder, Quotation, SupplierOrder, Reception, QuotationLineItem, SupplierOrderLineItem, Delivery, Invoice
 from models.clients import Client
 from models.suppliers import Supplier
-from datetime import datetime, date
 import traceback
 
 
@@ -114,27 +114,27 @@ class ArchiveStatsWidget(QWidget):
             try:
                 # Count archived quotations
                 archived_quotations = session.query(Quotation).filter(
-                    Quotation.notes.like('[ARCHIVED]%')
+                    Quotation.archived_at.isnot(None)
                 ).count()
                 
                 # Count archived client orders
                 archived_client_orders = session.query(ClientOrder).filter(
-                    ClientOrder.notes.like('[ARCHIVED]%')
+                    ClientOrder.archived_at.isnot(None)
                 ).count()
                 
                 # Count archived supplier orders
                 archived_supplier_orders = session.query(SupplierOrder).filter(
-                    SupplierOrder.notes.like('[ARCHIVED]%')
+                    SupplierOrder.archived_at.isnot(None)
                 ).count()
                 
                 # Count archived production batches
                 archived_production = session.query(ProductionBatch).filter(
-                    ProductionBatch.batch_code.like('[ARCHIVED]%')
+                    ProductionBatch.archived_at.isnot(None)
                 ).count()
                 
                 # Count archived receptions (through supplier orders)
                 archived_receptions = session.query(Reception).join(Reception.supplier_order).filter(
-                    SupplierOrder.notes.like('[ARCHIVED]%')
+                    SupplierOrder.archived_at.isnot(None)
                 ).count()
                 
                 # Estimate complete workflows (quotation + client order + production)
@@ -272,6 +272,10 @@ class ArchiveWidget(QWidget):
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._details_cache: dict[str, str] = {}
+        # Production batch to select once the list is loaded (global search result)
+        self._pending_selection: int | None = None
+        self._loader = BackgroundLoader(self)
         self._setup_ui()
         self._setup_refresh_timer()
         self.refresh_all_data()
@@ -365,233 +369,241 @@ class ArchiveWidget(QWidget):
             traceback.print_exc()
     
     def _load_archived_transactions(self):
-        """Load archived production entries into simplified list and cache details"""
-        try:
-            session = SessionLocal()
+        """Load archived production entries into simplified list and cache details.
+        Queries run on a background thread; the list is filled once they complete.
+        """
+        self._loader.submit(self._build_archived_transactions, self._apply_archived_transactions,
+                            lambda message: print(f"Error loading archived transactions: {message}"))
+
+    def _apply_archived_transactions(self, result):
+        data, details_cache = result
+        self._details_cache = details_cache
+        self.list_table.load_data(data)
+        if self._pending_selection is not None:
+            self.select_item(self._pending_selection)
+
+    def select_item(self, item_id: int) -> bool:
+        """Select the archived production batch item_id; when the list is not loaded
+        yet, the selection is applied after the load."""
+        for row in range(self.list_table.rowCount()):
+            id_item = self.list_table.item(row, 0)
+            if id_item and id_item.text() == str(item_id):
+                self._pending_selection = None
+                self.list_table.selectRow(row)
+                self.list_table.scrollToItem(id_item)
+                return True
+        self._pending_selection = item_id if self.list_table.rowCount() == 0 else None
+        return False
+
+    def _build_archived_transactions(self, session) -> tuple[list[list[str]], dict[str, str]]:
+        """Build list rows and details texts for archived production entries (off the GUI thread)"""
+        # Get archived production batches as the main driver
+        production_batches = session.query(ProductionBatch).filter(
+            ProductionBatch.archived_at.isnot(None)
+        ).all()
+
+        data = []
+        details_cache = {}
+        for pb in production_batches:
             try:
-                # Get archived production batches as the main driver
-                production_batches = session.query(ProductionBatch).filter(
-                    ProductionBatch.batch_code.like('[ARCHIVED]%')
-                ).all()
-                
-                data = []
-                self._details_cache = {}
-                for pb in production_batches:
-                    try:
-                        # Get client order and related information
-                        client_name = "N/A"
-                        description = "N/A"
-                        caisse_dimensions = "N/A"
-                        archive_date = self._extract_archive_date_from_batch_code(pb.batch_code)
-                        
-                        # Try to fetch ClientOrder and relations
-                        co = session.query(ClientOrder).filter(ClientOrder.id == pb.client_order_id).first() if getattr(pb, 'client_order_id', None) else None
-                        
-                        # Determine client name (prefer ClientOrder, fallback to SupplierOrder line item client)
-                        if co and co.client:
-                            client_name = co.client.name
-                        elif co and getattr(co, 'supplier_order', None) and co.supplier_order.line_items:
-                            first_li = co.supplier_order.line_items[0]
-                            if getattr(first_li, 'client', None):
-                                client_name = first_li.client.name
-                        
-                        # Determine caisse dimensions (prefer SupplierOrder line item, fallback to quotation line)
-                        if co and getattr(co, 'supplier_order', None) and co.supplier_order.line_items:
-                            sli = co.supplier_order.line_items[0]
-                            if all([sli.caisse_length_mm, sli.caisse_width_mm, sli.caisse_height_mm]):
-                                caisse_dimensions = f"{sli.caisse_length_mm}×{sli.caisse_width_mm}×{sli.caisse_height_mm}mm"
-                        if caisse_dimensions == "N/A" and co and co.quotation and co.quotation.line_items:
-                            qli = co.quotation.line_items[0]
-                            if all([qli.length_mm, qli.width_mm, qli.height_mm]):
-                                caisse_dimensions = f"{qli.length_mm}×{qli.width_mm}×{qli.height_mm}mm"
-
-                        # Determine description (prefer quotation description, then notes, then generated from dims)
-                        if co and co.quotation and co.quotation.line_items:
-                            qli = co.quotation.line_items[0]
-                            if qli.description and qli.description.strip():
-                                description = qli.description.strip()
-                            elif co.quotation.notes and co.quotation.notes.strip():
-                                description = co.quotation.notes.replace('[ARCHIVED]', '').strip()
-                            elif all([qli.length_mm, qli.width_mm, qli.height_mm]):
-                                cardboard_info = qli.cardboard_type or 'Standard'
-                                description = f"Carton {cardboard_info} {qli.length_mm}×{qli.width_mm}×{qli.height_mm}mm"
-                        # Last resort: use production batch description
-                        if description == "N/A":
-                            _desc_val = getattr(pb, 'description', None)
-                            if isinstance(_desc_val, str) and _desc_val.strip():
-                                description = _desc_val.strip()
-                        
-                        # Fill details cache using [ARCHIVE_DETAIL] from ClientOrder.notes if present
-                        archived_detail = None
-                        try:
-                            if pb.client_order_id:
-                                co = session.query(ClientOrder).filter(ClientOrder.id == pb.client_order_id).first()
-                                if co and co.notes and '[ARCHIVE_DETAIL]' in co.notes:
-                                    import json
-                                    # Take the last [ARCHIVE_DETAIL] line
-                                    lines = [ln.strip() for ln in co.notes.splitlines() if ln.strip().startswith('[ARCHIVE_DETAIL]')]
-                                    if lines:
-                                        payload = lines[-1][len('[ARCHIVE_DETAIL] '):].strip()
-                                        archived_detail = json.loads(payload)
-                        except Exception:
-                            archived_detail = None
-
-                        # Use archived detail as fallback to reduce N/A in the list
-                        if archived_detail and isinstance(archived_detail, dict):
-                            q = archived_detail.get('quotation', {}) or {}
-                            so = archived_detail.get('supplier_order', {}) or {}
-                            if description == "N/A":
-                                description = q.get('description') or archived_detail.get('description') or description
-                            if caisse_dimensions == "N/A":
-                                caisse_dimensions = q.get('caisse_dimensions') or caisse_dimensions
-                            if client_name == "N/A":
-                                client_name = archived_detail.get('client_name') or client_name
-
-                        # Push to left list
-                        data.append([str(pb.id), description, client_name, caisse_dimensions])
-
-                        # Assemble rich details text for right panel: include full data from DB (quotation + supplier order)
-                        details_parts = []
-                        # Header
-                        details_parts.append(
-                            (
-                                f"Archive Details\n\n"
-                                f"Lot: {pb.id}  Code: {getattr(pb, 'batch_code', '')}\n"
-                                f"Quantité: {getattr(pb, 'quantity', 'N/A')}   Date production: {getattr(pb, 'production_date', 'N/A')}\n"
-                                f"Client: {client_name}\n"
-                                f"Description: {description}\n"
-                                f"Dimensions caisse: {caisse_dimensions}\n"
-                            )
+                # Get client order and related information
+                client_name = "N/A"
+                description = "N/A"
+                caisse_dimensions = "N/A"
+                archive_date = self._format_archive_date(pb.archived_at)
+
+                # Try to fetch ClientOrder and relations
+                co = session.query(ClientOrder).filter(ClientOrder.id == pb.client_order_id).first() if getattr(pb, 'client_order_id', None) else None
+
+                # Determine client name (prefer ClientOrder, fallback to SupplierOrder line item client)
+                if co and co.client:
+                    client_name = co.client.name
+                elif co and getattr(co, 'supplier_order', None) and co.supplier_order.line_items:
+                    first_li = co.supplier_order.line_items[0]
+                    if getattr(first_li, 'client', None):
+                        client_name = first_li.client.name
+
+                # Determine caisse dimensions (prefer SupplierOrder line item, fallback to quotation line)
+                if co and getattr(co, 'supplier_order', None) and co.supplier_order.line_items:
+                    sli = co.supplier_order.line_items[0]
+                    if all([sli.caisse_length_mm, sli.caisse_width_mm, sli.caisse_height_mm]):
+                        caisse_dimensions = f"{sli.caisse_length_mm}×{sli.caisse_width_mm}×{sli.caisse_height_mm}mm"
+                if caisse_dimensions == "N/A" and co and co.quotation and co.quotation.line_items:
+                    qli = co.quotation.line_items[0]
+                    if all([qli.length_mm, qli.width_mm, qli.height_mm]):
+                        caisse_dimensions = f"{qli.length_mm}×{qli.width_mm}×{qli.height_mm}mm"
+
+                # Determine description (prefer quotation description, then notes, then generated from dims)
+                if co and co.quotation and co.quotation.line_items:
+                    qli = co.quotation.line_items[0]
+                    if qli.description and qli.description.strip():
+                        description = qli.description.strip()
+                    elif co.quotation.notes and co.quotation.notes.strip():
+                        description = co.quotation.notes.strip()
+                    elif all([qli.length_mm, qli.width_mm, qli.height_mm]):
+                        cardboard_info = qli.cardboard_type or 'Standard'
+                        description = f"Carton {cardboard_info} {qli.length_mm}×{qli.width_mm}×{qli.height_mm}mm"
+                # Last resort: use production batch description
+                if description == "N/A":
+                    _desc_val = getattr(pb, 'description', None)
+                    if isinstance(_desc_val, str) and _desc_val.strip():
+                        description = _desc_val.strip()
+
+                # Fill details cache using [ARCHIVE_DETAIL] from ClientOrder.notes if present
+                archived_detail = None
+                try:
+                    if pb.client_order_id:
+                        co = session.query(ClientOrder).filter(ClientOrder.id == pb.client_order_id).first()
+                        if co and co.notes and '[ARCHIVE_DETAIL]' in co.notes:
+                            import json
+                            # Take the last [ARCHIVE_DETAIL] line
+                            lines = [ln.strip() for ln in co.notes.splitlines() if ln.strip().startswith('[ARCHIVE_DETAIL]')]
+                            if lines:
+                                payload = lines[-1][len('[ARCHIVE_DETAIL] '):].strip()
+                                archived_detail = json.loads(payload)
+                except Exception:
+                    archived_detail = None
+
+                # Use archived detail as fallback to reduce N/A in the list
+                if archived_detail and isinstance(archived_detail, dict):
+                    q = archived_detail.get('quotation', {}) or {}
+                    so = archived_detail.get('supplier_order', {}) or {}
+                    if description == "N/A":
+                        description = q.get('description') or archived_detail.get('description') or description
+                    if caisse_dimensions == "N/A":
+                        caisse_dimensions = q.get('caisse_dimensions') or caisse_dimensions
+                    if client_name == "N/A":
+                        client_name = archived_detail.get('client_name') or client_name
+
+                # Push to left list
+                data.append([str(pb.id), description, client_name, caisse_dimensions])
+
+                # Assemble rich details text for right panel: include full data from DB (quotation + supplier order)
+                details_parts = []
+                # Header
+                details_parts.append(
+                    (
+                        f"Archive Details\n\n"
+                        f"Lot: {pb.id}  Code: {getattr(pb, 'batch_code', '')}\n"
+                        f"Quantité: {getattr(pb, 'quantity', 'N/A')}   Date production: {getattr(pb, 'production_date', 'N/A')}\n"
+                        f"Client: {client_name}\n"
+                        f"Description: {description}\n"
+                        f"Dimensions caisse: {caisse_dimensions}\n"
+                    )
+                )
+                # Quotation section
+                if co and co.quotation:
+                    q = co.quotation
+                    details_parts.append(
+                        (
+                            f"\n— Devis —\n"
+                            f"Référence: {q.reference}\nDate: {getattr(q, 'issue_date', 'N/A')}  Valide jusqu'au: {getattr(q, 'valid_until', 'N/A')}\n"
+                            f"Devise: {getattr(q, 'currency', 'DZD')}  Total: {getattr(q, 'total_amount', 'N/A')}\n"
+                            f"Notes: {getattr(q, 'notes', '') or '—'}\n"
                         )
-                        # Quotation section
-                        if co and co.quotation:
-                            q = co.quotation
-                            details_parts.append(
-                                (
-                                    f"\n— Devis —\n"
-                                    f"Référence: {q.reference}\nDate: {getattr(q, 'issue_date', 'N/A')}  Valide jusqu'au: {getattr(q, 'valid_until', 'N/A')}\n"
-                                    f"Devise: {getattr(q, 'currency', 'DZD')}  Total: {getattr(q, 'total_amount', 'N/A')}\n"
-                                    f"Notes: {getattr(q, 'notes', '') or '—'}\n"
-                                )
+                    )
+                    if q.line_items:
+                        details_parts.append("Lignes de devis:")
+                        for li in q.line_items:
+                            dims = (
+                                f"{li.length_mm}×{li.width_mm}×{li.height_mm}mm" if all([li.length_mm, li.width_mm, li.height_mm]) else "N/A"
                             )
-                            if q.line_items:
-                                details_parts.append("Lignes de devis:")
-                                for li in q.line_items:
-                                    dims = (
-                                        f"{li.length_mm}×{li.width_mm}×{li.height_mm}mm" if all([li.length_mm, li.width_mm, li.height_mm]) else "N/A"
-                                    )
-                                    color = getattr(li, 'color', None)
-                                    color_val = color.value if color else None
-                                    details_parts.append(
-                                        (
-                                            f"  - #{li.line_number} {li.description or ''}\n"
-                                            f"    Qté: {li.quantity}  PU: {getattr(li, 'unit_price', 'N/A')}  Total: {getattr(li, 'total_price', 'N/A')}\n"
-                                            f"    Dimensions caisse: {dims}  Couleur: {color_val or 'N/A'}  Carton: {li.cardboard_type or 'N/A'}\n"
-                                            f"    Réf matière: {getattr(li, 'material_reference', '') or '—'}  Cliché: {'Oui' if getattr(li, 'is_cliche', False) else 'Non'}\n"
-                                        )
-                                    )
-                        # Supplier order section
-                        if co and getattr(co, 'supplier_order', None):
-                            so = co.supplier_order
-                            supplier_name = getattr(getattr(so, 'supplier', None), 'name', 'N/A')
+                            color = getattr(li, 'color', None)
+                            color_val = color.value if color else None
                             details_parts.append(
                                 (
-                                    f"\n— Commande Matière Première —\n"
-                                    f"Bon: {getattr(so, 'bon_commande_ref', getattr(so, 'reference', 'N/A'))}  Date: {getattr(so, 'order_date', 'N/A')}  Statut: {getattr(so, 'status', 'N/A')}\n"
-                                    f"Fournisseur: {supplier_name}  Total: {getattr(so, 'total_amount', 'N/A')} {getattr(so, 'currency', 'DZD')}\n"
-                                    f"Notes: {getattr(so, 'notes', '') or '—'}\n"
+                                    f"  - #{li.line_number} {li.description or ''}\n"
+                                    f"    Qté: {li.quantity}  PU: {getattr(li, 'unit_price', 'N/A')}  Total: {getattr(li, 'total_price', 'N/A')}\n"
+                                    f"    Dimensions caisse: {dims}  Couleur: {color_val or 'N/A'}  Carton: {li.cardboard_type or 'N/A'}\n"
+                                    f"    Réf matière: {getattr(li, 'material_reference', '') or '—'}  Cliché: {'Oui' if getattr(li, 'is_cliche', False) else 'Non'}\n"
                                 )
                             )
-                            if so.line_items:
-                                details_parts.append("Lignes de commande:")
-                                for li in so.line_items:
-                                    caisse = f"{li.caisse_length_mm}×{li.caisse_width_mm}×{li.caisse_height_mm}mm"
-                                    plaque = f"{li.plaque_width_mm}×{li.plaque_length_mm}mm" + (f" (Rabat: {li.plaque_flap_mm}mm)" if getattr(li, 'plaque_flap_mm', None) else "")
-                                    details_parts.append(
-                                        (
-                                            f"  - {li.code_article}  Qté plaques: {li.quantity}  UTTC: {getattr(li, 'prix_uttc_plaque', 'N/A')}  Total: {getattr(li, 'total_line_amount', 'N/A')}\n"
-                                            f"    Caisse: {caisse}  Plaque: {plaque}\n"
-                                            f"    Client: {getattr(getattr(li, 'client', None), 'name', 'N/A')}  Réf matière: {getattr(li, 'material_reference', '') or '—'}  Carton: {getattr(li, 'cardboard_type', '') or '—'}\n"
-                                            f"    Notes: {getattr(li, 'notes', '') or '—'}\n"
-                                        )
-                                    )
-
-                        # Delivery and invoice quick summary
-                        if co:
-                            try:
-                                deliveries = session.query(Delivery).filter(Delivery.client_order_id == co.id).all()
-                                delivered_qty = sum(getattr(d, 'quantity', 0) or 0 for d in deliveries)
-                                invoices = session.query(Invoice).filter(Invoice.client_order_id == co.id).all()
-                                details_parts.append(
-                                    (
-                                        f"\n— Suivi —\n"
-                                        f"Livraisons: {len(deliveries)}  Quantité livrée: {delivered_qty}\n"
-                                        f"Factures: {len(invoices)}\n"
-                                    )
-                                )
-                            except Exception:
-                                pass
-                        elif archived_detail and isinstance(archived_detail, dict):
-                            # Provide minimal summary from archived detail if DB relations are absent
-                            q = archived_detail.get('quotation', {})
-                            so = archived_detail.get('supplier_order', {})
-                            details_parts.append("\n— Données archivées —")
+                # Supplier order section
+                if co and getattr(co, 'supplier_order', None):
+                    so = co.supplier_order
+                    supplier_name = getattr(getattr(so, 'supplier', None), 'name', 'N/A')
+                    details_parts.append(
+                        (
+                            f"\n— Commande Matière Première —\n"
+                            f"Bon: {getattr(so, 'bon_commande_ref', getattr(so, 'reference', 'N/A'))}  Date: {getattr(so, 'order_date', 'N/A')}  Statut: {getattr(so, 'status', 'N/A')}\n"
+                            f"Fournisseur: {supplier_name}  Total: {getattr(so, 'total_amount', 'N/A')} {getattr(so, 'currency', 'DZD')}\n"
+                            f"Notes: {getattr(so, 'notes', '') or '—'}\n"
+                        )
+                    )
+                    if so.line_items:
+                        details_parts.append("Lignes de commande:")
+                        for li in so.line_items:
+                            caisse = f"{li.caisse_length_mm}×{li.caisse_width_mm}×{li.caisse_height_mm}mm"
+                            plaque = f"{li.plaque_width_mm}×{li.plaque_length_mm}mm" + (f" (Rabat: {li.plaque_flap_mm}mm)" if getattr(li, 'plaque_flap_mm', None) else "")
                             details_parts.append(
                                 (
-                                    f"Devis: {q.get('reference', 'N/A')}  PU: {q.get('unit_price', 'N/A')}  Total: {q.get('total_price', 'N/A')}\n"
-                                    f"Description: {q.get('description', 'N/A')}  Caisse: {q.get('caisse_dimensions', 'N/A')}  Carton: {q.get('cardboard_type', 'N/A')}  Couleur: {q.get('color', 'N/A')}\n"
+                                    f"  - {li.code_article}  Qté plaques: {li.quantity}  UTTC: {getattr(li, 'prix_uttc_plaque', 'N/A')}  Total: {getattr(li, 'total_line_amount', 'N/A')}\n"
+                                    f"    Caisse: {caisse}  Plaque: {plaque}\n"
+                                    f"    Client: {getattr(getattr(li, 'client', None), 'name', 'N/A')}  Réf matière: {getattr(li, 'material_reference', '') or '—'}  Carton: {getattr(li, 'cardboard_type', '') or '—'}\n"
+                                    f"    Notes: {getattr(li, 'notes', '') or '—'}\n"
                                 )
                             )
-                            details_parts.append(
-                                (
-                                    f"BC Matière: {so.get('reference', 'N/A')}  Plaque: {so.get('plaque_dimensions', 'N/A')}  UTTC: {so.get('prix_uttc_plaque', 'N/A')}  Total: {so.get('total_amount', 'N/A')}\n"
-                                )
+
+                # Delivery and invoice quick summary
+                if co:
+                    try:
+                        deliveries = session.query(Delivery).filter(Delivery.client_order_id == co.id).all()
+                        delivered_qty = sum(getattr(d, 'quantity', 0) or 0 for d in deliveries)
+                        invoices = session.query(Invoice).filter(Invoice.client_order_id == co.id).all()
+                        details_parts.append(
+                            (
+                                f"\n— Suivi —\n"
+                                f"Livraisons: {len(deliveries)}  Quantité livrée: {delivered_qty}\n"
+                                f"Factures: {len(invoices)}\n"
                             )
+                        )
+                    except Exception:
+                        pass
+                elif archived_detail and isinstance(archived_detail, dict):
+                    # Provide minimal summary from archived detail if DB relations are absent
+                    q = archived_detail.get('quotation', {})
+                    so = archived_detail.get('supplier_order', {})
+                    details_parts.append("\n— Données archivées —")
+                    details_parts.append(
+                        (
+                            f"Devis: {q.get('reference', 'N/A')}  PU: {q.get('unit_price', 'N/A')}  Total: {q.get('total_price', 'N/A')}\n"
+                            f"Description: {q.get('description', 'N/A')}  Caisse: {q.get('caisse_dimensions', 'N/A')}  Carton: {q.get('cardboard_type', 'N/A')}  Couleur: {q.get('color', 'N/A')}\n"
+                        )
+                    )
+                    details_parts.append(
+                        (
+                            f"BC Matière: {so.get('reference', 'N/A')}  Plaque: {so.get('plaque_dimensions', 'N/A')}  UTTC: {so.get('prix_uttc_plaque', 'N/A')}  Total: {so.get('total_amount', 'N/A')}\n"
+                        )
+                    )
 
-                        # Include archived detail timestamp if present
-                        if archived_detail and isinstance(archived_detail, dict):
-                            details_parts.append(f"\nArchivé le: {archived_detail.get('archived_at', archive_date)}")
-                        else:
-                            details_parts.append(f"\nArchivé le: {archive_date}")
+                # Include archived detail timestamp if present
+                if archived_detail and isinstance(archived_detail, dict):
+                    details_parts.append(f"\nArchivé le: {archived_detail.get('archived_at', archive_date)}")
+                else:
+                    details_parts.append(f"\nArchivé le: {archive_date}")
 
-                        details_text = "\n".join(details_parts)
+                details_text = "\n".join(details_parts)
 
-                        self._details_cache[str(pb.id)] = details_text
-                        
-                    except Exception as e:
-                        print(f"Error processing production batch {pb.id}: {e}")
-                        continue
-                
-                # Sort by archive date (newest first)
-                # Sort by description ascending for easy scan
-                try:
-                    data.sort(key=lambda x: (x[1] or '').lower())
-                except Exception:
-                    pass
+                details_cache[str(pb.id)] = details_text
 
-                self.list_table.load_data(data)
-                
-            finally:
-                session.close()
-        except Exception as e:
-            print(f"Error loading archived transactions: {e}")
-            traceback.print_exc()
+            except Exception as e:
+                print(f"Error processing production batch {pb.id}: {e}")
+                continue
 
-    def _extract_archive_date(self, notes: str) -> str:
-        """Extract archive date from notes field"""
-        if not notes or '[ARCHIVED]' not in notes:
-            return "Unknown"
-        
-        # For now, use current date since we don't store archive timestamp
-        # In future, we could enhance this to store actual archive timestamp
-        return datetime.now().strftime('%Y-%m-%d %H:%M')
-    
-    def _extract_archive_date_from_batch_code(self, batch_code: str) -> str:
-        """Extract archive date from batch code"""
-        if not batch_code or '[ARCHIVED]' not in batch_code:
+        # Sort by archive date (newest first)
+        # Sort by description ascending for easy scan
+        try:
+            data.sort(key=lambda x: (x[1] or '').lower())
+        except Exception:
+            pass
+
+        return data, details_cache
+
+    def _format_archive_date(self, archived_at) -> str:
+        """Format an archived_at timestamp for display"""
+        if not archived_at:
             return "Unknown"
-        
-        return datetime.now().strftime('%Y-%m-%d %H:%M')
+        return archived_at.strftime('%Y-%m-%d %H:%M')
     
     def _handle_restore_request(self, item_type: str, item_id: int):
         """Handle restore request for archived item"""
@@ -632,7 +644,7 @@ class ArchiveWidget(QWidget):
                     QMessageBox.warning(self, 'Not found', 'Archived production lot not found.')
                     return
                 # Only allow delete if it is archived
-                if not (pb.batch_code or '').startswith('[ARCHIVED]'):
+                if pb.archived_at is None:
                     QMessageBox.information(self, 'Blocked', 'Only archived lots can be deleted.')
                     return
                 session.delete(pb)
@@ -668,32 +680,28 @@ class ArchiveWidget(QWidget):
                 
                 if item_type == "quotation":
                     quotation = session.query(Quotation).filter(Quotation.id == item_id).first()
-                    if quotation and quotation.notes and '[ARCHIVED]' in quotation.notes:
-                        quotation.notes = quotation.notes.replace('[ARCHIVED]', '').strip()
-                        if not quotation.notes:
-                            quotation.notes = None
+                    if quotation and quotation.archived_at is not None:
+                        quotation.archived_at = None
                         success = True
                 
                 elif item_type == "client_order":
                     client_order = session.query(ClientOrder).filter(ClientOrder.id == item_id).first()
-                    if client_order and client_order.notes and '[ARCHIVED]' in client_order.notes:
-                        client_order.notes = client_order.notes.replace('[ARCHIVED]', '').strip()
-                        if not client_order.notes:
-                            client_order.notes = None
+                    if client_order and client_order.archived_at is not None:
+                        client_order.archived_at = None
                         success = True
                 
                 elif item_type == "production_batch":
                     production_batch = session.query(ProductionBatch).filter(ProductionBatch.id == item_id).first()
-                    if production_batch and '[ARCHIVED]' in production_batch.batch_code:
-                        production_batch.batch_code = production_batch.batch_code.replace('[ARCHIVED]', '').strip()
+                    if production_batch and production_batch.archived_at is not None:
+                        production_batch.archived_at = None
                         success = True
                 
                 elif item_type == "archived_transaction":
                     # For archived transactions, we restore the entire workflow starting from production batch
                     production_batch = session.query(ProductionBatch).filter(ProductionBatch.id == item_id).first()
-                    if production_batch and '[ARCHIVED]' in production_batch.batch_code:
+                    if production_batch and production_batch.archived_at is not None:
                         # Remove archive marker from production batch
-                        production_batch.batch_code = production_batch.batch_code.replace('[ARCHIVED]', '').strip()
+                        production_batch.archived_at = None
                         
                         # Restore related client order if exists
                         if production_batch.client_order_id:
@@ -701,24 +709,18 @@ class ArchiveWidget(QWidget):
                                 ClientOrder.id == production_batch.client_order_id
                             ).first()
                             
-                            if client_order and client_order.notes and '[ARCHIVED]' in client_order.notes:
-                                client_order.notes = client_order.notes.replace('[ARCHIVED]', '').strip()
-                                if not client_order.notes:
-                                    client_order.notes = None
+                            if client_order and client_order.archived_at is not None:
+                                client_order.archived_at = None
                                 
                                 # Restore related quotation if exists
-                                if client_order.quotation and client_order.quotation.notes and '[ARCHIVED]' in client_order.quotation.notes:
-                                    client_order.quotation.notes = client_order.quotation.notes.replace('[ARCHIVED]', '').strip()
-                                    if not client_order.quotation.notes:
-                                        client_order.quotation.notes = None
+                                if client_order.quotation and client_order.quotation.archived_at is not None:
+                                    client_order.quotation.archived_at = None
                                 
                                 # Restore related supplier order if exists
                                 if hasattr(client_order, 'supplier_order') and client_order.supplier_order:
                                     supplier_order = client_order.supplier_order
-                                    if supplier_order.notes and '[ARCHIVED]' in supplier_order.notes:
-                                        supplier_order.notes = supplier_order.notes.replace('[ARCHIVED]', '').strip()
-                                        if not supplier_order.notes:
-                                            supplier_order.notes = None
+                                    if supplier_order.archived_at is not None:
+                                        supplier_order.archived_at = None
                         
                         success = True
                 
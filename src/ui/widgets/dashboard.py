@@ -4,15 +4,13 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
                             QTableWidget, QTableWidgetItem, QProgressBar)
 from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from PyQt6.QtGui import QFont, QPalette
-from config.database import SessionLocal
 from models.suppliers import Supplier
 from models.clients import Client
-from models.orders import ClientOrder, SupplierOrder, SupplierOrderLineItem, MaterialDelivery, StockMovement, StockMovementType, Delivery, Quotation, Reception
-from models.production import ProductionBatch
-from models.orders import ClientOrderStatus, SupplierOrderStatus
 from ui.styles import IconManager
+from ui.background_loader import BackgroundLoader
+from services.dashboard_metrics import load_dashboard_data
+from utils.instrumentation import timed
 from typing import Dict, Any, List
-from sqlalchemy.sql import func
 import datetime
 
 
@@ -258,9 +256,12 @@ class Dashboard(QWidget):
     
     actionTriggered = pyqtSignal(str)
     tabChangeRequested = pyqtSignal(int)
+    # Emitted after each refresh attempt (also on failure), e.g. to close the splash screen
+    dataLoaded = pyqtSignal()
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._loader = BackgroundLoader(self)
         self._setup_ui()
         self._setup_refresh_timer()
         
@@ -360,235 +361,43 @@ class Dashboard(QWidget):
             # Continue timer despite errors
         
     def refresh_data(self):
-        """Refresh dashboard data"""
-        session = SessionLocal()
-        try:
-            # Removed non-essential KPI updates (clients, fournisseurs, commandes, en production)
+        """Refresh dashboard data (queries run on a background thread)"""
+        self._loader.submit(self._load_data, self._apply_data, self._on_load_failed)
 
-            # Compute requested KPIs
-            plaques_stock = self._compute_plaques_stock(session)
-            devis_unconfirmed = self._compute_unconfirmed_quotations(session)
-            supplier_initial = self._compute_supplier_orders_initial(session)
+    def _on_load_failed(self, message: str):
+        print(f"Error refreshing dashboard: {message}")
+        self.dataLoaded.emit()
 
-            self.plaques_stock_card.update_value(str(plaques_stock))
-            self.devis_unconfirmed_card.update_value(str(devis_unconfirmed))
-            self.supplier_initial_card.update_value(str(supplier_initial))
+    @timed('dashboard.refresh')
+    def _load_data(self, session) -> Dict[str, Any]:
+        """Compute dashboard figures off the GUI thread; returns plain values only"""
+        return load_dashboard_data(session)
 
-            # Populate tables (PF top-10 removed)
-            self._populate_supplier_table(session)
-            
-            # Update recent activities
-            self._update_recent_activities(session)
-            
+    @timed('dashboard.apply')
+    def _apply_data(self, data: Dict[str, Any]):
+        try:
+            self.plaques_stock_card.update_value(str(data['plaques_stock']))
+            self.devis_unconfirmed_card.update_value(str(data['devis_unconfirmed']))
+            self.supplier_initial_card.update_value(str(data['supplier_initial']))
+            self._populate_supplier_table(data['supplier_rows'])
+            self._update_recent_activities(data['activities'])
         except Exception as e:
             print(f"Error refreshing dashboard: {e}")
-        finally:
-            session.close()
-
-    # ----- KPI computations -----
-    def _compute_plaques_stock(self, session) -> int:
-        """Approximate plaques stock = total deliveries - stock OUT/WASTE movements."""
-        try:
-            # Align with stock grid: count only non-archived receptions as incoming plaques
-            delivered = (
-                session.query(func.coalesce(func.sum(Reception.quantity), 0))
-                .join(Reception.supplier_order)
-                .filter(
-                    ~SupplierOrder.notes.like('[ARCHIVED]%'),
-                    ~Reception.notes.like('[ARCHIVED]%')
-                )
-                .scalar() or 0
-            )
-        except Exception:
-            delivered = 0
-        try:
-            outs = session.query(func.coalesce(func.sum(StockMovement.quantity), 0)).filter(
-                StockMovement.movement_type.in_([StockMovementType.OUT, StockMovementType.WASTE])
-            ).scalar() or 0
-        except Exception:
-            outs = 0
-        return max(0, int(delivered) - int(outs))
-
-    def _compute_finished_products_stock(self, session) -> tuple[int, list[dict]]:
-        """Compute finished products stock aggregated by designation and client.
-        Returns (total_stock, rows) where rows contain designation, client, produced, delivered, stock, percent.
-        """
-        rows: list[dict] = []
-        total_stock = 0
-        try:
-            # Produced per client order (exclude archived batches so dashboard matches stock view)
-            produced_by_order = dict(
-                session.query(
-                    ClientOrder.id,
-                    func.coalesce(func.sum(ProductionBatch.quantity), 0)
-                )
-                .join(ProductionBatch, ProductionBatch.client_order_id == ClientOrder.id)
-                .filter(~ProductionBatch.batch_code.like('[ARCHIVED]%'))
-                .group_by(ClientOrder.id)
-                .all()
-            )
-
-            # Delivered per client order (deliveries are never archived at batch level, keep as-is)
-            delivered_by_order = dict(
-                session.query(
-                    ClientOrder.id,
-                    func.coalesce(func.sum(Delivery.quantity), 0)
-                )
-                .join(Delivery, Delivery.client_order_id == ClientOrder.id)
-                .group_by(ClientOrder.id)
-                .all()
-            )
-
-            # For each order, derive designation and client
-            orders = session.query(ClientOrder).all()
-            for order in orders:
-                produced = int(produced_by_order.get(order.id, 0) or 0)
-                delivered = int(delivered_by_order.get(order.id, 0) or 0)
-                stock = max(0, produced - delivered)
-                if stock <= 0:
-                    continue
-
-                # Derive designation: prefer quotation line item description, else client order line item description, else composed dims
-                designation = "Produit fini"
-                client_name = order.client.name if order.client else ""
-                try:
-                    if order.quotation and order.quotation.line_items:
-                        qli = order.quotation.line_items[0]
-                        if qli.description:
-                            designation = qli.description
-                        elif qli.length_mm and qli.width_mm and qli.height_mm:
-                            designation = f"Caisse carton {qli.length_mm}×{qli.width_mm}×{qli.height_mm}"
-                    elif order.line_items:
-                        cli = order.line_items[0]
-                        if cli.description:
-                            designation = cli.description
-                        elif cli.length_mm and cli.width_mm and cli.height_mm:
-                            designation = f"Caisse carton {cli.length_mm}×{cli.width_mm}×{cli.height_mm}"
-                except Exception:
-                    pass
-
-                # Compute percentage relative to the EXACT linked raw material (plaques) in stock
-                # Strategy:
-                # 1) Identify target caisse dimensions from quotation/client order line item
-                # 2) Prefer supplier order linked to this client order; otherwise fall back to any matching line items for the same client and dims
-                # 3) Sum MaterialDelivery.received_quantity for matched SupplierOrderLineItem(s) whose SupplierOrder is not archived
-                raw_qty = 0
-                try:
-                    target_dims = None  # (L, W, H)
-                    if order.quotation and order.quotation.line_items:
-                        qli = order.quotation.line_items[0]
-                        if qli.length_mm and qli.width_mm and qli.height_mm:
-                            target_dims = (int(qli.length_mm), int(qli.width_mm), int(qli.height_mm))
-                    if target_dims is None and order.line_items:
-                        cli = order.line_items[0]
-                        if cli.length_mm and cli.width_mm and cli.height_mm:
-                            target_dims = (int(cli.length_mm), int(cli.width_mm), int(cli.height_mm))
-
-                    if target_dims is not None:
-                        L, W, H = target_dims
-                        # First, try to compute raw_qty strictly from non-archived Receptions
-                        # whose SupplierOrder has a line item for the same client and EXACT caisse dimensions,
-                        # and whose notes contain the dimension string (as used in stock display).
-                        dim_pattern = f"%{L}x{W}x{H}mm%"
-                        raw_qty = int(
-                            session.query(func.coalesce(func.sum(Reception.quantity), 0))
-                            .join(Reception.supplier_order)
-                            .join(SupplierOrderLineItem, SupplierOrderLineItem.supplier_order_id == SupplierOrder.id)
-                            .filter(
-                                SupplierOrderLineItem.client_id == order.client_id,
-                                SupplierOrderLineItem.caisse_length_mm == L,
-                                SupplierOrderLineItem.caisse_width_mm == W,
-                                SupplierOrderLineItem.caisse_height_mm == H,
-                                ~SupplierOrder.notes.like('[ARCHIVED]%'),
-                                ~Reception.notes.like('[ARCHIVED]%'),
-                                Reception.notes.like(dim_pattern)
-                            )
-                            .scalar() or 0
-                        )
-
-                        # Fallback: if no reception-based qty found, use exact matching line items' deliveries (non-archived supplier orders)
-                        if raw_qty == 0:
-                            li_q = (
-                                session.query(SupplierOrderLineItem)
-                                .join(SupplierOrder, SupplierOrderLineItem.supplier_order_id == SupplierOrder.id)
-                                .filter(
-                                    SupplierOrderLineItem.client_id == order.client_id,
-                                    SupplierOrderLineItem.caisse_length_mm == L,
-                                    SupplierOrderLineItem.caisse_width_mm == W,
-                                    SupplierOrderLineItem.caisse_height_mm == H,
-                                    ~SupplierOrder.notes.like('[ARCHIVED]%')
-                                )
-                            )
-                            if order.supplier_order_id:
-                                li_q = li_q.filter(SupplierOrderLineItem.supplier_order_id == order.supplier_order_id)
-                            matching_items = li_q.all()
-                            if matching_items:
-                                raw_qty = int(
-                                    session.query(func.coalesce(func.sum(MaterialDelivery.received_quantity), 0))
-                                    .filter(MaterialDelivery.supplier_order_line_item_id.in_([li.id for li in matching_items]))
-                                    .scalar() or 0
-                                )
-                except Exception:
-                    raw_qty = 0
-
-                percent = int(round((stock / raw_qty) * 100)) if raw_qty > 0 else 0
-                rows.append({
-                    'designation': designation,
-                    'client': client_name,
-                    'produced': produced,
-                    'delivered': delivered,
-                    'stock': stock,
-                    'percent': percent
-                })
-                total_stock += stock
-
-            # Sort by stock desc and limit top 10
-            rows.sort(key=lambda r: r['stock'], reverse=True)
-            rows = rows[:10]
-        except Exception:
-            pass
-        return total_stock, rows
-
-    def _compute_unconfirmed_quotations(self, session) -> int:
-        """Count quotations not converted to client orders."""
-        try:
-            # Quotations with no linked client_order
-            return session.query(Quotation).filter(Quotation.client_order == None).count()
-        except Exception:
-            return 0
-
-    def _compute_supplier_orders_initial(self, session) -> int:
-        """Count supplier orders not yet passed (status INITIAL)."""
-        try:
-            return session.query(SupplierOrder).filter(SupplierOrder.status == SupplierOrderStatus.INITIAL).count()
-        except Exception:
-            return 0
+        self.dataLoaded.emit()
 
     # ----- Table population -----
 
-    def _populate_supplier_table(self, session):
+    def _populate_supplier_table(self, rows: List[List[Any]]):
         try:
             self.supplier_table.setRowCount(0)
-            q = session.query(SupplierOrderLineItem, SupplierOrder).join(SupplierOrder, SupplierOrderLineItem.supplier_order_id == SupplierOrder.id)
-            q = q.filter(SupplierOrder.status != SupplierOrderStatus.COMPLETED)
-            items = q.order_by(SupplierOrder.order_date.desc(), SupplierOrderLineItem.line_number.asc()).limit(50).all()
-            for li, so in items:
-                ordered = int(li.quantity or 0)
-                received = int(li.total_received_quantity or 0)
-                remaining = max(0, ordered - received)
+            for values in rows:
                 row = self.supplier_table.rowCount()
                 self.supplier_table.insertRow(row)
-                self.supplier_table.setItem(row, 0, QTableWidgetItem(so.reference or so.bon_commande_ref))
-                self.supplier_table.setItem(row, 1, QTableWidgetItem(str(li.line_number)))
-                self.supplier_table.setItem(row, 2, QTableWidgetItem(li.client.name if li.client else ""))
-                designation = li.material_reference or li.cardboard_type or "Article"
-                self.supplier_table.setItem(row, 3, QTableWidgetItem(designation))
-                self.supplier_table.setItem(row, 4, QTableWidgetItem(str(ordered)))
-                self.supplier_table.setItem(row, 5, QTableWidgetItem(str(received)))
-                self.supplier_table.setItem(row, 6, QTableWidgetItem(str(remaining)))
+                for col, text in enumerate(values[:7]):
+                    self.supplier_table.setItem(row, col, QTableWidgetItem(text))
                 # Progress bar
+                percent = values[7]
                 prog = QProgressBar()
-                percent = int(round((received / ordered) * 100)) if ordered > 0 else 0
                 prog.setValue(percent)
                 prog.setFormat(f"{percent}%")
                 prog.setStyleSheet("QProgressBar { border: 1px solid #ced4da; border-radius: 4px; text-align: center; }"
@@ -596,65 +405,15 @@ class Dashboard(QWidget):
                 self.supplier_table.setCellWidget(row, 7, prog)
         except Exception as e:
             print(f"Supplier table update failed: {e}")
-            
-    def _update_recent_activities(self, session):
+
+    def _update_recent_activities(self, activities: List[tuple[str, str, str]]):
         """Update recent activities list"""
         try:
-            # Get recent orders with error handling
-            try:
-                recent_orders = session.query(ClientOrder).order_by(ClientOrder.id.desc()).limit(5).all()
-            except Exception:
-                recent_orders = []
-            
-            try:
-                recent_supplier_orders = session.query(SupplierOrder).order_by(SupplierOrder.id.desc()).limit(3).all()
-            except Exception:
-                recent_supplier_orders = []
-            
-            try:
-                recent_batches = session.query(ProductionBatch).order_by(ProductionBatch.id.desc()).limit(3).all()
-            except Exception:
-                recent_batches = []
-            
             # Clear existing activities
             if hasattr(self, 'activities_widget'):
                 self.activities_widget.clear_activities()
-            
-            # Add recent client orders
-            for order in recent_orders:
-                try:
-                    self.activities_widget.add_activity(
-                        "D", 
-                        f"Commande client {order.reference} - {order.status.value}",
-                        "Récent",
-                        "#FFC107"
-                    )
-                except Exception:
-                    pass
-                
-            # Add recent supplier orders
-            for order in recent_supplier_orders:
-                try:
-                    self.activities_widget.add_activity(
-                        "CM", 
-                        f"Commande fournisseur {order.reference} - {order.status.value}",
-                        "Récent",
-                        "#6F42C1"
-                    )
-                except Exception:
-                    pass
-                
-            # Add recent production batches
-            for batch in recent_batches:
-                try:
-                    self.activities_widget.add_activity(
-                        "P", 
-                        f"Production lot {batch.batch_code} - {batch.production_date.strftime('%Y-%m-%d') if batch.production_date else 'N/A'}",
-                        "Récent",
-                        "#20C997"
-                    )
-                except Exception:
-                    pass
+            for icon, text, color in activities:
+                self.activities_widget.add_activity(icon, text, "Récent", color)
         except Exception as e:
             print(f"Error updating recent activities: {e}")
             
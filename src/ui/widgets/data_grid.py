@@ -1,8 +1,10 @@
 from __future__ import annotations
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView, QLabel, QPushButton, QMenu
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QTableView, QHeaderView, QLabel, QPushButton, QMenu
 from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from PyQt6.QtGui import QFont, QAction, QColor
 from typing import Sequence, Callable, Optional
+from ui.widgets.row_table_model import RowTableModel, RowFilterProxyModel
+from utils.search_index import RowSearchIndex
 
 
 class DataGrid(QWidget):
@@ -13,17 +15,37 @@ class DataGrid(QWidget):
     # Signal emitted before context menu is shown (row_index, row_data, menu)
     contextMenuAboutToShow = pyqtSignal(int, list, QMenu)
     
-    def __init__(self, headers: Sequence[str], parent=None):
+    def __init__(self, headers: Sequence[str], parent=None, virtual: bool = False):
+        """virtual=True backs the grid with a RowTableModel + proxy (QTableView) instead of
+        one QTableWidgetItem per cell; suited to large datasets. The public API is the same.
+        """
         super().__init__(parent)
         self.headers = list(headers)
-        self.table = QTableWidget(0, len(self.headers))
+        self._model: Optional[RowTableModel] = None
+        self._proxy: Optional[RowFilterProxyModel] = None
+        if virtual:
+            self._model = RowTableModel(self.headers, self)
+            self._proxy = RowFilterProxyModel(self)
+            self._proxy.setSourceModel(self._model)
+            self.table = QTableView()
+            self.table.setModel(self._proxy)
+        else:
+            self.table = QTableWidget(0, len(self.headers))
         self._setup_table()
         self._build_ui()
         self._all_rows: list[list[str]] = []
+        self._row_colors: list[Optional[str]] = []
+        # Active filter tokens (virtual mode re-applies them when the data changes)
+        self._filter_tokens: list[str] = []
+        self._search_index: Optional[RowSearchIndex] = None
         self._context_actions: list[tuple[str, str, str]] = []  # (action_name, label, icon)
 
+    def is_virtual(self) -> bool:
+        return self._model is not None
+
     def _setup_table(self):
-        self.table.setHorizontalHeaderLabels(self.headers)
+        if not self.is_virtual():
+            self.table.setHorizontalHeaderLabels(self.headers)
         
         # Configure headers with intelligent sizing
         h_header = self.table.horizontalHeader()
@@ -65,7 +87,12 @@ class DataGrid(QWidget):
         self.table.setCornerButtonEnabled(False)
         
         # Connect double-click signal
-        self.table.itemDoubleClicked.connect(self._on_item_double_clicked)
+        if self.is_virtual():
+            self.table.doubleClicked.connect(lambda index: self.rowDoubleClicked.emit(index.row()))
+            # Same initial order as the QTableWidget renderer (first column ascending)
+            self.table.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        else:
+            self.table.itemDoubleClicked.connect(self._on_item_double_clicked)
         
         # Enable context menu
         self.table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
@@ -116,6 +143,10 @@ class DataGrid(QWidget):
         Garantit un rendu stable même avec le tri activé.
         """
         self._all_rows = [list(map(lambda v: '' if v is None else str(v), r)) for r in rows]
+        self._row_colors = [None] * len(self._all_rows)
+        if self._model is not None:
+            self._load_model()
+            return
         self._render_rows(self._all_rows)
         self._update_info_label(len(self._all_rows))
         # Adjust column widths after loading data
@@ -126,15 +157,138 @@ class DataGrid(QWidget):
         row_colors: list of color codes (e.g., '#ffeeee', 'lightblue') or None for default color
         """
         self._all_rows = [list(map(lambda v: '' if v is None else str(v), r)) for r in rows]
+        self._row_colors = [row_colors[i] if row_colors and i < len(row_colors) else None for i in range(len(self._all_rows))]
+        if self._model is not None:
+            self._load_model()
+            return
         self._render_rows_with_colors(self._all_rows, row_colors)
         self._update_info_label(len(self._all_rows))
         # Adjust column widths after loading data
         QTimer.singleShot(10, self._adjust_column_widths)
 
+    def _load_model(self):
+        """Virtual mode: hand the rows to the model; the view materialises visible cells only."""
+        matches = self._current_matches()
+        self._proxy.set_visible_rows(matches, relayout=False)
+        self._model.set_rows(self._all_rows, self._row_colors)
+        self._update_info_label(len(self._all_rows) if matches is None else len(matches), len(self._all_rows))
+        QTimer.singleShot(10, self._adjust_column_widths)
+
+    def _apply_row_filter(self):
+        """Virtual mode: push the rows matching the active filter to the proxy."""
+        matches = self._current_matches()
+        self._proxy.set_visible_rows(matches)
+        self._update_info_label(len(self._all_rows) if matches is None else len(matches), len(self._all_rows))
+
+    def _current_matches(self) -> Optional[list[int]]:
+        return self._get_search_index().matching_rows(self._filter_tokens) if self._filter_tokens else None
+
+    def _get_search_index(self) -> RowSearchIndex:
+        """Lowercase search index of the current dataset, built on the first filter after a load."""
+        if self._search_index is None or self._search_index.rows is not self._all_rows:
+            self._search_index = RowSearchIndex(self._all_rows)
+        return self._search_index
+
+    def _filter_rows(self, tokens: list[str]):
+        """Show the rows containing any of the tokens (all rows when there is none)."""
+        self._filter_tokens = tokens
+        if self._model is not None:
+            self._apply_row_filter()
+            return
+        matches = self._get_search_index().matching_rows(tokens)
+        if matches is None:
+            self._render_rows(self._all_rows)
+            self._update_info_label(len(self._all_rows))
+            return
+        filtered = [self._all_rows[i] for i in matches]
+        self._render_rows(filtered)
+        self._update_info_label(len(filtered), len(self._all_rows))
+
     def refresh_data(self, rows: Sequence[Sequence[str]]):
         """Refresh table data and adjust column widths."""
         self.load_rows(rows)
 
+    def update_rows(self, rows: Sequence[Sequence[str]], row_colors: Optional[Sequence[Optional[str]]] = None) -> int:
+        """Patch the grid in place with a new dataset instead of re-rendering every cell.
+        Rows are matched on their first column (ID): changed rows are updated, missing
+        rows removed and new rows appended. Falls back to a full load when the grid
+        currently shows a filtered subset or when IDs are not unique.
+        Returns the number of rows that were inserted, updated or removed.
+        """
+        new_rows = [list(map(lambda v: '' if v is None else str(v), r)) for r in rows]
+        new_colors = [row_colors[i] if row_colors and i < len(row_colors) else None for i in range(len(new_rows))]
+        if self._model is not None:
+            # The proxy filters and sorts on top of the model, so patching works even when filtered
+            self._all_rows = new_rows
+            self._row_colors = new_colors
+            matches = self._current_matches()
+            self._proxy.set_visible_rows(matches, relayout=False)
+            changed = self._model.update_rows(new_rows, new_colors)
+            self._update_info_label(len(self._all_rows) if matches is None else len(matches), len(self._all_rows))
+            if changed:
+                QTimer.singleShot(10, self._adjust_column_widths)
+            return changed
+        old_entries = {row[0]: (row, color) for row, color in zip(self._all_rows, self._row_colors) if row}
+        new_entries = {row[0]: (row, color) for row, color in zip(new_rows, new_colors) if row}
+
+        positions: dict[str, int] = {}
+        for r_index in range(self.table.rowCount()):
+            item = self.table.item(r_index, 0)
+            if item is not None:
+                positions[item.data(Qt.ItemDataRole.UserRole)] = r_index
+        if (len(new_entries) != len(new_rows) or len(old_entries) != len(self._all_rows)
+                or self.table.rowCount() != len(self._all_rows) or set(positions) != set(old_entries)):
+            self.load_rows_with_colors(new_rows, new_colors)
+            return len(new_rows)
+
+        changed = 0
+        sorting_prev = self.table.isSortingEnabled()
+        self.table.setSortingEnabled(False)
+        self.table.setUpdatesEnabled(False)
+        try:
+            for key, entry in new_entries.items():
+                if key in old_entries and old_entries[key] != entry:
+                    self._set_row_items(positions[key], *entry)
+                    changed += 1
+            for r_index in sorted((positions[key] for key in old_entries if key not in new_entries), reverse=True):
+                self.table.removeRow(r_index)
+                changed += 1
+            for key, (row, color) in new_entries.items():
+                if key not in old_entries:
+                    r_index = self.table.rowCount()
+                    self.table.insertRow(r_index)
+                    self._set_row_items(r_index, row, color)
+                    changed += 1
+        finally:
+            self.table.setUpdatesEnabled(True)
+            self.table.setSortingEnabled(sorting_prev)
+            if sorting_prev and changed:
+                h_header = self.table.horizontalHeader()
+                if h_header:
+                    self.table.sortItems(h_header.sortIndicatorSection(), h_header.sortIndicatorOrder())
+
+        self._all_rows = new_rows
+        self._row_colors = new_colors
+        self._update_info_label(len(self._all_rows))
+        if changed:
+            QTimer.singleShot(10, self._adjust_column_widths)
+        return changed
+
+    def _make_item(self, val: str, row_color: Optional[QColor] = None) -> QTableWidgetItem:
+        # Placeholder visible si valeur vide
+        display = val if (isinstance(val, str) and val.strip()) else '—'
+        item = QTableWidgetItem(display)
+        # Conserver valeur brute pour tri (si vide => '')
+        item.setData(Qt.ItemDataRole.UserRole, val)
+        if row_color:
+            item.setBackground(row_color)
+        return item
+
+    def _set_row_items(self, r_index: int, row: Sequence[str], color: Optional[str] = None):
+        row_color = QColor(color) if color else None
+        for c in range(self.table.columnCount()):
+            self.table.setItem(r_index, c, self._make_item(row[c] if c < len(row) else '', row_color))
+
     def _render_rows(self, rows: Sequence[Sequence[str]]):
         """Render a list of rows into the table safely.
         On désactive temporairement le tri et les updates pour éviter affichage vide.
@@ -149,12 +303,7 @@ class DataGrid(QWidget):
             self.table.setRowCount(len(rows))
             for r_index, row in enumerate(rows):
                 for c, val in enumerate(row):
-                    # Placeholder visible si valeur vide
-                    display = val if (isinstance(val, str) and val.strip()) else '—'
-                    item = QTableWidgetItem(display)
-                    # Conserver valeur brute pour tri (si vide => '')
-                    item.setData(Qt.ItemDataRole.UserRole, val)
-                    self.table.setItem(r_index, c, item)
+                    self.table.setItem(r_index, c, self._make_item(val))
         finally:
             self.table.setUpdatesEnabled(True)
             self.table.setSortingEnabled(sorting_prev)
@@ -189,17 +338,7 @@ class DataGrid(QWidget):
                     row_color = QColor(row_colors[r_index])
                 
                 for c, val in enumerate(row):
-                    # Placeholder visible si valeur vide
-                    display = val if (isinstance(val, str) and val.strip()) else '—'
-                    item = QTableWidgetItem(display)
-                    # Conserver valeur brute pour tri (si vide => '')
-                    item.setData(Qt.ItemDataRole.UserRole, val)
-                    
-                    # Apply row color if specified
-                    if row_color:
-                        item.setBackground(row_color)
-                    
-                    self.table.setItem(r_index, c, item)
+                    self.table.setItem(r_index, c, self._make_item(val, row_color))
         finally:
             self.table.setUpdatesEnabled(True)
             self.table.setSortingEnabled(sorting_prev)
@@ -216,37 +355,13 @@ class DataGrid(QWidget):
             v_header.setDefaultSectionSize(35)
 
     def filter(self, text: str):
-        if not text:
-            self._render_rows(self._all_rows)
-            self._update_info_label(len(self._all_rows))
-            return
-        
-        text_lower = text.lower()
-        filtered = [row for row in self._all_rows if any(text_lower in str(cell).lower() for cell in row)]
-        self._render_rows(filtered)
-        self._update_info_label(len(filtered), len(self._all_rows))
+        self._filter_rows([text] if text else [])
 
     def filter_multi(self, texts: list[str]):
         """Filter rows if ANY of the provided texts matches any cell (OR semantics).
         Empty or whitespace-only texts are ignored. If no valid texts, shows all rows.
         """
-        tokens = [t.strip().lower() for t in texts if t and t.strip()]
-        if not tokens:
-            self._render_rows(self._all_rows)
-            self._update_info_label(len(self._all_rows))
-            return
-
-        def row_matches(row: list[str]) -> bool:
-            r = [str(cell).lower() for cell in row]
-            for tok in tokens:
-                for cell in r:
-                    if tok in cell:
-                        return True
-            return False
-
-        filtered = [row for row in self._all_rows if row_matches(row)]
-        self._render_rows(filtered)
-        self._update_info_label(len(filtered), len(self._all_rows))
+        self._filter_rows([t for t in texts if t and t.strip()])
 
     def _update_info_label(self, shown_count: int, total_count: int | None = None):
         if total_count is None:
@@ -313,18 +428,22 @@ class DataGrid(QWidget):
 
     def get_selected_row_data(self) -> list[str] | None:
         """Get data from the currently selected row"""
-        current_row = self.table.currentRow()
+        current_row = self.table.currentIndex().row() if self.is_virtual() else self.table.currentRow()
         if current_row < 0:
             return None
-        
-        row_data = []
-        for col in range(self.table.columnCount()):
-            item = self.table.item(current_row, col)
-            if item:
-                row_data.append(item.text())
-            else:
-                row_data.append('')
-        return row_data
+        return self.get_row_data(current_row)
+
+    def select_row_by_id(self, entity_id: int) -> bool:
+        """Select and scroll to the displayed row whose ID column holds entity_id
+        (grouped rows list several comma separated IDs). False when no row shows it."""
+        key = str(entity_id)
+        model = self.table.model()
+        for row in range(model.rowCount()):
+            if key in str(model.index(row, 0).data() or '').split(','):
+                self.table.selectRow(row)
+                self.table.scrollTo(model.index(row, 0))
+                return True
+        return False
 
     def add_context_action(self, action_name: str, label: str, icon: str = ""):
         """Add a context menu action"""
@@ -335,18 +454,17 @@ class DataGrid(QWidget):
         if not self._context_actions:
             return
             
-        item = self.table.itemAt(position)
-        if not item:
-            return
-            
-        row = item.row()
-        row_data = []
-        for col in range(self.table.columnCount()):
-            cell_item = self.table.item(row, col)
-            if cell_item:
-                row_data.append(cell_item.text())
-            else:
-                row_data.append('')
+        if self.is_virtual():
+            index = self.table.indexAt(position)
+            if not index.isValid():
+                return
+            row = index.row()
+        else:
+            item = self.table.itemAt(position)
+            if not item:
+                return
+            row = item.row()
+        row_data = self.get_row_data(row)
         
         menu = QMenu(self)
         
@@ -368,6 +486,8 @@ class DataGrid(QWidget):
 
     def get_selected_row_indices(self) -> list[int]:
         """Get list of selected row indices"""
+        if self.is_virtual():
+            return sorted({index.row() for index in self.table.selectionModel().selectedRows()})
         selected_rows = []
         for item in self.table.selectedItems():
             row = item.row()
@@ -377,6 +497,8 @@ class DataGrid(QWidget):
 
     def get_row_data(self, row: int) -> list[str]:
         """Get data for a specific row"""
+        if self.is_virtual():
+            return [self._proxy.index(row, col).data() or '' for col in range(self._proxy.columnCount())]
         row_data = []
         for col in range(self.table.columnCount()):
             cell_item = self.table.item(row, col)
@@ -0,0 +1,291 @@
+"""
+Table model serving DataGrid rows on demand.
+
+Rows are kept as plain lists of strings; cells are only materialised by the
+view for the visible viewport, and row colors are served through
+BackgroundRole instead of one QTableWidgetItem per cell.
+"""
+from __future__ import annotations
+from typing import Any, Optional, Sequence
+from PyQt6.QtCore import Qt, QAbstractTableModel, QAbstractProxyModel, QModelIndex
+from PyQt6.QtGui import QColor
+
+# Placeholder shown for empty cells (same as the QTableWidget renderer)
+EMPTY_PLACEHOLDER = '—'
+
+
+class RowTableModel(QAbstractTableModel):
+    """Read-only model over a list of string rows with optional per-row colors."""
+
+    def __init__(self, headers: Sequence[str], parent=None):
+        super().__init__(parent)
+        self._headers = list(headers)
+        self._rows: list[list[str]] = []
+        self._colors: list[Optional[str]] = []
+        self._brushes: dict[str, QColor] = {}
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            val = row[index.column()] if index.column() < len(row) else ''
+            return val if val.strip() else EMPTY_PLACEHOLDER
+        if role == Qt.ItemDataRole.UserRole:
+            # Raw value, '' for empty cells
+            return row[index.column()] if index.column() < len(row) else ''
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return self._brush(self._colors[index.row()])
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal and section < len(self._headers):
+            return self._headers[section]
+        return None
+
+    def _brush(self, color: Optional[str]) -> Optional[QColor]:
+        if not color:
+            return None
+        brush = self._brushes.get(color)
+        if brush is None:
+            brush = self._brushes[color] = QColor(color)
+        return brush
+
+    def row(self, source_row: int) -> list[str]:
+        return self._rows[source_row]
+
+    def set_rows(self, rows: list[list[str]], colors: list[Optional[str]]) -> None:
+        """Replace the whole dataset (rows already normalised to strings)."""
+        self.beginResetModel()
+        self._rows = rows
+        self._colors = colors
+        self.endResetModel()
+
+    def update_rows(self, rows: list[list[str]], colors: list[Optional[str]]) -> int:
+        """Diff a new dataset against the current one, keyed on the first column.
+        The new rows are adopted as a single layout change (instead of a reset) so
+        the proxy can keep the view's selection. Falls back to a reset when keys
+        are not unique. Returns the number of rows inserted, updated or removed.
+        """
+        old_keys = [row[0] if row else None for row in self._rows]
+        new_entries = {row[0]: (row, color) for row, color in zip(rows, colors) if row}
+        if len(new_entries) != len(rows) or None in old_keys or len(set(old_keys)) != len(old_keys):
+            self.set_rows(rows, colors)
+            return len(rows)
+
+        known = set(old_keys)
+        changed = sum(1 for key in old_keys if key not in new_entries)
+        changed += sum(1 for key in new_entries if key not in known)
+        changed += sum(1 for r_index, key in enumerate(old_keys)
+                       if key in new_entries and (self._rows[r_index], self._colors[r_index]) != new_entries[key])
+        if not changed and old_keys == list(new_entries):
+            return 0
+        self.layoutAboutToBeChanged.emit()
+        self._rows = rows
+        self._colors = colors
+        self.layoutChanged.emit()
+        return changed
+
+    def key(self, source_row: int) -> Optional[str]:
+        row = self._rows[source_row]
+        return row[0] if row else None
+
+    def sort_key(self, column: int):
+        """Key function sorting source rows on the displayed text of a column."""
+        rows = self._rows
+
+        def key(source_row: int) -> str:
+            row = rows[source_row]
+            val = row[column] if column < len(row) else ''
+            return val if val.strip() else EMPTY_PLACEHOLDER
+        return key
+
+
+class RowFilterProxyModel(QAbstractProxyModel):
+    """Sort/filter proxy over a RowTableModel.
+
+    The row order is computed in Python (one sorted() call, one mask pass) rather
+    than through QSortFilterProxyModel, whose lessThan/filterAcceptsRow would
+    call back into Python O(n log n) times per sort or filter.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._visible: Optional[Sequence[int]] = None
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        # Every source row in sort order and its rank (kept across filter changes),
+        # the visible rows in display order, and the reverse mapping (built on demand)
+        self._sorted: Optional[list[int]] = None
+        self._rank: Optional[list[int]] = None
+        self._order: list[int] = []
+        self._positions: Optional[dict[int, int]] = None
+        # Persistent indexes being remapped: (index, source row, key, column)
+        self._pending: list[tuple[QModelIndex, int, Optional[str], int]] = []
+
+    def setSourceModel(self, source: RowTableModel) -> None:
+        self.beginResetModel()
+        super().setSourceModel(source)
+        self._sorted = None
+        source.modelAboutToBeReset.connect(self.beginResetModel)
+        source.modelReset.connect(self._on_source_reset)
+        source.layoutAboutToBeChanged.connect(self._on_source_layout_about_to_change)
+        source.layoutChanged.connect(self._on_source_layout_changed)
+        source.dataChanged.connect(self._on_source_data_changed)
+        self._rebuild()
+        self.endResetModel()
+
+    # --- QAbstractItemModel / QAbstractProxyModel API ---
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        source = self.sourceModel()
+        return 0 if parent.isValid() or source is None else source.columnCount()
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        if parent.isValid() or not (0 <= row < len(self._order)) or not (0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, child: Optional[QModelIndex] = None):
+        # Flat table; without argument this is QObject.parent()
+        if child is None:
+            return super().parent()
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index: QModelIndex) -> QModelIndex:
+        if not proxy_index.isValid() or proxy_index.row() >= len(self._order):
+            return QModelIndex()
+        return self.sourceModel().index(self._order[proxy_index.row()], proxy_index.column())
+
+    def mapFromSource(self, source_index: QModelIndex) -> QModelIndex:
+        if not source_index.isValid():
+            return QModelIndex()
+        row = self._position(source_index.row())
+        return QModelIndex() if row is None else self.createIndex(row, source_index.column())
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        source = self.sourceModel()
+        if orientation == Qt.Orientation.Horizontal and source is not None:
+            return source.headerData(section, orientation, role)
+        return None
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:
+        self._sort_column = column
+        self._sort_order = order
+        self._sorted = None
+        self._relayout()
+
+    # --- Filtering ---
+    def set_visible_rows(self, source_rows: Optional[Sequence[int]], relayout: bool = True) -> None:
+        """Show only the given source rows (None shows every row).
+        relayout=False only records the rows, for a source change about to follow.
+        """
+        self._visible = source_rows
+        if relayout:
+            self._relayout()
+
+    # --- Internals ---
+    def _position(self, source_row: int) -> Optional[int]:
+        if self._positions is None:
+            self._positions = {src: row for row, src in enumerate(self._order)}
+        return self._positions.get(source_row)
+
+    def _rebuild(self) -> None:
+        if self._sorted is None:
+            source = self.sourceModel()
+            order = list(range(source.rowCount() if source is not None else 0))
+            if source is not None and 0 <= self._sort_column < source.columnCount():
+                order.sort(key=source.sort_key(self._sort_column),
+                           reverse=self._sort_order == Qt.SortOrder.DescendingOrder)
+            self._sorted = order
+            self._rank = None
+        visible = self._visible
+        if visible is None:
+            self._order = self._sorted
+        elif len(visible) * 8 < len(self._sorted):
+            # Few matches: order them by rank instead of scanning every row
+            if self._rank is None:
+                self._rank = [0] * len(self._sorted)
+                for position, src in enumerate(self._sorted):
+                    self._rank[src] = position
+            rank = self._rank
+            self._order = sorted(visible, key=rank.__getitem__)
+        else:
+            flags = [False] * len(self._sorted)
+            for r in visible:
+                flags[r] = True
+            self._order = [r for r in self._sorted if flags[r]]
+        self._positions = None
+
+    def _snapshot_persistent(self) -> None:
+        """Remember persistent indexes (selection, current row) by source row and key."""
+        source = self.sourceModel()
+        self._pending = []
+        for index in self.persistentIndexList():
+            if index.isValid() and index.row() < len(self._order):
+                src = self._order[index.row()]
+                self._pending.append((index, src, source.key(src), index.column()))
+
+    def _restore_persistent(self, source_changed: bool = False) -> None:
+        """Point the remembered indexes at their rows' new positions (found by key
+        when the source rows themselves changed)."""
+        if not self._pending:
+            return
+        source = self.sourceModel()
+        by_key = {source.key(r): r for r in range(source.rowCount())} if source_changed else None
+        old, new = [], []
+        for index, src, key, column in self._pending:
+            if by_key is not None:
+                src = by_key.get(key)
+            row = self._find_position(src, len(self._pending)) if src is not None else None
+            old.append(index)
+            new.append(self.createIndex(row, column) if row is not None else QModelIndex())
+        self._pending = []
+        self.changePersistentIndexList(old, new)
+
+    def _find_position(self, source_row: int, lookups: int) -> Optional[int]:
+        # A few lookups (current row, small selection) are cheaper as linear scans than a full reverse map
+        if lookups > 16 or self._positions is not None:
+            return self._position(source_row)
+        try:
+            return self._order.index(source_row)
+        except ValueError:
+            return None
+
+    def _relayout(self) -> None:
+        self.layoutAboutToBeChanged.emit()
+        self._snapshot_persistent()
+        self._rebuild()
+        self._restore_persistent()
+        self.layoutChanged.emit()
+
+    def _on_source_reset(self) -> None:
+        self._sorted = None
+        self._rebuild()
+        self.endResetModel()
+
+    def _on_source_layout_about_to_change(self, *args) -> None:
+        self.layoutAboutToBeChanged.emit()
+        self._snapshot_persistent()
+
+    def _on_source_layout_changed(self, *args) -> None:
+        self._sorted = None
+        self._rebuild()
+        self._restore_persistent(source_changed=True)
+        self.layoutChanged.emit()
+
+    def _on_source_data_changed(self, top_left: QModelIndex, bottom_right: QModelIndex, roles=None) -> None:
+        # Row contents changed: positions may move under the current sort/filter
+        self._sorted = None
+        self._relayout()
+
+
+__all__ = ['RowTableModel', 'RowFilterProxyModel', 'EMPTY_PLACEHOLDER']
@@ -0,0 +1,233 @@
+"""
+Query and latency instrumentation.
+
+SQLAlchemy cursor events time every statement run by any engine. Named spans
+mark the UI actions (grid refresh, dashboard refresh, PDF exports, saves):
+a span records its duration and the statements executed inside it on its
+thread (spans nest; a statement counts for every enclosing span).
+
+Statements slower than settings.slow_query_ms are written to the slow-query
+log (logs/slow_queries.log, see config.logging_config). report() summarises
+spans and statements and flags N+1 hotspots: a statement executed at least
+N_PLUS_ONE_THRESHOLD times within a single run of a span.
+
+Usage:
+    with span('refresh_all'):
+        ...
+
+    @timed('pdf.devis')
+    def fill_devis_template(...): ...
+"""
+from __future__ import annotations
+import functools
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, TypeVar
+from contextlib import contextmanager
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from config.settings import settings
+
+# Executions of one statement within one span run from which it is reported as N+1
+N_PLUS_ONE_THRESHOLD = 10
+# Statements kept in the report (slowest total time first)
+REPORT_STATEMENTS = 50
+# Statement text length kept in logs and reports
+STATEMENT_PREVIEW = 500
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+@dataclass(slots=True)
+class SpanStats:
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    queries: int = 0
+    max_queries: int = 0
+    query_ms: float = 0.0
+    # statement -> highest number of executions in one run
+    repeated: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class StatementStats:
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+@dataclass(slots=True)
+class _ActiveSpan:
+    name: str
+    start: float
+    queries: int = 0
+    query_ms: float = 0.0
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+_local = threading.local()
+_lock = threading.Lock()
+_spans: Dict[str, SpanStats] = {}
+_statements: Dict[str, StatementStats] = {}
+_installed = False
+
+
+def _stack() -> List[_ActiveSpan]:
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _preview(statement: str) -> str:
+    return re.sub(r'\s+', ' ', statement).strip()[:STATEMENT_PREVIEW]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start')
+    if not starts:
+        return
+    elapsed = (time.perf_counter() - starts.pop()) * 1000
+    stack = _stack()
+    for active in stack:
+        active.queries += 1
+        active.query_ms += elapsed
+        active.counts[statement] = active.counts.get(statement, 0) + 1
+    with _lock:
+        stats = _statements.get(statement)
+        if stats is None:
+            stats = _statements[statement] = StatementStats()
+        stats.count += 1
+        stats.total_ms += elapsed
+        stats.max_ms = max(stats.max_ms, elapsed)
+    if elapsed >= settings.slow_query_ms:
+        action = stack[-1].name if stack else '-'
+        logger.bind(slow_query=True).warning("Requête lente ({:.0f} ms) [{}]: {}", elapsed, action, _preview(statement))
+
+
+def _handle_error(exception_context):
+    # The failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_start'):
+        conn.info['query_start'].pop()
+
+
+def install() -> None:
+    """Time the statements of every engine (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _handle_error)
+    _installed = True
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Record the duration and the statements of a named action."""
+    active = _ActiveSpan(name, time.perf_counter())
+    stack = _stack()
+    stack.append(active)
+    try:
+        yield
+    finally:
+        stack.remove(active)
+        elapsed = (time.perf_counter() - active.start) * 1000
+        with _lock:
+            stats = _spans.get(name)
+            if stats is None:
+                stats = _spans[name] = SpanStats()
+            stats.calls += 1
+            stats.total_ms += elapsed
+            stats.max_ms = max(stats.max_ms, elapsed)
+            stats.queries += active.queries
+            stats.max_queries = max(stats.max_queries, active.queries)
+            stats.query_ms += active.query_ms
+            for statement, count in active.counts.items():
+                if count > stats.repeated.get(statement, 0):
+                    stats.repeated[statement] = count
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator running the function inside span(name)."""
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def report() -> Dict[str, Any]:
+    """Summary of the recorded spans and statements, with N+1 hotspots."""
+    with _lock:
+        spans = {name: (stats.calls, stats.total_ms, stats.max_ms, stats.queries, stats.max_queries,
+                        stats.query_ms, dict(stats.repeated)) for name, stats in _spans.items()}
+        statements = [(statement, stats.count, stats.total_ms, stats.max_ms) for statement, stats in _statements.items()]
+
+    span_rows = {}
+    hotspots = []
+    for name, (calls, total_ms, max_ms, queries, max_queries, query_ms, repeated) in sorted(
+            spans.items(), key=lambda item: item[1][1], reverse=True):
+        span_rows[name] = {
+            'calls': calls,
+            'total_ms': round(total_ms, 2),
+            'avg_ms': round(total_ms / calls, 2),
+            'max_ms': round(max_ms, 2),
+            'queries': queries,
+            'avg_queries': round(queries / calls, 1),
+            'max_queries': max_queries,
+            'query_ms': round(query_ms, 2),
+        }
+        for statement, count in repeated.items():
+            if count >= N_PLUS_ONE_THRESHOLD:
+                hotspots.append({'span': name, 'executions': count, 'statement': _preview(statement)})
+    hotspots.sort(key=lambda row: row['executions'], reverse=True)
+
+    statements.sort(key=lambda row: row[2], reverse=True)
+    statement_rows = [{
+        'statement': _preview(statement),
+        'count': count,
+        'total_ms': round(total_ms, 2),
+        'avg_ms': round(total_ms / count, 3),
+        'max_ms': round(max_ms, 2),
+    } for statement, count, total_ms, max_ms in statements[:REPORT_STATEMENTS]]
+
+    return {
+        'slow_query_ms': settings.slow_query_ms,
+        'n_plus_one_threshold': N_PLUS_ONE_THRESHOLD,
+        'spans': span_rows,
+        'n_plus_one': hotspots,
+        'statements': statement_rows,
+    }
+
+
+def export_report(path: Path | str) -> Path:
+    """Write report() as JSON to path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report(), indent=2, ensure_ascii=False), encoding='utf-8')
+    return path
+
+
+def reset() -> None:
+    """Forget every recorded span and statement."""
+    with _lock:
+        _spans.clear()
+        _statements.clear()
+
+
+__all__ = ['install', 'span', 'timed', 'report', 'export_report', 'reset', 'SpanStats', 'StatementStats',
+           'N_PLUS_ONE_THRESHOLD']
@@ -10,11 +10,47 @@ Examples: DV001, BC001, CM001, FP001, MP001
 """
 
 from __future__ import annotations
+import re
 import secrets
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
-from config.database import SessionLocal
-from sqlalchemy import text
+from typing import Iterator, Optional
+from loguru import logger
+from config.database import SessionLocal, get_engine
+from models.sequences import ReferenceSequence
+from sqlalchemy import Connection, func, insert, inspect, text, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError, OperationalError
+from utils.exceptions import AppError
+
+
+@dataclass(slots=True)
+class ReferenceBlock:
+    """Contiguous block of reserved references, handed out in order by ``next()``."""
+    prefix: str
+    first: int
+    count: int
+    used: int = 0
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        if self.used >= self.count:
+            raise StopIteration
+        self.used += 1
+        return ReferenceGenerator.format_reference(self.prefix, self.first + self.used - 1)
+
+    def __len__(self) -> int:
+        return self.count - self.used
+
+    @property
+    def references(self) -> list[str]:
+        """Every reference of the block, used or not."""
+        return [ReferenceGenerator.format_reference(self.prefix, self.first + i) for i in range(self.count)]
 
 
 class ReferenceGenerator:
@@ -66,75 +102,149 @@ class ReferenceGenerator:
             generate('quotation') -> 'DV001'
             generate('supplier_order') -> 'BC001'
         """
-        if document_type not in cls.PREFIXES:
-            raise ValueError(f"Unknown document type: {document_type}. Valid types: {list(cls.PREFIXES.keys())}")
-        
-        prefix = cls.PREFIXES[document_type]
+        prefix = cls._prefix_for(document_type)
         
         # Get sequential number for this document type
         sequence_num = cls._get_next_sequence_number(prefix)
         
         # Build the short reference: PP + NNN
-        reference = f"{prefix}{sequence_num:03d}"
-        
-        return reference
+        return cls.format_reference(prefix, sequence_num)
+
+    @classmethod
+    def reserve(cls, document_type: str, n: int) -> ReferenceBlock:
+        """
+        Allocate ``n`` consecutive references in one database round-trip.
+
+        The numbers are taken atomically from the sequence and handed out from
+        memory, e.g. for multi-copy fiches or pallet labels. Numbers of a block
+        that are not used are not returned to the sequence.
+
+        Example:
+            block = reserve('finished_product', 3)
+            next(block), next(block) -> 'FP012', 'FP013'
+        """
+        if n < 1:
+            raise ValueError(f"Cannot reserve {n} references")
+        prefix = cls._prefix_for(document_type)
+        last = cls._allocate(prefix, n)
+        return ReferenceBlock(prefix, last - n + 1, n)
+
+    @staticmethod
+    def format_reference(prefix: str, sequence_num: int) -> str:
+        return f"{prefix}{sequence_num:03d}"
+
+    @classmethod
+    def _prefix_for(cls, document_type: str) -> str:
+        if document_type not in cls.PREFIXES:
+            raise ValueError(f"Unknown document type: {document_type}. Valid types: {list(cls.PREFIXES.keys())}")
+        return cls.PREFIXES[document_type]
     
+    # Tables/columns that may already hold short references, used to seed a new sequence
+    REFERENCE_COLUMNS = {
+        'quotations': ['reference'],
+        'supplier_orders': ['reference', 'bon_commande_ref'],
+        'client_orders': ['reference'],
+        'receptions': ['reference'],
+        'returns': ['reference'],
+        'deliveries': ['reference'],
+        'invoices': ['reference'],
+        'production_batches': ['batch_code'],
+        'stock_movements': ['reference'],
+    }
+
+    # Attempts before giving up on a locked database / deadlocked transaction
+    ALLOCATE_ATTEMPTS = 5
+    _table_ready = False
+    _table_lock = threading.Lock()
+
     @classmethod
     def _get_next_sequence_number(cls, prefix: str) -> int:
         """Get the next sequence number for a given prefix (short format)."""
-        session = SessionLocal()
-        try:
-            # Check all tables that might contain references with this prefix
-            tables_to_check = [
-                'quotations',
-                'supplier_orders', 
-                'client_orders',
-                'receptions',
-                'returns',
-                'deliveries',
-                'invoices',
-                'production_batches',
-                'stock_movements'
-            ]
-            
-            max_sequence = 0
-            pattern = f"{prefix}%"
-            
-            for table in tables_to_check:
+        return cls._allocate(prefix, 1)
+
+    @classmethod
+    def _allocate(cls, prefix: str, count: int) -> int:
+        """Atomically advance the sequence of ``prefix`` by ``count``.
+
+        Returns the last number of the allocated block (block = last - count + 1 .. last).
+        Runs in its own short transaction on a dedicated connection, independent
+        of any ORM session in progress, so the number is never handed out twice.
+        """
+        cls._ensure_table()
+        last_error: Exception | None = None
+        for attempt in range(cls.ALLOCATE_ATTEMPTS):
+            try:
+                with get_engine().begin() as conn:
+                    value = cls._increment(conn, prefix, count)
+                    if value is None:
+                        # First use of this prefix: continue after the references already stored
+                        cls._seed(conn, prefix, cls._scan_max_sequence(conn, prefix))
+                        value = cls._increment(conn, prefix, count)
+                    return int(value)
+            except OperationalError as exc:
+                # Locked (SQLite) or deadlocked (MySQL) transaction: retry shortly
+                last_error = exc
+                time.sleep(0.05 * (attempt + 1))
+        logger.error("Reference sequence allocation failed for {}: {}", prefix, last_error)
+        raise AppError(f"Impossible de générer une référence {prefix}: {last_error}")
+
+    @classmethod
+    def _ensure_table(cls) -> None:
+        """Create reference_sequences when migrations have not been applied (once per process)."""
+        with cls._table_lock:
+            if not cls._table_ready:
+                ReferenceSequence.__table__.create(bind=get_engine(), checkfirst=True)
+                cls._table_ready = True
+
+    @staticmethod
+    def _increment(conn: Connection, prefix: str, count: int) -> Optional[int]:
+        """Increment an existing sequence in a single statement; None when the prefix has no row."""
+        table = ReferenceSequence.__table__
+        stmt = update(table).where(table.c.prefix == prefix)
+        if conn.dialect.name in ('mysql', 'mariadb'):
+            # LAST_INSERT_ID(expr) reports the new value back with the UPDATE's OK packet
+            result = conn.execute(stmt.values(last_value=func.last_insert_id(table.c.last_value + count)))
+            return result.lastrowid if result.rowcount else None
+        # SQLite >= 3.35, PostgreSQL: UPDATE ... RETURNING
+        return conn.execute(stmt.values(last_value=table.c.last_value + count).returning(table.c.last_value)).scalar_one_or_none()
+
+    @staticmethod
+    def _seed(conn: Connection, prefix: str, value: int) -> None:
+        """Create the sequence row unless a concurrent transaction just did."""
+        table = ReferenceSequence.__table__
+        dialect = conn.dialect.name
+        if dialect in ('mysql', 'mariadb'):
+            conn.execute(mysql_insert(table).prefix_with('IGNORE').values(prefix=prefix, last_value=value))
+        elif dialect == 'sqlite':
+            conn.execute(sqlite_insert(table).values(prefix=prefix, last_value=value).on_conflict_do_nothing())
+        else:
+            with conn.begin_nested():
                 try:
-                    # Try different possible reference column names
-                    for ref_col in ['reference', 'bon_commande_ref', 'batch_code']:
-                        try:
-                            result = session.execute(
-                                text(f"""
-                                    SELECT COALESCE(MAX(
-                                        CAST(SUBSTRING({ref_col}, 3, 3) AS INTEGER)
-                                    ), 0) as max_seq
-                                    FROM {table} 
-                                    WHERE {ref_col} LIKE :pattern
-                                    AND LENGTH({ref_col}) = 5
-                                    AND {ref_col} REGEXP '^[A-Z]{{2}}[0-9]{{3}}$'
-                                """),
-                                {
-                                    "pattern": pattern
-                                }
-                            ).scalar()
-                            
-                            if result and result > max_sequence:
-                                max_sequence = result
-                            break  # If successful, don't try other column names for this table
-                        except Exception:
-                            continue  # Try next column name
-                except Exception:
-                    continue  # Skip this table if it doesn't exist or has issues
-            
-            return max_sequence + 1
-            
-        except Exception:
-            # Fallback: use random suffix if database query fails
-            return int(secrets.token_hex(1), 16) % 999 + 1
-        finally:
-            session.close()
+                    conn.execute(insert(table).values(prefix=prefix, last_value=value))
+                except IntegrityError:
+                    pass
+
+    @classmethod
+    def _scan_max_sequence(cls, conn: Connection, prefix: str) -> int:
+        """Highest PPNNN number already stored for ``prefix`` across the reference columns."""
+        inspector = inspect(conn)
+        tables = set(inspector.get_table_names())
+        pattern = re.compile(rf'^{re.escape(prefix)}(\d{{3,}})$')
+        max_sequence = 0
+        for table, columns in cls.REFERENCE_COLUMNS.items():
+            if table not in tables:
+                continue
+            present = {c['name'] for c in inspector.get_columns(table)}
+            for column in columns:
+                if column not in present:
+                    continue
+                rows = conn.execute(text(f"SELECT {column} FROM {table} WHERE {column} LIKE :pattern"),
+                                    {"pattern": f"{prefix}%"})
+                for (value,) in rows:
+                    match = pattern.match(str(value).strip())
+                    if match:
+                        max_sequence = max(max_sequence, int(match.group(1)))
+        return max_sequence
     
     @classmethod
     def generate_legacy_bc_format(cls) -> str:
@@ -300,6 +410,7 @@ def generate_reference(prefix: str) -> str:
 
 __all__ = [
     'ReferenceGenerator',
+    'ReferenceBlock',
     'generate_quotation_reference',
     'generate_supplier_order_reference', 
     'generate_client_order_reference',
@@ -0,0 +1,73 @@
+"""
+In-memory substring search over grid rows.
+
+The lowercase text of every row is computed once per dataset, so a keystroke
+only runs ``token in haystack`` over precomputed strings instead of
+stringifying and lowercasing every cell again. Typing forward narrows the
+previous result instead of rescanning every row.
+"""
+from __future__ import annotations
+from typing import Iterable, Optional, Sequence
+
+# Joins the cells of a row; cannot be typed, so a token never matches across two cells
+CELL_SEPARATOR = '\x1f'
+
+
+def normalize_tokens(texts: Iterable[str]) -> list[str]:
+    """Strip/lowercase tokens and drop the redundant ones for OR matching.
+    A token containing another token can only match rows the shorter one
+    already matches (e.g. '100x200mm' next to '100x200'), so it is dropped.
+    """
+    tokens = sorted({t.strip().lower() for t in texts if t and t.strip()}, key=len)
+    kept: list[str] = []
+    for tok in tokens:
+        if not any(k in tok for k in kept):
+            kept.append(tok)
+    return kept
+
+
+class RowSearchIndex:
+    """Answers "which rows contain any of these tokens" (OR semantics, case-insensitive)."""
+
+    def __init__(self, rows: Sequence[Sequence[str]]):
+        # Dataset the index was built from (lets callers detect a reload)
+        self.rows = rows
+        self._haystacks = [CELL_SEPARATOR.join(row).lower() for row in rows]
+        # Previous query, reused to narrow the scan while the user keeps typing
+        self._last_tokens: list[str] = []
+        self._last_matches: Optional[list[int]] = None
+
+    def __len__(self) -> int:
+        return len(self._haystacks)
+
+    def matching_rows(self, texts: Iterable[str]) -> Optional[list[int]]:
+        """Indices of matching rows in dataset order, or None when there is no token (all rows)."""
+        tokens = normalize_tokens(texts)
+        if not tokens:
+            return None
+        haystacks = self._haystacks
+        candidates: Iterable[int] = range(len(haystacks))
+        # Every new token extends an old one: the result is a subset of the previous matches
+        if self._last_matches is not None and all(any(old in tok for old in self._last_tokens) for tok in tokens):
+            candidates = self._last_matches
+        remaining = list(candidates)
+        matched: list[int] = []
+        for tok in tokens:
+            if not remaining:
+                break
+            hits = [i for i in remaining if tok in haystacks[i]]
+            if hits:
+                matched.extend(hits)
+                if len(hits) == len(remaining):
+                    remaining = []
+                else:
+                    hit_set = set(hits)
+                    remaining = [i for i in remaining if i not in hit_set]
+        if len(tokens) > 1:
+            matched.sort()
+        self._last_tokens = tokens
+        self._last_matches = matched
+        return matched
+
+
+__all__ = ['RowSearchIndex', 'normalize_tokens', 'CELL_SEPARATOR']